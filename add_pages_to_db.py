@@ -3,19 +3,24 @@ from src.crawlers import CrawlerCreator
 from src.utils import clear_redis
 
 def main(config_path, *args, **kwargs):
-    clear_redis()
     crawler = CrawlerCreator(config_path, *args, **kwargs)
+    # A resumed crawl keeps its seen URLs; only a fresh crawl starts with an empty filter
+    if not crawler.resuming:
+        clear_redis()
     crawler.start()
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Add pages to database with optional page count limit')
     parser.add_argument('--config', type=str, default='config.json', help='Path to config file')
     parser.add_argument('--pagecount', type=int, help='Maximum number of pages to crawl')
+    parser.add_argument('--resume', action='store_true', help='Continue the interrupted crawl saved in JOBDIR')
     
     args = parser.parse_args()
     
     kwargs = {}
     if args.pagecount:
         kwargs['pagecount'] = args.pagecount
+    if args.resume:
+        kwargs['resume'] = True
     
     main(args.config, **kwargs)
\ No newline at end of file
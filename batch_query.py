@@ -0,0 +1,53 @@
+"""
+Answer a file of questions in batch mode, e.g. for regression runs.
+
+Input is JSONL with one {"question": "..."} (optionally "id") per line.
+Output is JSONL in the ResultFormatter schema, one result per question.
+"""
+import argparse
+import json
+from src.llm.enhanced_search import build_rag_components
+from src.llm.batch_search import read_questions, run_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run many questions through the RAG system at once')
+    parser.add_argument('--input', type=str, required=True, help='JSONL file with questions')
+    parser.add_argument('--output', type=str, default='output/batch_results.jsonl', help='JSONL file for results')
+    parser.add_argument('--config', type=str, default='config_llm.json', help='Path to LLM config file')
+    parser.add_argument('--batch-size', type=int, default=64, help='Questions embedded and searched per batch')
+    parser.add_argument('--workers', type=int, help='Concurrent LLM generations (default: llm.max_concurrency)')
+    args = parser.parse_args()
+    
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    
+    components = build_rag_components(
+        collection_name=config['vector_store']['collection_name'],
+        qdrant_url=config['vector_store']['url'],
+        embedding_model=config['embedding']['model_name'],
+        llm_model=config['llm']['model'],
+        device=config['embedding']['device'],
+        retrieval_config=config.get('retrieval'),
+        llm_config=config.get('llm'),
+        vector_store_config=config.get('vector_store')
+    )
+    
+    print(f"🚀 Running batch queries from {args.input}...")
+    stats = run_batch(
+        components,
+        read_questions(args.input),
+        args.output,
+        batch_size=args.batch_size,
+        workers=args.workers
+    )
+    
+    print(f"\n✅ Answered {stats['questions']} questions in {stats['elapsed']:.1f}s "
+          f"({stats['failed']} failed)")
+    print(f"⚡ Throughput: {stats['questions_per_minute']:.1f} questions/minute "
+          f"(workers={stats['workers']}, batch_size={stats['batch_size']})")
+    print(f"💾 Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
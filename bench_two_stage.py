@@ -0,0 +1,88 @@
+"""
+Benchmark two-stage search against the collection on the Qdrant server.
+
+Copies a sample of the collection's vectors into a scratch collection
+with the configured HNSW and quantization settings and one small vector
+per --dims, then reports recall@k against exact search and latency for
+plain HNSW search and each small-vector prefetch size. Held-out vectors
+are the queries unless --questions gives real questions to embed.
+
+    python bench_two_stage.py --points 200000 --dims 64,128,256 --prefetch 100,200,400,800
+"""
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from benchmarks.suites import bench_two_stage
+from src.vectorstore import sample_vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency/recall trade-off of two-stage search at collection size')
+    parser.add_argument('--config', type=str, default='config_llm.json', help='Path to LLM config file')
+    parser.add_argument('--collection', type=str, help='Source collection (default: vector_store.collection_name)')
+    parser.add_argument('--points', type=int, default=100000, help='Vectors copied into the scratch collection')
+    parser.add_argument('--queries', type=int, default=200, help='Held-out vectors used as queries')
+    parser.add_argument('--questions', type=str, help='Text file with one question per line to embed as queries instead')
+    parser.add_argument('--dims', type=str, default='64,128,256', help='Small vector sizes')
+    parser.add_argument('--prefetch', type=str, default='100,200,400,800', help='Small-vector candidates rescored')
+    parser.add_argument('--method', choices=['pca', 'matryoshka'], default='pca', help='How small vectors are made')
+    parser.add_argument('-k', type=int, default=10, help='Results per query (recall@k)')
+    parser.add_argument('--output', type=str, help='Report path (default: output/two_stage_<date>.json)')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    vector_store = config['vector_store']
+    collection_name = args.collection or vector_store['collection_name']
+    client = QdrantClient(url=vector_store['url'])
+
+    held_out = 0 if args.questions else args.queries
+    vectors = sample_vectors(client, collection_name, limit=args.points + held_out)
+    if args.questions:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        with open(args.questions, 'r') as f:
+            questions = [line.strip() for line in f if line.strip()]
+        embeddings = HuggingFaceEmbeddings(model_name=config['embedding']['model_name'],
+                                           model_kwargs={"device": config['embedding']['device']})
+        queries = np.asarray([embeddings.embed_query(question) for question in questions], dtype=np.float32)
+    else:
+        # Random split, so the queries aren't all from the first pages scrolled
+        order = np.random.default_rng(0).permutation(len(vectors))
+        queries, vectors = vectors[order[:held_out]], vectors[order[held_out:]]
+
+    print(f"✂️  Two-stage search on {len(vectors)} vectors from {collection_name}, {len(queries)} queries, k={args.k}")
+    results = bench_two_stage(
+        client, vectors, queries,
+        collection_name=f"{collection_name}_two_stage_bench",
+        dims=[int(dim) for dim in args.dims.split(',')],
+        prefetch_limits=[int(limit) for limit in args.prefetch.split(',')],
+        k=args.k,
+        method=args.method,
+        vector_store=vector_store
+    )
+
+    print(f"\n{'Search':<24}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}")
+    full = results['full']
+    print(f"{'full vectors (HNSW)':<24}{full['recall']:>10.3f}{full['p50_ms']:>10.2f}{full['p95_ms']:>10.2f}")
+    for key, settings in results.items():
+        if not key.startswith('dim_'):
+            continue
+        for setting, result in settings.items():
+            label = f"{key[4:]}-dim, {setting.split('_')[1]} cand."
+            print(f"{label:<24}{result['recall']:>10.3f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}")
+
+    output = args.output or f"output/two_stage_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({"created": datetime.now().isoformat(), "collection": collection_name, "method": args.method,
+                   **results}, f, indent=2)
+    print(f"\n💾 Report saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+"""Offline benchmark suite for crawl, ingest and search (see run_benchmarks.py)."""
+from .fixtures import HashEmbeddings, generate_corpus, record_corpus, serve_directory, stub_ollama
+from .report import build_report, compare_reports, load_report, save_report
+from .suites import bench_dupefilters, bench_pipeline, bench_query
+
+__all__ = [
+    'HashEmbeddings', 'generate_corpus', 'record_corpus', 'serve_directory', 'stub_ollama',
+    'build_report', 'compare_reports', 'load_report', 'save_report',
+    'bench_dupefilters', 'bench_pipeline', 'bench_query',
+]
@@ -0,0 +1,221 @@
+"""
+Offline stand-ins for the services a crawl or search talks to.
+
+- A deterministic corpus of CU-style HTML pages (navigation, inline
+  scripts, the Google Translate widget, body text and links), or a
+  directory of recorded pages, served by a local HTTP server.
+- HashEmbeddings: a fast, deterministic 768-dim embedder, so runs do not
+  depend on downloading or running e5-base-v2.
+- A stub Ollama server that answers /api/generate with a fixed response
+  and Ollama-style timing fields, after an optional simulated delay.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+import requests
+from langchain_core.embeddings import Embeddings
+
+TOPICS = [
+    "admissions", "financial aid", "tuition", "housing", "dining", "registration",
+    "graduate school", "engineering", "computer science", "libraries", "athletics",
+    "parking", "health services", "career services", "study abroad", "scholarships",
+]
+
+WORDS = (
+    "student students campus university program programs course courses faculty research "
+    "office application deadline semester fall spring summer credit credits degree major "
+    "minor advising support services resources information contact email phone building "
+    "hall center department college school requirements eligible apply review process"
+).split()
+
+BOILERPLATE = (
+    "<header><a href='#main'>Skip to main content</a>"
+    "<div id='google_translate_element'></div>"
+    "<nav><ul><li><a href='/about'>About</a></li><li><a href='/academics'>Academics</a></li>"
+    "<li><a href='/admissions'>Admissions</a></li><li><a href='/research'>Research</a></li></ul></nav>"
+    "<form>Search Enter the terms you wish to search for</form></header>"
+)
+
+SCRIPTS = (
+    "<script>function googleTranslateElementInit() { new google.translate.TranslateElement("
+    "{pageLanguage: 'en'}, 'google_translate_element'); }</script>"
+    "<script>var _paq = window._paq || []; _paq.push(['trackPageView']);</script>"
+    "<style>.ucb-bootstrap-layout-section { padding: 10px; margin: 0 auto; }</style>"
+)
+
+
+def _paragraph(rng: random.Random, topic: str) -> str:
+    sentences = []
+    for _ in range(rng.randint(3, 6)):
+        words = rng.sample(WORDS, rng.randint(8, 16))
+        words.insert(rng.randint(0, len(words)), topic)
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def generate_corpus(num_pages: int = 200, seed: int = 0) -> Dict[str, str]:
+    """
+    Generate a deterministic corpus of HTML pages.
+
+    Args:
+        num_pages: Number of pages
+        seed: Random seed; the same seed always gives the same corpus
+
+    Returns:
+        Mapping of relative path (e.g. "pages/12.html") to HTML
+    """
+    rng = random.Random(seed)
+    pages = {}
+    for i in range(num_pages):
+        topic = TOPICS[i % len(TOPICS)]
+        paragraphs = "".join(f"<p>{_paragraph(rng, topic)}</p>" for _ in range(rng.randint(2, 12)))
+        links = "".join(
+            f"<a href='/pages/{rng.randrange(num_pages)}.html'>Related {j}</a>"
+            for j in range(rng.randint(3, 10))
+        )
+        # A few links the crawler should refuse
+        links += "<a href='/files/brochure.pdf'>Brochure (PDF)</a>"
+        pages[f"pages/{i}.html"] = (
+            f"<html><head><title>{topic.title()} | Page {i} | University of Colorado Boulder</title>"
+            f"{SCRIPTS}</head><body>{BOILERPLATE}<main id='main'><h1>{topic.title()}</h1>"
+            f"{paragraphs}</main><footer>{links}</footer></body></html>"
+        )
+    return pages
+
+
+def write_corpus(pages: Dict[str, str], directory: str) -> List[str]:
+    """Write a corpus to disk; returns the relative paths written."""
+    root = Path(directory)
+    for path, html in pages.items():
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(html, encoding='utf-8')
+    return sorted(pages)
+
+
+def load_corpus_paths(directory: str) -> List[str]:
+    """Relative paths of the recorded .html pages in directory."""
+    root = Path(directory)
+    return sorted(str(path.relative_to(root)) for path in root.rglob("*.html"))
+
+
+def record_corpus(urls: List[str], directory: str) -> List[str]:
+    """
+    Snapshot live pages into directory so later runs can replay them offline.
+
+    Args:
+        urls: Pages to download
+        directory: Output directory; files are named by URL hash
+
+    Returns:
+        Relative paths of the recorded pages
+    """
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    recorded = []
+    with requests.Session() as session:
+        for url in urls:
+            response = session.get(url, timeout=30)
+            if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', ''):
+                continue
+            name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16] + ".html"
+            (root / name).write_text(response.text, encoding='utf-8')
+            recorded.append(name)
+    (root / "urls.json").write_text(json.dumps(dict(zip(recorded, urls)), indent=2), encoding='utf-8')
+    return recorded
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_directory(directory: str) -> Iterator[str]:
+    """Serve a directory over HTTP on a free local port; yields the base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings via feature hashing."""
+
+    def __init__(self, size: int = 768):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in text.lower().split():
+            digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+            value = int.from_bytes(digest, 'little')
+            vector[value % self.size] += 1.0 if value & (1 << 63) else -1.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+@contextmanager
+def stub_ollama(delay: float = 0.0, tokens_per_second: float = 50.0) -> Iterator[str]:
+    """
+    Run a stub Ollama server; yields its base URL.
+
+    Args:
+        delay: Seconds each generation takes (simulated decode time)
+        tokens_per_second: Decode rate reported in the timing fields
+    """
+
+    class OllamaHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b"{}")
+            prompt = payload.get("prompt", "")
+            if prompt and delay:
+                time.sleep(delay)
+            output_tokens = int(delay * tokens_per_second) if prompt else 0
+            body = json.dumps({
+                "model": payload.get("model"),
+                "response": "Stub answer based on the provided context [Source 1]." if prompt else "",
+                "done": True,
+                "load_duration": 0,
+                "prompt_eval_count": len(prompt.split()),
+                "prompt_eval_duration": 0,
+                "eval_count": output_tokens,
+                "eval_duration": int(delay * 1e9),
+                "total_duration": int(delay * 1e9),
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
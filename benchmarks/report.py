@@ -0,0 +1,115 @@
+"""
+Machine-readable benchmark reports and commit-to-commit comparison.
+
+A report is JSON with the git commit, environment and run parameters at
+the top and one section per suite under "results". compare_reports()
+flattens two reports to dotted metric paths and flags metrics that moved
+in the wrong direction by more than a threshold.
+"""
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+REPORT_SCHEMA = 1
+
+# Metric name suffixes where a larger value is better; everything timed is lower-is-better
+HIGHER_IS_BETTER = ("_per_sec", "recall")
+LOWER_IS_BETTER = ("_ms", "elapsed_s")
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """Where and on what code the benchmark ran."""
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def build_report(params: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    return {"schema": REPORT_SCHEMA, **environment(), "params": params, "results": results}
+
+
+def save_report(report: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a results dict as {"query.p95_ms": 12.3, ...}."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def _direction(metric: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if neutral (counts)."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10,
+                    min_delta_ms: float = 0.5) -> List[Dict[str, Any]]:
+    """
+    Compare two reports metric by metric.
+
+    Args:
+        baseline: Report from the reference commit
+        current: Report from the commit under test
+        threshold: Relative change that counts as a regression/improvement
+        min_delta_ms: Ignore changes smaller than this on millisecond
+            metrics, which are dominated by timer noise
+
+    Returns:
+        One row per shared metric with baseline, current, relative change
+        and status ("regression", "improvement" or "ok")
+    """
+    before = flatten(baseline.get("results", {}))
+    after = flatten(current.get("results", {}))
+    rows = []
+    for metric in sorted(before.keys() & after.keys()):
+        old, new = before[metric], after[metric]
+        change = (new - old) / old if old else 0.0
+        direction = _direction(metric)
+        status = "ok"
+        noise = metric.endswith("_ms") and abs(new - old) < min_delta_ms
+        if direction and abs(change) > threshold and not noise:
+            status = "improvement" if change * direction > 0 else "regression"
+        rows.append({"metric": metric, "baseline": old, "current": new, "change": change, "status": status})
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], baseline: Dict[str, Any], current: Dict[str, Any]):
+    print(f"\n📊 {(baseline.get('commit') or 'unknown')[:10]} → {(current.get('commit') or 'unknown')[:10]}")
+    for row in rows:
+        if _direction(row["metric"]) == 0:
+            continue
+        marker = {"regression": "❌", "improvement": "✅", "ok": "  "}[row["status"]]
+        print(f"{marker} {row['metric']:<45} {row['baseline']:>12.2f} → {row['current']:>12.2f} "
+              f"({row['change'] * 100:+.1f}%)")
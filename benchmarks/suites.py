@@ -0,0 +1,309 @@
+"""
+Benchmark suites: crawl pipeline, dupefilters, RAG queries and two-stage search.
+
+Each suite returns a plain dict of results for the report. Stage
+breakdowns come from the same metrics registries the crawler and web app
+use, so a regression can be traced to the stage that caused it.
+"""
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import requests
+from qdrant_client import models
+from scrapy.exceptions import DropItem
+from scrapy.http import HtmlResponse, Request
+
+from src.crawlers.university_crawler import UniversitySpider
+from src.embedding import HuggingFaceEmbedder
+from src.filters.dupefilter import FileBasedDupeFilter, RedisBasedDupeFilter, SQLiteBasedDupeFilter
+from src.filters.qdrant_dupefilter import QdrantDupeFilter
+from src.llm.enhanced_search import build_rag_chain, build_rag_components, format_sources, retrieve_documents
+from src.pipeline import DataCleaningPipeline, EmbeddingPipeline, VectorDatabasePipeline
+from src.utils.metrics import get_registry
+from src.vectorstore import VectorReducer
+from src.vectorstore.collection import hnsw_config, quantization_config, vectors_config, wait_until_indexed
+
+from .fixtures import TOPICS, stub_ollama
+
+
+def _stage_summary(prefix: str) -> Dict[str, Dict[str, float]]:
+    """Mean and total milliseconds per stage from a metrics registry."""
+    stages = {}
+    for name, stage in get_registry(prefix).snapshot()["stages"].items():
+        stages[name] = {
+            "count": stage["count"],
+            "total_ms": stage["sum"] * 1000,
+            "mean_ms": stage["sum"] / stage["count"] * 1000 if stage["count"] else 0.0,
+        }
+    return stages
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000
+    return {
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+    }
+
+
+def bench_pipeline(base_url: str, paths: List[str], client, embeddings, collection_name: str) -> Dict[str, Any]:
+    """
+    Push every page through download -> parse -> clean -> chunk/embed -> upsert.
+
+    Args:
+        base_url: URL of the local corpus server
+        paths: Corpus pages relative to base_url
+        client: Qdrant client to write into (in-memory for offline runs)
+        embeddings: Embeddings model used by the embedder
+        collection_name: Collection to create and fill
+    """
+    spider = UniversitySpider(base_url=base_url + "/")
+    cleaning = DataCleaningPipeline()
+    embedding = EmbeddingPipeline(embedder=HuggingFaceEmbedder(embeddings=embeddings))
+    vector_db = VectorDatabasePipeline(client=client, collection_name=collection_name)
+
+    session = requests.Session()
+    pages = dropped = 0
+    start_time = time.perf_counter()
+    for path in paths:
+        url = f"{base_url}/{path}"
+        download_start = time.perf_counter()
+        body = session.get(url, timeout=10).content
+        get_registry("crawl").observe("download", time.perf_counter() - download_start)
+
+        response = HtmlResponse(url=url, body=body, encoding='utf-8', request=Request(url),
+                                headers={"Content-Type": "text/html; charset=utf-8"})
+        for item in spider.parse(response):
+            if isinstance(item, Request):
+                continue
+            try:
+                item = cleaning.process_item(item, spider)
+            except DropItem:
+                dropped += 1
+                continue
+            item = embedding.process_item(item, spider)
+            vector_db.process_item(item, spider)
+            pages += 1
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "pages": pages,
+        "dropped": dropped,
+        "chunks": client.count(collection_name=collection_name).count,
+        "elapsed_s": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+        "stages": _stage_summary("crawl"),
+    }
+
+
+def _lookup_workload(urls: List[str], lookups: int, seed: int) -> List[str]:
+    """Half known URLs, half unseen ones, in a fixed shuffled order."""
+    rng = random.Random(seed)
+    workload = [rng.choice(urls) for _ in range(lookups // 2)]
+    workload += [f"{url}?variant={i}" for i, url in enumerate(rng.choices(urls, k=lookups - len(workload)))]
+    rng.shuffle(workload)
+    return workload
+
+
+def _time_lookups(dupefilter, workload: List[str]) -> Dict[str, float]:
+    requests_ = [Request(url) for url in workload]
+    start_time = time.perf_counter()
+    seen = sum(1 for request in requests_ if dupefilter.request_seen(request))
+    elapsed = time.perf_counter() - start_time
+    return {
+        "lookups": len(requests_),
+        "seen": seen,
+        "elapsed_s": elapsed,
+        "lookups_per_sec": len(requests_) / elapsed if elapsed else 0.0,
+    }
+
+
+def bench_dupefilters(urls: List[str], client, collection_name: str, lookups: int = 5000,
+                      redis_url: str = "redis://localhost:6379/15", seed: int = 0) -> Dict[str, Any]:
+    """
+    Measure request_seen() throughput of every dupefilter on the same workload.
+
+    The Redis filter only runs if a server answers at redis_url (database
+    15 by default, cleared before and after); otherwise it is reported as
+    skipped. The Qdrant filter checks against the collection filled by
+    bench_pipeline.
+    """
+    workload = _lookup_workload(urls, lookups, seed)
+    results: Dict[str, Any] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_filter = SQLiteBasedDupeFilter(db_path=str(Path(tmp) / "bench_urls.db"))
+        sqlite_filter.open()
+        results["sqlite"] = _time_lookups(sqlite_filter, workload)
+        sqlite_filter.close("finished")
+
+        file_filter = FileBasedDupeFilter(file_path=str(Path(tmp) / "bench_urls.txt"))
+        file_filter.open()
+        results["file"] = _time_lookups(file_filter, workload)
+        file_filter.close("finished")
+
+    redis_filter = RedisBasedDupeFilter(redis_url=redis_url, key_prefix="benchmark:dupefilter")
+    try:
+        redis_filter.open()
+        redis_filter.redis_client.ping()
+    except Exception as e:
+        results["redis"] = {"skipped": f"Redis not reachable at {redis_url}: {e}"}
+    else:
+        redis_filter.clear()
+        results["redis"] = _time_lookups(redis_filter, workload)
+        redis_filter.clear()
+        redis_filter.close("finished")
+
+    qdrant_filter = QdrantDupeFilter(collection_name=collection_name, client=client)
+    results["qdrant"] = _time_lookups(qdrant_filter, workload)
+    qdrant_filter.close("finished")
+
+    return results
+
+
+def bench_query(client, embeddings, collection_name: str, num_queries: int = 50,
+                llm_delay: float = 0.0, warmup: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """
+    Measure end-to-end latency of the RAG chain built by setup_rag_system.
+
+    The LLM is a stub Ollama server, so by default this isolates retrieval,
+    rerank and context packing; set llm_delay to simulate generation time.
+    "search_only" times the same questions without generation (retrieval
+    and snippet formatting, as /api/search in search mode).
+    """
+    rng = random.Random(seed)
+    questions = [
+        f"What should I know about {rng.choice(TOPICS)} for {rng.choice(['new', 'transfer', 'graduate'])} students?"
+        for _ in range(num_queries + warmup)
+    ]
+
+    with stub_ollama(delay=llm_delay) as ollama_url:
+        components = build_rag_components(
+            collection_name=collection_name,
+            client=client,
+            embeddings=embeddings,
+            llm_config={"base_url": ollama_url}
+        )
+        rag_chain = build_rag_chain(components)
+        for question in questions[:warmup]:
+            rag_chain.invoke({"question": question})
+        get_registry("rag").reset()
+
+        latencies = []
+        for question in questions[warmup:]:
+            start_time = time.perf_counter()
+            rag_chain.invoke({"question": question})
+            latencies.append(time.perf_counter() - start_time)
+        stages = _stage_summary("rag")
+
+        search_latencies = []
+        for question in questions[warmup:]:
+            start_time = time.perf_counter()
+            format_sources(retrieve_documents(components, question, rerank=False), query=question)
+            search_latencies.append(time.perf_counter() - start_time)
+
+    return {
+        "queries": len(latencies),
+        "llm_delay_s": llm_delay,
+        **_latency_summary(latencies),
+        "stages": stages,
+        "search_only": _latency_summary(search_latencies),
+    }
+
+
+def bench_two_stage(client, vectors: np.ndarray, queries: np.ndarray, collection_name: str = "bench_two_stage",
+                    dims: Sequence[int] = (64, 128, 256), prefetch_limits: Sequence[int] = (50, 100, 200, 400),
+                    k: int = 10, method: str = "pca", vector_store: Optional[Dict[str, Any]] = None,
+                    warmup: int = 3) -> Dict[str, Any]:
+    """
+    Latency and recall@k of two-stage search against exact search.
+
+    The vectors are loaded into a scratch collection (deleted afterwards)
+    with one small named vector per dim, using the HNSW and quantization
+    settings of vector_store. Each query is compared with the exact top k
+    over the full vectors:
+    - "full": one search over the full vectors, as without two-stage
+    - "dim_<d>.prefetch_<n>": n candidates from the d-dim vectors,
+      rescored with the full vectors (as QdrantMMRRetriever does)
+
+    Args:
+        client: Qdrant client (in-memory for a smoke run, the server for real latencies)
+        vectors: (n, dim) full vectors, e.g. sampled from the collection
+        queries: (q, dim) query vectors, not among vectors
+        method: "pca" (fitted on vectors) or "matryoshka" (truncation)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32)
+    if method == "pca":
+        reducers = [VectorReducer.fit_pca(vectors, dim, name=f"d{dim}") for dim in dims]
+    else:
+        reducers = [VectorReducer.matryoshka(dim, name=f"d{dim}") for dim in dims]
+    config = {**(vector_store or {}), "vector_size": vectors.shape[1], "small_vector": None}
+    distance = models.Distance(config.get("distance", "Cosine"))
+
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    client.create_collection(
+        collection_name,
+        vectors_config={"": vectors_config(config), **{
+            reducer.name: models.VectorParams(size=reducer.dim, distance=distance) for reducer in reducers
+        }},
+        hnsw_config=hnsw_config(config),
+        quantization_config=quantization_config(config)
+    )
+    try:
+        start_time = time.perf_counter()
+        client.upload_collection(
+            collection_name,
+            vectors={"": vectors, **{reducer.name: reducer.transform(vectors) for reducer in reducers}},
+            ids=list(range(len(vectors))),
+            batch_size=256,
+            wait=True
+        )
+        wait_until_indexed(client, collection_name)
+        load_s = time.perf_counter() - start_time
+
+        exact = models.SearchParams(exact=True)
+        truth = [
+            {point.id for point in client.query_points(collection_name, query=query.tolist(), limit=k,
+                                                       search_params=exact).points}
+            for query in queries
+        ]
+
+        def run(request) -> Dict[str, float]:
+            for query in queries[:warmup]:
+                client.query_points(collection_name, limit=k, **request(query))
+            latencies, recalls = [], []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                points = client.query_points(collection_name, limit=k, **request(query)).points
+                latencies.append(time.perf_counter() - start)
+                recalls.append(len({point.id for point in points} & expected) / max(len(expected), 1))
+            return {"recall": statistics.fmean(recalls), **_latency_summary(latencies)}
+
+        rescore = models.SearchParams(quantization=models.QuantizationSearchParams(ignore=True))
+        results: Dict[str, Any] = {
+            "points": len(vectors), "queries": len(queries), "k": k, "load_s": load_s,
+            "full": run(lambda query: {"query": query.tolist()}),
+        }
+        for reducer in reducers:
+            results[f"dim_{reducer.dim}"] = {
+                f"prefetch_{limit}": run(lambda query, reducer=reducer, limit=limit: {
+                    "query": query.tolist(),
+                    "prefetch": models.Prefetch(query=reducer.transform_query(query), using=reducer.name,
+                                                limit=limit),
+                    "search_params": rescore,
+                })
+                for limit in prefetch_limits
+            }
+        return results
+    finally:
+        client.delete_collection(collection_name)
@@ -0,0 +1,70 @@
+"""
+Rebuild the link graph from archived crawls and publish authority scores.
+
+Crawls update output/link_graph.npz as they go; this replays the url and
+links columns of archive runs (e.g. after deleting the graph or changing
+URL canonicalization), recomputes PageRank and writes metadata.authority
+and metadata.in_degree into the Qdrant payloads.
+"""
+import argparse
+import json
+from pathlib import Path
+
+from qdrant_client import QdrantClient
+from tqdm import tqdm
+
+from src.archive import iter_archive
+from src.crawlers.university_crawler import UniversitySpider
+from src.filters.canonicalize import URLCanonicalizer
+from src.graph import LinkGraph, publish_authority, resolve_links
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the link graph from the crawl archive')
+    parser.add_argument('archive', nargs='?', default='output/archive', help='Crawl archive directory')
+    parser.add_argument('--run', nargs='+', help='Archive runs to replay, oldest first (default: all)')
+    parser.add_argument('--graph', type=str, default='output/link_graph.npz', help='Link graph file')
+    parser.add_argument('--fresh', action='store_true', help='Start from an empty graph instead of updating it')
+    parser.add_argument('--aliases', type=str, default='output/url_aliases.db', help='Learned URL aliases')
+    parser.add_argument('--crawler-config', type=str, default='config.json', help='Crawler config (allowed domains)')
+    parser.add_argument('--config', type=str, default='config_llm.json', help='Path to LLM config file')
+    parser.add_argument('--no-publish', action='store_true', help='Only update the graph file')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🕸️  Link Graph Rebuild")
+    print("=" * 70)
+
+    with open(args.crawler_config, 'r') as f:
+        crawler_config = json.load(f)
+    # Keep only on-site links, as LinkGraphPipeline does during the crawl
+    allowed_domains = UniversitySpider(base_url=crawler_config['base_url']).allowed_domains
+
+    if args.fresh:
+        Path(args.graph).unlink(missing_ok=True)
+    graph = LinkGraph.load(args.graph)
+    canonicalizer = URLCanonicalizer(aliases_path=args.aliases)
+    pages = []
+    for row in tqdm(iter_archive(args.archive, columns=['url', 'links'], runs=args.run), desc="Reading archive", unit="page"):
+        # Later runs replace the rows of earlier ones
+        url = canonicalizer.canonicalize(row['url'])
+        graph.set_links(url, resolve_links(url, row['links'] or [], canonicalizer, allowed_domains))
+        pages.append(url)
+    canonicalizer.close()
+
+    graph.pagerank()
+    stats = graph.stats()
+    print(f"\n📊 {stats['crawled']} crawled pages, {stats['nodes']} URLs, {stats['edges']} links")
+
+    if not args.no_publish:
+        with open(args.config, 'r') as f:
+            vector_store = json.load(f)['vector_store']
+        client = QdrantClient(url=vector_store['url'])
+        updated = publish_authority(client, vector_store['collection_name'], graph, urls=pages)
+        print(f"✅ Authority published for {updated} pages")
+    graph.save(args.graph)
+    print(f"💾 Graph saved to: {args.graph}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Fit and backfill the small vectors used by two-stage search.
+
+    python build_small_vectors.py --fit        # PCA from vectors in the collection
+    python build_small_vectors.py --backfill   # small vector for every stored point
+
+--fit samples full vectors from the collection, fits the PCA configured
+in vector_store.small_vector and saves it to its path (matryoshka needs
+no fitting). --backfill writes the small vector of points stored before
+the reducer existed; new points get it when they are written. The
+collection must have been created with small_vector configured.
+"""
+import argparse
+import json
+import time
+
+from qdrant_client import QdrantClient
+
+from src.vectorstore import VectorReducer, backfill_small_vectors, check_reducer, sample_vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit and backfill small vectors for two-stage search')
+    parser.add_argument('--config', type=str, default='config_llm.json', help='Path to LLM config file')
+    parser.add_argument('--collection', type=str, help='Collection (default: vector_store.collection_name)')
+    parser.add_argument('--fit', action='store_true', help='Fit the PCA on vectors sampled from the collection')
+    parser.add_argument('--sample', type=int, default=100000, help='Vectors sampled for --fit')
+    parser.add_argument('--backfill', action='store_true', help='Write the small vector of every stored point')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        vector_store = json.load(f)['vector_store']
+    small_vector = vector_store.get('small_vector')
+    if not small_vector:
+        print("❌ vector_store.small_vector is not configured")
+        return
+    collection_name = args.collection or vector_store['collection_name']
+    client = QdrantClient(url=vector_store['url'])
+
+    if args.fit:
+        if small_vector.get('method', 'pca') != 'pca':
+            print(f"ℹ️  {small_vector['method']} small vectors need no fitting")
+        else:
+            start_time = time.time()
+            vectors = sample_vectors(client, collection_name, limit=args.sample)
+            print(f"📥 Sampled {len(vectors)} vectors from {collection_name}")
+            reducer = VectorReducer.fit_pca(vectors, small_vector['dim'], name=small_vector.get('name', 'small'))
+            path = small_vector.get('path', 'output/small_vector_pca.npz')
+            reducer.save(path)
+            print(f"✅ Fitted {reducer.dim}-dim PCA in {time.time() - start_time:.1f}s, saved to {path}")
+
+    if args.backfill:
+        reducer = check_reducer(client, collection_name, VectorReducer.from_config(small_vector))
+        if reducer is None:
+            return
+        start_time = time.time()
+        updated = backfill_small_vectors(client, collection_name, reducer)
+        print(f"✅ Wrote {updated} '{reducer.name}' vectors in {time.time() - start_time:.1f}s")
+
+    if not (args.fit or args.backfill):
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
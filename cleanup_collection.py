@@ -0,0 +1,18 @@
+"""
+Audit the vector collection against every hygiene rule in a single pass.
+
+Rules: binary_extension, pdf_markers, replacement_chars, garbled,
+near_duplicate, orphaned (see src/cleanup/rules.py). Writes a per-rule
+report to output/hygiene_report.json; use --dry-run to only report, or
+--yes to delete matches while scanning.
+"""
+from src.cleanup.engine import run_cleanup_cli
+from src.cleanup.rules import RULES
+
+
+if __name__ == "__main__":
+    run_cleanup_cli(
+        "Collection Hygiene Audit",
+        default_rules=list(RULES),
+        output_name="hygiene"
+    )
@@ -0,0 +1,89 @@
+"""
+Rebuild the vector index from crawl dumps instead of re-crawling.
+
+Streams JSONL files (e.g. output/crawled_pages.jsonl) or crawl archive
+runs (output/archive) through cleaning,
+chunking, batched embedding and batched upserts, optionally in several
+worker processes. Interrupted runs resume from the last checkpointed byte
+offset of every shard.
+"""
+import argparse
+import json
+from contextlib import nullcontext
+from qdrant_client import QdrantClient
+from src.graph import publish_saved_authority
+from src.ingest import ingest_files, prepare_collection
+from src.vectorstore import bulk_load
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest crawled pages from JSONL dumps without crawling')
+    parser.add_argument('inputs', nargs='+', help='JSONL files with url/title/text per line, or crawl archive directories')
+    parser.add_argument('--run', nargs='+', help='Archive runs to ingest from archive directories (default: latest)')
+    parser.add_argument('--config', type=str, default='config_llm.json', help='Path to LLM config file')
+    parser.add_argument('--collection', type=str, help='Target collection (default: vector_store.collection_name)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes (each loads the embedding model)')
+    parser.add_argument('--batch-pages', type=int, default=64, help='Pages embedded and upserted per batch')
+    parser.add_argument('--chunk-size', type=int, default=1024, help='Characters per chunk')
+    parser.add_argument('--chunk-overlap', type=int, default=256, help='Characters shared by neighbouring chunks')
+    parser.add_argument('--no-clean', action='store_true', help='Text is already cleaned (only run the hygiene rules)')
+    parser.add_argument('--offset', type=int, default=0, help='Start each file at this byte offset')
+    parser.add_argument('--checkpoint', type=str, default='output/ingest.checkpoint.json', help='Resume checkpoint file')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an interrupted ingest')
+    parser.add_argument('--bulk-load', action='store_true', help='Pause HNSW indexing during the run and build the index once at the end (full rebuilds)')
+    parser.add_argument('--link-graph', type=str, default='output/link_graph.npz', help='Link graph to take authority scores from')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    vector_store = config['vector_store']
+    embedding = config['embedding']
+    collection_name = args.collection or vector_store['collection_name']
+
+    print("=" * 70)
+    print("📥 Offline JSONL Ingest")
+    print("=" * 70)
+    print(f"\n📍 Configuration:")
+    print(f"   Inputs: {', '.join(args.inputs)}")
+    print(f"   Collection: {collection_name}")
+    print(f"   Model: {embedding['model_name']} on {embedding['device']}")
+    print(f"   Chunks: {args.chunk_size} chars, {args.chunk_overlap} overlap")
+    print(f"   Workers: {args.workers}")
+    print()
+
+    client = QdrantClient(url=vector_store['url'])
+    prepare_collection(client, collection_name, vector_store=vector_store)
+
+    # A full rebuild indexes once at the end instead of while the points arrive
+    loading = bulk_load(client, collection_name, vector_store) if args.bulk_load else nullcontext()
+    with loading:
+        stats = ingest_files(
+            args.inputs,
+            {
+                "qdrant_url": vector_store['url'],
+                "collection_name": collection_name,
+                "model_name": embedding['model_name'],
+                "device": embedding['device'],
+                "embed_batch_size": embedding.get('batch_size', 32),
+                "chunk_size": args.chunk_size,
+                "chunk_overlap": args.chunk_overlap,
+                "batch_pages": args.batch_pages,
+                "small_vector": vector_store.get('small_vector'),
+                "clean": not args.no_clean,
+            },
+            workers=args.workers,
+            checkpoint_path=args.checkpoint,
+            resume=not args.restart,
+            start_offset=args.offset,
+            runs=args.run
+        )
+
+    print(f"\n✅ Ingested {stats['pages']} pages ({stats['chunks']} chunks, {stats['dropped']} dropped) "
+          f"in {stats['elapsed']:.1f}s")
+    print(f"⚡ Throughput: {stats['pages_per_sec']:.1f} pages/sec across {stats['shards']} shards")
+    # Chunks written here have no authority until the next crawl publishes it
+    print(f"🕸️  Authority published for {publish_saved_authority(client, collection_name, args.link_graph)} pages")
+
+
+if __name__ == '__main__':
+    main()
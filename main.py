@@ -1,10 +1,10 @@
+import sys
+
 from src.crawlers import CrawlerCreator
 from src.utils import clear_redis
 
-clear_redis()
-crawler = CrawlerCreator('config.json')
+# python main.py --resume continues an interrupted crawl
+crawler = CrawlerCreator('config.json', resume='--resume' in sys.argv)
+if not crawler.resuming:
+    clear_redis()
 crawler.start()
-
-
-
-
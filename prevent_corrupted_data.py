@@ -6,11 +6,27 @@ Add these filters to your pipeline to validate text before embedding.
 import re
 from typing import Optional
 
+from scrapy.exceptions import DropItem
+
+from src.cleanup.pipeline import HygienePipeline
+from src.cleanup.rules import GarbledTextRule, Record, ReplacementCharRule
+
+__all__ = [
+    "TextValidationPipeline",
+    "is_valid_text",
+    "clean_text",
+    "validate_scraped_item",
+    "filter_documents_before_embedding",
+]
+
 
 def is_valid_text(text: str, min_length: int = 50, max_replacement_ratio: float = 0.05) -> bool:
     """
     Check if text is valid for embedding.
     
+    Uses the shared hygiene rules (src/cleanup/rules.py), so ingest and
+    the cleanup scripts agree on what counts as corrupted.
+    
     Args:
         text: The text to validate
         min_length: Minimum acceptable text length
@@ -19,33 +35,9 @@ def is_valid_text(text: str, min_length: int = 50, max_replacement_ratio: float
     Returns:
         True if text is valid, False otherwise
     """
-    if not text or len(text) < min_length:
-        return False
-    
-    # Check for excessive replacement characters
-    replacement_count = text.count('�')
-    replacement_ratio = replacement_count / len(text)
-    
-    if replacement_ratio > max_replacement_ratio:
-        return False
-    
-    # Check for reasonable ASCII ratio
-    ascii_count = sum(1 for c in text if ord(c) < 128)
-    ascii_ratio = ascii_count / len(text)
-    
-    # Should be at least 70% ASCII for English text
-    if ascii_ratio < 0.7:
-        return False
-    
-    # Check for reasonable alphanumeric content
-    alnum_count = sum(1 for c in text if c.isalnum() or c.isspace())
-    alnum_ratio = alnum_count / len(text)
-    
-    # Should be at least 80% alphanumeric + spaces
-    if alnum_ratio < 0.8:
-        return False
-    
-    return True
+    record = Record(url='', text=text)
+    rules = [ReplacementCharRule(max_ratio=max_replacement_ratio), GarbledTextRule(min_length=min_length)]
+    return not any(rule.check(record) for rule in rules)
 
 
 def clean_text(text: str) -> Optional[str]:
@@ -106,41 +98,34 @@ def validate_scraped_item(item: dict) -> bool:
 
 
 # Example Scrapy Pipeline Integration
-class TextValidationPipeline:
+class TextValidationPipeline(HygienePipeline):
     """
-    Scrapy pipeline to filter out corrupted text items.
+    Scrapy pipeline to clean item text and filter out corrupted items.
     
-    Add to your Scrapy settings:
+    Cleans the text with clean_text() first, then applies the hygiene rules
+    like HygienePipeline (same settings). Add to your Scrapy settings:
         ITEM_PIPELINES = {
             'prevent_corrupted_data.TextValidationPipeline': 100,
         }
     """
     
-    def __init__(self):
-        self.dropped_count = 0
-        self.processed_count = 0
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.uncleanable_count = 0
     
     def process_item(self, item, spider):
-        self.processed_count += 1
-        
-        # Validate the item
-        if not validate_scraped_item(item):
-            self.dropped_count += 1
-            spider.logger.warning(
-                f"Dropped corrupted item from {item.get('url', 'unknown')}"
-            )
-            # Drop the item
-            from scrapy.exceptions import DropItem
+        cleaned = clean_text(item.get(self.text_field) or '')
+        if cleaned is None:
+            self.uncleanable_count += 1
+            spider.logger.warning(f"Dropped corrupted item from {item.get('url', 'unknown')}")
             raise DropItem("Invalid or corrupted text content")
-        
-        return item
+        item[self.text_field] = cleaned
+        return super().process_item(item, spider)
     
     def close_spider(self, spider):
-        spider.logger.info(
-            f"Text Validation: Processed {self.processed_count} items, "
-            f"dropped {self.dropped_count} corrupted items "
-            f"({self.dropped_count/self.processed_count*100:.1f}%)"
-        )
+        if self.uncleanable_count:
+            spider.logger.info(f"Text Validation: dropped {self.uncleanable_count} items that could not be cleaned")
+        super().close_spider(spider)
 
 
 # Example usage in your embedding script
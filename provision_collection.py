@@ -0,0 +1,56 @@
+"""
+Create or re-tune the Qdrant collection from config_llm.json.
+
+Creates the collection with the quantization, on-disk vector and HNSW
+settings of the vector_store section if it doesn't exist. With --apply an
+existing collection is updated to match (Qdrant re-optimizes it in the
+background). --backfill-sites adds the indexed site/subdomain/section
+fields to points written before they existed.
+"""
+import argparse
+import json
+
+from qdrant_client import QdrantClient
+
+from src.vectorstore import apply_collection_config, backfill_site_fields, ensure_collection, ram_bytes_per_vector
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create or re-tune the Qdrant collection from config_llm.json')
+    parser.add_argument('--config', type=str, default='config_llm.json', help='Path to LLM config file')
+    parser.add_argument('--collection', type=str, help='Collection (default: vector_store.collection_name)')
+    parser.add_argument('--apply', action='store_true', help='Update an existing collection to the configured settings')
+    parser.add_argument('--backfill-sites', action='store_true', help='Add site/subdomain/section fields to older points')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        vector_store = json.load(f)['vector_store']
+    collection_name = args.collection or vector_store['collection_name']
+    client = QdrantClient(url=vector_store['url'])
+
+    quantization = (vector_store.get('quantization') or {}).get('type', 'none')
+    baseline = ram_bytes_per_vector({'vector_size': vector_store.get('vector_size', 768), 'hnsw': vector_store.get('hnsw')})
+    print(f"📦 Collection: {collection_name}")
+    print(f"   Vectors: {vector_store.get('vector_size', 768)}-dim {vector_store.get('distance', 'Cosine')}, "
+          f"originals {'on disk' if vector_store.get('on_disk') else 'in RAM'}, quantization: {quantization}")
+    print(f"   HNSW: {vector_store.get('hnsw') or 'Qdrant defaults'}")
+    print(f"   RAM per vector: ~{ram_bytes_per_vector(vector_store)} bytes (float32 in RAM: ~{baseline} bytes)")
+
+    if ensure_collection(client, collection_name, vector_store):
+        print(f"✅ Created {collection_name}")
+    elif args.apply:
+        apply_collection_config(client, collection_name, vector_store)
+        print(f"✅ Updated {collection_name}; Qdrant re-optimizes its segments in the background")
+    else:
+        print(f"ℹ️  {collection_name} already exists; use --apply to update its settings")
+
+    if args.backfill_sites:
+        updated = backfill_site_fields(client, collection_name)
+        print(f"✅ Added site fields to {updated} points")
+
+    info = client.get_collection(collection_name)
+    print(f"📊 Status: {info.status}, {info.points_count or 0} points, {info.indexed_vectors_count or 0} indexed vectors")
+
+
+if __name__ == '__main__':
+    main()
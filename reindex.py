@@ -0,0 +1,157 @@
+"""
+Rebuild the index into a new collection version and swap it in.
+
+vector_store.collection_name in config_llm.json is a Qdrant alias for the
+live version (cuboulder_pages -> cuboulder_pages_v3). This builds the next
+version from crawl dumps or the HTTP cache at bulk-load speed while search
+keeps serving the live one, validates it, and then repoints the alias
+atomically. The web app follows the alias without a restart.
+
+    python reindex.py output/archive                    # from the crawl archive / JSONL dumps
+    python reindex.py --from-cache                      # from the crawler's HTTP cache
+    python reindex.py --swap cuboulder_pages_v2         # roll back to an older version
+
+The first run on an unversioned collection needs --replace-collection: the
+old collection is deleted right before the alias takes its name.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from qdrant_client import QdrantClient
+from scrapy.utils.project import data_path
+
+from src.crawlers.httpcache import migrate_filesystem_cache
+from src.crawlers.university_crawler import UniversitySpider
+from src.graph import publish_saved_authority
+from src.ingest import build_ingester, build_replay_ingester, ingest_files
+from src.vectorstore import (bulk_load, create_version, list_versions, prune_versions, resolve_alias,
+                             swap_alias, validate_version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a new collection version, validate it and swap the alias')
+    parser.add_argument('inputs', nargs='*', help='JSONL files, crawl archive directories or HTTP cache files')
+    parser.add_argument('--from-cache', action='store_true', help='Replay the HTTP cache (default: the crawler config\'s HTTPCACHE_DIR)')
+    parser.add_argument('--run', nargs='+', help='Archive runs to ingest from archive directories (default: latest)')
+    parser.add_argument('--crawler-config', type=str, default='config.json', help='Crawler config (cache dir, crawl rules)')
+    parser.add_argument('--config', type=str, default='config_llm.json', help='Path to LLM config file')
+    parser.add_argument('--version', type=int, help='Build (or resume building) this version instead of the next one')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (each loads the embedding model)')
+    parser.add_argument('--batch-pages', type=int, default=64, help='Pages embedded and upserted per batch')
+    parser.add_argument('--chunk-size', type=int, default=1024, help='Characters per chunk')
+    parser.add_argument('--chunk-overlap', type=int, default=256, help='Characters shared by neighbouring chunks')
+    parser.add_argument('--min-ratio', type=float, default=0.9, help='Minimum points relative to the live version')
+    parser.add_argument('--no-swap', action='store_true', help='Build and validate only; leave the alias alone')
+    parser.add_argument('--swap', type=str, metavar='COLLECTION', help='Validate an existing version and swap to it (no build)')
+    parser.add_argument('--replace-collection', action='store_true', help='Delete an unversioned collection named like the alias')
+    parser.add_argument('--keep', type=int, default=2, help='Versions kept after a swap (for rollback)')
+    parser.add_argument('--link-graph', type=str, default='output/link_graph.npz', help='Link graph to take authority scores from')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    vector_store = config['vector_store']
+    embedding = config['embedding']
+    alias = vector_store['collection_name']
+    client = QdrantClient(url=vector_store['url'])
+    live = resolve_alias(client, alias)
+    if not client.collection_exists(live):
+        live = None
+
+    print("=" * 70)
+    print("🔄 Versioned Reindex")
+    print("=" * 70)
+    print(f"\n📍 Alias: {alias} -> {live or '(nothing yet)'}")
+    print(f"   Versions: {', '.join(name for _, name in list_versions(client, alias)) or 'none'}")
+
+    if args.swap:
+        collection_name = args.swap
+    else:
+        if args.from_cache:
+            with open(args.crawler_config, 'r') as f:
+                crawler_config = json.load(f)
+            cache_dir = data_path(crawler_config.get('settings', {}).get('HTTPCACHE_DIR', 'httpcache'))
+            # A cache from before the SQLite storage is imported on first use
+            imported = migrate_filesystem_cache(cache_dir, UniversitySpider.name)
+            if imported:
+                print(f"   Imported {imported['imported']} cached responses from {imported['path']}")
+            inputs = args.inputs or [str(Path(cache_dir) / f"{UniversitySpider.name}.sqlite")]
+        elif args.inputs:
+            crawler_config, inputs = {}, args.inputs
+        else:
+            parser.error('give crawl dumps to ingest, --from-cache, or --swap')
+        missing = [path for path in inputs if not os.path.exists(path)]
+        if missing:
+            print(f"❌ Missing inputs: {', '.join(missing)}")
+            sys.exit(1)
+
+        collection_name = create_version(client, alias, vector_store, metadata={
+            "embedding_model": embedding['model_name'],
+            "chunk_size": args.chunk_size,
+            "chunk_overlap": args.chunk_overlap,
+        }, version=args.version)
+        print(f"   Building: {collection_name} from {', '.join(inputs)}")
+        print(f"   Model: {embedding['model_name']} on {embedding['device']}, {args.workers} workers")
+        print()
+
+        options = {
+            "qdrant_url": vector_store['url'],
+            "collection_name": collection_name,
+            "model_name": embedding['model_name'],
+            "device": embedding['device'],
+            "embed_batch_size": embedding.get('batch_size', 32),
+            "chunk_size": args.chunk_size,
+            "chunk_overlap": args.chunk_overlap,
+            "batch_pages": args.batch_pages,
+            "small_vector": vector_store.get('small_vector'),
+        }
+        if args.from_cache:
+            options.update(base_url=crawler_config['base_url'], crawl_rules=crawler_config.get('crawl_rules'))
+        # Nothing reads the new version yet, so index it once at the end
+        with bulk_load(client, collection_name, vector_store):
+            stats = ingest_files(
+                inputs,
+                options,
+                workers=args.workers,
+                checkpoint_path=f"output/reindex_{collection_name}.checkpoint.json",
+                runs=args.run,
+                factory=build_replay_ingester if args.from_cache else build_ingester
+            )
+        print(f"\n✅ Built {collection_name}: {stats['pages']} pages, {stats['chunks']} chunks "
+              f"in {stats['elapsed']:.1f}s ({stats['pages_per_sec']:.1f} pages/sec)")
+        # The new version starts without authority; copy it in before search can see the version
+        print(f"🕸️  Authority published for {publish_saved_authority(client, collection_name, args.link_graph)} pages")
+
+    print(f"🔎 Validating {collection_name}...")
+    problems = validate_version(client, collection_name, vector_store, live=live, min_ratio=args.min_ratio)
+    if problems:
+        print(f"❌ {collection_name} failed validation; {alias} still points to {live}:")
+        for problem in problems:
+            print(f"   - {problem}")
+        sys.exit(1)
+    print("✅ Validation passed")
+
+    if args.no_swap:
+        print(f"ℹ️  Swap later with: python reindex.py --swap {collection_name}")
+        return
+    if collection_name == live:
+        print(f"ℹ️  {alias} already points to {collection_name}")
+        return
+    try:
+        previous = swap_alias(client, alias, collection_name, replace_collection=args.replace_collection)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"🔀 {alias}: {previous or live or '(new)'} -> {collection_name}")
+    deleted = prune_versions(client, alias, keep=args.keep)
+    if deleted:
+        print(f"🗑️  Deleted old versions: {', '.join(deleted)}")
+    if previous:
+        print(f"↩️  Roll back with: python reindex.py --swap {previous}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Re-extract crawled pages from the HTTP cache instead of re-crawling.
+
+Replays the cached raw responses through the spider's extraction,
+cleaning, chunking, embedding and upserts in worker processes, without
+the scheduler or DOWNLOAD_DELAY. Pages are diffed against the collection
+first: unchanged pages are skipped and only changed chunks are embedded.
+Use --dry-run to only see the diff report after changing the extraction
+or cleaning code.
+"""
+import argparse
+import json
+from contextlib import nullcontext
+import os
+from datetime import datetime
+from pathlib import Path
+
+from qdrant_client import QdrantClient
+from scrapy.utils.project import data_path
+
+from src.crawlers.httpcache import migrate_filesystem_cache
+from src.crawlers.university_crawler import UniversitySpider
+from src.graph import publish_saved_authority
+from src.ingest import DIFF_COUNTERS, build_replay_ingester, ingest_files, prepare_collection
+from src.vectorstore import bulk_load
+
+
+def import_filesystem_caches(cache_dir):
+    """Import Scrapy filesystem caches (<cache dir>/<spider name>/) that have no .sqlite file yet."""
+    for spider_dir in sorted(p for p in Path(cache_dir).iterdir() if p.is_dir()):
+        imported = migrate_filesystem_cache(cache_dir, spider_dir.name)
+        if imported:
+            print(f"📦 Imported {imported['imported']} cached responses from {imported['path']} "
+                  f"({imported['skipped']} incomplete entries skipped)")
+
+
+def cache_files(inputs, crawler_config):
+    """Cache files to replay: the given files, *.sqlite in given directories, or the crawler's cache."""
+    if not inputs:
+        cache_dir = Path(data_path(crawler_config.get('settings', {}).get('HTTPCACHE_DIR', 'httpcache')))
+        if cache_dir.is_dir():
+            import_filesystem_caches(cache_dir)
+        return [str(cache_dir / f"{UniversitySpider.name}.sqlite")]
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            import_filesystem_caches(path)
+            files.extend(sorted(str(p) for p in Path(path).glob('*.sqlite')))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay cached responses into the vector store without crawling')
+    parser.add_argument('inputs', nargs='*', help='HTTP cache files or directories (default: the crawler config\'s HTTPCACHE_DIR)')
+    parser.add_argument('--crawler-config', type=str, default='config.json', help='Crawler config (cache dir, crawl rules)')
+    parser.add_argument('--config', type=str, default='config_llm.json', help='Path to LLM config file')
+    parser.add_argument('--collection', type=str, help='Target collection (default: vector_store.collection_name)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (each loads the embedding model)')
+    parser.add_argument('--batch-pages', type=int, default=64, help='Pages diffed, embedded and upserted per batch')
+    parser.add_argument('--chunk-size', type=int, default=1024, help='Characters per chunk')
+    parser.add_argument('--chunk-overlap', type=int, default=256, help='Characters shared by neighbouring chunks')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what changed; embed and write nothing')
+    parser.add_argument('--checkpoint', type=str, default='output/replay.checkpoint.json', help='Resume checkpoint file')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an interrupted replay')
+    parser.add_argument('--bulk-load', action='store_true', help='Pause HNSW indexing during the run and build the index once at the end (full rebuilds)')
+    parser.add_argument('--report', type=str, default='output/replay_report.json', help='Where to write the diff report')
+    parser.add_argument('--link-graph', type=str, default='output/link_graph.npz', help='Link graph to take authority scores from')
+    args = parser.parse_args()
+
+    with open(args.crawler_config, 'r') as f:
+        crawler_config = json.load(f)
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    vector_store = config['vector_store']
+    embedding = config['embedding']
+    collection_name = args.collection or vector_store['collection_name']
+    inputs = cache_files(args.inputs, crawler_config)
+    missing = [path for path in inputs if not os.path.exists(path)]
+    if missing or not inputs:
+        print(f"❌ No HTTP cache at {', '.join(missing or args.inputs)} (crawl with HTTPCACHE_ENABLED first)")
+        return
+
+    print("=" * 70)
+    print("🔁 HTTP Cache Replay" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 70)
+    print(f"\n📍 Configuration:")
+    print(f"   Cache: {', '.join(inputs)}")
+    print(f"   Collection: {collection_name}")
+    print(f"   Model: {embedding['model_name']} on {embedding['device']}")
+    print(f"   Chunks: {args.chunk_size} chars, {args.chunk_overlap} overlap")
+    print(f"   Workers: {args.workers}")
+    print()
+
+    client = QdrantClient(url=vector_store['url'])
+    prepare_collection(client, collection_name, vector_store=vector_store)
+
+    # A full rebuild indexes once at the end instead of while the points arrive
+    loading = bulk_load(client, collection_name, vector_store) if args.bulk_load else nullcontext()
+    with loading:
+        stats = ingest_files(
+            inputs,
+            {
+                "qdrant_url": vector_store['url'],
+                "collection_name": collection_name,
+                "model_name": embedding['model_name'],
+                "device": embedding['device'],
+                "embed_batch_size": embedding.get('batch_size', 32),
+                "chunk_size": args.chunk_size,
+                "chunk_overlap": args.chunk_overlap,
+                "batch_pages": args.batch_pages,
+                "small_vector": vector_store.get('small_vector'),
+                "base_url": crawler_config['base_url'],
+                "crawl_rules": crawler_config.get('crawl_rules'),
+                "dry_run": args.dry_run,
+            },
+            workers=args.workers,
+            checkpoint_path=args.checkpoint,
+            resume=not args.restart,
+            factory=build_replay_ingester
+        )
+
+    # Counters are missing when there was nothing to replay
+    stats = {**dict.fromkeys(DIFF_COUNTERS, 0), **stats}
+    print(f"\n✅ Replayed {stats['pages']} pages ({stats['dropped']} dropped) in {stats['elapsed']:.1f}s "
+          f"({stats['pages_per_sec']:.1f} pages/sec)")
+    print(f"📊 Diff against {collection_name}:")
+    print(f"   Pages: {stats['pages_unchanged']} unchanged, {stats['pages_changed']} changed, {stats['pages_new']} new")
+    print(f"   Chunks: {stats['chunks_reused']} unchanged, {stats['chunks_embedded']} "
+          f"{'to embed' if args.dry_run else 'embedded'}, {stats['chunks_removed']} removed")
+    if not args.dry_run:
+        print(f"   Written: {stats['chunks']} chunks")
+        # Rewritten chunks lost their authority; the next crawl would only restore it for pages it visits
+        print(f"🕸️  Authority published for {publish_saved_authority(client, collection_name, args.link_graph)} pages")
+
+    Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.report, 'w') as f:
+        json.dump({"created": datetime.now().isoformat(), "collection": collection_name, "inputs": inputs,
+                   "dry_run": args.dry_run, **stats}, f, indent=2)
+    print(f"💾 Report saved to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Run the offline benchmark suite and write a JSON report.
+
+Everything runs locally: HTML pages are served from a generated (or
+recorded) corpus, Qdrant runs in memory, embeddings are hashed and the
+LLM is a stub Ollama server. Reports from two commits can be compared:
+
+    python run_benchmarks.py --output output/bench_base.json
+    git checkout my-branch
+    python run_benchmarks.py --compare output/bench_base.json
+"""
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from qdrant_client import QdrantClient
+
+from benchmarks.fixtures import TOPICS, HashEmbeddings, generate_corpus, load_corpus_paths, serve_directory, write_corpus
+from benchmarks.report import build_report, compare_reports, load_report, print_comparison, save_report
+from benchmarks.suites import bench_dupefilters, bench_pipeline, bench_query, bench_two_stage
+from src.vectorstore import sample_vectors
+
+COLLECTION_NAME = "benchmark_pages"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmarks for crawl, ingest and search')
+    parser.add_argument('--pages', type=int, default=200, help='Pages in the generated corpus')
+    parser.add_argument('--corpus', type=str, help='Directory of recorded .html pages to use instead')
+    parser.add_argument('--lookups', type=int, default=5000, help='request_seen() calls per dupefilter')
+    parser.add_argument('--queries', type=int, default=50, help='Timed RAG queries')
+    parser.add_argument('--llm-delay', type=float, default=0.0, help='Simulated seconds per LLM generation')
+    parser.add_argument('--redis-url', type=str, default='redis://localhost:6379/15', help='Redis for the Redis dupefilter (skipped if down)')
+    parser.add_argument('--real-embeddings', type=str, metavar='MODEL', help='Use this Hugging Face model instead of hashed embeddings')
+    parser.add_argument('--two-stage-dims', type=str, default='64,128,256', help='Small vector sizes for the two-stage benchmark')
+    parser.add_argument('--two-stage-method', choices=['pca', 'matryoshka'], default='pca', help='How small vectors are made')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for corpus and workloads')
+    parser.add_argument('--output', type=str, help='Report path (default: output/benchmark_<commit>.json)')
+    parser.add_argument('--compare', type=str, help='Baseline report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative change counted as a regression')
+    args = parser.parse_args()
+
+    if args.real_embeddings:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name=args.real_embeddings, model_kwargs={"device": "cpu"})
+    else:
+        embeddings = HashEmbeddings()
+    client = QdrantClient(":memory:")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            corpus_dir, paths = args.corpus, load_corpus_paths(args.corpus)
+        else:
+            corpus_dir, paths = tmp, write_corpus(generate_corpus(args.pages, seed=args.seed), tmp)
+
+        print(f"🕷️  Pipeline: {len(paths)} pages...")
+        with serve_directory(corpus_dir) as base_url:
+            pipeline = bench_pipeline(base_url, paths, client, embeddings, COLLECTION_NAME)
+            urls = [f"{base_url}/{path}" for path in paths]
+            print(f"   {pipeline['pages_per_sec']:.1f} pages/sec ({pipeline['chunks']} chunks)")
+
+            print(f"🔁 Dupefilters: {args.lookups} lookups each...")
+            dupefilters = bench_dupefilters(urls, client, COLLECTION_NAME, lookups=args.lookups,
+                                            redis_url=args.redis_url, seed=args.seed)
+            for name, result in dupefilters.items():
+                if "skipped" in result:
+                    print(f"   {name}: skipped ({result['skipped']})")
+                else:
+                    print(f"   {name}: {result['lookups_per_sec']:.0f} lookups/sec")
+
+    print(f"🔍 Query: {args.queries} queries...")
+    query = bench_query(client, embeddings, COLLECTION_NAME, num_queries=args.queries,
+                        llm_delay=args.llm_delay, seed=args.seed)
+    print(f"   p50 {query['p50_ms']:.1f}ms, p95 {query['p95_ms']:.1f}ms")
+    print(f"   search only: p50 {query['search_only']['p50_ms']:.1f}ms, p95 {query['search_only']['p95_ms']:.1f}ms")
+
+    # Fitting a d-dim PCA needs more than d vectors
+    vectors = sample_vectors(client, COLLECTION_NAME)
+    dims = [int(dim) for dim in args.two_stage_dims.split(',') if int(dim) < len(vectors)]
+    print(f"✂️  Two-stage search: {len(vectors)} vectors, dims {dims}...")
+    rng = random.Random(args.seed)
+    queries = embeddings.embed_documents([f"{rng.choice(TOPICS)} deadlines and contacts" for _ in range(args.queries)])
+    two_stage = bench_two_stage(client, vectors, queries, dims=dims, method=args.two_stage_method)
+    print(f"   full: recall {two_stage['full']['recall']:.3f}, p50 {two_stage['full']['p50_ms']:.2f}ms")
+    for dim in dims:
+        for setting, result in two_stage[f"dim_{dim}"].items():
+            print(f"   {dim}-dim {setting}: recall {result['recall']:.3f}, p50 {result['p50_ms']:.2f}ms")
+
+    params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'threshold')}
+    params["embeddings"] = args.real_embeddings or "hash-768"
+    report = build_report(params, {"pipeline": pipeline, "dupefilters": dupefilters, "query": query,
+                                 "two_stage": two_stage})
+
+    output = args.output or f"output/benchmark_{(report['commit'] or 'nogit')[:10]}.json"
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    save_report(report, output)
+    print(f"💾 Report saved to: {output}")
+
+    if args.compare:
+        baseline = load_report(args.compare)
+        rows = compare_reports(baseline, report, threshold=args.threshold)
+        print_comparison(rows, baseline, report)
+        if any(row["status"] == "regression" for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,11 +8,11 @@ import sys
 import time
 
 
-def run_crawler(crawler_name: str, config_path: str):
+def run_crawler(crawler_name: str, config_path: str, resume: bool = False):
     """Run a single crawler instance."""
     print(f"[{crawler_name}] Starting crawler with config: {config_path}")
     try:
-        crawler = CrawlerCreator(config_path)
+        crawler = CrawlerCreator(config_path, resume=resume)
         crawler.start()
         print(f"[{crawler_name}] Completed successfully")
     except Exception as e:
@@ -41,7 +41,8 @@ def main():
     for name, config_path in crawlers:
         p = multiprocessing.Process(
             target=run_crawler,
-            args=(name, config_path)
+            # Each config has its own JOBDIR, so both crawls resume independently
+            args=(name, config_path, '--resume' in sys.argv)
         )
         processes.append((name, p))
         p.start()
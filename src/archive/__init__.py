@@ -0,0 +1,8 @@
+"""Compressed, columnar crawl archive."""
+from .writer import COLUMNS, ArchiveWriter, CrawlArchivePipeline, new_run_id
+from .reader import archive_files, iter_archive, iter_file, list_runs, read_archive
+
+__all__ = [
+    'COLUMNS', 'ArchiveWriter', 'CrawlArchivePipeline', 'new_run_id',
+    'archive_files', 'iter_archive', 'iter_file', 'list_runs', 'read_archive',
+]
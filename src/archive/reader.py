@@ -0,0 +1,99 @@
+"""
+Read the crawl archive, loading only the columns asked for.
+
+Parquet segments are read column-wise with pyarrow, so e.g. listing URLs
+never decompresses page text; zstd JSONL segments are streamed frame by
+frame and projected to the requested columns.
+"""
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from .writer import COLUMNS
+
+ARCHIVE_SUFFIXES = (".parquet", ".jsonl.zst")
+
+
+def list_runs(root: str = "output/archive") -> List[str]:
+    """Run IDs in the archive, oldest first."""
+    return sorted(p.name.split("=", 1)[1] for p in Path(root).glob("run=*") if p.is_dir())
+
+
+def archive_files(root: str = "output/archive", runs: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Finished segment files of the given runs (open .tmp segments are skipped).
+
+    Args:
+        root: Archive directory
+        runs: Run IDs (default: all; "latest" selects the newest run)
+
+    Returns:
+        Paths sorted by run and file name
+    """
+    available = list_runs(root)
+    if runs is None:
+        selected = available
+    else:
+        selected = [available[-1] if run == "latest" and available else run for run in runs]
+    files = []
+    for run in selected:
+        run_dir = Path(root) / f"run={run}"
+        files.extend(sorted(str(p) for p in run_dir.iterdir() if p.name.endswith(ARCHIVE_SUFFIXES)))
+    return files
+
+
+def _iter_zst(path: str, columns: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    import zstandard
+    with open(path, "rb") as f:
+        # Each flush is its own frame; a truncated last frame (killed crawl) is skipped
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        try:
+            for line in io.TextIOWrapper(reader, encoding="utf-8"):
+                if line.strip():
+                    row = json.loads(line)
+                    yield {name: row.get(name) for name in columns}
+        except zstandard.ZstdError:
+            return
+
+
+def iter_file(path: str, columns: Optional[Sequence[str]] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Rows of one segment as dicts with only the requested columns."""
+    columns = list(columns or COLUMNS)
+    if path.endswith(".jsonl.zst"):
+        yield from _iter_zst(path, columns)
+        return
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+        yield from batch.to_pylist()
+
+
+def iter_archive(
+    root: str = "output/archive",
+    columns: Optional[Sequence[str]] = None,
+    runs: Optional[Sequence[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream archived pages.
+
+    Args:
+        root: Archive directory
+        columns: Columns to load (default: all of COLUMNS)
+        runs: Run IDs to read (default: all; "latest" for the newest)
+
+    Yields:
+        One dict per page
+    """
+    for path in archive_files(root, runs):
+        yield from iter_file(path, columns)
+
+
+def read_archive(root: str = "output/archive", columns: Optional[Sequence[str]] = None,
+                 runs: Optional[Sequence[str]] = None):
+    """Load Parquet segments into one pyarrow Table (for analytics)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    files = [path for path in archive_files(root, runs) if path.endswith(".parquet")]
+    if not files:
+        return pa.table({name: [] for name in (columns or COLUMNS)})
+    return pa.concat_tables([pq.read_table(path, columns=list(columns) if columns else None) for path in files])
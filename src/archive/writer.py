@@ -0,0 +1,225 @@
+"""
+Append-only, compressed crawl archive partitioned by crawl run.
+
+Each run writes to its own directory, output/archive/run=<run_id>/, so
+history is kept instead of being overwritten. Pages are buffered and
+flushed in row groups, and files are rotated every max_rows_per_file pages.
+Columns (url, title, text, links, spider, crawled_at) are stored
+separately, so readers that only need URLs or text never decode the rest.
+
+Parquet (zstd-compressed) is used when pyarrow is installed. A Parquet file
+is unreadable until its footer is written, so the open segment is written
+under a .tmp name and renamed when it is closed; a killed crawl loses the
+pages of that segment (up to max_rows_per_file) and readers never see it.
+Without pyarrow, segments are JSONL in independent zstd frames (one frame
+per flush), which stay readable up to the last complete frame even if the
+crawl is killed.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+COLUMNS = ("url", "title", "text", "links", "spider", "crawled_at")
+
+
+def new_run_id() -> str:
+    """Sortable UTC timestamp identifying one crawl run."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ArchiveWriter:
+    """Buffers pages and writes them as compressed columnar segments."""
+
+    def __init__(
+        self,
+        root: str = "output/archive",
+        run_id: Optional[str] = None,
+        format: str = "parquet",
+        row_group_size: int = 1000,
+        max_rows_per_file: int = 20000,
+        compression_level: int = 6,
+        name: str = "pages"
+    ):
+        """
+        Args:
+            root: Archive directory; each run gets a run=<run_id> subdirectory
+            run_id: Partition name (default: UTC start time)
+            format: "parquet", or "jsonl.zst" (also used when pyarrow is missing)
+            row_group_size: Pages buffered per flush
+            max_rows_per_file: Pages per file before starting the next one
+            compression_level: zstd level
+            name: File name prefix (e.g. the spider name)
+        """
+        if format == "parquet" and not _parquet_available():
+            print("⚠️  pyarrow not installed, archiving as zstd-compressed JSONL")
+            format = "jsonl.zst"
+        if format not in ("parquet", "jsonl.zst"):
+            raise ValueError(f"Unknown archive format: {format}")
+        self.format = format
+        self.run_id = run_id or new_run_id()
+        self.run_dir = Path(root) / f"run={self.run_id}"
+        self.row_group_size = row_group_size
+        self.max_rows_per_file = max_rows_per_file
+        self.compression_level = compression_level
+        # Host and PID keep files from concurrent spiders/processes apart
+        self.prefix = f"{name}-{socket.gethostname()}-{os.getpid()}"
+
+        self.rows = 0
+        self.files: List[str] = []
+        self._buffer: List[Dict[str, Any]] = []
+        self._file_rows = 0
+        self._part = 0
+        self._writer = None
+        self._path: Optional[Path] = None
+        self._lock = threading.Lock()
+
+    def write(self, page: Dict[str, Any]):
+        """Add one page (url, title, text, links; spider and crawled_at are optional)."""
+        row = {
+            "url": page.get("url") or "",
+            "title": page.get("title") or "",
+            "text": page.get("text") or "",
+            "links": [str(link) for link in page.get("links") or []],
+            "spider": page.get("spider") or "",
+            "crawled_at": page.get("crawled_at") or time.time(),
+        }
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Flush buffered pages and finish the open file."""
+        with self._lock:
+            self._flush()
+            self._close_file()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._writer is None:
+            self._open_file()
+        rows, self._buffer = self._buffer, []
+        if self.format == "parquet":
+            self._writer.write_table(self._table(rows))
+        else:
+            payload = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+            self._writer.write(self._compressor.compress(payload))
+            self._writer.flush()
+        self.rows += len(rows)
+        self._file_rows += len(rows)
+        if self._file_rows >= self.max_rows_per_file:
+            self._close_file()
+
+    def _open_file(self):
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        path = self.run_dir / f"{self.prefix}-{self._part:05d}.{self.format}"
+        self._part += 1
+        self._file_rows = 0
+        self._path = path
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(f"{path}.tmp", self._schema(), compression="zstd",
+                                            compression_level=self.compression_level)
+        else:
+            import zstandard
+            self._compressor = zstandard.ZstdCompressor(level=self.compression_level)
+            self._writer = open(path, "wb")
+
+    def _close_file(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            if self.format == "parquet":
+                # Finished: the footer is written, so readers may see it now
+                os.replace(f"{self._path}.tmp", self._path)
+            self.files.append(str(self._path))
+
+    @staticmethod
+    def _schema():
+        import pyarrow as pa
+        return pa.schema([
+            ("url", pa.string()),
+            ("title", pa.string()),
+            ("text", pa.large_string()),
+            ("links", pa.list_(pa.string())),
+            ("spider", pa.string()),
+            ("crawled_at", pa.timestamp("ms", tz="UTC")),
+        ])
+
+    def _table(self, rows: List[Dict[str, Any]]):
+        import pyarrow as pa
+        columns = {name: [row[name] for row in rows] for name in COLUMNS}
+        columns["crawled_at"] = [int(ts * 1000) for ts in columns["crawled_at"]]
+        return pa.table(columns, schema=self._schema())
+
+
+class CrawlArchivePipeline:
+    """
+    Append crawled pages to the archive. Runs after cleaning and
+    near-duplicate filtering, so the archive holds exactly the pages that
+    get indexed and can be re-ingested without crawling:
+        ITEM_PIPELINES = {
+            'src.archive.writer.CrawlArchivePipeline': 160,
+        }
+
+    Settings:
+        ARCHIVE_DIR: Archive root (default 'output/archive')
+        ARCHIVE_FORMAT: 'parquet' (default) or 'jsonl.zst'
+        ARCHIVE_RUN_ID: Partition name (default: crawl start time, shared by
+            spiders in the same process)
+        ARCHIVE_ROW_GROUP_SIZE: Pages per flush (default 1000)
+        ARCHIVE_MAX_ROWS_PER_FILE: Pages per file (default 20000)
+    """
+
+    _default_run_id: Optional[str] = None
+
+    def __init__(self, writer: ArchiveWriter):
+        self.writer = writer
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if cls._default_run_id is None:
+            cls._default_run_id = new_run_id()
+        return cls(ArchiveWriter(
+            root=settings.get('ARCHIVE_DIR', 'output/archive'),
+            run_id=settings.get('ARCHIVE_RUN_ID') or cls._default_run_id,
+            format=settings.get('ARCHIVE_FORMAT', 'parquet'),
+            row_group_size=settings.getint('ARCHIVE_ROW_GROUP_SIZE', 1000),
+            max_rows_per_file=settings.getint('ARCHIVE_MAX_ROWS_PER_FILE', 20000),
+            name=crawler.spidercls.name
+        ))
+
+    def process_item(self, item, spider):
+        self.writer.write({
+            "url": item.get("url"),
+            "title": item.get("title"),
+            "text": item.get("text"),
+            "links": item.get("links"),
+            "spider": spider.name,
+        })
+        return item
+
+    def close_spider(self, spider):
+        self.writer.close()
+        if self.writer.rows:
+            print(f"\n🗄️  Archived {self.writer.rows} pages to {self.writer.run_dir} ({self.writer.format})")
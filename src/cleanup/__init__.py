@@ -0,0 +1,12 @@
+"""Vector collection cleanup tools."""
+from .scanner import CollectionScanner, delete_ids, partition_bounds, read_matches
+from .rules import RULES, Record, Rule, build_rules, register_rule
+from .engine import INGEST_RULE_OPTIONS, INGEST_RULES, HygieneEngine
+from .quality import QUALITY_INDEXES, backfill_quality_fields, ensure_quality_indexes, quality_fields
+
+__all__ = [
+    'CollectionScanner', 'delete_ids', 'partition_bounds', 'read_matches',
+    'RULES', 'Record', 'Rule', 'build_rules', 'register_rule',
+    'INGEST_RULE_OPTIONS', 'INGEST_RULES', 'HygieneEngine',
+    'QUALITY_INDEXES', 'backfill_quality_fields', 'ensure_quality_indexes', 'quality_fields',
+]
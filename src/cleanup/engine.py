@@ -0,0 +1,342 @@
+"""
+Single-pass hygiene audit over a collection (or a stream of scraped items).
+
+HygieneEngine evaluates every registered rule on each record in one pass,
+keeps per-rule counts and a few examples, and plugs into CollectionScanner
+as its matcher, so one scan can audit or delete for all rules at once.
+Rules that can be expressed over the indexed quality fields can instead
+be answered by Qdrant directly (server_side), without fetching any text.
+"""
+import argparse
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from qdrant_client import QdrantClient, models
+
+from .quality import backfill_quality_fields, missing_quality_filter
+from .rules import Record, Rule, build_rules
+from .scanner import CollectionScanner, delete_ids, read_matches
+
+# Rules that make sense on scraped items before they are embedded
+INGEST_RULES = ("binary_extension", "pdf_markers", "replacement_chars", "garbled")
+# Navigation and directory text (Rm 0 · Ph 303 ...) trips the short-word
+# heuristic, so at crawl time pdf_markers only looks for the PDF markers
+INGEST_RULE_OPTIONS = {"pdf_markers": {"max_short_word_ratio": None}}
+
+
+class HygieneEngine:
+    """Evaluates a rule set and keeps per-rule counts and examples."""
+
+    def __init__(self, rules: List[Rule], examples_per_rule: int = 3):
+        """
+        Args:
+            rules: Rules in priority order; the first hit names the match
+            examples_per_rule: Examples kept per rule for the report
+        """
+        self.rules = rules
+        self.examples_per_rule = examples_per_rule
+        self.checked = 0
+        self.matched = 0
+        self.counts: Dict[str, int] = {rule.name: 0 for rule in rules}
+        self.examples: Dict[str, List[Dict[str, Any]]] = {rule.name: [] for rule in rules}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_names(cls, names: Optional[Iterable[str]] = None, options: Optional[Dict[str, Dict[str, Any]]] = None) -> "HygieneEngine":
+        return cls(build_rules(names, options))
+
+    @property
+    def payload_fields(self) -> List[str]:
+        """Union of the payload keys the rules need."""
+        fields = []
+        for rule in self.rules:
+            fields.extend(f for f in rule.payload_fields if f not in fields)
+        return fields
+
+    def evaluate(self, record: Record, rules: Optional[List[Rule]] = None, stop_at_first: bool = False) -> Optional[str]:
+        """
+        Run rules on one record.
+
+        Args:
+            record: Page or chunk to check
+            rules: Subset of self.rules to run (default: all)
+            stop_at_first: Skip the remaining rules after the first hit
+                (ingest only needs a yes/no; audits want every count)
+
+        Returns:
+            "rule_name: reason" for the first rule that fired, else None
+        """
+        hits = []
+        for rule in rules if rules is not None else self.rules:
+            reason = rule.check(record)
+            if reason:
+                hits.append((rule.name, reason))
+                if stop_at_first:
+                    break
+
+        with self._lock:
+            self.checked += 1
+            if hits:
+                self.matched += 1
+            for name, reason in hits:
+                self.counts[name] += 1
+                if len(self.examples[name]) < self.examples_per_rule:
+                    self.examples[name].append({"id": record.id, "url": record.url, "reason": reason,
+                                                "preview": record.text[:200]})
+
+        if not hits:
+            return None
+        name, reason = hits[0]
+        return f"{name}: {reason}"
+
+    def match_point(self, point: Any) -> Optional[str]:
+        """CollectionScanner matcher."""
+        return self.evaluate(Record.from_point(point))
+
+    def drain_state(self) -> List[Any]:
+        """Rule state added since the last call, as [rule name, entry] pairs (CollectionScanner checkpoints)."""
+        return [[rule.name, entry] for rule in self.rules for entry in rule.drain_state()]
+
+    def restore_state(self, entries: List[Any]):
+        by_rule: Dict[str, List[Any]] = {}
+        for name, entry in entries:
+            by_rule.setdefault(name, []).append(entry)
+        for rule in self.rules:
+            if rule.name in by_rule:
+                rule.restore_state(by_rule[rule.name])
+
+    def scan(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        delete: bool = False,
+        **scanner_kwargs
+    ) -> Dict[str, Any]:
+        """
+        Audit a whole collection in one pass (and optionally delete matches).
+
+        Args:
+            client: Qdrant client
+            collection_name: Collection to scan
+            delete: Delete matching points while scanning
+            **scanner_kwargs: Passed to CollectionScanner (workers, batch_size,
+                checkpoint_path, matches_path)
+
+        Returns:
+            The report (see report())
+        """
+        scanner = CollectionScanner(
+            client,
+            collection_name,
+            payload_fields=self.payload_fields,
+            delete=delete,
+            **scanner_kwargs
+        )
+        stats = scanner.scan(self.match_point, state=self)
+        return {**self.report(), "scan": stats}
+
+    def server_side(self, client: QdrantClient, collection_name: str, delete: bool = False) -> Dict[str, Any]:
+        """
+        Count (and optionally delete) matches with filters on the indexed
+        quality fields; nothing but counts crosses the network.
+
+        Counts are per rule, so a point matching two rules is counted twice.
+        Points ingested before the quality fields existed are reported as
+        "unindexed" and are not matched; run backfill_quality_fields first.
+
+        Args:
+            client: Qdrant client
+            collection_name: Collection to check
+            delete: Delete matching points with one filter request per rule
+
+        Returns:
+            {"rules": {name: {"count", "exact"}}, "scan_only": [names], "unindexed": n}
+        """
+        result: Dict[str, Any] = {"rules": {}, "scan_only": [], "unindexed": 0}
+        result["unindexed"] = client.count(collection_name, count_filter=missing_quality_filter(), exact=True).count
+        for rule in self.rules:
+            rule_filter = rule.to_filter()
+            if rule_filter is None:
+                result["scan_only"].append(rule.name)
+                continue
+            count = client.count(collection_name, count_filter=rule_filter, exact=True).count
+            self.counts[rule.name] = count
+            result["rules"][rule.name] = {"count": count, "exact": rule.exact_filter}
+            if delete and count:
+                client.delete(collection_name, points_selector=models.FilterSelector(filter=rule_filter), wait=True)
+        return result
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "checked": self.checked,
+            "matched": self.matched,
+            "rules": {
+                rule.name: {"count": self.counts[rule.name], "examples": self.examples[rule.name]}
+                for rule in self.rules
+            },
+        }
+
+    def print_report(self):
+        print(f"\n📊 Checked {self.checked} records, {self.matched} matched at least one rule")
+        for rule in self.rules:
+            print(f"  • {rule.name}: {self.counts[rule.name]}")
+            for example in self.examples[rule.name][:1]:
+                print(f"      e.g. {example['url'] or example['id']} ({example['reason']})")
+
+
+def load_crawled_urls(path: str) -> List[str]:
+    """URLs from a crawl output JSONL file or the latest crawl archive run (for the orphaned rule)."""
+    if os.path.isdir(path):
+        from src.archive import iter_archive
+        return [row["url"] for row in iter_archive(path, columns=["url"], runs=["latest"]) if row["url"]]
+    urls = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                url = json.loads(line).get('url')
+                if url:
+                    urls.append(url)
+    return urls
+
+
+def run_cleanup_cli(title: str, default_rules: Iterable[str], output_name: str):
+    """
+    Shared command line for the cleanup scripts.
+
+    Scans once with the given rules, writes a JSON report and the matched
+    IDs, then deletes them after confirmation (or during the scan with --yes).
+
+    Args:
+        title: Banner shown at start
+        default_rules: Rules run when --rules is not given
+        output_name: Base name for files in output/ (matches, checkpoint, report)
+    """
+    parser = argparse.ArgumentParser(description=title)
+    parser.add_argument('--rules', nargs='+', default=list(default_rules), help='Hygiene rules to run')
+    parser.add_argument('--known-urls', type=str, help='Crawl output JSONL or archive directory; chunks from other URLs count as orphaned')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel scroll workers')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Points fetched per scroll request')
+    parser.add_argument('--dry-run', action='store_true', help='Only write the report, never delete')
+    parser.add_argument('--yes', action='store_true', help='Delete while scanning, without confirmation')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an interrupted scan')
+    parser.add_argument('--server-side', action='store_true',
+                        help='Count/delete with filters on the indexed quality fields instead of scanning text')
+    parser.add_argument('--backfill', action='store_true', help='Add quality fields to points ingested without them first')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"🧹 {title}")
+    print("=" * 70)
+
+    try:
+        with open('config_llm.json', 'r') as f:
+            config = json.load(f)
+        collection_name = config['vector_store']['collection_name']
+        qdrant_url = config['vector_store']['url']
+    except FileNotFoundError:
+        print("⚠️  config_llm.json not found, using defaults")
+        collection_name = "cuboulder_pages"
+        qdrant_url = "http://localhost:6333"
+
+    print(f"\n📍 Configuration:")
+    print(f"   Collection: {collection_name}")
+    print(f"   Qdrant URL: {qdrant_url}")
+    print(f"   Rules: {', '.join(args.rules)}")
+    print()
+
+    options = {}
+    if args.known_urls:
+        options["orphaned"] = {"known_urls": load_crawled_urls(args.known_urls)}
+    engine = HygieneEngine.from_names(args.rules, options)
+    client = QdrantClient(url=qdrant_url)
+
+    if args.backfill:
+        updated = backfill_quality_fields(client, collection_name)
+        print(f"✅ Added quality fields to {updated} vectors")
+    if args.server_side:
+        _run_server_side(engine, client, collection_name, args.dry_run, args.yes)
+        return
+
+    matches_path = f"output/{output_name}.jsonl"
+    checkpoint_path = f"output/{output_name}.checkpoint.json"
+    report_path = f"output/{output_name}_report.json"
+    if args.restart:
+        Path(checkpoint_path).unlink(missing_ok=True)
+
+    report = engine.scan(
+        client,
+        collection_name,
+        delete=args.yes and not args.dry_run,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_path=checkpoint_path,
+        matches_path=matches_path
+    )
+    engine.print_report()
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\n💾 Report saved to '{report_path}', matched IDs in '{matches_path}'")
+
+    matched = report["scan"]["matched"]
+    if not matched:
+        print("\n🎉 Nothing matched! Your collection is clean.")
+        return
+    if args.dry_run:
+        print(f"\n🔍 DRY RUN MODE - would delete {matched} vectors")
+        return
+    if args.yes:
+        print(f"\n✅ Cleanup complete! Deleted {report['scan']['deleted']} vectors")
+        return
+
+    print(f"\n⚠️  WARNING: This will delete {matched} vectors from your collection!")
+    response = input("\nDo you want to proceed with deletion? (yes/no): ").strip().lower()
+    if response not in ['yes', 'y']:
+        print("\n❌ Deletion cancelled.")
+        return
+
+    deleted = 0
+    batch = []
+    for match in read_matches(matches_path):
+        batch.append(match['id'])
+        if len(batch) >= 1000:
+            delete_ids(client, collection_name, batch)
+            deleted += len(batch)
+            batch = []
+    if batch:
+        delete_ids(client, collection_name, batch)
+        deleted += len(batch)
+    print(f"\n✅ Cleanup complete! Deleted {deleted} vectors")
+
+
+def _run_server_side(engine: HygieneEngine, client: QdrantClient, collection_name: str, dry_run: bool, yes: bool):
+    """--server-side mode of run_cleanup_cli."""
+    result = engine.server_side(client, collection_name)
+    print(f"\n📊 Server-side counts (no text transferred):")
+    for name, info in result["rules"].items():
+        note = "" if info["exact"] else " (filter covers part of the rule)"
+        print(f"  • {name}: {info['count']}{note}")
+    if result["scan_only"]:
+        print(f"  ℹ️  Need a full scan: {', '.join(result['scan_only'])}")
+    if result["unindexed"]:
+        print(f"  ⚠️  {result['unindexed']} vectors have no quality fields; run with --backfill to include them")
+
+    total = sum(info["count"] for info in result["rules"].values())
+    if not total:
+        print("\n🎉 Nothing matched! Your collection is clean.")
+        return
+    if dry_run:
+        print(f"\n🔍 DRY RUN MODE - would delete up to {total} vectors")
+        return
+    if not yes:
+        print(f"\n⚠️  WARNING: This will delete up to {total} vectors from your collection!")
+        response = input("\nDo you want to proceed with deletion? (yes/no): ").strip().lower()
+        if response not in ['yes', 'y']:
+            print("\n❌ Deletion cancelled.")
+            return
+    before = client.count(collection_name, exact=True).count
+    engine.server_side(client, collection_name, delete=True)
+    deleted = before - client.count(collection_name, exact=True).count
+    print(f"\n✅ Cleanup complete! Deleted {deleted} vectors")
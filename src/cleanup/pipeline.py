@@ -0,0 +1,50 @@
+"""Scrapy pipeline applying the hygiene rules to scraped items at ingest time."""
+from scrapy.exceptions import DropItem
+
+from .engine import INGEST_RULE_OPTIONS, INGEST_RULES, HygieneEngine
+from .rules import Record
+
+
+class HygienePipeline:
+    """
+    Drop scraped items that a hygiene rule rejects.
+
+    Runs the same rules as the collection cleanup, so bad pages never get
+    embedded. Add after DataCleaningPipeline:
+        ITEM_PIPELINES = {
+            'src.cleanup.pipeline.HygienePipeline': 150,
+        }
+
+    Settings:
+        HYGIENE_RULES: Rule names to apply (default: INGEST_RULES)
+        HYGIENE_RULE_OPTIONS: Per-rule constructor arguments (replace INGEST_RULE_OPTIONS per rule)
+        HYGIENE_TEXT_FIELD: Item field holding the text (default 'text')
+    """
+
+    def __init__(self, rules=INGEST_RULES, options=None, text_field='text'):
+        self.engine = HygieneEngine.from_names(rules, {**INGEST_RULE_OPTIONS, **(options or {})})
+        self.text_field = text_field
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            rules=settings.getlist('HYGIENE_RULES') or INGEST_RULES,
+            options=settings.getdict('HYGIENE_RULE_OPTIONS'),
+            text_field=settings.get('HYGIENE_TEXT_FIELD', 'text')
+        )
+
+    def process_item(self, item, spider):
+        reason = self.engine.evaluate(Record.from_item(item, self.text_field), stop_at_first=True)
+        if reason:
+            raise DropItem(f"{reason} ({item.get('url', 'unknown')})")
+        return item
+
+    def close_spider(self, spider):
+        engine = self.engine
+        if engine.checked:
+            breakdown = ", ".join(f"{name} {count}" for name, count in engine.counts.items() if count)
+            spider.logger.info(
+                f"Hygiene Pipeline: Checked {engine.checked} items, dropped {engine.matched} "
+                f"({engine.matched / engine.checked * 100:.1f}%){': ' + breakdown if breakdown else ''}"
+            )
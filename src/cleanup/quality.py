@@ -0,0 +1,111 @@
+"""
+Compact, indexed quality fields stored with every chunk.
+
+VectorDatabasePipeline adds these to each chunk's metadata at ingest, so
+most hygiene rules can be expressed as a Qdrant filter (see
+Rule.to_filter) and answered with a server-side count or
+delete(filter=...) instead of pulling page_content for every point.
+Chunks ingested before the fields existed can be brought up to date with
+backfill_quality_fields.
+"""
+from typing import Any, Dict, Optional
+
+from qdrant_client import QdrantClient, models
+from tqdm import tqdm
+
+from .rules import PDF_INDICATORS, content_hash, non_ascii_ratio, replacement_ratio, url_extension
+
+# Payload keys (under "metadata", LangChain layout) and their index types
+QUALITY_INDEXES = {
+    "metadata.url": models.PayloadSchemaType.KEYWORD,
+    "metadata.url_ext": models.PayloadSchemaType.KEYWORD,
+    "metadata.content_hash": models.PayloadSchemaType.KEYWORD,
+    "metadata.content_length": models.PayloadSchemaType.INTEGER,
+    "metadata.replacement_ratio": models.PayloadSchemaType.FLOAT,
+    "metadata.non_ascii_ratio": models.PayloadSchemaType.FLOAT,
+    "metadata.alnum_ratio": models.PayloadSchemaType.FLOAT,
+    "metadata.pdf_markers": models.PayloadSchemaType.BOOL,
+}
+
+
+def quality_fields(url: str, text: str) -> Dict[str, Any]:
+    """
+    Quality signals for one chunk, rounded to keep the payload small.
+
+    Args:
+        url: Source page URL
+        text: Chunk text as stored in page_content
+
+    Returns:
+        Dict merged into the chunk's metadata
+    """
+    length = len(text)
+    alnum = sum(1 for c in text if c.isalnum() or c.isspace()) / length if length else 0.0
+    return {
+        "content_length": length,
+        "replacement_ratio": round(replacement_ratio(text), 4),
+        "non_ascii_ratio": round(non_ascii_ratio(text), 4),
+        "alnum_ratio": round(alnum, 4),
+        "url_ext": url_extension(url),
+        "pdf_markers": any(indicator in text for indicator in PDF_INDICATORS),
+        "content_hash": content_hash(text),
+    }
+
+
+def ensure_quality_indexes(client: QdrantClient, collection_name: str):
+    """Create payload indexes for the quality fields (no-op for existing ones)."""
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field_name, schema in QUALITY_INDEXES.items():
+        if field_name not in existing:
+            client.create_payload_index(collection_name, field_name=field_name, field_schema=schema)
+
+
+def missing_quality_filter() -> models.Filter:
+    """Points ingested before quality fields were added."""
+    return models.Filter(must=[models.IsEmptyCondition(is_empty=models.PayloadField(key="metadata.content_hash"))])
+
+
+def backfill_quality_fields(client: QdrantClient, collection_name: str, batch_size: int = 500,
+                            limit: Optional[int] = None) -> int:
+    """
+    Compute quality fields for points that don't have them yet.
+
+    Args:
+        client: Qdrant client
+        collection_name: Collection to update
+        batch_size: Points per scroll request
+        limit: Stop after this many points (None = all)
+
+    Returns:
+        Number of points updated
+    """
+    total = client.count(collection_name, count_filter=missing_quality_filter(), exact=True).count
+    if limit is not None:
+        total = min(total, limit)
+    updated = 0
+    with tqdm(total=total, desc="Backfilling quality fields") as pbar:
+        while updated < total:
+            # Updated points drop out of the filter, so always read the first page
+            points, _ = client.scroll(
+                collection_name,
+                scroll_filter=missing_quality_filter(),
+                limit=min(batch_size, total - updated),
+                with_payload=models.PayloadSelectorInclude(include=["page_content", "metadata.url"]),
+                with_vectors=False
+            )
+            if not points:
+                break
+            operations = []
+            for point in points:
+                payload = point.payload or {}
+                url = (payload.get("metadata") or {}).get("url", "")
+                operations.append(models.SetPayloadOperation(set_payload=models.SetPayload(
+                    payload=quality_fields(url, payload.get("page_content", "")),
+                    points=[point.id],
+                    key="metadata"
+                )))
+            # One request per batch; wait so the next scroll no longer sees these points
+            client.batch_update_points(collection_name, update_operations=operations, wait=True)
+            updated += len(points)
+            pbar.update(len(points))
+    return updated
@@ -0,0 +1,336 @@
+"""
+Hygiene rules for crawled pages and stored chunks.
+
+Each rule looks at one record (URL + text) and returns a short reason when
+the record should not be in the vector store. Rules are registered by name
+in RULES, so the cleanup scripts, the collection-wide audit and the Scrapy
+ingest pipeline all share one implementation and one set of thresholds.
+"""
+import hashlib
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from qdrant_client import models
+
+# File extensions that should not be in a text vector store
+INVALID_EXTENSIONS = (
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.zip', '.tar', '.gz', '.rar', '.7z',
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.bmp', '.webp',
+    '.mp4', '.mp3', '.avi', '.mov', '.wmv', '.flv', '.wav',
+    '.exe', '.dmg', '.pkg', '.deb', '.rpm',
+    '.csv', '.xml', '.json'  # These might be okay, but usually not useful for RAG
+)
+
+# Common patterns in PDF text extraction that indicate binary/corrupted content
+PDF_INDICATORS = (
+    'application/pdf',
+    '%PDF-',
+    'stream\nendstream',
+    '/Type /Page',
+    '/Contents ',
+    'obj\nendobj',
+)
+
+REPLACEMENT_CHAR = '�'
+
+
+@dataclass
+class Record:
+    """What a rule sees: a crawled page or a stored chunk."""
+    url: str
+    text: str
+    id: Any = None
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_point(cls, point: Any) -> "Record":
+        """Build from a Qdrant point in the LangChain payload layout."""
+        payload = point.payload or {}
+        metadata = payload.get('metadata') or {}
+        return cls(url=metadata.get('url', ''), text=payload.get('page_content', ''), id=point.id, payload=payload)
+
+    @classmethod
+    def from_item(cls, item: Dict[str, Any], text_field: str = 'text') -> "Record":
+        """Build from a scraped item."""
+        return cls(url=item.get('url', '') or '', text=item.get(text_field, '') or '')
+
+
+def url_extension(url: str) -> str:
+    """Blocked file extension in url (also before ?query or #fragment), or ''."""
+    url_lower = url.lower()
+    for ext in INVALID_EXTENSIONS:
+        if url_lower.endswith(ext) or f'{ext}?' in url_lower or f'{ext}#' in url_lower:
+            return ext
+    return ''
+
+
+def replacement_ratio(text: str, include_control: bool = True) -> float:
+    """Share of replacement (and control) characters in text."""
+    if not text:
+        return 0.0
+    bad = text.count(REPLACEMENT_CHAR)
+    if include_control:
+        bad += sum(1 for c in text if ord(c) < 32 and c not in '\n\r\t')
+    return bad / len(text)
+
+
+def non_ascii_ratio(text: str) -> float:
+    if not text:
+        return 0.0
+    return sum(1 for c in text if ord(c) > 127) / len(text)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation/digits and collapse whitespace for duplicate detection."""
+    return ' '.join(re.sub(r'[\W\d_]+', ' ', text.lower()).split())
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class Rule:
+    """
+    Base class for hygiene rules.
+
+    Attributes:
+        name: Registry key and report label
+        ingest: Whether the rule applies to scraped items at crawl time
+        url_only: Whether the rule only needs the URL (can run before cleaning)
+        payload_fields: Payload keys a collection scan must fetch for this rule
+        exact_filter: Whether to_filter() matches exactly what check() does
+    """
+
+    name = ""
+    ingest = True
+    url_only = False
+    payload_fields = ("page_content", "metadata.url")
+    exact_filter = True
+
+    def check(self, record: Record) -> Optional[str]:
+        """Return a reason if the record should be removed, else None."""
+        raise NotImplementedError
+
+    def drain_state(self) -> List[Any]:
+        """JSON entries of the state added since the last call, for a resumable scan."""
+        return []
+
+    def restore_state(self, entries: List[Any]):
+        """Reload entries from drain_state() after a resume."""
+
+    def to_filter(self) -> Optional[models.Filter]:
+        """
+        Qdrant filter over the indexed quality fields (see cleanup.quality)
+        selecting the points this rule removes, or None if the rule needs
+        the text (or state across records) and can only run in a scan.
+        """
+        return None
+
+
+def _metadata_range(key: str, **range_kwargs) -> models.FieldCondition:
+    return models.FieldCondition(key=f"metadata.{key}", range=models.Range(**range_kwargs))
+
+
+RULES: Dict[str, Type[Rule]] = {}
+
+
+def register_rule(cls: Type[Rule]) -> Type[Rule]:
+    """Class decorator adding a rule to the registry under its name."""
+    RULES[cls.name] = cls
+    return cls
+
+
+@register_rule
+class BinaryExtensionRule(Rule):
+    """URL points to a PDF, image, archive or other non-HTML file."""
+
+    name = "binary_extension"
+    url_only = True
+    payload_fields = ("metadata.url",)
+
+    def check(self, record: Record) -> Optional[str]:
+        ext = url_extension(record.url)
+        return f"URL has {ext} extension" if ext else None
+
+    def to_filter(self) -> Optional[models.Filter]:
+        return models.Filter(must=[
+            models.FieldCondition(key="metadata.url_ext", match=models.MatchAny(any=list(INVALID_EXTENSIONS)))
+        ])
+
+
+@register_rule
+class PdfMarkerRule(Rule):
+    """Text extracted from a PDF/binary stream rather than an HTML page."""
+
+    name = "pdf_markers"
+    # The short-word heuristic needs the text; the filter only covers the markers
+    exact_filter = False
+
+    def __init__(self, max_short_word_ratio: Optional[float] = 0.4):
+        """
+        Args:
+            max_short_word_ratio: Drop text whose first 100 words are mostly
+                1-2 characters long (None = only check the markers)
+        """
+        self.max_short_word_ratio = max_short_word_ratio
+
+    def check(self, record: Record) -> Optional[str]:
+        text = record.text
+        if not text:
+            return None
+        for indicator in PDF_INDICATORS:
+            if indicator in text:
+                return f"Contains PDF indicator: {indicator[:20]!r}"
+
+        # PDFs extracted as text often have many short "words" separated by spaces
+        if self.max_short_word_ratio is None:
+            return None
+        words = text.split()
+        if len(words) > 50:
+            sample = words[:100]
+            short_words = sum(1 for w in sample if len(w) <= 2)
+            if short_words / len(sample) > self.max_short_word_ratio:
+                return "Too many short words (likely binary)"
+        return None
+
+    def to_filter(self) -> Optional[models.Filter]:
+        return models.Filter(must=[models.FieldCondition(key="metadata.pdf_markers", match=models.MatchValue(value=True))])
+
+
+@register_rule
+class ReplacementCharRule(Rule):
+    """Encoding errors: too many replacement (and control) characters."""
+
+    name = "replacement_chars"
+
+    def __init__(self, max_ratio: float = 0.05):
+        self.max_ratio = max_ratio
+
+    def check(self, record: Record) -> Optional[str]:
+        ratio = replacement_ratio(record.text)
+        return f"{ratio:.0%} replacement/control characters" if ratio > self.max_ratio else None
+
+    def to_filter(self) -> Optional[models.Filter]:
+        return models.Filter(must=[_metadata_range("replacement_ratio", gt=self.max_ratio)])
+
+
+@register_rule
+class GarbledTextRule(Rule):
+    """Empty, too short, mostly non-ASCII or mostly symbols."""
+
+    name = "garbled"
+
+    def __init__(self, min_length: int = 50, max_non_ascii: float = 0.3, min_alnum: float = 0.8):
+        self.min_length = min_length
+        self.max_non_ascii = max_non_ascii
+        self.min_alnum = min_alnum
+
+    def check(self, record: Record) -> Optional[str]:
+        text = record.text
+        if not text or len(text) < self.min_length:
+            return f"Shorter than {self.min_length} characters"
+        ratio = non_ascii_ratio(text)
+        if ratio > self.max_non_ascii:
+            return f"{ratio:.0%} non-ASCII characters"
+        alnum = sum(1 for c in text if c.isalnum() or c.isspace()) / len(text)
+        if alnum < self.min_alnum:
+            return f"Only {alnum:.0%} letters, digits and spaces"
+        return None
+
+    def to_filter(self) -> Optional[models.Filter]:
+        return models.Filter(should=[
+            _metadata_range("content_length", lt=self.min_length),
+            _metadata_range("non_ascii_ratio", gt=self.max_non_ascii),
+            _metadata_range("alnum_ratio", lt=self.min_alnum),
+        ])
+
+
+@register_rule
+class NearDuplicateRule(Rule):
+    """
+    Same content as a record seen earlier in the pass (after normalizing
+    case, punctuation, digits and whitespace); the first copy is kept.
+
+    The first copy's ID is kept with each hash, so a record checked again
+    after a resume is not a duplicate of itself.
+    """
+
+    name = "near_duplicate"
+    ingest = False
+
+    def __init__(self):
+        self._seen: Dict[str, Any] = {}
+        self._new: List[List[Any]] = []
+        self._lock = threading.Lock()
+
+    def check(self, record: Record) -> Optional[str]:
+        if not record.text:
+            return None
+        # Chunks ingested with quality fields carry the hash already
+        digest = (record.payload.get('metadata') or {}).get('content_hash') or content_hash(record.text)
+        with self._lock:
+            if digest in self._seen:
+                first = self._seen[digest]
+                return None if record.id is not None and first == record.id else "Duplicate content"
+            self._seen[digest] = record.id
+            self._new.append([digest, record.id])
+        return None
+
+    def drain_state(self) -> List[Any]:
+        with self._lock:
+            entries, self._new = self._new, []
+        return entries
+
+    def restore_state(self, entries: List[Any]):
+        with self._lock:
+            for digest, first in entries:
+                self._seen.setdefault(digest, first)
+
+
+@register_rule
+class OrphanedChunkRule(Rule):
+    """
+    Chunk not attached to a page: no URL/metadata, or (when known_urls is
+    given, e.g. from the latest crawl output) a URL that no longer exists.
+    """
+
+    name = "orphaned"
+    ingest = False
+    payload_fields = ("metadata.url",)
+
+    def __init__(self, known_urls: Optional[Iterable[str]] = None):
+        self.known_urls = set(known_urls) if known_urls is not None else None
+
+    def check(self, record: Record) -> Optional[str]:
+        if not record.url:
+            return "No source URL"
+        if self.known_urls is not None and record.url not in self.known_urls:
+            return "URL not in latest crawl"
+        return None
+
+    def to_filter(self) -> Optional[models.Filter]:
+        if self.known_urls is not None:
+            return None
+        return models.Filter(must=[models.IsEmptyCondition(is_empty=models.PayloadField(key="metadata.url"))])
+
+
+def build_rules(names: Optional[Iterable[str]] = None, options: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Rule]:
+    """
+    Instantiate rules by name.
+
+    Args:
+        names: Rule names in evaluation order (default: all registered rules)
+        options: Per-rule constructor arguments, e.g. {"garbled": {"min_length": 100}}
+
+    Returns:
+        Rule instances
+    """
+    options = options or {}
+    names = list(names) if names is not None else list(RULES)
+    unknown = [name for name in names if name not in RULES]
+    if unknown:
+        raise KeyError(f"Unknown hygiene rules: {unknown} (available: {sorted(RULES)})")
+    return [RULES[name](**options.get(name, {})) for name in names]
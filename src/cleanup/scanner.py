@@ -0,0 +1,331 @@
+"""
+Parallel, resumable full-collection scan for cleanup jobs.
+
+Point IDs are ordered by Qdrant (integer IDs first, then UUIDs by value),
+so the UUID space is split into equal ranges and each range is scrolled by
+its own worker thread; the first range also covers integer IDs. Only the
+payload fields a check needs are fetched. Each worker's scroll offset is
+checkpointed to disk after every batch, matches are streamed to a JSONL
+file instead of being kept in memory, and matched IDs can be deleted by a
+background thread with filter-based deletes while the scan continues.
+"""
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from qdrant_client import QdrantClient, models
+from tqdm import tqdm
+
+UUID_SPACE = 2 ** 128
+
+# A check returns a reason string for points that should be removed, else None
+Matcher = Callable[[Any], Optional[str]]
+
+
+def partition_bounds(partitions: int) -> List[Optional[str]]:
+    """
+    Split the UUID space into ranges.
+
+    Returns:
+        partitions + 1 boundaries; range i is [bounds[i], bounds[i+1]). The
+        first start is None (scroll from the beginning, including integer
+        IDs) and the last end is None (scroll to the end).
+    """
+    bounds: List[Optional[str]] = [None]
+    for i in range(1, partitions):
+        bounds.append(str(uuid.UUID(int=UUID_SPACE * i // partitions)))
+    bounds.append(None)
+    return bounds
+
+
+def _id_key(point_id: Any):
+    """Sort key matching Qdrant's ID order: integers before UUIDs."""
+    if isinstance(point_id, int):
+        return (0, point_id)
+    return (1, uuid.UUID(str(point_id)).int)
+
+
+def read_matches(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream match records written by CollectionScanner, once per point.
+
+    A batch re-scanned after a resume may have been recorded already.
+    """
+    seen = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                match = json.loads(line)
+                if match["id"] not in seen:
+                    seen.add(match["id"])
+                    yield match
+
+
+def delete_ids(client: QdrantClient, collection_name: str, ids: Sequence[Any], wait: bool = True):
+    """Delete points with one filter-based request."""
+    client.delete(
+        collection_name=collection_name,
+        points_selector=models.FilterSelector(
+            filter=models.Filter(must=[models.HasIdCondition(has_id=list(ids))])
+        ),
+        wait=wait
+    )
+
+
+class CollectionScanner:
+    """Scans a collection in parallel ID ranges and reports/deletes matching points."""
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        payload_fields: Sequence[str] = ("page_content", "metadata.url"),
+        batch_size: int = 1000,
+        workers: int = 4,
+        checkpoint_path: Optional[str] = None,
+        matches_path: str = "output/cleanup_matches.jsonl",
+        delete: bool = False,
+        delete_batch_size: int = 1000
+    ):
+        """
+        Args:
+            client: Qdrant client
+            collection_name: Collection to scan
+            payload_fields: Payload keys to fetch (dotted paths allowed)
+            batch_size: Points per scroll request
+            workers: Parallel scroll workers (= ID ranges)
+            checkpoint_path: JSON file for per-range offsets; enables resume
+            matches_path: JSONL file that receives one record per match
+            delete: Delete matches while scanning
+            delete_batch_size: IDs per delete request
+        """
+        self.client = client
+        self.collection_name = collection_name
+        self.payload_fields = list(payload_fields)
+        self.batch_size = batch_size
+        self.workers = max(workers, 1)
+        self.checkpoint_path = checkpoint_path
+        self.matches_path = matches_path
+        self.delete = delete
+        self.delete_batch_size = delete_batch_size
+
+        self._lock = threading.Lock()
+        self._state: Dict[str, Any] = {}
+        self._matcher_state: Optional[Any] = None
+        # IDs already in the matches file when resuming
+        self._recorded: set = set()
+        self._deletes: "queue.Queue[Optional[List[Any]]]" = queue.Queue(maxsize=16)
+        self._delete_error: Optional[Exception] = None
+        self.stats = {"scanned": 0, "matched": 0, "deleted": 0, "reasons": {}}
+
+    def scan(self, matcher: Matcher, resume: bool = True, state: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Run matcher over every point in the collection.
+
+        Args:
+            matcher: Called with each point (id + selected payload); returns
+                a reason string for points to remove, else None
+            resume: Continue from the checkpoint file if it matches this scan
+            state: Matcher state that has to survive a resume (drain_state()
+                and restore_state(), e.g. HygieneEngine's near-duplicate
+                hashes); appended to <checkpoint>.state.jsonl after every batch
+
+        Returns:
+            Stats: scanned, matched, deleted, per-reason counts, elapsed;
+            matched includes the matches recorded before a resume
+
+        Raises:
+            RuntimeError: A delete request failed; the checkpoint is kept, so
+                the next run resumes and deletes the recorded matches again
+        """
+        start_time = time.time()
+        self._matcher_state = state
+        self._recorded = set()
+        self._state = self._load_checkpoint() if resume else {}
+        resumed = bool(self._state)
+        if not resumed:
+            self._state = {
+                "collection": self.collection_name,
+                "partitions": [
+                    {"start": start, "end": end, "offset": start, "done": False, "scanned": 0}
+                    for start, end in zip(partition_bounds(self.workers)[:-1], partition_bounds(self.workers)[1:])
+                ],
+            }
+            # A fresh scan starts a fresh matches file
+            Path(self.matches_path).parent.mkdir(parents=True, exist_ok=True)
+            open(self.matches_path, 'w').close()
+            if self.state_path:
+                Path(self.state_path).unlink(missing_ok=True)
+        else:
+            print(f"↩️  Resuming scan from {self.checkpoint_path}")
+            if state is not None and os.path.exists(self.state_path):
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state.restore_state([json.loads(line) for line in f if line.strip()])
+
+        partitions = self._state["partitions"]
+        already_scanned = sum(p["scanned"] for p in partitions)
+        total = self.client.count(collection_name=self.collection_name, exact=False).count
+
+        deleter = None
+        if self.delete:
+            deleter = threading.Thread(target=self._delete_worker, name="cleanup-deleter", daemon=True)
+            deleter.start()
+        if resumed:
+            # Matches from the interrupted run count towards this scan, and
+            # may not have been deleted yet
+            self._load_recorded_matches()
+
+        try:
+            with open(self.matches_path, 'a', encoding='utf-8') as matches, \
+                    tqdm(total=total, initial=already_scanned, desc="Scanning vectors") as pbar, \
+                    ThreadPoolExecutor(max_workers=len(partitions), thread_name_prefix="scan") as pool:
+                futures = [
+                    pool.submit(self._scan_partition, partition, matcher, matches, pbar)
+                    for partition in partitions if not partition["done"]
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            # Let queued deletes finish, even if a worker failed
+            if deleter is not None:
+                self._deletes.put(None)
+                deleter.join()
+        if self._delete_error is not None:
+            raise RuntimeError(f"Deleting matches failed ({self.stats['delete_failed']} not deleted), "
+                               f"rerun to resume: {self._delete_error}") from self._delete_error
+
+        self.stats["elapsed"] = time.time() - start_time
+        self.stats["matches_path"] = self.matches_path
+        if self.checkpoint_path and all(p["done"] for p in partitions):
+            # Finished: a later run should start over, not resume a completed scan
+            Path(self.checkpoint_path).unlink(missing_ok=True)
+            Path(self.state_path).unlink(missing_ok=True)
+        return self.stats
+
+    @property
+    def state_path(self) -> Optional[str]:
+        return f"{self.checkpoint_path}.state.jsonl" if self.checkpoint_path else None
+
+    def _scan_partition(self, partition: Dict[str, Any], matcher: Matcher, matches, pbar):
+        end_key = _id_key(partition["end"]) if partition["end"] else None
+        offset = partition["offset"]
+        pending_deletes: List[Any] = []
+
+        while self._delete_error is None:
+            points, next_offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=models.PayloadSelectorInclude(include=self.payload_fields),
+                with_vectors=False
+            )
+            if end_key is not None:
+                points = [point for point in points if _id_key(point.id) < end_key]
+                if next_offset is not None and _id_key(next_offset) >= end_key:
+                    next_offset = None
+
+            lines = []
+            for point in points:
+                reason = matcher(point)
+                # A batch re-scanned after a resume may have been recorded (and queued for deletion) already
+                if reason and point.id not in self._recorded:
+                    payload = point.payload or {}
+                    url = (payload.get("metadata") or {}).get("url", payload.get("url", ""))
+                    lines.append(json.dumps({"id": point.id, "url": url, "reason": reason}) + "\n")
+                    pending_deletes.append(point.id)
+                    with self._lock:
+                        self.stats["reasons"][reason] = self.stats["reasons"].get(reason, 0) + 1
+
+            if self.delete and (len(pending_deletes) >= self.delete_batch_size or next_offset is None):
+                if pending_deletes:
+                    self._deletes.put(pending_deletes)
+                pending_deletes = []
+            elif not self.delete:
+                pending_deletes = []
+
+            with self._lock:
+                # Matches are on disk before the offset moves past them
+                matches.writelines(lines)
+                matches.flush()
+                self.stats["scanned"] += len(points)
+                self.stats["matched"] += len(lines)
+                partition["scanned"] += len(points)
+                partition["offset"] = next_offset
+                partition["done"] = next_offset is None
+                self._save_matcher_state()
+                self._save_checkpoint()
+            pbar.update(len(points))
+
+            if next_offset is None:
+                return
+            offset = next_offset
+
+    def _load_recorded_matches(self):
+        batch = []
+        for match in read_matches(self.matches_path):
+            self._recorded.add(match["id"])
+            self.stats["matched"] += 1
+            reasons = self.stats["reasons"]
+            reasons[match["reason"]] = reasons.get(match["reason"], 0) + 1
+            if not self.delete:
+                continue
+            batch.append(match["id"])
+            if len(batch) >= self.delete_batch_size:
+                self._deletes.put(batch)
+                batch = []
+        if batch:
+            self._deletes.put(batch)
+
+    def _delete_worker(self):
+        # Never stop before the None sentinel: scan threads block on a full queue
+        while True:
+            ids = self._deletes.get()
+            if ids is None:
+                return
+            for i in range(0, len(ids), self.delete_batch_size):
+                batch = ids[i:i + self.delete_batch_size]
+                if self._delete_error is None:
+                    try:
+                        delete_ids(self.client, self.collection_name, batch)
+                    except Exception as e:
+                        print(f"❌ Deleting {len(batch)} matches failed: {e}")
+                        self._delete_error = e
+                with self._lock:
+                    if self._delete_error is None:
+                        self.stats["deleted"] += len(batch)
+                    else:
+                        # After a failure the rest is only drained
+                        self.stats["delete_failed"] = self.stats.get("delete_failed", 0) + len(batch)
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("collection") != self.collection_name or len(state.get("partitions", [])) != self.workers:
+            print(f"⚠️  Checkpoint {self.checkpoint_path} is for a different scan, starting over")
+            return {}
+        return state
+
+    def _save_matcher_state(self):
+        if not self.checkpoint_path or self._matcher_state is None:
+            return
+        entries = self._matcher_state.drain_state()
+        if entries:
+            # Appended, not rewritten: it grows with the collection
+            with open(self.state_path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.checkpoint_path)
@@ -1,4 +1,5 @@
 import json
+import shutil
 from pathlib import Path
 from typing import Dict, Any
 from scrapy.crawler import CrawlerProcess
@@ -8,8 +9,15 @@ from .university_crawler import UniversitySpider
 
 class CrawlerCreator:
     def __init__(self, config_path: str = 'config.json', *args, **kwargs):
+        """
+        Args:
+            config_path: Crawler config JSON
+            pagecount: Stop after this many pages (keyword, optional)
+            resume: Continue the job saved in JOBDIR instead of starting over (keyword, default False)
+        """
         self.args = args
         self.kwargs = kwargs
+        self.config_path = config_path
         self.config = self._load_config(config_path)
         self.settings = self._build_scrapy_settings()
     
@@ -52,9 +60,52 @@ class CrawlerCreator:
             'qdrant': 'src.filters.qdrant_dupefilter.QdrantDupeFilter',
         }
         
+        # HTTP cache backend: 'sqlite' (default), 'filesystem', or a storage class path
+        httpcache_storage = {
+            'sqlite': 'src.crawlers.httpcache.SQLiteCacheStorage',
+            'filesystem': 'scrapy.extensions.httpcache.FilesystemCacheStorage',
+        }
+        storage = config_settings.get('HTTPCACHE_STORAGE', 'sqlite')
+
         # Determine crawl order: BFS (breadth-first) or DFS (depth-first, default)
         use_bfs = config_settings.get('USE_BFS', False)
+
+        # Job state (frontier, spider state, dupefilter session) lives here so a crawl can be
+        # paused and resumed; one directory per config so concurrent crawlers don't collide
+        jobdir = config_settings.get('JOBDIR', f"output/jobs/{Path(self.config_path).stem}")
+        if jobdir:
+            settings.set('JOBDIR', jobdir)
         
+        item_pipelines = {
+            'src.pipeline.DataCleaningPipeline': 100,
+            'src.pipeline.EmbeddingPipeline': 200,
+            'src.pipeline.VectorDatabasePipeline': 300,
+        }
+        # Drop near-duplicate pages before they are embedded (see src/filters/near_duplicate.py);
+        # opt-in until the content check has been validated on a full crawl
+        if config_settings.get('NEAR_DUPLICATE_ENABLED', False):
+            item_pipelines['src.filters.near_duplicate.NearDuplicatePipeline'] = 150
+        # Append pages to the compressed crawl archive, one partition per run (see src/archive)
+        if config_settings.get('ARCHIVE_ENABLED', True):
+            item_pipelines['src.archive.writer.CrawlArchivePipeline'] = 160
+        # Record out-links in the link graph and publish authority scores (see src/graph)
+        if config_settings.get('LINK_GRAPH_ENABLED', True):
+            item_pipelines['src.graph.authority.LinkGraphPipeline'] = 170
+        # Opt-in binary float32 sidecar of the chunk vectors (see src/vectorstore/sidecar.py)
+        if config_settings.get('VECTOR_SIDECAR_ENABLED', False):
+            item_pipelines['src.vectorstore.sidecar.VectorSidecarPipeline'] = 250
+
+        # The uncompressed JSONL feed is overwritten every run; the archive keeps history
+        feeds = {}
+        if config_settings.get('JSONL_FEED_ENABLED', False):
+            feeds['output/crawled_pages.jsonl'] = {
+                'format': 'jsonlines',
+                'encoding': 'utf8',
+                'overwrite': True,
+                # Vectors and raw links stay out of the text feed unless asked for
+                'fields': config_settings.get('JSONL_FEED_FIELDS', ['url', 'title', 'text']),
+            }
+
         if self.kwargs.get('pagecount', None):
             settings.setdict({
                 'CLOSESPIDER_PAGECOUNT': self.kwargs.get('pagecount', 30) + 1
@@ -76,10 +127,14 @@ class CrawlerCreator:
             'HTTPCACHE_ENABLED': config_settings.get('HTTPCACHE_ENABLED', True),
             'HTTPCACHE_EXPIRATION_SECS': config_settings.get('HTTPCACHE_EXPIRATION_SECS', 86400),
             'HTTPCACHE_DIR': config_settings.get('HTTPCACHE_DIR', 'httpcache'),
+            # One zstd-compressed, content-addressed SQLite file instead of a file tree per response
+            'HTTPCACHE_STORAGE': httpcache_storage.get(storage, storage),
+            'HTTPCACHE_MAX_SIZE_MB': config_settings.get('HTTPCACHE_MAX_SIZE_MB', 4096),
             'BASE_URL': self.config['base_url'],
             # BFS/DFS Configuration
             'DEPTH_PRIORITY': 1 if use_bfs else 0,  # 1 = BFS (breadth-first), 0 = DFS (depth-first)
-            'SCHEDULER_DISK_QUEUE': 'scrapy.squeues.PickleFifoDiskQueue' if use_bfs else 'scrapy.squeues.PickleLifoDiskQueue',
+            # With JOBDIR, pending requests are kept on disk as compressed records
+            'SCHEDULER_DISK_QUEUE': 'src.crawlers.squeues.CompressedPickleFifoDiskQueue' if use_bfs else 'src.crawlers.squeues.CompressedPickleLifoDiskQueue',
             'SCHEDULER_MEMORY_QUEUE': 'scrapy.squeues.FifoMemoryQueue' if use_bfs else 'scrapy.squeues.LifoMemoryQueue',
             # Shared duplicate filter for multi-spider coordination
             'DUPEFILTER_CLASS': dupefilter_mapping.get(dupefilter_class, dupefilter_mapping['redis']),
@@ -89,26 +144,58 @@ class CrawlerCreator:
             'DUPEFILTER_KEY_PREFIX': config_settings.get('DUPEFILTER_KEY_PREFIX', 'scrapy:dupefilter'),
             'QDRANT_URL': config_settings.get('QDRANT_URL', 'http://localhost:6333'),
             'QDRANT_COLLECTION': config_settings.get('QDRANT_COLLECTION', 'cuboulder_pages'),
+            # vector_store section (quantization, on-disk vectors, HNSW) used to create the collection
+            'VECTOR_STORE_CONFIG': config_settings.get('VECTOR_STORE_CONFIG', 'config_llm.json'),
+            # URL canonicalization shared by the dupefilters, spider and vector store
+            'URL_STRIP_PARAMS': config_settings.get('URL_STRIP_PARAMS', []),
+            'URL_FORCE_HTTPS': config_settings.get('URL_FORCE_HTTPS', True),
+            'URL_ALIASES_PATH': config_settings.get('URL_ALIASES_PATH', 'output/url_aliases.db'),
             # Configure item pipelines
-            'ITEM_PIPELINES': {
-                'src.pipeline.DataCleaningPipeline': 100,
-                'src.pipeline.EmbeddingPipeline': 200,
-                'src.pipeline.VectorDatabasePipeline': 300,
-            },
-            # Add feeds export for saving results
-            'FEEDS': {
-                'output/crawled_pages.jsonl': {
-                    'format': 'jsonlines',
-                    'encoding': 'utf8',
-                    'overwrite': True,
-                },
+            'ITEM_PIPELINES': item_pipelines,
+            'NEAR_DUPLICATE_DB_PATH': config_settings.get('NEAR_DUPLICATE_DB_PATH', 'output/near_duplicates.db'),
+            'NEAR_DUPLICATE_MAX_DISTANCE': config_settings.get('NEAR_DUPLICATE_MAX_DISTANCE', 3),
+            'NEAR_DUPLICATE_MIN_LENGTH': config_settings.get('NEAR_DUPLICATE_MIN_LENGTH', 200),
+            'NEAR_DUPLICATE_MAX_NEW_WORDS': config_settings.get('NEAR_DUPLICATE_MAX_NEW_WORDS', 20),
+            # Crawl throughput metrics and optional profiler (see src/crawlers/metrics.py)
+            'EXTENSIONS': {
+                'src.crawlers.metrics.CrawlMetrics': 500,
             },
+            'CRAWL_METRICS_ENABLED': config_settings.get('CRAWL_METRICS_ENABLED', True),
+            'CRAWL_METRICS_INTERVAL': config_settings.get('CRAWL_METRICS_INTERVAL', 10),
+            'CRAWL_METRICS_PORT': config_settings.get('CRAWL_METRICS_PORT'),
+            'CRAWL_METRICS_JSON_PATH': config_settings.get('CRAWL_METRICS_JSON_PATH', 'output/crawl_metrics.jsonl'),
+            'CRAWL_PROFILE': config_settings.get('CRAWL_PROFILE'),
+            'CRAWL_PROFILE_OUTPUT': config_settings.get('CRAWL_PROFILE_OUTPUT'),
+            'ARCHIVE_DIR': config_settings.get('ARCHIVE_DIR', 'output/archive'),
+            'ARCHIVE_FORMAT': config_settings.get('ARCHIVE_FORMAT', 'parquet'),
+            'ARCHIVE_RUN_ID': config_settings.get('ARCHIVE_RUN_ID'),
+            'LINK_GRAPH_PATH': config_settings.get('LINK_GRAPH_PATH', 'output/link_graph.npz'),
+            'LINK_GRAPH_PUBLISH': config_settings.get('LINK_GRAPH_PUBLISH', True),
+            'VECTOR_SIDECAR_DIR': config_settings.get('VECTOR_SIDECAR_DIR', 'output/vectors'),
+            # Optional JSONL feed export for saving results
+            'FEEDS': feeds,
         })
         
         return settings
     
+    @property
+    def jobdir(self):
+        return self.settings.get('JOBDIR')
+
+    @property
+    def resuming(self) -> bool:
+        """True if this run continues a saved job (callers must then keep the dupefilter state)."""
+        return bool(self.kwargs.get('resume') and self.jobdir and Path(self.jobdir).exists())
+
     def start(self):
         """Start the crawler process."""
+        if self.resuming:
+            print(f"⏯️  Resuming crawl from {self.jobdir}")
+        elif self.jobdir and Path(self.jobdir).exists():
+            # A fresh crawl must not pick up the frontier of an earlier one
+            shutil.rmtree(self.jobdir)
+        if self.jobdir:
+            print(f"💾 Crawl state is saved in {self.jobdir}; stop with a single Ctrl-C and rerun with --resume to continue")
         process = CrawlerProcess(self.settings)
         process.crawl(
             UniversitySpider,
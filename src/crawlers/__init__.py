@@ -1,5 +1,6 @@
 """Web crawler modules."""
 from .university_crawler import UniversitySpider
 from .CrawlerCreator import CrawlerCreator
+from .items import PageItem
 
-__all__ = ['UniversitySpider', 'CrawlerCreator']
+__all__ = ['UniversitySpider', 'CrawlerCreator', 'PageItem']
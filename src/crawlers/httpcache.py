@@ -0,0 +1,454 @@
+"""
+Single-file, compressed, deduplicating storage for Scrapy's HTTP cache.
+
+Scrapy's default FilesystemCacheStorage writes a directory with seven files
+per response, so a full crawl leaves millions of small uncompressed files
+and every lookup is a handful of os.stat/open calls. SQLiteCacheStorage
+keeps the whole cache in one SQLite file (WAL mode, shared by concurrent
+crawlers like the SQLite dupefilter):
+
+- bodies are zstd-compressed (zlib if zstandard is missing) and stored once
+  per content hash, so identical pages under different URLs share a row;
+- entries older than HTTPCACHE_EXPIRATION_SECS and, above
+  HTTPCACHE_MAX_SIZE_MB of compressed bodies, the least recently used
+  entries are evicted when a spider opens and closes;
+- retrieve_many and iter_cache_rows read many responses in bulk
+  (replay_cache.py re-extracts a crawl from them, see src/ingest/replay.py);
+- a cache left by FilesystemCacheStorage (<dir>/<spider name>/) is imported
+  once, when the SQLite file doesn't exist yet (migrate_filesystem_cache).
+
+Enable with:
+    HTTPCACHE_STORAGE = 'src.crawlers.httpcache.SQLiteCacheStorage'
+"""
+import gzip
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from scrapy.http import Headers, Request, Response
+from scrapy.responsetypes import responsetypes
+from scrapy.settings import Settings
+from scrapy.utils.project import data_path
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+CODEC_ZLIB = 0
+CODEC_ZSTD = 1
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS responses (
+        fingerprint TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        method TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        response_url TEXT NOT NULL,
+        headers BLOB NOT NULL,
+        body_hash BLOB NOT NULL,
+        timestamp REAL NOT NULL,
+        last_access REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS responses_timestamp ON responses (timestamp);
+    CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+    CREATE INDEX IF NOT EXISTS responses_body ON responses (body_hash);
+    CREATE TABLE IF NOT EXISTS bodies (
+        hash BLOB PRIMARY KEY,
+        codec INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        raw_size INTEGER NOT NULL,
+        size INTEGER NOT NULL
+    );
+'''
+
+
+class _Codec:
+    """zstd when available, zlib otherwise; each body records which one wrote it."""
+
+    def __init__(self, level: int = 3):
+        try:
+            import zstandard
+        except ImportError:
+            zstandard = None
+        self.zstd = zstandard
+        self.level = level
+        if zstandard is not None:
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> Tuple[int, bytes]:
+        if self.zstd is not None:
+            return CODEC_ZSTD, self._compressor.compress(data)
+        return CODEC_ZLIB, zlib.compress(data, min(self.level * 2, 9))
+
+    def decompress(self, codec: int, data: bytes) -> bytes:
+        if codec == CODEC_ZSTD:
+            if self.zstd is None:
+                raise RuntimeError("Cache entry is zstd-compressed but zstandard is not installed")
+            return self._decompressor.decompress(data)
+        return zlib.decompress(data)
+
+
+def _decode_content(response: Response) -> Response:
+    """
+    Undo gzip/deflate Content-Encoding like HttpCompressionMiddleware.
+
+    Responses are cached before that middleware runs, so the cache holds
+    the bodies as sent; readers outside the crawl must decode them.
+    """
+    encoding = response.headers.get('Content-Encoding', b'').lower()
+    if encoding in (b'gzip', b'x-gzip'):
+        body = gzip.decompress(response.body)
+    elif encoding == b'deflate':
+        try:
+            body = zlib.decompress(response.body)
+        except zlib.error:
+            body = zlib.decompress(response.body, -zlib.MAX_WBITS)  # raw deflate
+    else:
+        return response
+    headers = response.headers.copy()
+    del headers['Content-Encoding']
+    respcls = responsetypes.from_args(headers=headers, url=response.url, body=body)
+    return response.replace(cls=respcls, headers=headers, body=body)
+
+
+def _to_response(codec: _Codec, row: tuple) -> Tuple[Response, float]:
+    """Build a Response from (_, status, url, raw headers, timestamp, codec, data)."""
+    _, status, url, raw_headers, timestamp, body_codec, data = row
+    headers = Headers(headers_raw_to_dict(raw_headers))
+    body = codec.decompress(body_codec, data)
+    respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+    return respcls(url=url, status=status, headers=headers, body=body), timestamp
+
+
+class SQLiteCacheStorage:
+    """Scrapy HTTPCACHE_STORAGE backed by one SQLite file per spider name."""
+
+    def __init__(self, settings):
+        """
+        Settings:
+            HTTPCACHE_DIR: Cache directory (the file is <dir>/<spider name>.sqlite)
+            HTTPCACHE_EXPIRATION_SECS: Entry TTL (0 = never expire)
+            HTTPCACHE_MAX_SIZE_MB: Compressed body budget before LRU eviction (0 = unlimited)
+            HTTPCACHE_COMPRESSION_LEVEL: zstd level (default 3)
+        """
+        self.cachedir = data_path(settings['HTTPCACHE_DIR'], createdir=True)
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self.max_size = settings.getint('HTTPCACHE_MAX_SIZE_MB', 0) * 1024 * 1024
+        self.codec = _Codec(settings.getint('HTTPCACHE_COMPRESSION_LEVEL', 3))
+        self.conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Cache hits; last_access is written in batches instead of on every read
+        self._accessed: Dict[str, float] = {}
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "deduplicated": 0}
+
+    def open_spider(self, spider):
+        self.db_path = Path(self.cachedir) / f"{spider.name}.sqlite"
+        imported = migrate_filesystem_cache(self.cachedir, spider.name)
+        if imported:
+            spider.logger.info(f"HTTP cache: imported {imported['imported']} responses from {imported['path']}")
+        self.open(self.db_path)
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        evicted = self.evict()
+        if any(evicted.values()):
+            spider.logger.info(f"HTTP cache: evicted {evicted['expired']} expired and {evicted['lru']} LRU entries")
+
+    def open(self, db_path):
+        """Open (or create) the cache file; open_spider calls this."""
+        self.conn = sqlite3.connect(str(db_path), timeout=30.0, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close_spider(self, spider):
+        self.evict()
+        self.close()
+
+    def close(self):
+        if self.conn is None:
+            return
+        self._flush_access()
+        self.conn.close()
+        self.conn = None
+
+    def _fingerprint(self, request: Request) -> str:
+        return self._fingerprinter.fingerprint(request).hex()
+
+    def retrieve_response(self, spider, request: Request) -> Optional[Response]:
+        """Return the cached response, or None if missing or expired."""
+        responses = self.retrieve_many([request])
+        return responses[0]
+
+    def retrieve_many(self, requests: Sequence[Request]) -> List[Optional[Response]]:
+        """
+        Look up many requests with one query.
+
+        Returns:
+            One cached Response (or None) per request, in order
+        """
+        fingerprints = [self._fingerprint(request) for request in requests]
+        rows = self._load(fingerprints)
+        results = []
+        for request, fingerprint in zip(requests, fingerprints):
+            row = rows.get(fingerprint)
+            if row is None:
+                self.stats["misses"] += 1
+                results.append(None)
+                continue
+            response, timestamp = _to_response(self.codec, row)
+            request.meta['cache_timestamp'] = timestamp
+            self.stats["hits"] += 1
+            results.append(response)
+        return results
+
+    def _load(self, fingerprints: Sequence[str]) -> Dict[str, tuple]:
+        rows = {}
+        now = time()
+        with self._lock:
+            for start in range(0, len(fingerprints), 500):
+                batch = fingerprints[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                for row in self.conn.execute(
+                    f'''SELECT r.fingerprint, r.status, r.response_url, r.headers, r.timestamp, b.codec, b.data
+                        FROM responses r JOIN bodies b ON b.hash = r.body_hash
+                        WHERE r.fingerprint IN ({placeholders})''',
+                    batch
+                ):
+                    if 0 < self.expiration_secs < now - row[4]:
+                        continue  # expired
+                    rows[row[0]] = row
+                    self._accessed[row[0]] = now
+            if len(self._accessed) >= 1000:
+                self._flush_access()
+        return rows
+
+    def store_response(self, spider, request: Request, response: Response):
+        """Store a response; its body is shared with any identical cached body."""
+        self.store(self._fingerprint(request), request.url, request.method, response)
+
+    def store(self, fingerprint: str, url: str, method: str, response: Response, timestamp: Optional[float] = None):
+        body_hash = hashlib.blake2b(response.body, digest_size=16).digest()
+        headers = headers_dict_to_raw(response.headers)
+        timestamp = timestamp or time()
+        with self._lock:
+            # Checked first only to skip compressing a known body: another process
+            # sharing the cache can still insert it before we do
+            inserted = 0
+            if not self.conn.execute('SELECT 1 FROM bodies WHERE hash = ?', (body_hash,)).fetchone():
+                codec, data = self.codec.compress(response.body)
+                inserted = self.conn.execute(
+                    'INSERT OR IGNORE INTO bodies (hash, codec, data, raw_size, size) VALUES (?, ?, ?, ?, ?)',
+                    (body_hash, codec, data, len(response.body), len(data))
+                ).rowcount
+            if not inserted:
+                self.stats["deduplicated"] += 1
+            self.conn.execute(
+                '''INSERT OR REPLACE INTO responses
+                   (fingerprint, url, method, status, response_url, headers, body_hash, timestamp, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (fingerprint, url, method, response.status, response.url, headers, body_hash, timestamp, timestamp)
+            )
+            self.conn.commit()
+        self.stats["stored"] += 1
+
+    def _flush_access(self):
+        if self._accessed and self.conn is not None:
+            self.conn.executemany(
+                'UPDATE responses SET last_access = ? WHERE fingerprint = ?',
+                [(ts, fp) for fp, ts in self._accessed.items()]
+            )
+            self.conn.commit()
+        self._accessed = {}
+
+    def evict(self) -> Dict[str, int]:
+        """
+        Drop expired entries, then least recently used ones while the
+        compressed bodies exceed the size budget, then unreferenced bodies.
+
+        Returns:
+            {"expired": n, "lru": n, "bodies": n}
+        """
+        evicted = {"expired": 0, "lru": 0, "bodies": 0}
+        with self._lock:
+            self._flush_access()
+            if self.expiration_secs > 0:
+                evicted["expired"] = self.conn.execute(
+                    'DELETE FROM responses WHERE timestamp < ?', (time() - self.expiration_secs,)
+                ).rowcount
+            evicted["bodies"] = self._delete_orphaned_bodies()
+            if self.max_size:
+                total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM bodies').fetchone()[0]
+                while total > self.max_size:
+                    # Least recently used entries until their bodies cover the excess
+                    victims, freed = [], 0
+                    for fingerprint, size in self.conn.execute(
+                        '''SELECT r.fingerprint, b.size FROM responses r JOIN bodies b ON b.hash = r.body_hash
+                           ORDER BY r.last_access'''
+                    ):
+                        victims.append((fingerprint,))
+                        freed += size
+                        if freed >= total - self.max_size:
+                            break
+                    if not victims:
+                        break
+                    self.conn.executemany('DELETE FROM responses WHERE fingerprint = ?', victims)
+                    evicted["lru"] += len(victims)
+                    evicted["bodies"] += self._delete_orphaned_bodies()
+                    total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM bodies').fetchone()[0]
+            self.conn.commit()
+        return evicted
+
+    def _delete_orphaned_bodies(self) -> int:
+        return self.conn.execute(
+            'DELETE FROM bodies WHERE hash NOT IN (SELECT body_hash FROM responses)'
+        ).rowcount
+
+    def size_stats(self) -> Dict[str, int]:
+        """Entry count, unique bodies and raw vs stored bytes."""
+        with self._lock:
+            entries = self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            bodies, raw, stored = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(size), 0) FROM bodies'
+            ).fetchone()
+        return {"entries": entries, "bodies": bodies, "raw_bytes": raw, "stored_bytes": stored}
+
+
+def cache_rowid_range(db_path: str) -> Tuple[int, int]:
+    """[first, last + 1) rowids of the cached responses, for splitting a replay into shards."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        first, last = conn.execute('SELECT MIN(rowid), MAX(rowid) FROM responses').fetchone()
+    finally:
+        conn.close()
+    return (0, 0) if first is None else (first, last + 1)
+
+
+def iter_cache_rows(db_path: str, start: int = 0, end: Optional[int] = None, batch_size: int = 500,
+                    expiration_secs: int = 0) -> Iterator[Tuple[int, str, Response]]:
+    """
+    Stream cached GET responses with rowids in [start, end), in rowid order.
+
+    Args:
+        db_path: <HTTPCACHE_DIR>/<spider name>.sqlite
+        start, end: Rowid range (end None = to the last row)
+        batch_size: Rows fetched per round trip
+        expiration_secs: Skip entries older than this (0 = all)
+
+    Yields:
+        (rowid, requested URL, Response)
+    """
+    codec = _Codec()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(
+            '''SELECT r.url, r.status, r.response_url, r.headers, r.timestamp, b.codec, b.data, r.rowid
+               FROM responses r JOIN bodies b ON b.hash = r.body_hash
+               WHERE r.method = 'GET' AND r.timestamp >= ? AND r.rowid >= ? AND r.rowid < ?
+               ORDER BY r.rowid''',
+            (time() - expiration_secs if expiration_secs else 0, start, end if end is not None else 2 ** 63 - 1)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                response, _ = _to_response(codec, row[:7])
+                try:
+                    response = _decode_content(response)
+                except (OSError, EOFError, zlib.error):
+                    continue  # truncated or corrupt body
+                # Tie it to its request like a downloaded response (response.meta works)
+                response.request = Request(row[0])
+                yield row[7], row[0], response
+    finally:
+        conn.close()
+
+
+def iter_cached_responses(db_path: str, batch_size: int = 500,
+                          expiration_secs: int = 0) -> Iterator[Tuple[str, Response]]:
+    """
+    Stream every cached response of a cache file in bulk.
+
+    Args:
+        db_path: <HTTPCACHE_DIR>/<spider name>.sqlite
+        batch_size: Rows fetched per round trip
+        expiration_secs: Skip entries older than this (0 = all)
+
+    Yields:
+        (requested URL, Response)
+    """
+    for _, url, response in iter_cache_rows(db_path, batch_size=batch_size, expiration_secs=expiration_secs):
+        yield url, response
+
+
+def import_filesystem_cache(fs_dir: str, db_path: str) -> Dict[str, int]:
+    """
+    Copy a FilesystemCacheStorage cache (<fp[:2]>/<fp>/ per entry) into a SQLite cache file.
+
+    Entries keep their fingerprint and timestamp, so the crawler still hits
+    them and expiry is unchanged. Bodies are stored as they were cached.
+
+    Args:
+        fs_dir: <HTTPCACHE_DIR>/<spider name>
+        db_path: SQLite cache file (created if missing)
+
+    Returns:
+        {"imported": entries copied, "skipped": incomplete entries}
+    """
+    storage = SQLiteCacheStorage(Settings({'HTTPCACHE_DIR': str(Path(db_path).resolve().parent)}))
+    storage.open(db_path)
+    counts = {"imported": 0, "skipped": 0}
+    try:
+        for meta_path in sorted(Path(fs_dir).glob('*/*/pickled_meta')):
+            entry = meta_path.parent
+            try:
+                # HTTPCACHE_GZIP caches gzip every file
+                with open(meta_path, 'rb') as f:
+                    opener = gzip.open if f.read(2) == b'\x1f\x8b' else open
+                with opener(meta_path, 'rb') as f:
+                    meta = pickle.load(f)
+                with opener(entry / 'response_headers', 'rb') as f:
+                    headers = Headers(headers_raw_to_dict(f.read()))
+                with opener(entry / 'response_body', 'rb') as f:
+                    body = f.read()
+            except (OSError, EOFError, pickle.UnpicklingError):
+                # A crawl killed mid-write leaves entries without all their files
+                counts["skipped"] += 1
+                continue
+            url = meta['response_url']
+            respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+            response = respcls(url=url, status=meta['status'], headers=headers, body=body)
+            storage.store(entry.name, meta['url'], meta['method'], response, timestamp=meta['timestamp'])
+            counts["imported"] += 1
+    finally:
+        storage.close()
+    return counts
+
+
+def migrate_filesystem_cache(cachedir: str, spider_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Import <cachedir>/<spider name>/ into <cachedir>/<spider name>.sqlite, once.
+
+    Does nothing if the SQLite file already exists or there is no
+    filesystem cache (the storage default changed from filesystem to SQLite).
+
+    Returns:
+        import_filesystem_cache counts plus "path", or None if nothing was imported
+    """
+    fs_dir = Path(cachedir) / spider_name
+    db_path = Path(cachedir) / f"{spider_name}.sqlite"
+    if db_path.exists() or next(fs_dir.glob('*/*/pickled_meta'), None) is None:
+        return None
+    # Written under a temporary name so an interrupted import is retried
+    tmp_path = db_path.with_name(f"{db_path.name}.{os.getpid()}.tmp")
+    try:
+        counts = import_filesystem_cache(str(fs_dir), str(tmp_path))
+        os.replace(tmp_path, db_path)
+    finally:
+        for leftover in (tmp_path, Path(f"{tmp_path}-wal"), Path(f"{tmp_path}-shm")):
+            leftover.unlink(missing_ok=True)
+    return {**counts, "path": str(fs_dir)}
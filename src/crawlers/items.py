@@ -0,0 +1,50 @@
+"""
+Item type yielded by the spiders.
+
+Pages used to travel through the pipelines as plain dicts, with
+EmbeddingPipeline attaching a list of {"text", "embedding"} dicts holding
+768 boxed Python floats per chunk. PageItem uses __slots__ and keeps the
+chunk vectors as one contiguous float32 matrix, about a tenth of the memory
+of the equivalent lists. It supports the dict-style access the pipelines
+already use (item['url'], item.get('title')), and Scrapy's ItemAdapter
+handles it as a dataclass, so feed exports can select fields from it.
+"""
+from dataclasses import dataclass, field, fields
+from typing import Any, List, Optional
+
+import numpy as np
+
+
+@dataclass(slots=True)
+class PageItem:
+    """One crawled page and, after EmbeddingPipeline, its chunks and vectors."""
+
+    url: str
+    title: Optional[str] = None
+    text: str = ''
+    links: List[str] = field(default_factory=list)
+    # Chunk texts and their (len(chunks), dim) float32 vectors, set by EmbeddingPipeline
+    chunks: List[str] = field(default_factory=list)
+    vectors: Optional[np.ndarray] = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self:
+            raise KeyError(f"PageItem has no field {key!r}")
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELD_NAMES
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self else default
+
+    def keys(self) -> List[str]:
+        return list(_FIELD_NAMES)
+
+
+_FIELD_NAMES = tuple(f.name for f in fields(PageItem))
@@ -0,0 +1,179 @@
+"""
+Crawl throughput metrics as a Scrapy extension.
+
+Stage timings are recorded into the "crawl" metrics registry by the
+spider (parse), the downloader (download latency) and the item pipelines
+(clean, chunk, embed, upsert). This extension adds queue depth, requests
+in flight and items/sec gauges on a fixed interval, and exports
+everything via a Prometheus endpoint and/or a periodic JSON dump, so a
+slow crawl can be attributed to download delay, cleaning, embedding or
+Qdrant writes. It can also run a profiler for the length of the crawl.
+
+Settings:
+    CRAWL_METRICS_ENABLED: Turn the extension on (default True)
+    CRAWL_METRICS_INTERVAL: Seconds between gauge updates/dumps (default 10)
+    CRAWL_METRICS_PORT: Serve /metrics in Prometheus format on this port
+    CRAWL_METRICS_JSON_PATH: Append a JSON snapshot here every interval
+    CRAWL_PROFILE: "cprofile" or "sample" to profile the crawl
+    CRAWL_PROFILE_OUTPUT: Profile output path (default output/crawl_profile.<ext>)
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+from ..utils.metrics import MetricsRegistry, get_registry, record
+from ..utils.profiler import Profiler
+
+
+def serve_metrics(registry: MetricsRegistry, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve registry.render_prometheus() on http://host:port/metrics from a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="crawl-metrics", daemon=True).start()
+    return server
+
+
+class CrawlMetrics:
+    """Scrapy extension publishing crawl stage timings, queue depth and rates."""
+
+    def __init__(self, crawler, interval: float = 10.0, port: Optional[int] = None,
+                 json_path: Optional[str] = None, profile: Optional[str] = None,
+                 profile_output: Optional[str] = None):
+        self.crawler = crawler
+        self.registry = get_registry("crawl")
+        self.interval = interval
+        self.port = port
+        self.json_path = json_path
+        self.server = None
+        self.task = None
+
+        self.profiler = None
+        if profile:
+            extension = "prof" if profile == "cprofile" else "folded"
+            self.profiler = Profiler(profile, profile_output or f"output/crawl_profile.{extension}")
+
+        self._last_time = 0.0
+        self._last_counts = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('CRAWL_METRICS_ENABLED', True):
+            raise NotConfigured
+        extension = cls(
+            crawler,
+            interval=settings.getfloat('CRAWL_METRICS_INTERVAL', 10.0),
+            port=settings.getint('CRAWL_METRICS_PORT') or None,
+            json_path=settings.get('CRAWL_METRICS_JSON_PATH'),
+            profile=settings.get('CRAWL_PROFILE'),
+            profile_output=settings.get('CRAWL_PROFILE_OUTPUT'),
+        )
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(extension.item_dropped, signal=signals.item_dropped)
+        return extension
+
+    def spider_opened(self, spider):
+        if self.port:
+            try:
+                self.server = serve_metrics(self.registry, self.port)
+                print(f"📈 Crawl metrics at http://localhost:{self.port}/metrics")
+            except OSError as e:
+                print(f"⚠️  Could not serve crawl metrics on port {self.port}: {e}")
+        if self.profiler is not None:
+            self.profiler.start()
+
+        self._last_time = time.time()
+        self.task = task.LoopingCall(self.update)
+        self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.update()
+
+        if self.profiler is not None:
+            print(f"🔬 Crawl profile written to {self.profiler.stop()}")
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+        self.print_summary()
+
+    def response_received(self, response, request, spider):
+        self.registry.increment("responses")
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            record("download", latency, self.registry)
+
+    def item_scraped(self, item, response, spider):
+        self.registry.increment("items")
+
+    def item_dropped(self, item, response, exception, spider):
+        self.registry.increment("items_dropped")
+
+    def update(self):
+        """Refresh gauges (queue depth, in flight, rates) and write the JSON dump."""
+        now = time.time()
+        elapsed = max(now - self._last_time, 1e-9)
+        counters = dict(self.registry.counters)
+        for name in ("responses", "items"):
+            delta = counters.get(name, 0) - self._last_counts.get(name, 0)
+            self.registry.set_gauge(f"{name}_per_second", delta / elapsed)
+        self._last_counts = counters
+        self._last_time = now
+
+        engine = self.crawler.engine
+        if engine is not None:
+            scheduler = self._scheduler(engine)
+            if scheduler is not None:
+                self.registry.set_gauge("queue_depth", len(scheduler))
+            self.registry.set_gauge("requests_in_flight", len(engine.downloader.active))
+
+        if self.json_path:
+            Path(self.json_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.json_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.registry.snapshot()) + "\n")
+
+    @staticmethod
+    def _scheduler(engine):
+        # Scrapy 2.13 (pinned) keeps the scheduler on the engine's private
+        # _slot, older releases on engine.slot; use a public one if present
+        scheduler = getattr(engine, 'scheduler', None)
+        if scheduler is None:
+            slot = getattr(engine, '_slot', None) or getattr(engine, 'slot', None)
+            scheduler = getattr(slot, 'scheduler', None)
+        return scheduler
+
+    def print_summary(self):
+        """Print where crawl time went, per stage."""
+        snapshot = self.registry.snapshot()
+        if not snapshot["stages"]:
+            return
+        total = sum(stage["sum"] for stage in snapshot["stages"].values()) or 1.0
+        print("\n📊 Crawl stage timings:")
+        for name, stage in sorted(snapshot["stages"].items(), key=lambda s: s[1]["sum"], reverse=True):
+            mean = stage["sum"] / stage["count"] if stage["count"] else 0.0
+            print(f"    • {name}: {stage['count']} calls, {stage['sum']:.1f}s "
+                  f"({stage['sum'] / total * 100:.1f}%), {mean * 1000:.1f}ms mean")
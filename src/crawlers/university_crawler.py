@@ -1,8 +1,14 @@
+import time
+
 import scrapy
 from scrapy.linkextractors import LinkExtractor
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from urllib.parse import urlparse
 
+from ..filters.canonicalize import URLCanonicalizer, get_canonicalizer
+from .items import PageItem
+from ..utils.metrics import get_registry, record
+
 class UniversitySpider(scrapy.Spider):
     """Spider that crawls an entire university website by following links."""
     name = 'university_crawler'
@@ -34,17 +40,46 @@ class UniversitySpider(scrapy.Spider):
             deny=tuple(crawl_rules.get('deny_patterns', [])),
             unique=True
         )
+        self._canonicalizer = None
+
+    @property
+    def canonicalizer(self):
+        """URL canonicalizer shared with the dupefilter (see src/filters/canonicalize.py)."""
+        if self._canonicalizer is None:
+            # Spiders built outside a crawler (e.g. the benchmarks) have no settings
+            settings = getattr(self, 'settings', None)
+            self._canonicalizer = get_canonicalizer(settings) if settings is not None else URLCanonicalizer()
+        return self._canonicalizer
     
-    def parse(self, response):
-        """Parse each page, extract content, and follow links."""
-        
+    async def start(self):
+        """Seed the crawl with start_urls, unless resuming a job (JOBDIR) that already did."""
+        # spider.state is persisted in JOBDIR by Scrapy's SpiderState extension
+        state = getattr(self, 'state', None)
+        if state is not None:
+            if state.get('seeded'):
+                self.logger.info('Resuming from the saved frontier; not re-requesting start URLs')
+                return
+            state['seeded'] = True
+        for url in self.start_urls:
+            yield scrapy.Request(url, dont_filter=True)
+
+    def extract(self, response) -> Optional[PageItem]:
+        """
+        Page item of an HTML response, without following its links.
+
+        Used by parse and by the HTTP cache replay (src/ingest/replay.py),
+        so both extract pages the same way.
+
+        Returns:
+            PageItem, or None for non-HTML content
+        """
         # Check content type - only process HTML
         content_type = response.headers.get('Content-Type', b'').decode('utf-8', errors='ignore').lower()
         
         # Skip non-HTML content (PDFs, images, documents, etc.)
         if not any(html_type in content_type for html_type in ['text/html', 'text/plain', 'application/xhtml']):
             self.logger.warning(f'Skipping non-HTML content: {response.url} (Content-Type: {content_type})')
-            return
+            return None
         
         # Additional URL-based filtering for PDFs and other files
         url_lower = response.url.lower()
@@ -54,19 +89,35 @@ class UniversitySpider(scrapy.Spider):
         
         if any(url_lower.endswith(ext) for ext in skip_extensions):
             self.logger.warning(f'Skipping file with blocked extension: {response.url}')
-            return
+            return None
         
+        # Learn redirect / rel=canonical aliases; the item is stored under the canonical URL
+        canonical_url, _ = self.canonicalizer.learn_from_response(response)
+
         # Extract text content
-        page_data = {
-            'url': response.url,
-            'title': response.css('title::text').get(),
-            'text': ' '.join(response.css('body *::text').getall()),
-            'links': response.css('a::attr(href)').getall(),
-        }
+        return PageItem(
+            url=canonical_url,
+            title=response.css('title::text').get(),
+            text=' '.join(response.css('body *::text').getall()),
+            # Absolute hrefs; LinkGraphPipeline turns them into link-graph edges
+            links=[response.urljoin(href) for href in response.css('a::attr(href)').getall()],
+        )
+
+    def parse(self, response):
+        """Parse each page, extract content, and follow links."""
+        start_time = time.perf_counter()
+        
+        page_data = self.extract(response)
+        if page_data is None:
+            return
+        
+        links = self.link_extractor.extract_links(response)
+        # Time extraction only; time spent in pipelines after yield is theirs
+        record("parse", time.perf_counter() - start_time, get_registry("crawl"))
         
         self.logger.info(f'Scraped: {response.url}')
         yield page_data
         
         # Extract and follow links
-        for link in self.link_extractor.extract_links(response):
+        for link in links:
             yield scrapy.Request(link.url, callback=self.parse)
@@ -9,19 +9,22 @@ logging.getLogger('sentence_transformers').setLevel(logging.ERROR)
 logging.getLogger('httpx').setLevel(logging.ERROR)
 os.environ['TOKENIZERS_PARALLELISM'] = 'false'
 
+import numpy as np
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from src.utils.metrics import get_registry, timed
 
 class HuggingFaceEmbedder:
-    def __init__(self, model_name="intfloat/e5-base-v2"):
-        self.embeddings = HuggingFaceEmbeddings(
+    def __init__(self, model_name="intfloat/e5-base-v2", embeddings=None, device="mps",
+                 chunk_size=1024, chunk_overlap=256):
+        self.embeddings = embeddings or HuggingFaceEmbeddings(
             model_name=model_name,
-            model_kwargs={"device": "mps"},
+            model_kwargs={"device": device},
         )
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1024,
-            chunk_overlap=256,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
             length_function=len,
             is_separator_regex=False,
         )
@@ -33,11 +36,54 @@ class HuggingFaceEmbedder:
         return document
     
     def embed_document(self, document):
-        text_chunks = self.text_splitter.split_documents([document])
+        metrics = get_registry("crawl")
+        with timed("chunk", metrics):
+            text_chunks = self.text_splitter.split_documents([document])
         texts = [chunk.page_content for chunk in text_chunks]
-        embeddings = self.embeddings.embed_documents(texts)
+        with timed("embed", metrics):
+            embeddings = self.embeddings.embed_documents(texts)
         return list(zip(text_chunks, embeddings))
 
+    def embed_texts(self, texts):
+        """
+        Embed texts straight into a contiguous float32 matrix.
+
+        HuggingFaceEmbeddings.embed_documents converts the model output to
+        nested Python lists; with a local SentenceTransformer the numpy
+        array is taken directly instead. Other embeddings (e.g. the
+        benchmark's hash embeddings) go through embed_documents.
+
+        Returns:
+            np.ndarray of shape (len(texts), dim), dtype float32
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        client = getattr(self.embeddings, "_client", None)
+        if isinstance(self.embeddings, HuggingFaceEmbeddings) and not self.embeddings.multi_process \
+                and hasattr(client, "encode"):
+            # Same preprocessing as HuggingFaceEmbeddings._embed
+            texts = [text.replace("\n", " ") for text in texts]
+            encode_kwargs = {**self.embeddings.encode_kwargs, "convert_to_numpy": True}
+            vectors = client.encode(texts, show_progress_bar=self.embeddings.show_progress, **encode_kwargs)
+        else:
+            vectors = self.embeddings.embed_documents(texts)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+
+    def embed_item(self, item):
+        """
+        Chunk and embed a page.
+
+        Returns:
+            (chunk texts, float32 matrix with one row per chunk)
+        """
+        metrics = get_registry("crawl")
+        with timed("chunk", metrics):
+            text_chunks = self.text_splitter.split_documents([self.create_document_from_item(item)])
+        texts = [chunk.page_content for chunk in text_chunks]
+        with timed("embed", metrics):
+            vectors = self.embed_texts(texts)
+        return texts, vectors
+
     def process_item(self, item, spider):
         document = self.create_document_from_item(item)
         chunk_embeddings = self.embed_document(document)
@@ -1,5 +1,9 @@
 """Duplicate filtering modules."""
 from .dupefilter import RedisBasedDupeFilter, SQLiteBasedDupeFilter, FileBasedDupeFilter
 from .qdrant_dupefilter import QdrantDupeFilter
+from .canonicalize import URLCanonicalizer, get_canonicalizer
+from .near_duplicate import NearDuplicatePipeline, SimHashIndex, simhash
 
-__all__ = ['RedisBasedDupeFilter', 'SQLiteBasedDupeFilter', 'FileBasedDupeFilter', 'QdrantDupeFilter']
+__all__ = ['RedisBasedDupeFilter', 'SQLiteBasedDupeFilter', 'FileBasedDupeFilter', 'QdrantDupeFilter',
+           'URLCanonicalizer', 'get_canonicalizer',
+           'NearDuplicatePipeline', 'SimHashIndex', 'simhash']
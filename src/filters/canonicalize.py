@@ -0,0 +1,207 @@
+"""
+URL canonicalization shared by the dupefilters, the spider and the vector store.
+
+Without it, http/https, trailing slashes, utm_* and session parameters,
+#fragments and index.html aliases of one page all fingerprint differently
+and get fetched, cleaned and embedded again. URLCanonicalizer normalizes
+URLs with fixed rules and a configurable parameter strip list, and also
+learns aliases from fetched pages (<link rel="canonical"> and redirect
+targets). Learned aliases are persisted in SQLite so both crawlers and
+later runs share them.
+"""
+import sqlite3
+import threading
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from scrapy.utils.request import fingerprint
+
+# Query parameters that never change page content (shell-style patterns)
+DEFAULT_STRIP_PARAMS = (
+    'utm_*', 'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'hsa_*',
+    'sessionid', 'session_id', 'sid', 'phpsessid', 'jsessionid', 'cfid', 'cftoken',
+)
+
+# Directory index files that are aliases of the directory itself
+INDEX_FILES = ('index.html', 'index.htm', 'index.php', 'default.aspx', 'default.htm')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class URLCanonicalizer:
+    """Maps URL variants of the same page to one canonical URL."""
+
+    def __init__(
+        self,
+        strip_params: Iterable[str] = DEFAULT_STRIP_PARAMS,
+        force_https: bool = True,
+        aliases_path: Optional[str] = None
+    ):
+        """
+        Args:
+            strip_params: Query parameter names (or patterns like 'utm_*') to drop
+            force_https: Treat http:// and https:// as the same page (canonical https)
+            aliases_path: SQLite file for learned aliases (None = keep in memory only)
+        """
+        self.strip_params = tuple(p.lower() for p in strip_params)
+        self.force_https = force_https
+        self.aliases_path = Path(aliases_path) if aliases_path else None
+        self.aliases: Dict[str, str] = {}
+        self.learned = {"canonical": 0, "redirect": 0}
+        self._lock = threading.Lock()
+        self.conn = None
+
+        if self.aliases_path:
+            self.aliases_path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.aliases_path), timeout=30.0, check_same_thread=False)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS url_aliases (
+                    url TEXT PRIMARY KEY,
+                    canonical_url TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self.conn.commit()
+            self.aliases = dict(self.conn.execute('SELECT url, canonical_url FROM url_aliases'))
+
+    @classmethod
+    def from_settings(cls, settings) -> "URLCanonicalizer":
+        return cls(
+            strip_params=settings.getlist('URL_STRIP_PARAMS') or DEFAULT_STRIP_PARAMS,
+            force_https=settings.getbool('URL_FORCE_HTTPS', True),
+            aliases_path=settings.get('URL_ALIASES_PATH')
+        )
+
+    def _strip(self, name: str) -> bool:
+        name = name.lower()
+        return any(fnmatch(name, pattern) for pattern in self.strip_params)
+
+    def normalize(self, url: str) -> str:
+        """
+        Rule-based normalization (no learned aliases).
+
+        Lowercases scheme and host, drops default ports, fragments, ;jsessionid
+        path parameters, stripped query parameters and index files, removes
+        trailing slashes and sorts the remaining query parameters.
+        """
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS:
+            return url
+        if self.force_https:
+            scheme = 'https'
+
+        host = (parts.hostname or '').lower()
+        port = parts.port
+        netloc = host if port is None or port == DEFAULT_PORTS.get(parts.scheme.lower()) else f"{host}:{port}"
+
+        path = parts.path.split(';', 1)[0] or '/'
+        segments = path.rsplit('/', 1)
+        if segments[-1].lower() in INDEX_FILES:
+            path = segments[0] + '/'
+        if len(path) > 1:
+            path = path.rstrip('/') or '/'
+
+        query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not self._strip(k))
+        return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+    def _chain(self, url: str) -> List[str]:
+        """url followed by the aliases it resolves through."""
+        chain = [url]
+        # Aliases can chain (redirect to a page with its own rel=canonical)
+        while chain[-1] in self.aliases and self.aliases[chain[-1]] not in chain:
+            chain.append(self.aliases[chain[-1]])
+        return chain
+
+    def canonicalize(self, url: str) -> str:
+        """Normalized URL, followed through learned aliases."""
+        return self._chain(self.normalize(url))[-1]
+
+    def learn(self, url: str, canonical_url: str, kind: str) -> bool:
+        """
+        Record that url is an alias of canonical_url.
+
+        Args:
+            url: Requested or fetched URL
+            canonical_url: Redirect target or rel=canonical href (may be relative to url)
+            kind: "canonical" or "redirect"
+
+        Returns:
+            True if this was a new alias
+        """
+        source = self.normalize(url)
+        target = self.normalize(urljoin(url, canonical_url))
+        if source == target or urlsplit(source).hostname != urlsplit(target).hostname:
+            # Cross-host canonicals are often misconfigured; only trust same-host ones
+            return False
+        with self._lock:
+            if self.aliases.get(source) == target:
+                return False
+            chain = self._chain(target)
+            if source in chain:
+                # The newest observation wins over older aliases that would form a loop
+                stale = chain[:chain.index(source)]
+                for node in stale:
+                    self.aliases.pop(node, None)
+                if self.conn is not None:
+                    self.conn.executemany('DELETE FROM url_aliases WHERE url = ?', [(node,) for node in stale])
+            self.aliases[source] = target
+            self.learned[kind] = self.learned.get(kind, 0) + 1
+            if self.conn is not None:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO url_aliases (url, canonical_url, kind) VALUES (?, ?, ?)',
+                    (source, target, kind)
+                )
+                self.conn.commit()
+        return True
+
+    def learn_from_response(self, response) -> Tuple[str, Optional[str]]:
+        """
+        Learn redirect and rel=canonical aliases from a fetched page.
+
+        Returns:
+            (canonical URL of the page, rel=canonical href or None)
+        """
+        for redirected_from in response.meta.get('redirect_urls', []):
+            self.learn(redirected_from, response.url, 'redirect')
+        href = None
+        if hasattr(response, 'css'):
+            href = response.css('link[rel="canonical"]::attr(href)').get()
+            if href:
+                self.learn(response.url, href, 'canonical')
+        return self.canonicalize(response.url), href
+
+    def request_fingerprint(self, request) -> str:
+        """Scrapy request fingerprint computed on the canonical URL."""
+        canonical = self.canonicalize(request.url)
+        if canonical != request.url:
+            request = request.replace(url=canonical)
+        fp_bytes = fingerprint(request)
+        return fp_bytes.hex() if isinstance(fp_bytes, bytes) else str(fp_bytes)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+_shared: Dict[Tuple, URLCanonicalizer] = {}
+
+
+def get_canonicalizer(settings) -> URLCanonicalizer:
+    """
+    Canonicalizer for these settings, shared within the process so the
+    dupefilter, spider and pipelines see the same learned aliases.
+    """
+    key = (
+        tuple(settings.getlist('URL_STRIP_PARAMS') or DEFAULT_STRIP_PARAMS),
+        settings.getbool('URL_FORCE_HTTPS', True),
+        settings.get('URL_ALIASES_PATH'),
+    )
+    if key not in _shared:
+        _shared[key] = URLCanonicalizer.from_settings(settings)
+    return _shared[key]
@@ -9,6 +9,8 @@ import sqlite3
 from pathlib import Path
 from typing import Optional
 
+from .canonicalize import get_canonicalizer
+
 
 class RedisBasedDupeFilter(RFPDupeFilter):
     """
@@ -18,8 +20,10 @@ class RedisBasedDupeFilter(RFPDupeFilter):
     Requires Redis server running. Install: pip install redis
     """
     
-    def __init__(self, fingerprinter=None, redis_url: str = 'redis://localhost:6379/0', key_prefix: str = 'scrapy:dupefilter'):
+    def __init__(self, fingerprinter=None, redis_url: str = 'redis://localhost:6379/0', key_prefix: str = 'scrapy:dupefilter',
+                 canonicalizer=None):
         super().__init__(fingerprinter=fingerprinter)
+        self.canonicalizer = canonicalizer
         self.redis_url = redis_url
         self.key_prefix = key_prefix
         self.redis_client = None
@@ -33,7 +37,8 @@ class RedisBasedDupeFilter(RFPDupeFilter):
         return cls(
             fingerprinter=crawler.request_fingerprinter,
             redis_url=redis_url,
-            key_prefix=key_prefix
+            key_prefix=key_prefix,
+            canonicalizer=get_canonicalizer(settings)
         )
     
     def open(self):
@@ -60,7 +65,9 @@ class RedisBasedDupeFilter(RFPDupeFilter):
         return not added  # Return True if URL was already seen
     
     def _get_request_fingerprint(self, request):
-        """Generate fingerprint for request."""
+        """Generate fingerprint for request (on its canonical URL when canonicalizing)."""
+        if self.canonicalizer is not None:
+            return self.canonicalizer.request_fingerprint(request)
         fp_bytes = fingerprint(request)
         return fp_bytes.hex() if isinstance(fp_bytes, bytes) else str(fp_bytes)
     
@@ -80,8 +87,9 @@ class SQLiteBasedDupeFilter(RFPDupeFilter):
     No additional dependencies required.
     """
     
-    def __init__(self, fingerprinter=None, db_path: str = 'shared_urls.db'):
+    def __init__(self, fingerprinter=None, db_path: str = 'shared_urls.db', canonicalizer=None):
         super().__init__(fingerprinter=fingerprinter)
+        self.canonicalizer = canonicalizer
         self.db_path = Path(db_path)
         self.conn = None
     
@@ -92,7 +100,8 @@ class SQLiteBasedDupeFilter(RFPDupeFilter):
         db_path = settings.get('DUPEFILTER_DB_PATH', 'shared_urls.db')
         return cls(
             fingerprinter=crawler.request_fingerprinter,
-            db_path=db_path
+            db_path=db_path,
+            canonicalizer=get_canonicalizer(settings)
         )
     
     def open(self):
@@ -146,7 +155,9 @@ class SQLiteBasedDupeFilter(RFPDupeFilter):
             return True  # URL already seen
     
     def _get_request_fingerprint(self, request):
-        """Generate fingerprint for request."""
+        """Generate fingerprint for request (on its canonical URL when canonicalizing)."""
+        if self.canonicalizer is not None:
+            return self.canonicalizer.request_fingerprint(request)
         fp_bytes = fingerprint(request)
         return fp_bytes.hex() if isinstance(fp_bytes, bytes) else str(fp_bytes)
     
@@ -165,8 +176,9 @@ class FileBasedDupeFilter(RFPDupeFilter):
     Use SQLite or Redis for production.
     """
     
-    def __init__(self, fingerprinter=None, file_path: str = 'seen_urls.txt'):
+    def __init__(self, fingerprinter=None, file_path: str = 'seen_urls.txt', canonicalizer=None):
         super().__init__(fingerprinter=fingerprinter)
+        self.canonicalizer = canonicalizer
         self.file_path = Path(file_path)
         self.seen_fingerprints = set()
     
@@ -177,7 +189,8 @@ class FileBasedDupeFilter(RFPDupeFilter):
         file_path = settings.get('DUPEFILTER_FILE_PATH', 'seen_urls.txt')
         return cls(
             fingerprinter=crawler.request_fingerprinter,
-            file_path=file_path
+            file_path=file_path,
+            canonicalizer=get_canonicalizer(settings)
         )
     
     def open(self):
@@ -213,7 +226,9 @@ class FileBasedDupeFilter(RFPDupeFilter):
         return False
     
     def _get_request_fingerprint(self, request):
-        """Generate fingerprint for request."""
+        """Generate fingerprint for request (on its canonical URL when canonicalizing)."""
+        if self.canonicalizer is not None:
+            return self.canonicalizer.request_fingerprint(request)
         fp_bytes = fingerprint(request)
         return fp_bytes.hex() if isinstance(fp_bytes, bytes) else str(fp_bytes)
     
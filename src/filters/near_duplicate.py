@@ -0,0 +1,315 @@
+"""
+Near-duplicate page detection at ingest with SimHash.
+
+Archived news, templated department pages, print versions and ?page=N
+variants have different URLs, so the URL dupefilters let them through,
+but their text is almost identical. Each page gets a 64-bit SimHash of its
+word shingles; pages whose signatures differ in at most max_distance bits
+are near duplicates. The signature is split into bands stored in SQLite
+(an LSH index), and by the pigeonhole principle two signatures within
+max_distance < bands bits share at least one band exactly, so a lookup
+only compares against the few candidates with a matching band.
+
+SimHash alone can't tell apart short pages that share a large site
+template (menus, footer): their signatures are a few bits apart even when
+the actual content differs. So a candidate is only a duplicate if the page
+adds at most max_new_words words that the indexed page doesn't have
+(new_words); the index keeps each page's text, compressed, for that check.
+"""
+import hashlib
+import math
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scrapy.exceptions import DropItem
+
+from src.cleanup.rules import normalize_text
+from src.utils.metrics import get_registry
+
+SIGNATURE_BITS = 64
+_BIT_SHIFTS = np.arange(SIGNATURE_BITS, dtype=np.uint64)
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    64-bit SimHash of normalized word shingles.
+
+    Args:
+        text: Page text
+        shingle_size: Words per shingle
+
+    Returns:
+        Signature as an unsigned 64-bit int (0 for empty text)
+    """
+    words = normalize_text(text).split()
+    if not words:
+        return 0
+    shingles = [' '.join(words[i:i + shingle_size]) for i in range(max(len(words) - shingle_size + 1, 1))]
+    hashes = np.fromiter((_shingle_hash(s) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # Each bit votes +1/-1 per shingle; the signature keeps the bits with a positive total
+    bits = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int32)
+    votes = bits.sum(axis=0) * 2 - len(shingles)
+    return sum(1 << int(i) for i in np.flatnonzero(votes > 0))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def new_words(text: str, indexed_text: str, shingle_size: int = 3) -> int:
+    """
+    Words of text that indexed_text doesn't have.
+
+    A word counts as known when it is part of a shingle that also occurs in
+    indexed_text, so reordered or repeated template text is known, and an
+    edited word counts once.
+    """
+    words = normalize_text(text).split()
+    indexed_words = normalize_text(indexed_text).split()
+    known = {tuple(indexed_words[i:i + shingle_size]) for i in range(max(len(indexed_words) - shingle_size + 1, 1))}
+    covered = [False] * len(words)
+    for i in range(max(len(words) - shingle_size + 1, 1)):
+        if tuple(words[i:i + shingle_size]) in known:
+            covered[i:i + shingle_size] = [True] * len(covered[i:i + shingle_size])
+    return covered.count(False)
+
+
+def estimate_chunks(length: int, chunk_size: int = 1024, chunk_overlap: int = 256) -> int:
+    """Chunks EmbeddingPipeline would produce for text of this length (its splitter settings)."""
+    if length <= chunk_size:
+        return 1
+    return math.ceil((length - chunk_overlap) / (chunk_size - chunk_overlap))
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class SimHashIndex:
+    """
+    Persistent LSH index of page signatures in SQLite.
+
+    Shared between spiders the same way as SQLiteBasedDupeFilter (WAL mode),
+    so a page seen by either crawler counts.
+    """
+
+    def __init__(self, db_path: str = 'output/near_duplicates.db', bands: int = 4, max_distance: int = 3):
+        """
+        Args:
+            db_path: SQLite file
+            bands: Number of equal bands the 64-bit signature is split into
+            max_distance: Largest Hamming distance treated as a near duplicate
+                (must be below bands for lookups to be exact)
+        """
+        if SIGNATURE_BITS % bands or max_distance >= bands:
+            raise ValueError(f"Need 64 % bands == 0 and max_distance < bands (got bands={bands}, max_distance={max_distance})")
+        self.db_path = Path(db_path)
+        self.bands = bands
+        self.band_bits = SIGNATURE_BITS // bands
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30.0, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS signatures (
+                url TEXT PRIMARY KEY,
+                simhash INTEGER NOT NULL,
+                text BLOB
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                url TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, value);
+            CREATE TABLE IF NOT EXISTS duplicates (
+                url TEXT PRIMARY KEY,
+                canonical_url TEXT NOT NULL,
+                distance INTEGER NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+        ''')
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(signatures)')]
+        if 'text' not in columns:
+            # Indexes written before the content check have no text; their
+            # pages are never confirmed as duplicates until re-crawled
+            self.conn.execute('ALTER TABLE signatures ADD COLUMN text BLOB')
+        self.conn.commit()
+
+    def _bands(self, signature: int):
+        mask = (1 << self.band_bits) - 1
+        return [(band, (signature >> (band * self.band_bits)) & mask) for band in range(self.bands)]
+
+    def candidates(self, signature: int, exclude_url: Optional[str] = None) -> List[Tuple[str, int]]:
+        """
+        Indexed pages within max_distance, closest first.
+
+        Args:
+            signature: SimHash to look up
+            exclude_url: Ignore this URL (a re-crawl of the same page is not a duplicate)
+
+        Returns:
+            (url, distance) pairs
+        """
+        clauses = ' OR '.join('(b.band = ? AND b.value = ?)' for _ in range(self.bands))
+        params = [v for pair in self._bands(signature) for v in pair]
+        with self._lock:
+            rows = self.conn.execute(
+                f'SELECT DISTINCT s.url, s.simhash FROM bands b JOIN signatures s ON s.url = b.url WHERE {clauses}',
+                params
+            ).fetchall()
+        found = []
+        for url, stored in rows:
+            if url == exclude_url:
+                continue
+            distance = hamming_distance(signature, stored & ((1 << 64) - 1))
+            if distance <= self.max_distance:
+                found.append((url, distance))
+        return sorted(found, key=lambda match: match[1])
+
+    def find(self, signature: int, exclude_url: Optional[str] = None) -> Optional[Tuple[str, int]]:
+        """Closest indexed page within max_distance as (url, distance), or None."""
+        found = self.candidates(signature, exclude_url)
+        return found[0] if found else None
+
+    def text_of(self, url: str) -> Optional[str]:
+        """Normalized text of an indexed page (None if it was indexed without it)."""
+        with self._lock:
+            row = self.conn.execute('SELECT text FROM signatures WHERE url = ?', (url,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def add(self, url: str, signature: int, text: Optional[str] = None):
+        """Index (or re-index) a page, with its text for the content check."""
+        data = zlib.compress(normalize_text(text).encode('utf-8')) if text else None
+        with self._lock:
+            self.conn.execute('DELETE FROM bands WHERE url = ?', (url,))
+            self.conn.execute('INSERT OR REPLACE INTO signatures (url, simhash, text) VALUES (?, ?, ?)',
+                              (url, _to_signed(signature), data))
+            self.conn.executemany(
+                'INSERT INTO bands (band, value, url) VALUES (?, ?, ?)',
+                [(band, value, url) for band, value in self._bands(signature)]
+            )
+            self.conn.commit()
+
+    def record_duplicate(self, url: str, canonical_url: str, distance: int):
+        """Remember which indexed page a dropped page was merged into."""
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO duplicates (url, canonical_url, distance) VALUES (?, ?, ?)',
+                (url, canonical_url, distance)
+            )
+            self.conn.commit()
+
+    def canonical_for(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute('SELECT canonical_url FROM duplicates WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM signatures').fetchone()[0]
+
+    def clear(self):
+        """Remove all signatures (use with caution!)."""
+        with self._lock:
+            self.conn.executescript('DELETE FROM signatures; DELETE FROM bands; DELETE FROM duplicates;')
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class NearDuplicatePipeline:
+    """
+    Drop pages that are near duplicates of an already indexed page, before
+    any chunking or embedding work: their signature is within max_distance
+    bits and they add at most max_new_words words. Dropped pages are
+    recorded in the index with the URL they were merged into. Runs between
+    DataCleaningPipeline and EmbeddingPipeline:
+        ITEM_PIPELINES = {
+            'src.filters.near_duplicate.NearDuplicatePipeline': 150,
+        }
+
+    Settings:
+        NEAR_DUPLICATE_DB_PATH: SQLite index file (default 'output/near_duplicates.db')
+        NEAR_DUPLICATE_MAX_DISTANCE: Max differing signature bits (default 3)
+        NEAR_DUPLICATE_BANDS: LSH bands (default 4)
+        NEAR_DUPLICATE_MIN_LENGTH: Shorter texts are never treated as duplicates (default 200)
+        NEAR_DUPLICATE_MAX_NEW_WORDS: Most words a dropped page may add to the indexed one (default 20)
+    """
+
+    def __init__(self, db_path: str = 'output/near_duplicates.db', max_distance: int = 3, bands: int = 4,
+                 min_length: int = 200, max_new_words: int = 20, stats=None):
+        self.index = SimHashIndex(db_path, bands=bands, max_distance=max_distance)
+        self.min_length = min_length
+        self.max_new_words = max_new_words
+        self.stats = stats
+        self.metrics = get_registry("crawl")
+        self.checked = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.chunks_avoided = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            db_path=settings.get('NEAR_DUPLICATE_DB_PATH', 'output/near_duplicates.db'),
+            max_distance=settings.getint('NEAR_DUPLICATE_MAX_DISTANCE', 3),
+            bands=settings.getint('NEAR_DUPLICATE_BANDS', 4),
+            min_length=settings.getint('NEAR_DUPLICATE_MIN_LENGTH', 200),
+            max_new_words=settings.getint('NEAR_DUPLICATE_MAX_NEW_WORDS', 20),
+            stats=crawler.stats
+        )
+
+    def process_item(self, item, spider):
+        text = item.get('text', '') or ''
+        if len(text) < self.min_length:
+            return item
+        self.checked += 1
+        url = item['url']
+        signature = simhash(text)
+        match = None
+        for canonical_url, distance in self.index.candidates(signature, exclude_url=url):
+            indexed_text = self.index.text_of(canonical_url)
+            if indexed_text is not None and new_words(text, indexed_text) <= self.max_new_words:
+                match = (canonical_url, distance)
+                break
+            # Close signature, different content (e.g. a shared site template)
+            self.rejected += 1
+        if match is None:
+            self.index.add(url, signature, text)
+            return item
+
+        canonical_url, distance = match
+        self.index.record_duplicate(url, canonical_url, distance)
+        chunks = estimate_chunks(len(text))
+        self.dropped += 1
+        self.chunks_avoided += chunks
+        self.metrics.increment("near_duplicates")
+        self.metrics.increment("embeddings_avoided", chunks)
+        if self.stats is not None:
+            self.stats.inc_value('near_duplicate/dropped')
+            self.stats.inc_value('near_duplicate/embeddings_avoided', chunks)
+        raise DropItem(f"Near duplicate of {canonical_url} ({distance} bits apart): {url}")
+
+    def close_spider(self, spider):
+        if self.checked:
+            print(f"\n♻️  Near duplicates: dropped {self.dropped} of {self.checked} pages "
+                  f"({self.dropped / self.checked * 100:.1f}%), ~{self.chunks_avoided} embeddings avoided; "
+                  f"{self.rejected} close signatures kept after the content check")
+        self.index.close()
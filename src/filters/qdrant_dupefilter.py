@@ -1,9 +1,14 @@
 """Custom duplicate filter that checks Qdrant vector database."""
+from pathlib import Path
+
 from scrapy.dupefilters import BaseDupeFilter
 from scrapy.http import Request
+from scrapy.utils.job import job_dir
 from qdrant_client import QdrantClient
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 
+from .canonicalize import get_canonicalizer
+
 
 class QdrantDupeFilter(BaseDupeFilter):
     """
@@ -12,17 +17,34 @@ class QdrantDupeFilter(BaseDupeFilter):
     and stored in the vector database.
     """
     
-    def __init__(self, qdrant_url="http://localhost:6333", collection_name="cuboulder_pages"):
-        self.client = QdrantClient(url=qdrant_url)
+    def __init__(self, qdrant_url="http://localhost:6333", collection_name="cuboulder_pages", client=None,
+                 canonicalizer=None, path=None):
+        self.client = client or QdrantClient(url=qdrant_url)
+        # Stored payload URLs are canonical, so lookups must be too
+        self.canonicalizer = canonicalizer
         self.collection_name = collection_name
         self.fingerprints = set()  # Track URLs seen in this session
+        # URLs queued but not yet stored in Qdrant are only known here; with a
+        # JOBDIR they are appended to a file so a resumed crawl doesn't queue them again
+        self.file = None
+        if path:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                with path.open('r', encoding='utf-8') as f:
+                    self.fingerprints.update(line.rstrip('\n') for line in f if line.strip())
+            # Line-buffered like Scrapy's requests.seen: a crawl killed at a pause loses no URLs
+            self.file = path.open('a', buffering=1, encoding='utf-8')
         
     @classmethod
     def from_settings(cls, settings):
         """Initialize from Scrapy settings."""
+        jobdir = job_dir(settings)
         return cls(
             qdrant_url=settings.get('QDRANT_URL', 'http://localhost:6333'),
-            collection_name=settings.get('QDRANT_COLLECTION', 'cuboulder_pages')
+            collection_name=settings.get('QDRANT_COLLECTION', 'cuboulder_pages'),
+            canonicalizer=get_canonicalizer(settings),
+            path=str(Path(jobdir) / 'qdrant_dupefilter.seen') if jobdir else None
         )
     
     def request_seen(self, request: Request) -> bool:
@@ -30,7 +52,7 @@ class QdrantDupeFilter(BaseDupeFilter):
         Check if this URL has been seen before.
         Returns True if the URL should be filtered (skipped).
         """
-        url = request.url
+        url = self.canonicalizer.canonicalize(request.url) if self.canonicalizer else request.url
         
         # Check if we've seen it in this session
         if url in self.fingerprints:
@@ -64,8 +86,13 @@ class QdrantDupeFilter(BaseDupeFilter):
         
         # Not a duplicate - add to fingerprints and allow
         self.fingerprints.add(url)
+        if self.file is not None:
+            self.file.write(url + '\n')
         return False
     
     def close(self, reason: str) -> None:
         """Clean up when spider closes."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
         self.fingerprints.clear()
@@ -0,0 +1,5 @@
+"""Link graph of crawled pages and the authority scores derived from it."""
+from .authority import LinkGraphPipeline, publish_authority, publish_saved_authority, resolve_links
+from .link_graph import LinkGraph
+
+__all__ = ['LinkGraph', 'LinkGraphPipeline', 'publish_authority', 'publish_saved_authority', 'resolve_links']
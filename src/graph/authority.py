@@ -0,0 +1,219 @@
+"""
+Feed crawled links into the link graph and publish authority scores.
+
+LinkGraphPipeline records each page's out-links while crawling and then
+drops them from the item, so later pipelines don't carry them. When the
+spider closes, it merges the new rows into the graph on disk, updates
+PageRank incrementally, and writes metadata.authority (PageRank rescaled
+to [0, 1]) and metadata.in_degree into the Qdrant payload of every chunk.
+QdrantMMRRetriever can then blend authority into ranking (authority_weight
+in the retrieval config).
+
+Writes outside a crawl (offline ingest, cache replay, a reindexed version)
+replace chunks without these fields; publish_saved_authority puts them
+back from the graph on disk.
+"""
+from typing import Iterable, List, Optional, Sequence
+from urllib.parse import urljoin, urlsplit
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+from scrapy.utils.url import url_is_from_any_domain
+
+from src.filters.canonicalize import URLCanonicalizer, get_canonicalizer
+from .link_graph import LinkGraph
+
+AUTHORITY_INDEXES = {
+    "metadata.authority": models.PayloadSchemaType.FLOAT,
+    "metadata.in_degree": models.PayloadSchemaType.INTEGER,
+}
+
+
+def resolve_links(url: str, hrefs: Iterable[str], canonicalizer: URLCanonicalizer,
+                  allowed_domains: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Canonical http(s) targets of a page's hrefs.
+
+    Args:
+        url: URL the hrefs are relative to
+        hrefs: Raw or absolute href values
+        canonicalizer: Maps link variants to the URLs pages are stored under
+        allowed_domains: Keep only links into these domains (None = all)
+
+    Returns:
+        Unique canonical target URLs, in first-seen order
+    """
+    targets = {}
+    for href in hrefs:
+        if not href:
+            continue
+        absolute = urljoin(url, href.strip())
+        if urlsplit(absolute).scheme not in ('http', 'https'):
+            continue
+        if allowed_domains and not url_is_from_any_domain(absolute, allowed_domains):
+            continue
+        targets[canonicalizer.canonicalize(absolute)] = None
+    return list(targets)
+
+
+def publish_authority(client: QdrantClient, collection_name: str, graph: LinkGraph,
+                      urls: Iterable[str] = (), tolerance: float = 0.01, batch_size: int = 256) -> int:
+    """
+    Write authority and in-degree into the payload of crawled pages' chunks.
+
+    Only pages whose authority moved by more than tolerance since it was
+    last published are updated, plus urls (pages re-written this crawl,
+    whose payload no longer has the fields).
+
+    Returns:
+        Number of pages updated
+    """
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field_name, schema in AUTHORITY_INDEXES.items():
+        if field_name not in existing:
+            client.create_payload_index(collection_name, field_name=field_name, field_schema=schema)
+
+    authority = graph.authority()
+    in_degree = graph.in_degree()
+    stale = np.isnan(graph.published) | (np.abs(authority - graph.published) > tolerance)
+    forced = np.zeros(len(graph), dtype=bool)
+    forced[[graph.ids[url] for url in urls if url in graph.ids]] = True
+    nodes = np.flatnonzero(graph.crawled & (stale | forced))
+
+    for start in range(0, len(nodes), batch_size):
+        batch = nodes[start:start + batch_size]
+        operations = [
+            models.SetPayloadOperation(set_payload=models.SetPayload(
+                payload={"authority": round(float(authority[node]), 4), "in_degree": int(in_degree[node])},
+                filter=models.Filter(must=[
+                    models.FieldCondition(key="metadata.url", match=models.MatchValue(value=graph.urls[node]))
+                ]),
+                key="metadata"
+            ))
+            for node in batch
+        ]
+        client.batch_update_points(collection_name, update_operations=operations, wait=True)
+        graph.published[batch] = authority[batch]
+    return len(nodes)
+
+
+def missing_authority_filter() -> models.Filter:
+    """Chunks written without authority (outside a crawl, or before the link graph)."""
+    return models.Filter(must=[models.IsEmptyCondition(is_empty=models.PayloadField(key="metadata.authority"))])
+
+
+def publish_saved_authority(client: QdrantClient, collection_name: str, path: str = 'output/link_graph.npz',
+                            batch_size: int = 1000) -> int:
+    """
+    Write authority from the saved link graph into chunks that don't have it.
+
+    Run after writing pages outside a crawl, so they don't rank below
+    crawled pages. The graph file is not changed: what it records as
+    published refers to the collection the crawler writes to.
+
+    Args:
+        client: Qdrant client
+        collection_name: Collection (or new version) the pages were written to
+        path: Link graph saved by LinkGraphPipeline
+        batch_size: Points per scroll request
+
+    Returns:
+        Number of pages updated (0 without a saved graph)
+    """
+    graph = LinkGraph.load(path)
+    if not len(graph):
+        return 0
+    urls, offset = {}, None
+    while True:
+        points, offset = client.scroll(
+            collection_name,
+            scroll_filter=missing_authority_filter(),
+            limit=batch_size,
+            offset=offset,
+            with_payload=models.PayloadSelectorInclude(include=["metadata.url"]),
+            with_vectors=False
+        )
+        for point in points:
+            urls[((point.payload or {}).get("metadata") or {}).get("url", "")] = None
+        if offset is None:
+            break
+    if not urls:
+        return 0
+    # Mark every page as up to date so only the pages missing authority are written
+    graph.published[:] = graph.authority()
+    return publish_authority(client, collection_name, graph, urls=urls)
+
+
+class LinkGraphPipeline:
+    """
+    Record out-links into the link graph, then drop them from the item.
+    Runs after CrawlArchivePipeline (which keeps the raw links) and before
+    EmbeddingPipeline:
+        ITEM_PIPELINES = {
+            'src.graph.authority.LinkGraphPipeline': 170,
+        }
+
+    Settings:
+        LINK_GRAPH_PATH: Graph file (default 'output/link_graph.npz')
+        LINK_GRAPH_PUBLISH: Write authority into Qdrant at spider close (default True)
+        LINK_GRAPH_DAMPING: PageRank damping factor (default 0.85)
+        QDRANT_URL, QDRANT_COLLECTION: Where to publish
+    """
+
+    def __init__(self, path: str = 'output/link_graph.npz', canonicalizer: Optional[URLCanonicalizer] = None,
+                 client: Optional[QdrantClient] = None, collection_name: str = "cuboulder_pages",
+                 damping: float = 0.85):
+        self.path = path
+        self.canonicalizer = canonicalizer or URLCanonicalizer()
+        self.client = client
+        self.collection_name = collection_name
+        self.damping = damping
+        # Rows are collected in a private graph and merged into the file at close,
+        # so spiders sharing the file don't overwrite each other's rows
+        self.rows = LinkGraph()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        client = None
+        if settings.getbool('LINK_GRAPH_PUBLISH', True):
+            client = QdrantClient(url=settings.get('QDRANT_URL', 'http://localhost:6333'))
+        return cls(
+            path=settings.get('LINK_GRAPH_PATH', 'output/link_graph.npz'),
+            canonicalizer=get_canonicalizer(settings),
+            client=client,
+            collection_name=settings.get('QDRANT_COLLECTION', 'cuboulder_pages'),
+            damping=settings.getfloat('LINK_GRAPH_DAMPING', 0.85)
+        )
+
+    def process_item(self, item, spider):
+        links = item.get('links') or []
+        self.rows.set_links(
+            item['url'],
+            resolve_links(item['url'], links, self.canonicalizer, getattr(spider, 'allowed_domains', None))
+        )
+        item['links'] = []
+        return item
+
+    def close_spider(self, spider):
+        self.rows.compact()
+        crawled = [self.rows.urls[node] for node in np.flatnonzero(self.rows.crawled)]
+        if not crawled:
+            return
+        graph = LinkGraph.load(self.path)
+        for url in crawled:
+            graph.set_links(url, self.rows.links(url))
+        graph.pagerank(damping=self.damping)
+
+        published = 0
+        if self.client is not None:
+            try:
+                published = publish_authority(self.client, self.collection_name, graph, urls=crawled)
+            except Exception as e:
+                # The graph is still saved; these pages are published after the next crawl
+                graph.published[[graph.ids[url] for url in crawled]] = np.nan
+                print(f"⚠️  Could not publish authority scores: {e}")
+        graph.save(self.path)
+        stats = graph.stats()
+        print(f"\n🕸️  Link graph: {stats['crawled']} crawled pages, {stats['nodes']} URLs, {stats['edges']} links; "
+              f"authority updated for {published} pages")
@@ -0,0 +1,176 @@
+"""
+Compact on-disk link graph of crawled pages and PageRank over it.
+
+URLs get integer IDs and out-links are stored as CSR adjacency arrays
+(indptr/indices) in one .npz file, about 4 bytes per edge. Re-crawling a
+page replaces its row, and PageRank is warm-started from the previous
+scores, so updating after a crawl takes a few iterations instead of a
+full recomputation.
+"""
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+def _pack_urls(urls: List[str]):
+    encoded = [url.encode('utf-8') for url in urls]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_urls(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    blob = data.tobytes()
+    return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+class LinkGraph:
+    """Directed graph of canonical page URLs."""
+
+    def __init__(self):
+        self.urls: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        # Pages whose out-links are known (crawled), as opposed to link targets only
+        self.crawled = np.zeros(0, dtype=bool)
+        # PageRank from the last update and authority last written to Qdrant (NaN = never)
+        self.scores = np.zeros(0, dtype=np.float32)
+        self.published = np.zeros(0, dtype=np.float32)
+        # Rows replaced since the CSR arrays were last rebuilt
+        self._pending: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "LinkGraph":
+        """Load a graph saved with save(); a missing file gives an empty graph."""
+        graph = cls()
+        if not Path(path).exists():
+            return graph
+        with np.load(path) as data:
+            graph.urls = _unpack_urls(data['url_data'], data['url_offsets'])
+            graph.indptr = data['indptr']
+            graph.indices = data['indices']
+            graph.crawled = data['crawled']
+            graph.scores = data['scores']
+            graph.published = data['published']
+        graph.ids = {url: i for i, url in enumerate(graph.urls)}
+        return graph
+
+    def save(self, path: str):
+        """Write the graph atomically (a crash never leaves a truncated file)."""
+        self.compact()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        url_data, url_offsets = _pack_urls(self.urls)
+        tmp = path.with_name(path.name + '.tmp')
+        with tmp.open('wb') as f:
+            np.savez(f, url_data=url_data, url_offsets=url_offsets, indptr=self.indptr, indices=self.indices,
+                     crawled=self.crawled, scores=self.scores, published=self.published)
+        os.replace(tmp, path)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    @property
+    def num_edges(self) -> int:
+        self.compact()
+        return len(self.indices)
+
+    def node_id(self, url: str) -> int:
+        """ID of url, adding it as a new node if needed."""
+        node = self.ids.get(url)
+        if node is None:
+            node = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+        return node
+
+    def set_links(self, url: str, targets: Iterable[str]):
+        """Replace the out-links of a crawled page (duplicates and self-links are dropped)."""
+        source = self.node_id(url)
+        row = {self.node_id(target) for target in targets} - {source}
+        self._pending[source] = np.fromiter(sorted(row), dtype=np.int32, count=len(row))
+
+    def links(self, url: str) -> List[str]:
+        self.compact()
+        node = self.ids[url]
+        return [self.urls[i] for i in self.indices[self.indptr[node]:self.indptr[node + 1]]]
+
+    def compact(self):
+        """Fold replaced rows and new nodes into the CSR arrays."""
+        n = len(self.urls)
+        grow = n - len(self.crawled)
+        if grow:
+            self.crawled = np.concatenate([self.crawled, np.zeros(grow, dtype=bool)])
+            self.scores = np.concatenate([self.scores, np.zeros(grow, dtype=np.float32)])
+            self.published = np.concatenate([self.published, np.full(grow, np.nan, dtype=np.float32)])
+            self.indptr = np.concatenate([self.indptr, np.full(grow, self.indptr[-1], dtype=np.int64)])
+        if not self._pending:
+            return
+        replaced = np.fromiter(self._pending.keys(), dtype=np.int64, count=len(self._pending))
+        self.crawled[replaced] = True
+        # Keep the edges of untouched rows, add the new rows, and regroup by source
+        sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.indptr))
+        keep = ~np.isin(sources, replaced)
+        new_sources = np.repeat(replaced.astype(np.int32), [len(row) for row in self._pending.values()])
+        sources = np.concatenate([sources[keep], new_sources])
+        targets = np.concatenate([self.indices[keep], *self._pending.values()]).astype(np.int32)
+        order = np.argsort(sources, kind='stable')
+        self.indices = targets[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=self.indptr[1:])
+        self._pending = {}
+
+    def in_degree(self) -> np.ndarray:
+        self.compact()
+        return np.bincount(self.indices, minlength=len(self.urls)).astype(np.int32)
+
+    def pagerank(self, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100) -> np.ndarray:
+        """
+        PageRank by power iteration, warm-started from the stored scores.
+
+        Pages without out-links (and uncrawled targets) spread their rank
+        uniformly. The result is stored in self.scores.
+
+        Returns:
+            float32 array of scores summing to 1
+        """
+        self.compact()
+        n = len(self.urls)
+        if n == 0:
+            return self.scores
+        out_degree = np.diff(self.indptr)
+        sources = np.repeat(np.arange(n, dtype=np.int32), out_degree)
+        dangling = out_degree == 0
+        inv_degree = np.zeros(n, dtype=np.float64)
+        inv_degree[~dangling] = 1.0 / out_degree[~dangling]
+
+        rank = self.scores.astype(np.float64)
+        # New nodes start at the uniform score
+        rank[rank <= 0] = 1.0 / n
+        rank /= rank.sum()
+        for _ in range(max_iter):
+            spread = np.bincount(self.indices, weights=(rank * inv_degree)[sources], minlength=n)
+            updated = (1 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+            delta = np.abs(updated - rank).sum()
+            rank = updated
+            if delta < tol:
+                break
+        self.scores = rank.astype(np.float32)
+        return self.scores
+
+    def authority(self) -> np.ndarray:
+        """
+        PageRank rescaled to [0, 1] on a log scale (1 = most linked-to page),
+        so it can be blended with cosine similarity at ranking time.
+        """
+        if not len(self.scores) or not self.scores.max():
+            return np.zeros(len(self.scores), dtype=np.float32)
+        scaled = np.log1p(self.scores.astype(np.float64) * len(self.scores))
+        return (scaled / scaled.max()).astype(np.float32)
+
+    def stats(self) -> Dict[str, int]:
+        self.compact()
+        return {"nodes": len(self.urls), "crawled": int(self.crawled.sum()), "edges": len(self.indices)}
+
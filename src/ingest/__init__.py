@@ -0,0 +1,8 @@
+"""Offline ingest of crawl dumps into the vector store."""
+from .jsonl import JsonlIngester, build_embedder, build_ingester, ingest_files, iter_range, prepare_collection, shard_ranges
+from .replay import DIFF_COUNTERS, ReplayIngester, build_replay_ingester
+
+__all__ = [
+    'DIFF_COUNTERS', 'JsonlIngester', 'ReplayIngester', 'build_embedder', 'build_ingester',
+    'build_replay_ingester', 'ingest_files', 'iter_range', 'prepare_collection', 'shard_ranges',
+]
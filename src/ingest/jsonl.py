@@ -0,0 +1,476 @@
+"""
+Offline ingest of crawl dumps (JSONL) into the vector store.
+
+Rebuilding the index by re-crawling takes days at a polite download delay;
+the pages are already in output/crawled_pages.jsonl. This streams one or
+more dumps through the crawler's cleaning and hygiene rules, chunking,
+batched embedding and batched upserts, with constant memory:
+
+- each file is split into byte ranges (shards) that worker processes read
+  independently; a line belongs to the shard in which it starts
+- pages are processed in batches, so only one batch is in memory per worker
+- after every upserted batch the shard's byte offset is checkpointed, and
+  an interrupted run resumes from there (point IDs are deterministic, so
+  re-ingesting a partly written batch just overwrites it)
+
+Crawl archive segments (src/archive) are read the same way, loading only
+the url/title/text columns: Parquet files are sharded by row group, and
+zstd JSONL segments are one shard each with a line offset. HTTP cache files
+(.sqlite, see src/crawlers/httpcache.py) are sharded by rowid and yield raw
+responses, which ReplayIngester (src/ingest/replay.py) parses.
+"""
+import json
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from qdrant_client import QdrantClient
+from scrapy.exceptions import DropItem
+from tqdm import tqdm
+
+from src.archive import archive_files, iter_file
+from src.cleanup import Record
+from src.embedding import HuggingFaceEmbedder
+from src.filters.canonicalize import URLCanonicalizer
+from src.pipeline import DataCleaningPipeline
+from src.utils.metrics import get_registry, timed
+from src.vectorstore import VectorReducer, check_reducer, ensure_collection, write_pages
+
+# Don't split files into shards smaller than this
+MIN_SHARD_BYTES = 4 * 1024 * 1024
+
+# Shard bookkeeping; every other shard field is a counter summed across updates
+SHARD_FIELDS = ("path", "start", "end", "offset", "done", "weight")
+
+INGEST_METRICS = get_registry("ingest")
+
+# Archive columns the ingest needs (links are never decoded)
+INGEST_COLUMNS = ("url", "title", "text")
+
+Progress = Callable[[Dict[str, Any]], None]
+
+
+def expand_inputs(paths: Sequence[str], runs: Optional[Sequence[str]] = None) -> List[str]:
+    """Replace archive directories with their segment files (runs default to the latest)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(archive_files(path, runs or ["latest"]))
+        else:
+            files.append(str(path))
+    return files
+
+
+def _shard(path: str, start: int, end: Optional[int], weight: float) -> Dict[str, Any]:
+    return {"path": path, "start": start, "end": end, "offset": start, "done": end is not None and start >= end,
+            "weight": weight, "pages": 0, "chunks": 0, "dropped": 0}
+
+
+def _split(path: str, start: int, end: int, parts: int, weight: float) -> List[Dict[str, Any]]:
+    bounds = [start + (end - start) * i // parts for i in range(parts)] + [end]
+    return [_shard(path, begin, stop, weight) for begin, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def shard_ranges(paths: Sequence[str], shards_per_file: int, start_offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Split files into independently readable ranges.
+
+    JSONL files are split by bytes, Parquet archive segments by row group
+    and HTTP cache files by rowid; zstd JSONL segments can't be split and
+    become one shard each.
+
+    Args:
+        paths: JSONL files, archive segments or HTTP cache files
+        shards_per_file: Upper bound on ranges per file (usually the worker count)
+        start_offset: Skip the first bytes of each JSONL file (manual resume)
+
+    Returns:
+        Shard dicts: path, start, end, offset (next unread unit), done,
+        weight (bytes per unit, for progress) and counters
+    """
+    shards = []
+    for path in paths:
+        path = str(path)
+        size = os.path.getsize(path)
+        if path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            try:
+                groups = pq.ParquetFile(path).num_row_groups
+            except pa.ArrowInvalid as e:
+                # No footer: a segment a killed crawl left open (archives written before .tmp segments)
+                print(f"⚠️  Skipping unreadable archive segment {path}: {e}")
+                continue
+            shards.extend(_split(path, 0, groups, max(1, min(shards_per_file, groups)), size / max(groups, 1)))
+        elif path.endswith(".zst"):
+            shards.append(_shard(path, 0, None, 0.0))
+        elif path.endswith(".sqlite"):
+            from src.crawlers.httpcache import cache_rowid_range
+            first, end = cache_rowid_range(path)
+            rows = max(end - first, 1)
+            shards.extend(_split(path, first, end, max(1, min(shards_per_file, rows)), size / rows))
+        else:
+            start = min(start_offset, size)
+            count = max(1, min(shards_per_file, (size - start) // MIN_SHARD_BYTES))
+            shards.extend(_split(path, start, size, count, 1.0))
+    return shards
+
+
+def iter_range(path: str, start: int, end: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    Lines starting in [start, end).
+
+    Yields:
+        (offset just past the line, raw line)
+    """
+    with open(path, 'rb') as f:
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                # Mid-line: the rest of this line belongs to the previous range
+                f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield position, line
+
+
+def iter_shard(shard: Dict[str, Any]) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """
+    Pages of a shard from its current offset.
+
+    Yields:
+        (offset to resume from after this page, page dict or None if
+        unreadable; a Response for HTTP cache files)
+    """
+    path, offset = shard["path"], shard["offset"]
+    if path.endswith(".sqlite"):
+        from src.crawlers.httpcache import iter_cache_rows
+        for rowid, _, response in iter_cache_rows(path, offset, shard["end"]):
+            yield rowid + 1, response
+    elif path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        for group in range(offset, shard["end"]):
+            rows = parquet.read_row_group(group, columns=list(INGEST_COLUMNS)).to_pylist()
+            for i, row in enumerate(rows):
+                # Mid-group the resume point is the start of the group (re-ingest overwrites)
+                yield (group + 1 if i == len(rows) - 1 else group), row
+    elif path.endswith(".zst"):
+        for line_number, row in enumerate(iter_file(path, INGEST_COLUMNS), start=1):
+            if line_number > offset:
+                yield line_number, row
+    else:
+        for position, line in iter_range(path, offset, shard["end"]):
+            try:
+                yield position, json.loads(line)
+            except json.JSONDecodeError:
+                yield position, None
+
+
+class JsonlIngester:
+    """Cleans, chunks, embeds and upserts batches of crawled pages."""
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        embedder: HuggingFaceEmbedder,
+        clean: bool = True,
+        batch_pages: int = 64,
+        canonicalizer: Optional[URLCanonicalizer] = None,
+        reducer: Optional[VectorReducer] = None
+    ):
+        """
+        Args:
+            client: Qdrant client
+            collection_name: Collection to write into
+            embedder: Chunking and embedding (model and chunk sizes)
+            clean: Run DataCleaningPipeline's HTML cleaning; pass False for
+                dumps that already hold cleaned text (hygiene rules still run)
+            batch_pages: Pages embedded and upserted together
+            canonicalizer: URL canonicalizer for the payload URL
+            reducer: Also write this small named vector per chunk (two-stage search)
+        """
+        self.client = client
+        self.collection_name = collection_name
+        self.embedder = embedder
+        self.clean = clean
+        self.batch_pages = batch_pages
+        self.canonicalizer = canonicalizer or URLCanonicalizer()
+        self.reducer = check_reducer(client, collection_name, reducer)
+        self.cleaning = DataCleaningPipeline()
+
+    def to_item(self, record: Any) -> Dict[str, Any]:
+        """Page dict of one record from iter_shard; raises DropItem."""
+        if record is None:
+            raise DropItem("Unreadable line")
+        if not isinstance(record, dict):
+            raise TypeError(f"Can't ingest {type(record).__name__} records (replay HTTP caches with replay_cache.py)")
+        # Dumps written by older crawls carry the vectors; they are recomputed
+        for key in ('embeddings', 'chunks', 'vectors'):
+            record.pop(key, None)
+        return record
+
+    def prepare(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the crawler's cleaning/hygiene rules; raises DropItem."""
+        if not item.get('url') or item.get('text') is None:
+            raise DropItem("Missing url or text")
+        if self.clean:
+            return self.cleaning.process_item(item, None)
+        reason = self.cleaning.hygiene.evaluate(Record.from_item(item), stop_at_first=True)
+        if reason:
+            raise DropItem(reason)
+        return item
+
+    def ingest_range(self, shard: Dict[str, Any], progress: Progress):
+        """
+        Ingest one shard from its current offset.
+
+        Args:
+            shard: Shard dict from shard_ranges (or a checkpoint)
+            progress: Called after each upserted batch with
+                {"offset", "pages", "chunks", "dropped", "done"} (counts are deltas)
+        """
+        batch: List[Dict[str, Any]] = []
+        dropped = 0
+        offset = shard["offset"]
+        for offset, record in iter_shard(shard):
+            try:
+                batch.append(self.prepare(self.to_item(record)))
+            except DropItem:
+                dropped += 1
+            if len(batch) >= self.batch_pages:
+                pages, chunks = self.write_batch(batch)
+                progress({"offset": offset, "pages": pages, "chunks": chunks, "dropped": dropped, "done": False})
+                batch, dropped = [], 0
+        pages, chunks = self.write_batch(batch)
+        progress({"offset": offset, "pages": pages, "chunks": chunks, "dropped": dropped, "done": True})
+
+    def write_batch(self, items: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Chunk, embed (one call for the whole batch) and upsert pages.
+
+        Returns:
+            (pages written, chunks written)
+        """
+        pages: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            # A URL seen twice in a batch keeps its last version
+            item['url'] = self.canonicalizer.canonicalize(item['url'])
+            item.setdefault('title', '')
+            pages[item['url']] = item
+        if not pages:
+            return 0, 0
+
+        with timed("chunk", INGEST_METRICS):
+            documents = [self.embedder.create_document_from_item(item) for item in pages.values()]
+            chunks = self.embedder.text_splitter.split_documents(documents)
+        with timed("embed", INGEST_METRICS):
+            vectors = self.embedder.embed_texts([chunk.page_content for chunk in chunks])
+
+        rows: Dict[str, List[int]] = {url: [] for url in pages}
+        for row, chunk in enumerate(chunks):
+            rows[chunk.metadata["url"]].append(row)
+        with timed("upsert", INGEST_METRICS):
+            written = write_pages(self.client, self.collection_name, [
+                (url, pages[url].get("title"), [chunks[row].page_content for row in page_rows], vectors[page_rows])
+                for url, page_rows in rows.items()
+            ], reducer=self.reducer)
+        return len(pages), written
+
+
+def build_embedder(options: Dict[str, Any]) -> HuggingFaceEmbedder:
+    """HuggingFace embeddings and chunking from worker options (model_name, device, chunk_size, ...)."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=options["model_name"],
+        model_kwargs={"device": options.get("device", "mps")},
+        encode_kwargs={"batch_size": options.get("embed_batch_size", 32)}
+    )
+    return HuggingFaceEmbedder(
+        embeddings=embeddings,
+        chunk_size=options.get("chunk_size", 1024),
+        chunk_overlap=options.get("chunk_overlap", 256)
+    )
+
+
+def build_ingester(options: Dict[str, Any]) -> JsonlIngester:
+    """Default worker factory: real Qdrant client and HuggingFace embeddings."""
+    return JsonlIngester(
+        QdrantClient(url=options["qdrant_url"]),
+        options["collection_name"],
+        build_embedder(options),
+        clean=options.get("clean", True),
+        batch_pages=options.get("batch_pages", 64),
+        reducer=VectorReducer.from_config(options.get("small_vector"))
+    )
+
+
+# Per-process ingester, built once by the pool initializer
+_worker: Optional[JsonlIngester] = None
+
+
+def _init_worker(factory: Callable[[Dict[str, Any]], JsonlIngester], options: Dict[str, Any]):
+    global _worker
+    _worker = factory(options)
+
+
+def _run_shard(index: int, shard: Dict[str, Any], updates):
+    _worker.ingest_range(shard, lambda update: updates.put((index, update)))
+
+
+class _Checkpoint:
+    """Shard offsets and counters, saved atomically after every batch."""
+
+    def __init__(self, path: Optional[str], shards: List[Dict[str, Any]], files: Dict[str, int]):
+        self.path = path
+        self.state = {"files": files, "shards": shards}
+
+    @classmethod
+    def load(cls, path: Optional[str], files: Dict[str, int]) -> Optional["_Checkpoint"]:
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("files") != files:
+            print(f"⚠️  Checkpoint {path} is for different input files, starting over")
+            return None
+        return cls(path, state["shards"], files)
+
+    def save(self):
+        if not self.path:
+            return
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+
+def ingest_files(
+    paths: Sequence[str],
+    options: Dict[str, Any],
+    workers: int = 1,
+    checkpoint_path: Optional[str] = "output/ingest.checkpoint.json",
+    resume: bool = True,
+    start_offset: int = 0,
+    factory: Callable[[Dict[str, Any]], JsonlIngester] = build_ingester,
+    runs: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    Ingest JSONL dumps, in parallel worker processes when workers > 1.
+
+    Args:
+        paths: JSONL files (e.g. output/crawled_pages.jsonl), archive
+            segments or archive directories (e.g. output/archive)
+        options: Passed to factory in every worker (see build_ingester:
+            qdrant_url, collection_name, model_name, device, chunk_size,
+            chunk_overlap, embed_batch_size, batch_pages, clean, small_vector)
+        workers: Worker processes; 1 runs in this process
+        checkpoint_path: JSON file with per-shard offsets (None disables resume)
+        resume: Continue from checkpoint_path if it matches the input files
+        start_offset: Byte offset to start each file at (ignored when resuming)
+        factory: Builds the per-process JsonlIngester (top-level function,
+            so it can be sent to spawned workers)
+        runs: Archive runs to read from archive directories (default: latest)
+
+    Returns:
+        Stats: pages, chunks, dropped (plus any other counters the
+        ingester reports), bytes, elapsed, pages_per_sec, shards
+    """
+    start_time = time.time()
+    paths = expand_inputs(paths, runs)
+    files = {str(path): os.path.getsize(path) for path in paths}
+    checkpoint = _Checkpoint.load(checkpoint_path, files) if resume else None
+    if checkpoint:
+        print(f"↩️  Resuming ingest from {checkpoint_path}")
+    else:
+        checkpoint = _Checkpoint(checkpoint_path, shard_ranges(paths, max(workers, 1), start_offset), files)
+    shards = checkpoint.state["shards"]
+    pending = [i for i, shard in enumerate(shards) if not shard["done"]]
+
+    def position(shard: Dict[str, Any], offset: int) -> int:
+        # Approximate bytes read; the last line of a range may run past its end
+        if shard["end"] is None:
+            return 0
+        return int((min(offset, shard["end"]) - shard["start"]) * shard["weight"])
+
+    total_bytes = sum(position(shard, shard["end"]) for shard in shards if shard["end"] is not None)
+    done_bytes = sum(position(shard, shard["offset"]) for shard in shards)
+    pbar = tqdm(total=total_bytes, initial=done_bytes, unit="B", unit_scale=True, desc="Ingesting")
+
+    def apply(index: int, update: Dict[str, Any]):
+        shard = shards[index]
+        pbar.update(position(shard, update["offset"]) - position(shard, shard["offset"]))
+        shard["offset"] = update["offset"]
+        shard["done"] = update["done"]
+        for key, value in update.items():
+            if key not in SHARD_FIELDS:
+                shard[key] = shard.get(key, 0) + value
+        checkpoint.save()
+        pbar.set_postfix({"pages": sum(s["pages"] for s in shards), "chunks": sum(s["chunks"] for s in shards)})
+
+    try:
+        if workers <= 1:
+            _init_worker(factory, options)
+            for index in pending:
+                _worker.ingest_range(shards[index], lambda update, index=index: apply(index, update))
+        else:
+            context = multiprocessing.get_context("spawn")
+            with context.Manager() as manager:
+                updates = manager.Queue()
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                         initializer=_init_worker, initargs=(factory, options)) as pool:
+                    futures = [pool.submit(_run_shard, index, dict(shards[index]), updates) for index in pending]
+                    while True:
+                        try:
+                            apply(*updates.get(timeout=0.5))
+                        except queue.Empty:
+                            if all(future.done() for future in futures):
+                                break
+                    while not updates.empty():
+                        apply(*updates.get())
+                    for future in futures:
+                        # Surface worker errors (progress up to the failure is checkpointed)
+                        future.result()
+    finally:
+        pbar.close()
+
+    elapsed = time.time() - start_time
+    counters = {"pages": 0, "chunks": 0, "dropped": 0}
+    for shard in shards:
+        for key, value in shard.items():
+            if key not in SHARD_FIELDS:
+                counters[key] = counters.get(key, 0) + value
+    pages = counters["pages"]
+    if checkpoint_path and all(shard["done"] for shard in shards):
+        # Finished: a later run should start over, not resume a completed ingest
+        Path(checkpoint_path).unlink(missing_ok=True)
+    return {
+        **counters,
+        "bytes": total_bytes,
+        "shards": len(shards),
+        "elapsed": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+    }
+
+
+def prepare_collection(client: QdrantClient, collection_name: str, vector_size: int = 768, distance: str = "Cosine",
+                       vector_store: Optional[Dict[str, Any]] = None):
+    """
+    Create the collection (if missing) and its payload indexes before workers start.
+
+    Args:
+        vector_store: config_llm.json's vector_store section (quantization,
+            on-disk vectors, HNSW); its vector_size/distance take precedence
+    """
+    ensure_collection(client, collection_name, {"vector_size": vector_size, "distance": distance, **(vector_store or {})})
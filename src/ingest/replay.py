@@ -0,0 +1,203 @@
+"""
+Replay a crawl from the HTTP cache instead of re-crawling.
+
+After a change to the spider's extraction (UniversitySpider.extract) or to
+DataCleaningPipeline, every page has to be processed again, but a re-crawl
+waits DOWNLOAD_DELAY between requests for responses that are already in
+the HTTP cache (src/crawlers/httpcache.py). ReplayIngester reads the cache
+file in rowid shards, in worker processes (ingest_files), and runs the
+crawl's extract -> clean -> chunk -> embed -> upsert steps with no
+scheduler and no politeness delays.
+
+Before embedding, each page's chunks are compared with the chunks stored
+in Qdrant by metadata.content_hash:
+
+- pages whose chunks are all unchanged are not written at all
+- changed pages reuse the stored vector of every unchanged chunk, so only
+  new or edited chunks are embedded
+
+The counts (DIFF_COUNTERS) come back in the ingest stats as a diff report.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+from scrapy.exceptions import DropItem
+from scrapy.http import Response
+
+from src.cleanup.rules import content_hash
+from src.crawlers.university_crawler import UniversitySpider
+from src.embedding import HuggingFaceEmbedder
+from src.filters.canonicalize import URLCanonicalizer
+from src.utils.metrics import timed
+from src.vectorstore import VectorReducer, point_id, write_pages
+from .jsonl import INGEST_METRICS, JsonlIngester, Progress, build_embedder
+
+DIFF_COUNTERS = (
+    "pages_new", "pages_changed", "pages_unchanged",
+    "chunks_reused", "chunks_embedded", "chunks_removed",
+)
+
+# (content hash, vector) of a stored chunk; either may be None
+StoredChunk = Tuple[Optional[str], Optional[Any]]
+
+
+class ReplayIngester(JsonlIngester):
+    """Re-extracts cached responses and re-embeds only the chunks that changed."""
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        embedder: HuggingFaceEmbedder,
+        spider: UniversitySpider,
+        batch_pages: int = 64,
+        dry_run: bool = False,
+        canonicalizer: Optional[URLCanonicalizer] = None,
+        reducer: Optional[VectorReducer] = None
+    ):
+        """
+        Args:
+            client: Qdrant client
+            collection_name: Collection to compare against and write into
+            embedder: Chunking and embedding (must match the collection's model)
+            spider: Spider whose extract() turns responses into pages
+            batch_pages: Pages compared, embedded and upserted together
+            dry_run: Only compute the diff; nothing is embedded or written
+            canonicalizer: URL canonicalizer for the payload URL
+            reducer: Also write this small named vector per chunk (two-stage search)
+        """
+        super().__init__(client, collection_name, embedder, clean=True, batch_pages=batch_pages,
+                         canonicalizer=canonicalizer, reducer=reducer)
+        self.spider = spider
+        self.dry_run = dry_run
+        self.diff = dict.fromkeys(DIFF_COUNTERS, 0)
+
+    def to_item(self, record: Any) -> Dict[str, Any]:
+        """Page dict of a cached response (JSONL records are passed through); raises DropItem."""
+        if not isinstance(record, Response):
+            return super().to_item(record)
+        if record.status != 200:
+            # Redirects and errors are cached too; a redirect target has its own entry
+            raise DropItem(f"HTTP {record.status}: {record.url}")
+        page = self.spider.extract(record)
+        if page is None:
+            raise DropItem(f"Not an HTML page: {record.url}")
+        return {"url": page.url, "title": page.title, "text": page.text}
+
+    def ingest_range(self, shard: Dict[str, Any], progress: Progress):
+        """JsonlIngester.ingest_range, with the diff counters added to every progress update."""
+        def report(update: Dict[str, Any]):
+            update.update(self.diff)
+            self.diff = dict.fromkeys(DIFF_COUNTERS, 0)
+            progress(update)
+
+        super().ingest_range(shard, report)
+
+    def stored_chunks(self, urls: Sequence[str]) -> Dict[str, List[StoredChunk]]:
+        """
+        Stored chunks of the given pages, in chunk order.
+
+        Returns:
+            url -> [(content hash, vector or None in dry runs)] ([] for new pages)
+        """
+        found: Dict[str, Dict[str, StoredChunk]] = {url: {} for url in urls}
+        url_filter = models.Filter(must=[
+            models.FieldCondition(key="metadata.url", match=models.MatchAny(any=list(urls)))
+        ])
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                self.collection_name,
+                scroll_filter=url_filter,
+                limit=1024,
+                offset=offset,
+                with_payload=models.PayloadSelectorInclude(include=["metadata.url", "metadata.content_hash"]),
+                # Only the full vector; small vectors are recomputed from it
+                with_vectors=False if self.dry_run else [""]
+            )
+            for point in points:
+                metadata = point.payload.get("metadata") or {}
+                found[metadata["url"]][str(point.id)] = (metadata.get("content_hash"), point.vector)
+            if offset is None:
+                break
+        # write_pages numbers a page's chunks 0..n-1, so point IDs give the order
+        return {
+            url: [chunks.get(point_id(url, i), (None, None)) for i in range(len(chunks))]
+            for url, chunks in found.items()
+        }
+
+    def write_batch(self, items: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Chunk pages, diff them against the collection and write the changed ones.
+
+        Returns:
+            (pages replayed, chunks written)
+        """
+        pages: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            # A URL seen twice in a batch keeps its last version
+            item['url'] = self.canonicalizer.canonicalize(item['url'])
+            item.setdefault('title', '')
+            pages[item['url']] = item
+        if not pages:
+            return 0, 0
+
+        with timed("chunk", INGEST_METRICS):
+            documents = [self.embedder.create_document_from_item(item) for item in pages.values()]
+            texts: Dict[str, List[str]] = {url: [] for url in pages}
+            for chunk in self.embedder.text_splitter.split_documents(documents):
+                texts[chunk.metadata["url"]].append(chunk.page_content)
+        stored = self.stored_chunks(list(pages))
+
+        # Changed pages: (url, chunk texts, stored vector or None per chunk)
+        changed: List[Tuple[str, List[str], List[Optional[Any]]]] = []
+        for url, chunk_texts in texts.items():
+            old = stored[url]
+            hashes = [content_hash(text) for text in chunk_texts]
+            if not old:
+                self.diff["pages_new"] += 1
+            elif [old_hash for old_hash, _ in old] == hashes:
+                self.diff["pages_unchanged"] += 1
+                continue
+            else:
+                self.diff["pages_changed"] += 1
+            known = {old_hash: vector for old_hash, vector in old if old_hash is not None}
+            reused = [known[h] if h in known else None for h in hashes]
+            new_hashes = set(hashes)
+            self.diff["chunks_reused"] += sum(h in known for h in hashes)
+            self.diff["chunks_embedded"] += sum(h not in known for h in hashes)
+            self.diff["chunks_removed"] += sum(old_hash not in new_hashes for old_hash, _ in old)
+            changed.append((url, chunk_texts, reused))
+        if self.dry_run or not changed:
+            return len(pages), 0
+
+        missing = [text for _, chunk_texts, reused in changed
+                   for text, vector in zip(chunk_texts, reused) if vector is None]
+        with timed("embed", INGEST_METRICS):
+            embedded = iter(self.embedder.embed_texts(missing))
+        writes = []
+        for url, chunk_texts, reused in changed:
+            rows = [next(embedded) if vector is None else vector for vector in reused]
+            matrix = np.asarray(rows, dtype=np.float32).reshape(len(rows), -1) if rows else np.zeros((0, 0), np.float32)
+            writes.append((url, pages[url].get("title"), chunk_texts, matrix))
+        with timed("upsert", INGEST_METRICS):
+            written = write_pages(self.client, self.collection_name, writes, reducer=self.reducer)
+        return len(pages), written
+
+
+def build_replay_ingester(options: Dict[str, Any]) -> ReplayIngester:
+    """
+    Worker factory for replays: real Qdrant client, HuggingFace embeddings
+    and the crawl's spider (options as for build_ingester, plus base_url,
+    crawl_rules and dry_run).
+    """
+    return ReplayIngester(
+        QdrantClient(url=options["qdrant_url"]),
+        options["collection_name"],
+        build_embedder(options),
+        UniversitySpider(base_url=options["base_url"], crawl_rules=options.get("crawl_rules")),
+        batch_pages=options.get("batch_pages", 64),
+        dry_run=options.get("dry_run", False),
+        reducer=VectorReducer.from_config(options.get("small_vector"))
+    )
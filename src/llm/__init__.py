@@ -7,10 +7,31 @@ and source link extraction.
 
 Components:
 - setup_rag_system: Initialize RAG chain with embeddings and LLM
-- format_sources: Format document sources for display
+- build_rag_components: Initialize the retriever, reranker, context builder and LLM client
+- run_batch: Answer a JSONL file of questions with batched retrieval and concurrent generation
+- format_sources: Format document sources (with query-aware snippets) for display
+- retrieve_documents: Retrieval and optional rerank without generation
+- choose_mode: Pick search-only or answer mode for a request
 - prepare_context: Prepare context from retrieved documents
+- ContextBuilder: Token-budgeted context packing with overlap dedupe
+- QdrantMMRRetriever: Single-query retriever with NumPy MMR and URL diversification
+- OllamaClient: Pooled, pre-warmed Ollama client with keep-alive and per-request timings
+- CrossEncoderReranker: Optional cross-encoder rerank stage with score cache and latency budget
 """
 
-from .enhanced_search import setup_rag_system, format_sources, prepare_context
+from .enhanced_search import setup_rag_system, build_rag_components, format_sources, prepare_context, retrieve_documents
+from .search_mode import choose_mode, is_navigational
+from .snippets import query_snippet
+from .batch_search import run_batch, read_questions
+from .retrieval import QdrantMMRRetriever, maximal_marginal_relevance
+from .reranker import CrossEncoderReranker
+from .context_builder import ContextBuilder, get_token_counter
+from .ollama_client import OllamaClient
 
-__all__ = ['setup_rag_system', 'format_sources', 'prepare_context']
+__all__ = [
+    'setup_rag_system', 'build_rag_components', 'format_sources', 'prepare_context', 'retrieve_documents',
+    'choose_mode', 'is_navigational', 'query_snippet',
+    'run_batch', 'read_questions',
+    'QdrantMMRRetriever', 'maximal_marginal_relevance', 'CrossEncoderReranker',
+    'ContextBuilder', 'get_token_counter', 'OllamaClient'
+]
@@ -0,0 +1,188 @@
+"""
+Batch/offline query mode for evaluating many questions at once.
+
+Questions are read from JSONL and processed in batches: every batch is
+embedded as queries and searched with one batched Qdrant query, then
+answers are generated by a bounded pool of concurrent LLM workers.
+Results stream to a JSONL file in the ResultFormatter schema as they
+complete, so a long regression run can be inspected while it runs.
+"""
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from .enhanced_search import format_sources, generate_answer, timing_metadata
+from ..utils.metrics import collect_timings, timed
+
+
+def read_questions(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream questions from a JSONL file.
+
+    Each line is either {"question": "..."} (or "query"), optionally with
+    an "id", or a bare JSON string.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for index, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"question": record}
+            question = (record.get("question") or record.get("query") or "").strip()
+            if question:
+                yield {"index": index, "id": record.get("id", index), "question": question}
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embed_queries(embeddings: Any, questions: List[str]) -> List[List[float]]:
+    """
+    Embed questions as queries in one batched forward pass.
+
+    Uses the query-side encode arguments (instruction-tuned models such as
+    e5 or bge give queries a different prompt than documents), so vectors
+    match embed_query. Embeddings other than a local SentenceTransformer
+    are embedded one query at a time.
+    """
+    client = getattr(embeddings, "_client", None)
+    if isinstance(embeddings, HuggingFaceEmbeddings) and not embeddings.multi_process \
+            and hasattr(client, "encode"):
+        # Same preprocessing and kwargs as HuggingFaceEmbeddings.embed_query
+        encode_kwargs = embeddings.query_encode_kwargs or embeddings.encode_kwargs
+        vectors = client.encode([question.replace("\n", " ") for question in questions],
+                                show_progress_bar=embeddings.show_progress, **encode_kwargs)
+        return vectors.tolist()
+    return [embeddings.embed_query(question) for question in questions]
+
+
+def retrieve_batch(components: Dict[str, Any], questions: List[str]) -> List[List[Document]]:
+    """Embed the questions and retrieve documents for each with one batched search."""
+    retriever = components["retriever"]
+    embeddings = components["embeddings"]
+    with timed("query_embedding"):
+        query_vectors = embed_queries(embeddings, questions)
+
+    if hasattr(retriever, "retrieve_batch"):
+        return retriever.retrieve_batch(query_vectors)
+    # Generic LangChain retrievers have no batched search
+    return [retriever.invoke(question) for question in questions]
+
+
+def _answer(components: Dict[str, Any], item: Dict[str, Any], docs: List[Document], retrieval_time: float) -> Dict[str, Any]:
+    """Rerank, generate and format one result (runs in a worker thread)."""
+    start_time = time.time()
+    with collect_timings() as timings:
+        reranker = components["reranker"]
+        if reranker is not None:
+            with timed("rerank"):
+                docs = reranker.rerank(item["question"], docs)
+
+        generation = generate_answer(components, item["question"], docs)
+        with timed("formatting"):
+            sources = format_sources(docs, query=item["question"])
+    generation_time = time.time() - start_time
+
+    return {
+        "answer": generation["answer"],
+        "sources": sources,
+        "metadata": {
+            "id": item["id"],
+            "query": item["question"],
+            "total_time": retrieval_time + generation_time,
+            "total_docs": len(sources),
+            "llm_timings": generation["llm_timings"],
+            **timing_metadata(generation, timings),
+            # Retrieval is batched, so each question gets its share of the batch
+            "retrieval_time": retrieval_time,
+        }
+    }
+
+
+def run_batch(
+    components: Dict[str, Any],
+    questions: Iterable[Dict[str, Any]],
+    output_path: str,
+    batch_size: int = 64,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Answer a stream of questions and write results to JSONL.
+
+    Args:
+        components: Output of build_rag_components
+        questions: Items from read_questions
+        output_path: JSONL file to write results to
+        batch_size: Questions embedded and searched per batch
+        workers: Concurrent LLM generations (defaults to llm.max_concurrency)
+
+    Returns:
+        Run statistics including throughput in questions/minute
+    """
+    workers = workers or components["llm_client"].max_concurrency
+    # Keep a bounded number of retrieved-but-unanswered questions in memory
+    max_pending = max(workers * 4, batch_size)
+
+    stats = {"questions": 0, "failed": 0, "retrieval_time": 0.0}
+    start_time = time.time()
+
+    # Future -> the question it answers, for error records
+    submitted: Dict[Any, Dict[str, Any]] = {}
+
+    def write_done(done, out):
+        for future in done:
+            item = submitted.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                stats["failed"] += 1
+                result = {"error": str(e), "metadata": {"id": item["id"], "query": item["question"]}}
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            stats["questions"] += 1
+        out.flush()
+
+    with open(output_path, 'w', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm") as pool:
+        pending = set()
+        for batch in _batched(questions, batch_size):
+            batch_start = time.time()
+            doc_lists = retrieve_batch(components, [item["question"] for item in batch])
+            batch_retrieval = time.time() - batch_start
+            stats["retrieval_time"] += batch_retrieval
+
+            for item, docs in zip(batch, doc_lists):
+                future = pool.submit(_answer, components, item, docs, batch_retrieval / len(batch))
+                submitted[future] = item
+                pending.add(future)
+
+            while len(pending) > max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_done(done, out)
+
+            done = {future for future in pending if future.done()}
+            pending -= done
+            write_done(done, out)
+
+        done, _ = wait(pending)
+        write_done(done, out)
+
+    elapsed = time.time() - start_time
+    stats["elapsed"] = elapsed
+    stats["questions_per_minute"] = stats["questions"] / elapsed * 60 if elapsed else 0.0
+    stats["workers"] = workers
+    stats["batch_size"] = batch_size
+    return stats
@@ -0,0 +1,192 @@
+"""
+Token-budgeted context packing for the RAG prompt.
+
+Chunks are measured with the target model's tokenizer and packed by
+relevance per token until the budget is used. Text already sent in an
+earlier chunk (the splitter's 256-char overlap, repeated boilerplate
+sentences) is dropped, and chunks that do not fit whole are trimmed at a
+sentence boundary instead of mid-sentence.
+"""
+import re
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+# Split after sentence punctuation followed by whitespace
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+# Overlaps shorter than this are more likely coincidence than splitter overlap
+MIN_OVERLAP_CHARS = 20
+
+
+def get_token_counter(tokenizer_name: Optional[str] = None) -> Callable[[str], int]:
+    """
+    Return a function that counts tokens the way the target LLM does.
+
+    Args:
+        tokenizer_name: Hugging Face tokenizer matching the Ollama model
+            (e.g. "unsloth/Llama-3.2-3B-Instruct"). If not given or not
+            available, tiktoken's cl100k_base is used, which is close to the
+            Llama 3 BPE vocabulary; as a last resort ~4 chars per token.
+
+    Returns:
+        Callable mapping text to a token count
+    """
+    if tokenizer_name:
+        try:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+        except Exception as e:
+            print(f"⚠️  Could not load tokenizer '{tokenizer_name}': {e}")
+
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: max(1, len(text) // 4)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, keeping the punctuation."""
+    return [s for s in SENTENCE_BOUNDARY.split(text.strip()) if s]
+
+
+def strip_overlap(previous: str, text: str, max_overlap: int = 512) -> str:
+    """
+    Remove the prefix of text that repeats the end of previous.
+
+    Args:
+        previous: Text of a chunk already in the context
+        text: Text of the next chunk from the same page
+        max_overlap: Longest overlap to look for (>= the splitter's chunk_overlap)
+
+    Returns:
+        text without the overlapping prefix
+    """
+    longest = min(len(previous), len(text), max_overlap)
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:].lstrip()
+    return text
+
+
+def _normalize(sentence: str) -> str:
+    return ' '.join(sentence.lower().split())
+
+
+class ContextBuilder:
+    """Packs retrieved documents into a prompt context under a token budget."""
+
+    def __init__(
+        self,
+        max_tokens: int = 1000,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        min_trimmed_tokens: int = 48
+    ):
+        """
+        Args:
+            max_tokens: Token budget for the whole context block
+            count_tokens: Token counter (see get_token_counter)
+            min_trimmed_tokens: Don't add a trimmed chunk smaller than this
+        """
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or get_token_counter()
+        self.min_trimmed_tokens = min_trimmed_tokens
+
+    def build(self, docs: List[Document]) -> str:
+        """Return the packed context string for the given documents."""
+        return "\n\n".join(self.pack(docs))
+
+    def pack(self, docs: List[Document]) -> List[str]:
+        """
+        Select, dedupe and trim documents; return the context parts in rank order.
+
+        Source numbers stay aligned with the position of each document in
+        docs, so they match the ids produced by format_sources.
+        """
+        # 1. Drop text that an earlier chunk already carries
+        seen_sentences = set()
+        previous_by_url: Dict[str, List[str]] = {}
+        candidates = []
+        for i, doc in enumerate(docs):
+            url = doc.metadata.get('url', 'Unknown URL')
+            text = doc.page_content
+            for previous in previous_by_url.get(url, []):
+                text = strip_overlap(previous, text)
+            previous_by_url.setdefault(url, []).append(doc.page_content)
+
+            sentences = []
+            for sentence in split_sentences(text):
+                key = _normalize(sentence)
+                if key in seen_sentences:
+                    continue
+                seen_sentences.add(key)
+                sentences.append(sentence)
+            if not sentences:
+                continue
+
+            header = f"[Source {i+1}: {url}]"
+            body = ' '.join(sentences)
+            candidates.append({
+                "rank": i,
+                "header": header,
+                "sentences": sentences,
+                "tokens": self.count_tokens(f"{header}\n{body}"),
+            })
+
+        if not candidates:
+            return []
+
+        # 2. Greedy packing by relevance per token
+        relevance = self._relevance(docs)
+        for candidate in candidates:
+            candidate["density"] = relevance[candidate["rank"]] / max(candidate["tokens"], 1)
+
+        remaining = self.max_tokens
+        packed = {}
+        for candidate in sorted(candidates, key=lambda c: c["density"], reverse=True):
+            if candidate["tokens"] <= remaining:
+                packed[candidate["rank"]] = f"{candidate['header']}\n{' '.join(candidate['sentences'])}"
+                remaining -= candidate["tokens"]
+            elif remaining >= self.min_trimmed_tokens:
+                trimmed = self._trim(candidate["header"], candidate["sentences"], remaining)
+                if trimmed:
+                    packed[candidate["rank"]] = trimmed
+                    remaining -= self.count_tokens(trimmed)
+
+        # 3. Emit in retrieval order so the most relevant source comes first
+        return [packed[rank] for rank in sorted(packed)]
+
+    def _trim(self, header: str, sentences: List[str], budget: int) -> Optional[str]:
+        """Keep whole leading sentences that fit in budget tokens."""
+        kept = []
+        used = self.count_tokens(header) + 1
+        for sentence in sentences:
+            cost = self.count_tokens(sentence) + 1
+            if used + cost > budget:
+                break
+            kept.append(sentence)
+            used += cost
+        if not kept or used < self.min_trimmed_tokens:
+            return None
+        return f"{header}\n{' '.join(kept)}"
+
+    @staticmethod
+    def _relevance(docs: List[Document]) -> List[float]:
+        """Relevance per document in (0, 1], from rerank/vector scores or rank."""
+        scores = []
+        for doc in docs:
+            score = doc.metadata.get('_rerank_score', doc.metadata.get('_score'))
+            if score is None:
+                break
+            scores.append(float(score))
+
+        if len(scores) != len(docs):
+            return [1.0 / (rank + 1) for rank in range(len(docs))]
+
+        low, high = min(scores), max(scores)
+        if high - low < 1e-9:
+            return [1.0] * len(docs)
+        return [0.1 + 0.9 * (score - low) / (high - low) for score in scores]
@@ -1,42 +1,113 @@
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from qdrant_client import QdrantClient
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_qdrant import QdrantVectorStore
-from langchain_ollama import OllamaLLM
 from langchain_core.prompts import PromptTemplate
 from langchain_core.documents import Document
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from tqdm import tqdm
 import json
+from .retrieval import QdrantMMRRetriever
+from .reranker import CrossEncoderReranker
+from .snippets import query_snippet
+from .context_builder import ContextBuilder, get_token_counter
+from .ollama_client import OllamaClient
+from ..utils.metrics import timed, record, collect_timings
+from ..vectorstore import SiteRouter, VectorReducer, check_reducer, resolve_alias, search_params
+
+# Defaults for the "retrieval" section of config_llm.json
+DEFAULT_RETRIEVAL_CONFIG = {
+    "search_type": "mmr",
+    "k": 5,
+    "fetch_k": 100,
+    "lambda_mult": 0.5,
+    "max_chunks_per_url": 2,
+    "authority_weight": 0.0,
+    # Query-time HNSW/quantization parameters (see src/vectorstore/collection.py)
+    "hnsw_ef": None,
+    "rescore": None,
+    "oversampling": None,
+    # Small-vector prefetch + full-vector rescoring (needs vector_store.small_vector)
+    "two_stage": {"enabled": False, "prefetch_limit": 400},
+    # Restrict unfiltered queries to the site they clearly belong to (src/vectorstore/partitions.py)
+    "routing": {"enabled": False, "sites": None, "margin": 0.02, "sample": 1000},
+    "rerank": {"enabled": False},
+    # Retrieval-only responses; "auto" picks them for navigational queries (src/llm/search_mode.py)
+    "fast_search": {"default_mode": "auto", "max_words": 5, "rerank": False},
+    "max_context_length": 4000,
+    "max_context_tokens": None,
+}
+
+# Stages that count towards retrieval_time in the result metadata
+RETRIEVAL_STAGES = ("query_embedding", "vector_search", "mmr", "rerank")
+
+# Tokens reserved for the prompt template and question around the context
+PROMPT_OVERHEAD_TOKENS = 256
+
+# The static instructions come first so every prompt shares the same prefix
+# and Ollama can reuse its KV cache for it; only context and question vary.
+QA_PROMPT_TEMPLATE = """You are a helpful assistant answering questions about CU Boulder based on the provided context.
+Please provide a comprehensive, well-structured answer to the user's question.
+
+INSTRUCTIONS:
+1. Answer the question based primarily on the provided context
+2. If the context doesn't contain enough information, say so clearly
+3. Organize your answer with clear headings and bullet points when appropriate
+4. Be concise but thorough
+5. Include specific details from the sources
+
+CONTEXT:
+{context}
+
+USER QUESTION: {question}
+
+ANSWER:
+"""
+
+
+def context_token_budget(retrieval_config: Dict[str, Any], llm_config: Dict[str, Any]) -> int:
+    """
+    Work out how many tokens the context block may use.
+
+    retrieval.max_context_tokens wins if set, otherwise max_context_length
+    (characters) is converted at ~4 chars per token. The result is capped
+    so context, prompt and answer (llm.max_tokens) fit in llm.num_ctx.
+    """
+    budget = retrieval_config.get("max_context_tokens") or retrieval_config["max_context_length"] // 4
+    num_ctx = llm_config.get("num_ctx")
+    if num_ctx:
+        window = num_ctx - llm_config.get("max_tokens", 0) - PROMPT_OVERHEAD_TOKENS
+        budget = min(budget, max(window, 0))
+    return budget
 
 # --- Helper Functions (Moved from the class) ---
 
-def prepare_context(docs: List[Document], max_length: int = 4000) -> str:
-    """Prepare context from retrieved documents"""
-    context_parts = []
-    current_length = 0
-    for i, doc in enumerate(docs):
-        source_info = f"[Source {i+1}: {doc.metadata.get('url', 'Unknown URL')}]"
-        content = doc.page_content
-        
-        # Truncate content if necessary
-        doc_length = len(source_info) + len(content)
-        if current_length + doc_length > max_length:
-            remaining_space = max_length - current_length - len(source_info) - 100
-            if remaining_space > 200:  # Only include if we have meaningful content
-                content = content[:remaining_space] + "..."
-                context_parts.append(f"{source_info}\n{content}")
-            break
-        
-        context_parts.append(f"{source_info}\n{content}")
-        current_length += doc_length
-    
-    return "\n\n".join(context_parts)
+def prepare_context(docs: List[Document], max_tokens: int = 1000, builder: Optional[ContextBuilder] = None) -> str:
+    """Prepare context from retrieved documents within a token budget"""
+    if builder is None:
+        builder = ContextBuilder(max_tokens=max_tokens)
+    return builder.build(docs)
 
-def format_sources(docs: List[Document]) -> List[Dict[str, str]]:
-    """Format source information"""
+def timing_metadata(result: Dict[str, Any], timings: Dict[str, float]) -> Dict[str, Any]:
+    """Summarize per-stage timings of one request for the result metadata"""
+    return {
+        "retrieval_time": sum(timings.get(stage, 0.0) for stage in RETRIEVAL_STAGES),
+        "generation_time": timings.get("llm", 0.0),
+        "context_length": result.get("context_length", 0),
+        "stage_timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+    }
+
+def format_sources(docs: List[Document], query: Optional[str] = None,
+                   snippet_chars: int = 200) -> List[Dict[str, Any]]:
+    """
+    Format source information.
+    
+    With a query, each snippet is the passage of the chunk that matches it
+    best, and 'matches' lists the query terms it contains (for
+    highlighting); otherwise it is the start of the chunk.
+    """
     sources = []
     seen_urls = set()
     
@@ -53,14 +124,20 @@ def format_sources(docs: List[Document]) -> List[Dict[str, str]]:
         
         # Create a short snippet
         content = doc.page_content
-        snippet = content[:150] + "..." if len(content) > 150 else content
+        if query:
+            snippet, matches = query_snippet(content, query, max_chars=snippet_chars)
+        else:
+            snippet, matches = content[:150] + "..." if len(content) > 150 else content, []
         
-        sources.append({
+        source = {
             "id": i + 1,
             "url": url,
             "title": title,
             "snippet": snippet.strip()
-        })
+        }
+        if query:
+            source["matches"] = matches
+        sources.append(source)
     
     return sources
 
@@ -87,6 +164,14 @@ def print_results(result: Dict[str, Any]):
     print(f"\n⏱️  Performance:")
     print(f"    • Total time: {metadata['total_time']:.2f}s")
     print(f"    • Documents used: {metadata['total_docs']}")
+    if metadata.get('stage_timings'):
+        stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in metadata['stage_timings'].items())
+        print(f"    • Stages: {stages}")
+    timings = metadata.get('llm_timings')
+    if timings:
+        print(f"    • LLM load: {timings['load_time']:.2f}s, "
+              f"prefill: {timings['prefill_time']:.2f}s ({timings['prompt_tokens']} tokens), "
+              f"decode: {timings['decode_time']:.2f}s ({timings['tokens_per_second']:.1f} tok/s)")
     
     print("\n" + "="*80)
 
@@ -103,105 +188,278 @@ def save_results(result: Dict[str, Any], filename: str = None):
 
 # --- Main RAG System Setup ---
 
-def setup_rag_system(
+def build_rag_components(
     collection_name: str = "cuboulder_pages",
     qdrant_url: str = "http://localhost:6333",
     embedding_model: str = "intfloat/e5-base-v2",
     llm_model: str = "llama3.2",
-    device: str = "mps"
-):
-    """Initialize components and build the LCEL RAG chain."""
+    device: str = "mps",
+    retrieval_config: Optional[Dict[str, Any]] = None,
+    llm_config: Optional[Dict[str, Any]] = None,
+    client: Optional[QdrantClient] = None,
+    embeddings: Optional[Embeddings] = None,
+    vector_store_config: Optional[Dict[str, Any]] = None,
+    reuse: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Initialize the building blocks of the RAG system.
     
-    print("🔧 Initializing RAG system...")
+    An existing Qdrant client or embeddings model can be passed in
+    (e.g. an in-memory client and stub embedder for benchmarks); otherwise
+    they are created from qdrant_url and embedding_model.
+    vector_store_config (config_llm.json's vector_store section) supplies
+    the small vector for two-stage search.
     
-    # 1. Initialize embeddings
-    print("📚 Loading embedding model...")
-    start_time = time.time()
-    embeddings = HuggingFaceEmbeddings(
-        model_name=embedding_model,
-        model_kwargs={"device": device}
-    )
-    print(f"✅ Embeddings loaded ({time.time() - start_time:.2f}s)")
+    If collection_name is an alias (versioned collections, see
+    src/vectorstore/versions.py) it is resolved once here and the retriever
+    queries that version. Queries are embedded with the model recorded in
+    the collection's metadata, if any.
+    
+    reuse takes the components built for another version (an alias swap):
+    its client, reranker and warmed-up LLM client are kept, and so are its
+    embeddings unless the new version was embedded with a different model,
+    so only the retriever is rebuilt.
     
-    # 2. Initialize vector store and retriever
+    Returns:
+        Dict with 'embeddings', 'client', 'collection_name' (resolved),
+        'embedding_model', 'retriever', 'reranker', 'k' (documents kept when
+        the reranker is skipped), 'context_builder', 'qa_prompt' and
+        'llm_client'.
+        setup_rag_system wires them into a chain; batch mode drives them
+        directly.
+    """
+    retrieval_config = {**DEFAULT_RETRIEVAL_CONFIG, **(retrieval_config or {})}
+    llm_config = llm_config or {}
+    
+    # Optional cross-encoder rerank stage; it needs a few extra candidates to choose from
+    reranker = None
+    k = retrieval_config["k"]
+    if retrieval_config["rerank"].get("enabled"):
+        if reuse is not None and reuse["reranker"] is not None:
+            reranker = reuse["reranker"]
+        else:
+            print("🎯 Loading cross-encoder reranker...")
+            reranker = CrossEncoderReranker.from_config(retrieval_config["rerank"])
+        k = max(k, retrieval_config["rerank"].get("candidates", k))
+    
+    # 1. Resolve the collection alias to the live version
     print("🔗 Connecting to vector database...")
-    client = QdrantClient(url=qdrant_url)
+    if client is None and reuse is not None:
+        client = reuse["client"]
+    if client is None:
+        client = QdrantClient(url=qdrant_url)
+    alias, collection_name = collection_name, resolve_alias(client, collection_name)
+    if collection_name != alias:
+        print(f"🔀 {alias} -> {collection_name}")
+    # Versions record the model they were embedded with (in collection
+    # metadata, which servers before Qdrant 1.16 don't return)
+    collection_metadata = getattr(client.get_collection(collection_name).config, "metadata", None) or {}
+    built_with = collection_metadata.get("embedding_model")
+    if embeddings is None and built_with and built_with != embedding_model:
+        print(f"ℹ️  {collection_name} was embedded with {built_with}; using it for queries")
+        embedding_model = built_with
+    
+    # 2. Initialize embeddings
+    if embeddings is None and reuse is not None and reuse.get("embedding_model") == embedding_model:
+        embeddings = reuse["embeddings"]
+    if embeddings is None:
+        print("📚 Loading embedding model...")
+        start_time = time.time()
+        embeddings = HuggingFaceEmbeddings(
+            model_name=embedding_model,
+            model_kwargs={"device": device}
+        )
+        print(f"✅ Embeddings loaded ({time.time() - start_time:.2f}s)")
+    
+    # 3. Initialize vector store and retriever
     vectorstore = QdrantVectorStore(
         client=client,
         collection_name=collection_name,
         embedding=embeddings
     )
-    retriever = vectorstore.as_retriever(
-        search_type="mmr",
-        search_kwargs={"k": 5, "fetch_k": 10, "lambda_mult": 0.5}
-    )
+    params = search_params(retrieval_config)
+    query_reducer = None
+    two_stage = retrieval_config["two_stage"]
+    if two_stage.get("enabled"):
+        query_reducer = check_reducer(client, collection_name, VectorReducer.from_config(
+            (vector_store_config or {}).get("small_vector")))
+        if query_reducer is None:
+            print("⚠️  Two-stage search is enabled but no small vector is available; searching full vectors")
+    router = None
+    routing = retrieval_config["routing"]
+    if routing.get("enabled"):
+        router = SiteRouter.fit(client, collection_name, sites=routing.get("sites"),
+                                sample=routing.get("sample", 1000), margin=routing.get("margin", 0.02))
+        if router is None:
+            print("⚠️  Routing is enabled but the collection has fewer than two sites; searching everything")
+        else:
+            print(f"🧭 Routing queries between {', '.join(router.sites)}")
+    if retrieval_config["search_type"] == "mmr":
+        # Candidates and their vectors come back in one query; MMR runs locally
+        retriever = QdrantMMRRetriever(
+            client=client,
+            collection_name=collection_name,
+            embeddings=embeddings,
+            k=k,
+            fetch_k=retrieval_config["fetch_k"],
+            lambda_mult=retrieval_config["lambda_mult"],
+            max_chunks_per_url=retrieval_config["max_chunks_per_url"],
+            authority_weight=retrieval_config["authority_weight"],
+            search_params=params,
+            query_reducer=query_reducer,
+            prefetch_limit=two_stage.get("prefetch_limit", 400),
+            router=router
+        )
+    else:
+        search_kwargs = {"k": k}
+        if params is not None:
+            search_kwargs["search_params"] = params
+        retriever = vectorstore.as_retriever(
+            search_type=retrieval_config["search_type"],
+            search_kwargs=search_kwargs
+        )
     
-    # 3. Initialize local LLM
-    print("🤖 Initializing local LLM...")
-    try:
-        llm = OllamaLLM(model=llm_model)
-        # Test connection
-        llm.invoke("Hello!")
-        print(f"✅ LLM {llm_model} ready")
-    except Exception as e:
-        print(f"❌ Failed to initialize LLM: {e}")
-        print("💡 Make sure Ollama is installed, running, and you have the model:")
-        print("   - Install: https://ollama.com/")
-        print(f"   - Run: ollama pull {llm_model}")
-        raise
+    # 4. Initialize local LLM (already resident when reusing)
+    if reuse is not None:
+        llm_client = reuse["llm_client"]
+    else:
+        print("🤖 Initializing local LLM...")
+        llm_client = OllamaClient.from_config({**llm_config, "model": llm_model})
+        try:
+            # Load the model now and keep it resident so the first user doesn't pay for it
+            load_time = llm_client.warm_up()
+            print(f"✅ LLM {llm_model} ready (load {load_time:.2f}s, keep_alive={llm_client.keep_alive})")
+        except Exception as e:
+            print(f"❌ Failed to initialize LLM: {e}")
+            print("💡 Make sure Ollama is installed, running, and you have the model:")
+            print("   - Install: https://ollama.com/")
+            print(f"   - Run: ollama pull {llm_model}")
+            raise
     
-    # 4. Create prompt template
-    template = """
-You are a helpful assistant answering questions about CU Boulder based on the provided context.
-Please provide a comprehensive, well-structured answer to the user's question.
-
-CONTEXT:
-{context}
-
-USER QUESTION: {question}
-
-INSTRUCTIONS:
-1. Answer the question based primarily on the provided context
-2. If the context doesn't contain enough information, say so clearly
-3. Organize your answer with clear headings and bullet points when appropriate
-4. Be concise but thorough
-5. Include specific details from the sources
-
-ANSWER:
-"""
+    # 5. Create prompt template
     qa_prompt = PromptTemplate(
-        template=template,
+        template=QA_PROMPT_TEMPLATE,
         input_variables=["context", "question"]
     )
     
-    # 5. Build the modern LCEL RAG Chain
-    # This chain:
-    # 1. Takes the 'question' as input.
-    # 2. Retrieves documents and passes them through as 'docs'.
-    # 3. Passes the original 'question' through.
-    # 4. Generates the 'answer' by formatting context, piping to prompt, LLM, and parser.
+    # 6. Context is packed by tokens of the target model, within its context window
+    context_builder = ContextBuilder(
+        max_tokens=context_token_budget(retrieval_config, llm_config),
+        count_tokens=get_token_counter(llm_config.get("tokenizer"))
+    )
     
-    # Helper function to format context for prompt
-    def format_docs_for_prompt(x):
-        return {
-            "context": prepare_context(x["docs"]),
-            "question": x["question"]
-        }
+    return {
+        "embeddings": embeddings,
+        "embedding_model": embedding_model,
+        "client": client,
+        "collection_name": collection_name,
+        "retriever": retriever,
+        "reranker": reranker,
+        "k": retrieval_config["k"],
+        "context_builder": context_builder,
+        "qa_prompt": qa_prompt,
+        "llm_client": llm_client,
+    }
+
+def retrieve_documents(components: Dict[str, Any], question: str, query_filter: Optional[Any] = None,
+                       route: bool = True, rerank: bool = True) -> List[Document]:
+    """
+    Retrieve candidates, then let the cross-encoder (if any) keep the best ones.
     
+    Args:
+        components: build_rag_components output
+        question: User question
+        query_filter: Qdrant filter (src.vectorstore.build_filter)
+        route: Let the site router restrict an unfiltered question
+        rerank: Run the reranker; search-only requests may skip it for latency
+    """
+    retriever = components["retriever"]
+    kwargs = {}
+    if query_filter is not None:
+        kwargs["filter"] = query_filter
+    if isinstance(retriever, QdrantMMRRetriever):
+        kwargs["route"] = route
+    docs = retriever.invoke(question, **kwargs)
+    reranker = components["reranker"]
+    if rerank and reranker is not None:
+        with timed("rerank"):
+            docs = reranker.rerank(question, docs)
+    elif reranker is not None and components.get("k"):
+        # The retriever fetched the reranker's candidates; keep the configured k
+        docs = docs[:components["k"]]
+    return docs
+
+def generate_answer(components: Dict[str, Any], question: str, docs: List[Document]) -> Dict[str, Any]:
+    """Pack the context, prompt the LLM and return the answer with its timings."""
+    with timed("context_packing"):
+        context = components["context_builder"].build(docs)
+        prompt = components["qa_prompt"].format(context=context, question=question)
+    
+    with timed("llm"):
+        generation = components["llm_client"].generate(prompt)
+    
+    llm_timings = generation["timings"]
+    record("llm_load", llm_timings["load_time"])
+    record("llm_prefill", llm_timings["prefill_time"])
+    record("llm_decode", llm_timings["decode_time"])
+    
+    return {
+        "answer": generation["response"],
+        "llm_timings": llm_timings,
+        "context_length": len(context)
+    }
+
+def build_rag_chain(components: Dict[str, Any]):
+    """
+    Build the modern LCEL RAG Chain from build_rag_components output.
+    
+    This chain:
+    1. Takes the 'question' as input, with an optional Qdrant 'filter'
+       (src.vectorstore.build_filter) and 'route' (default True: let the
+       site router restrict unfiltered questions).
+    2. Retrieves documents (reranked if enabled) and passes them through as 'docs'.
+    3. Passes the original 'question' through.
+    4. Generates the 'answer' from the token-packed context.
+    5. Reports the LLM's load/prefill/decode timings as 'llm_timings'.
+    """
     rag_chain = (
         RunnablePassthrough.assign(
-            docs=(lambda x: x["question"]) | retriever
-        )
-        | RunnablePassthrough.assign(
-            answer=(
-                format_docs_for_prompt
-                | qa_prompt
-                | llm
-                | StrOutputParser()
-            )
+            docs=lambda x: retrieve_documents(components, x["question"], x.get("filter"), x.get("route", True))
         )
+        | RunnableLambda(lambda x: {**x, **generate_answer(components, x["question"], x["docs"])})
     )
-    # The output of this chain is a dict: {"question": str, "docs": List[Doc], "answer": str}
+    # The output of this chain is a dict:
+    # {"question": str, "docs": List[Doc], "answer": str, "llm_timings": Dict, "context_length": int}
+    return rag_chain
+
+def setup_rag_system(
+    collection_name: str = "cuboulder_pages",
+    qdrant_url: str = "http://localhost:6333",
+    embedding_model: str = "intfloat/e5-base-v2",
+    llm_model: str = "llama3.2",
+    device: str = "mps",
+    retrieval_config: Optional[Dict[str, Any]] = None,
+    llm_config: Optional[Dict[str, Any]] = None,
+    client: Optional[QdrantClient] = None,
+    embeddings: Optional[Embeddings] = None,
+    vector_store_config: Optional[Dict[str, Any]] = None
+):
+    """Initialize components and build the LCEL RAG chain."""
+    
+    print("🔧 Initializing RAG system...")
+    components = build_rag_components(
+        collection_name=collection_name,
+        qdrant_url=qdrant_url,
+        embedding_model=embedding_model,
+        llm_model=llm_model,
+        device=device,
+        retrieval_config=retrieval_config,
+        llm_config=llm_config,
+        client=client,
+        embeddings=embeddings,
+        vector_store_config=vector_store_config
+    )
+    rag_chain = build_rag_chain(components)
     
     print("✅ RAG system ready!")
     return rag_chain
@@ -240,11 +498,14 @@ def interactive_search():
             print("🧠 Thinking...")
             start_time = time.time()
             chain_input = {"question": query}
-            result = rag_chain.invoke(chain_input)
+            with collect_timings() as timings:
+                result = rag_chain.invoke(chain_input)
+                
+                # 2. Format results for printing and saving
+                with timed("formatting"):
+                    sources = format_sources(result["docs"])
             total_time = time.time() - start_time
-            
-            # 2. Format results for printing and saving
-            sources = format_sources(result["docs"])
+            record("total", total_time)
             
             final_result = {
                 "answer": result['answer'],
@@ -252,7 +513,9 @@ def interactive_search():
                 "metadata": {
                     "query": query,
                     "total_time": total_time,
-                    "total_docs": len(sources)
+                    "total_docs": len(sources),
+                    "llm_timings": result.get("llm_timings", {}),
+                    **timing_metadata(result, timings)
                 }
             }
             
@@ -0,0 +1,164 @@
+"""
+Pooled Ollama client that keeps the model resident between queries.
+
+Talks to Ollama's /api/generate endpoint over a shared requests.Session,
+so HTTP connections are reused, and sends keep_alive with every request
+so the model is not unloaded between users. Generation options
+(temperature, max_tokens, num_ctx) and the timeout come from the "llm"
+section of config_llm.json, and every call reports load, prefill and
+decode timings from Ollama's response.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Defaults for the "llm" section of config_llm.json
+DEFAULT_LLM_CONFIG = {
+    "model": "llama3.2",
+    "base_url": "http://localhost:11434",
+    "temperature": 0.1,
+    "max_tokens": 2048,
+    "num_ctx": None,
+    "timeout": 60,
+    "keep_alive": "30m",
+    "max_concurrency": 2,
+}
+
+NANOSECONDS = 1e9
+
+
+class OllamaClient:
+    """Thin, thread-safe client for a single Ollama model."""
+
+    def __init__(
+        self,
+        model: str = "llama3.2",
+        base_url: str = "http://localhost:11434",
+        temperature: float = 0.1,
+        max_tokens: int = 2048,
+        num_ctx: Optional[int] = None,
+        timeout: float = 60,
+        keep_alive: Any = "30m",
+        max_concurrency: int = 2
+    ):
+        """
+        Args:
+            model: Ollama model name
+            base_url: Ollama server URL
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate (Ollama's num_predict)
+            num_ctx: Context window to allocate; None keeps the model default
+            timeout: Read timeout in seconds for one generation
+            keep_alive: How long Ollama keeps the model loaded after a request
+                ("30m", seconds, or -1 for forever)
+            max_concurrency: Maximum generations in flight from this process
+        """
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.num_ctx = num_ctx
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.max_concurrency = max_concurrency
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_concurrency, 1))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._slots = threading.BoundedSemaphore(max(max_concurrency, 1))
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "OllamaClient":
+        """Build a client from the "llm" section of config_llm.json."""
+        config = {**DEFAULT_LLM_CONFIG, **(config or {})}
+        return cls(
+            model=config["model"],
+            base_url=config["base_url"],
+            temperature=config["temperature"],
+            max_tokens=config["max_tokens"],
+            num_ctx=config["num_ctx"],
+            timeout=config["timeout"],
+            keep_alive=config["keep_alive"],
+            max_concurrency=config["max_concurrency"]
+        )
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        options = {"temperature": self.temperature, "num_predict": self.max_tokens}
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+        return options
+
+    def warm_up(self) -> float:
+        """
+        Load the model into memory without generating anything.
+
+        Ollama loads a model and returns immediately when it receives an
+        empty prompt, so this replaces the old throwaway "Hello!" call.
+
+        Returns:
+            Seconds Ollama spent loading the model (0 if it was already resident)
+        """
+        data = self._post({"model": self.model, "prompt": "", "options": self.options})
+        return data.get("load_duration", 0) / NANOSECONDS
+
+    def generate(self, prompt: str) -> Dict[str, Any]:
+        """
+        Generate a completion.
+
+        Args:
+            prompt: Full prompt text
+
+        Returns:
+            Dict with the generated "response" and a "timings" dict
+        """
+        start_time = time.time()
+        with self._slots:
+            queued = time.time() - start_time
+            data = self._post({
+                "model": self.model,
+                "prompt": prompt,
+                "stream": False,
+                "options": self.options,
+            })
+
+        return {
+            "response": data.get("response", ""),
+            "timings": self._timings(data, wall_time=time.time() - start_time, queue_time=queued),
+        }
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        payload["keep_alive"] = self.keep_alive
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json=payload,
+            timeout=(5, self.timeout)
+        )
+        if response.status_code != 200:
+            try:
+                error = response.json().get("error", response.text)
+            except ValueError:
+                error = response.text
+            raise RuntimeError(f"Ollama returned {response.status_code}: {error}")
+        return response.json()
+
+    @staticmethod
+    def _timings(data: Dict[str, Any], wall_time: float, queue_time: float) -> Dict[str, Any]:
+        """Convert Ollama's nanosecond counters into seconds and rates."""
+        decode_time = data.get("eval_duration", 0) / NANOSECONDS
+        output_tokens = data.get("eval_count", 0)
+        return {
+            "wall_time": wall_time,
+            "queue_time": queue_time,
+            "load_time": data.get("load_duration", 0) / NANOSECONDS,
+            "prefill_time": data.get("prompt_eval_duration", 0) / NANOSECONDS,
+            "decode_time": decode_time,
+            "total_time": data.get("total_duration", 0) / NANOSECONDS,
+            "prompt_tokens": data.get("prompt_eval_count", 0),
+            "output_tokens": output_tokens,
+            "tokens_per_second": output_tokens / decode_time if decode_time else 0.0,
+        }
@@ -0,0 +1,163 @@
+"""
+Optional cross-encoder reranking stage for retrieved chunks.
+
+The retriever returns a slightly larger candidate set, the cross-encoder
+scores all (query, chunk) pairs in one batched forward pass on CPU, and
+only the best top_n chunks go on to prepare_context. Scores are cached
+per (query, chunk id), and a hard latency budget guarantees the stage
+never costs more than budget_ms: when it would, the candidates are
+returned in the order they came in (MMR order) instead.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+# Defaults for the "retrieval.rerank" section of config_llm.json
+DEFAULT_RERANK_CONFIG = {
+    "enabled": False,
+    "model_name": "cross-encoder/ms-marco-MiniLM-L-6-v2",
+    "device": "cpu",
+    "candidates": 12,
+    "top_n": 4,
+    "budget_ms": 300,
+    "cache_size": 4096,
+    "max_length": 512,
+}
+
+
+def chunk_id(doc: Document) -> str:
+    """Stable identifier of a chunk: its Qdrant point ID, or a hash of its text."""
+    point_id = doc.metadata.get('_id')
+    if point_id is not None:
+        return str(point_id)
+    return hashlib.sha1(doc.page_content.encode('utf-8')).hexdigest()
+
+
+class CrossEncoderReranker:
+    """Scores retrieved chunks with a small cross-encoder under a latency budget."""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_RERANK_CONFIG["model_name"],
+        device: str = "cpu",
+        top_n: int = 4,
+        budget_ms: float = 300,
+        cache_size: int = 4096,
+        max_length: int = 512,
+        model: Optional[Any] = None
+    ):
+        """
+        Args:
+            model: Preloaded model with CrossEncoder's predict(); loads
+                model_name when not given
+        """
+        if model is None:
+            # Imported lazily: sentence-transformers is only needed when reranking is enabled
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(model_name, device=device, max_length=max_length)
+        self.model = model
+        self.top_n = top_n
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One worker and at most one pass in flight: a pass that overruns its
+        # budget keeps running in the background and fills the cache, and
+        # requests arriving meanwhile fall back instead of queueing behind it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        self._inflight: Optional[Future] = None
+
+        self.stats = {"requests": 0, "cache_hits": 0, "scored": 0, "budget_exceeded": 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["CrossEncoderReranker"]:
+        """Build a reranker from the retrieval.rerank config, or None if disabled."""
+        config = {**DEFAULT_RERANK_CONFIG, **(config or {})}
+        if not config["enabled"]:
+            return None
+        return cls(
+            model_name=config["model_name"],
+            device=config["device"],
+            top_n=config["top_n"],
+            budget_ms=config["budget_ms"],
+            cache_size=config["cache_size"],
+            max_length=config["max_length"]
+        )
+
+    def rerank(self, query: str, docs: List[Document]) -> List[Document]:
+        """
+        Reorder documents by cross-encoder score and keep the best top_n.
+
+        Args:
+            query: The user question
+            docs: Candidate documents, best first by the previous stage
+
+        Returns:
+            Up to top_n documents, best first. Falls back to the first top_n
+            documents in their incoming order if scoring exceeds the latency
+            budget or another request's pass is still running.
+        """
+        if not docs:
+            return []
+
+        self.stats["requests"] += 1
+        keys = [(query, chunk_id(doc)) for doc in docs]
+        scores = self._cached_scores(keys)
+
+        missing = [i for i, key in enumerate(keys) if key not in scores]
+        if missing:
+            pairs = [(query, docs[i].page_content) for i in missing]
+            with self._lock:
+                if self._inflight is not None and not self._inflight.done():
+                    self.stats["budget_exceeded"] += 1
+                    return docs[:self.top_n]
+                future = self._inflight = self._executor.submit(self._score, [keys[i] for i in missing], pairs)
+            try:
+                scores.update(future.result(timeout=self.budget_ms / 1000))
+            except FutureTimeoutError:
+                # Only a pass that hasn't started can be cancelled; a running
+                # one finishes in the background
+                future.cancel()
+                self.stats["budget_exceeded"] += 1
+                return docs[:self.top_n]
+
+        order = sorted(range(len(docs)), key=lambda i: scores[keys[i]], reverse=True)
+        reranked = []
+        for i in order[:self.top_n]:
+            doc = docs[i]
+            doc.metadata['_rerank_score'] = scores[keys[i]]
+            reranked.append(doc)
+        return reranked
+
+    def _score(self, keys: List[Tuple[str, str]], pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+        """Score all pairs in a single batched forward pass and cache the results."""
+        start_time = time.time()
+        raw_scores = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        scores = {key: float(score) for key, score in zip(keys, raw_scores)}
+
+        with self._lock:
+            for key, score in scores.items():
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.stats["scored"] += len(pairs)
+            self.stats["last_score_ms"] = (time.time() - start_time) * 1000
+        return scores
+
+    def _cached_scores(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+            self.stats["cache_hits"] += len(found)
+        return found
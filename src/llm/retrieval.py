@@ -0,0 +1,270 @@
+"""
+Vector retrieval stage for the RAG chain.
+
+Candidates are fetched together with their stored vectors in a single
+Qdrant query and re-ranked locally with Maximal Marginal Relevance as a
+NumPy matrix computation. Because no second round trip is needed, fetch_k
+can be raised to 100+ for better diversity without a latency hit.
+Relevance can be blended with each page's link authority so well-linked
+pages win among similar candidates.
+
+With a query_reducer the search runs in two stages inside the same query:
+HNSW over the small named vectors (src/vectorstore/reduction.py) picks a
+shortlist of prefetch_limit points, which Qdrant rescores with the full
+vectors.
+
+A Qdrant filter (src.vectorstore.build_filter) can be passed per query and
+is applied inside the search, so only that partition is walked. Without
+one, a SiteRouter may restrict the query to the site it clearly belongs to.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from qdrant_client import models
+
+from ..utils.metrics import timed
+from ..vectorstore import build_filter
+
+
+def maximal_marginal_relevance(
+    query_vector: Sequence[float],
+    candidate_vectors: Sequence[Sequence[float]],
+    k: int = 5,
+    lambda_mult: float = 0.5,
+    groups: Optional[Sequence[Any]] = None,
+    max_per_group: Optional[int] = None,
+    prior: Optional[Sequence[float]] = None,
+    prior_weight: float = 0.0
+) -> List[int]:
+    """
+    Select candidates by Maximal Marginal Relevance.
+
+    Args:
+        query_vector: Embedding of the query
+        candidate_vectors: Embeddings of the candidates (n x dim)
+        k: Number of candidates to select
+        lambda_mult: 1.0 = pure relevance, 0.0 = maximum diversity
+        groups: Optional group key per candidate (e.g. the page URL)
+        max_per_group: Maximum number of candidates selected per group
+        prior: Optional query-independent score per candidate in [0, 1]
+            (e.g. link authority)
+        prior_weight: Share of relevance taken from prior instead of cosine similarity
+
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    if k <= 0 or candidates.ndim != 2 or len(candidates) == 0:
+        return []
+
+    query = np.asarray(query_vector, dtype=np.float32)
+
+    # Normalise once so every dot product below is a cosine similarity
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = candidates @ query
+    if prior is not None and prior_weight:
+        relevance = (1 - prior_weight) * relevance + prior_weight * np.asarray(prior, dtype=np.float32)
+    similarity = candidates @ candidates.T
+
+    group_ids = None
+    if groups is not None and max_per_group:
+        _, group_ids = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+        group_counts = np.zeros(group_ids.max() + 1, dtype=np.int32)
+
+    n = len(candidates)
+    available = np.ones(n, dtype=bool)
+    # Highest similarity of each candidate to anything already selected
+    redundancy = np.zeros(n, dtype=np.float32)
+    selected: List[int] = []
+
+    while len(selected) < min(k, n) and available.any():
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+
+        idx = int(np.argmax(scores))
+        selected.append(idx)
+        available[idx] = False
+        redundancy = np.maximum(redundancy, similarity[idx])
+
+        # Drop the rest of a group once it has used up its share
+        if group_ids is not None:
+            group = group_ids[idx]
+            group_counts[group] += 1
+            if group_counts[group] >= max_per_group:
+                available &= group_ids != group
+
+    return selected
+
+
+class QdrantMMRRetriever(BaseRetriever):
+    """
+    Retriever that runs MMR over candidate vectors returned by one Qdrant query.
+
+    Documents are built from the LangChain payload layout
+    ({"page_content": ..., "metadata": {...}}) so the retriever can read
+    collections written by VectorDatabasePipeline.
+    """
+
+    client: Any
+    collection_name: str
+    embeddings: Embeddings
+    k: int = 5
+    fetch_k: int = 100
+    lambda_mult: float = 0.5
+    max_chunks_per_url: Optional[int] = None
+    # Weight of metadata.authority (link-graph PageRank, see src/graph) in relevance
+    authority_weight: float = 0.0
+    # hnsw_ef / quantization rescoring (src.vectorstore.search_params); None = collection defaults
+    search_params: Optional[Any] = None
+    # VectorReducer for two-stage search (None = one search over the full vectors)
+    query_reducer: Optional[Any] = None
+    prefetch_limit: int = 400
+    # SiteRouter that restricts unfiltered queries to one site (None = never route)
+    router: Optional[Any] = None
+    vector_name: Optional[str] = None
+    content_payload_key: str = "page_content"
+    metadata_payload_key: str = "metadata"
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun,
+        filter: Optional[models.Filter] = None, route: bool = True
+    ) -> List[Document]:
+        with timed("query_embedding"):
+            query_vector = self.embeddings.embed_query(query)
+        return self.retrieve_by_vector(query_vector, query_filter=filter, route=route)
+
+    def retrieve_by_vector(self, query_vector: Sequence[float], query_filter: Optional[models.Filter] = None,
+                           route: bool = True) -> List[Document]:
+        """
+        Fetch fetch_k candidates with their vectors and select k of them by MMR.
+
+        Args:
+            query_vector: Embedded query
+            query_filter: Restrict the search to matching points
+            route: Let the router pick a site when there is no query_filter;
+                the documents of a routed search carry metadata['_routed_site']
+        """
+        site = None
+        if query_filter is None and route and self.router is not None:
+            site = self.router.route(query_vector)
+        with timed("vector_search"):
+            points = self._search(query_vector, build_filter({"site": site}) if site else query_filter)
+            if site and len(points) < self.k:
+                # The routed site has too little; search everything instead
+                site, points = None, self._search(query_vector, None)
+        with timed("mmr"):
+            documents = self.select_documents(query_vector, points)
+        if site:
+            for doc in documents:
+                doc.metadata['_routed_site'] = site
+        return documents
+
+    def _search(self, query_vector: Sequence[float], query_filter: Optional[models.Filter]) -> List[Any]:
+        prefetch, params = self._stages(query_vector, query_filter)
+        return self.client.query_points(
+            collection_name=self.collection_name,
+            prefetch=prefetch,
+            query=list(query_vector),
+            using=self.vector_name,
+            query_filter=query_filter,
+            limit=self.fetch_k,
+            search_params=params,
+            with_payload=True,
+            with_vectors=self._with_vectors()
+        ).points
+
+    def retrieve_batch(self, query_vectors: Sequence[Sequence[float]],
+                       query_filter: Optional[models.Filter] = None) -> List[List[Document]]:
+        """Run one batched Qdrant query for many questions and apply MMR to each."""
+        if not len(query_vectors):
+            return []
+        requests = []
+        for query_vector in query_vectors:
+            prefetch, params = self._stages(query_vector, query_filter)
+            requests.append(models.QueryRequest(
+                prefetch=prefetch,
+                query=list(query_vector),
+                using=self.vector_name,
+                filter=query_filter,
+                limit=self.fetch_k,
+                params=params,
+                with_payload=True,
+                with_vector=self._with_vectors()
+            ))
+        with timed("vector_search"):
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests
+            )
+        return [
+            self.select_documents(query_vector, response.points)
+            for query_vector, response in zip(query_vectors, responses)
+        ]
+
+    def _stages(self, query_vector: Sequence[float], query_filter: Optional[models.Filter] = None):
+        """(prefetch, search params): one search, or small-vector search then full-vector rescoring."""
+        if self.query_reducer is None:
+            return None, self.search_params
+        # The filter goes into the first stage too, so the shortlist is from the partition
+        prefetch = models.Prefetch(
+            query=self.query_reducer.transform_query(query_vector),
+            using=self.query_reducer.name,
+            filter=query_filter,
+            limit=max(self.prefetch_limit, self.fetch_k),
+            params=self.search_params
+        )
+        # Rescore the shortlist with the original full vectors, not their quantized copies
+        return prefetch, models.SearchParams(quantization=models.QuantizationSearchParams(ignore=True))
+
+    def _with_vectors(self):
+        if self.vector_name or self.query_reducer is not None:
+            # Only the full vector MMR needs, not the small one
+            return [self.vector_name or ""]
+        return True
+
+    def select_documents(self, query_vector: Sequence[float], points: List[Any]) -> List[Document]:
+        """Run MMR with URL-level diversification over already fetched points."""
+        points = [point for point in points if point.vector is not None]
+        if not points:
+            return []
+
+        documents = [self._point_to_document(point) for point in points]
+        vectors = [self._point_vector(point) for point in points]
+        urls = [doc.metadata.get('url', '') for doc in documents]
+
+        selected = maximal_marginal_relevance(
+            query_vector,
+            vectors,
+            k=self.k,
+            lambda_mult=self.lambda_mult,
+            groups=urls,
+            max_per_group=self.max_chunks_per_url,
+            prior=[doc.metadata.get('authority') or 0.0 for doc in documents],
+            prior_weight=self.authority_weight
+        )
+        return [documents[i] for i in selected]
+
+    def _point_vector(self, point: Any) -> List[float]:
+        if isinstance(point.vector, dict):
+            return point.vector[self.vector_name or ""]
+        return point.vector
+
+    def _point_to_document(self, point: Any) -> Document:
+        payload = point.payload or {}
+        metadata: Dict[str, Any] = dict(payload.get(self.metadata_payload_key) or {})
+        metadata['_id'] = point.id
+        metadata['_collection_name'] = self.collection_name
+        metadata['_score'] = point.score
+        return Document(
+            page_content=payload.get(self.content_payload_key, ''),
+            metadata=metadata
+        )
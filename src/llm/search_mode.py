@@ -0,0 +1,53 @@
+"""
+Search-only or generated answer, per request.
+
+Navigational queries ("registrar office hours", "canvas login") want the
+right page rather than a paragraph about it. They are answered from
+retrieval alone: ranked sources with query-aware snippets, without the
+LLM. The UI can still ask for a generated answer as a second step.
+"""
+import re
+from typing import Optional
+
+MODES = ("search", "answer", "auto")
+
+# First words of questions that want an explanation rather than a page
+QUESTION_WORDS = {
+    "what", "how", "why", "when", "where", "who", "which", "can", "could", "should", "would", "do", "does",
+    "did", "is", "are", "was", "will", "tell", "explain", "describe", "compare", "help", "summarize",
+}
+
+# Words that ask for a page, a place or a contact
+NAVIGATIONAL_TERMS = {
+    "hours", "login", "portal", "contact", "phone", "email", "address", "office", "website", "homepage",
+    "map", "directory", "calendar", "form", "forms", "page", "link", "location", "tickets", "schedule",
+}
+
+
+def is_navigational(query: str, max_words: int = 5) -> bool:
+    """
+    True for short lookups that retrieval alone answers well.
+
+    A query is navigational when it isn't phrased as a question and is
+    either at most max_words long or names a page-like thing (hours,
+    portal, contact, ...) in at most twice that.
+    """
+    words = re.findall(r"[a-z0-9']+", query.lower())
+    if not words or query.rstrip().endswith("?") or words[0] in QUESTION_WORDS:
+        return False
+    return len(words) <= max_words or (bool(NAVIGATIONAL_TERMS & set(words)) and len(words) <= 2 * max_words)
+
+
+def choose_mode(requested: Optional[str], query: str, default: str = "auto", max_words: int = 5) -> str:
+    """
+    Resolve the requested mode to "search" or "answer".
+
+    Raises:
+        ValueError: Unknown mode
+    """
+    mode = requested or default
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r} (expected one of {', '.join(MODES)})")
+    if mode == "auto":
+        return "search" if is_navigational(query, max_words) else "answer"
+    return mode
@@ -0,0 +1,78 @@
+"""
+Query-aware snippets for search results.
+
+Instead of the first characters of a chunk, a snippet is the passage that
+covers the most query terms: the best-scoring sentence, extended with the
+sentences after it up to max_chars. The matched terms are returned too so
+the UI can highlight them.
+"""
+import re
+from typing import List, Set, Tuple
+
+# Words too common to say anything about which passage matches
+STOPWORDS = {
+    "a", "about", "an", "and", "are", "at", "be", "by", "can", "cu", "do", "does", "for", "from", "how",
+    "i", "in", "is", "it", "me", "my", "of", "on", "or", "the", "to", "what", "when", "where", "which",
+    "who", "why", "with", "you", "your",
+}
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct content words of the query, in order."""
+    return list(dict.fromkeys(word for word in _WORD.findall(query.lower()) if word not in STOPWORDS))
+
+
+def _matches(term: str, words: Set[str]) -> bool:
+    # Light stemming: "deadline" matches "deadlines", "apply" matches "applying"
+    stem = term[:max(len(term) - 2, 4)]
+    return term in words or any(word.startswith(stem) for word in words)
+
+
+def query_snippet(text: str, query: str, max_chars: int = 200) -> Tuple[str, List[str]]:
+    """
+    Best passage of text for query.
+
+    Args:
+        text: Chunk text
+        query: User query
+        max_chars: Snippet length limit
+
+    Returns:
+        (snippet, query terms found in it); the snippet starts at the
+        beginning of text when no term matches
+    """
+    sentences = [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+    terms = query_terms(query)
+    if not sentences:
+        return "", []
+
+    best, best_found = 0, []
+    for i, sentence in enumerate(sentences):
+        words = set(_WORD.findall(sentence.lower()))
+        found = [term for term in terms if _matches(term, words)]
+        if len(found) > len(best_found):
+            best, best_found = i, found
+
+    end = best + 1
+    snippet = sentences[best]
+    while end < len(sentences) and len(snippet) + 1 + len(sentences[end]) <= max_chars:
+        snippet += " " + sentences[end]
+        end += 1
+    head = "..." if best > 0 else ""
+    tail = "..." if end < len(sentences) else ""
+    if len(snippet) > max_chars:
+        # One long sentence: cut a window that starts a little before its first match
+        lowered = snippet.lower()
+        positions = [lowered.find(term[:4]) for term in best_found]
+        first = min((position for position in positions if position >= 0), default=0)
+        start = max(0, min(first - max_chars // 4, len(snippet) - max_chars))
+        if start:
+            start = snippet.find(" ", start) + 1 or start
+            head = "..."
+        snippet, tail = snippet[start:start + max_chars].rsplit(" ", 1)[0], "..."
+    if tail and snippet.endswith((".", "!", "?")):
+        tail = " ..."
+    return f"{head}{snippet}{tail}", best_found
@@ -10,10 +10,14 @@ from bs4 import BeautifulSoup
 import re
 from src.embedding import HuggingFaceEmbedder
 from tqdm import tqdm
-from langchain_qdrant import Qdrant
-from langchain_huggingface import HuggingFaceEmbeddings
 from qdrant_client import QdrantClient
-from langchain_core.documents import Document
+from src.utils.metrics import get_registry, timed
+from src.cleanup import INGEST_RULE_OPTIONS, INGEST_RULES, HygieneEngine, Record, build_rules
+from src.filters.canonicalize import URLCanonicalizer, get_canonicalizer
+from src.vectorstore import VectorReducer, check_reducer, ensure_collection, load_vector_store_config, write_pages
+
+# Stage timings shared with the CrawlMetrics extension
+CRAWL_METRICS = get_registry("crawl")
 
 JAVASCRIPT_CODE = "{;if(!''.replace(/^/,String)){];;c=1};g{3 c=2.r();}}u(e){}}6 h(a){4(a.8)a=a.8;4(a==\\'\\')v;3 b=[1];3 c;3 d=2.x(\\'y\\');z(3 i=0;i<d.5;i++)4(d[i].A==\\'B-C-D\\')c=d[i];4(2.j(\\'k\\')==E||2.j(\\'k\\').l.5==0||c.5==0||c.l.5==0){F(6(){h(a)},G)}g{c.8=b;7(c,\\'m\\');7(c,\\'m\\')}}',43,43,'||document|var|if|length|function|GTranslateFireEvent|value|createEvent||||||true|else|doGTranslate||getElementById||innerHTML|change|try|HTMLEvents|initEvent|dispatchEvent|createEventObject|fireEvent|on|catch|return|split|getElementsByTagName|select|for|className|goog|te|combo|null|setTimeout|500'.split('|'),0,{}))"
 
@@ -22,24 +26,31 @@ class DataCleaningPipeline:
     def __init__(self):
         self.dropped_count = 0
         self.processed_count = 0
+        # Same rules as the collection cleanup scripts (src/cleanup/rules.py)
+        self.hygiene = HygieneEngine.from_names(INGEST_RULES, INGEST_RULE_OPTIONS)
+        self.url_rules = [rule for rule in self.hygiene.rules if rule.url_only]
+        self.text_rules = [rule for rule in self.hygiene.rules if not rule.url_only]
     
     def process_item(self, item, spider):
         """Clean HTML content by removing scripts, styles, and extracting clean text."""
         self.processed_count += 1
         
-        # First check if URL is valid (not a PDF, image, etc.)
-        if not self.is_valid_url(item.get('url', '')):
+        # First check if URL is valid (not a PDF, image, etc.) - cheap, before parsing HTML
+        reason = self.hygiene.evaluate(Record.from_item(item), self.url_rules, stop_at_first=True)
+        if reason:
             self.dropped_count += 1
             from scrapy.exceptions import DropItem
-            raise DropItem(f"Invalid URL (PDF/binary file): {item.get('url', 'unknown')}")
+            raise DropItem(f"Invalid URL ({reason}): {item.get('url', 'unknown')}")
         
-        item['text'] = self.clean_text(item['text'])
+        with timed("clean", CRAWL_METRICS):
+            item['text'] = self.clean_text(item['text'])
         
         # Validate the cleaned text to prevent corrupted data
-        if not self.is_valid_text(item['text']):
+        reason = self.hygiene.evaluate(Record.from_item(item), self.text_rules, stop_at_first=True)
+        if reason:
             self.dropped_count += 1
             from scrapy.exceptions import DropItem
-            raise DropItem(f"Corrupted or invalid text from {item.get('url', 'unknown')}")
+            raise DropItem(f"Corrupted or invalid text ({reason}) from {item.get('url', 'unknown')}")
         
         return item
     
@@ -121,29 +132,12 @@ class DataCleaningPipeline:
         Returns:
             True if URL is valid, False otherwise
         """
-        url_lower = url.lower()
-        
-        # File extensions that should not be in vector store
-        invalid_extensions = [
-            '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-            '.zip', '.tar', '.gz', '.rar', '.7z',
-            '.jpg', '.jpeg', '.png', '.gif', '.svg', '.bmp', '.webp',
-            '.mp4', '.mp3', '.avi', '.mov', '.wmv', '.wav'
-        ]
-        
-        # Check if URL ends with or contains invalid extension
-        for ext in invalid_extensions:
-            if url_lower.endswith(ext):
-                return False
-            # Also check for extension in query params (e.g., file.pdf?download=1)
-            if f'{ext}?' in url_lower or f'{ext}#' in url_lower:
-                return False
-        
-        return True
+        record = Record(url=url, text='')
+        return not any(rule.check(record) for rule in self.url_rules)
     
     def is_valid_text(self, text: str, min_length: int = 50, max_replacement_ratio: float = 0.05) -> bool:
         """
-        Validate that text is not corrupted.
+        Validate that text is not corrupted (see the text rules in src/cleanup/rules.py).
         
         Args:
             text: The text to validate
@@ -153,33 +147,11 @@ class DataCleaningPipeline:
         Returns:
             True if text is valid, False otherwise
         """
-        if not text or len(text) < min_length:
-            return False
-        
-        # Check for excessive replacement characters (encoding errors)
-        replacement_count = text.count('�')
-        replacement_ratio = replacement_count / len(text)
-        
-        if replacement_ratio > max_replacement_ratio:
-            return False
-        
-        # Check for reasonable ASCII ratio (should be mostly readable English)
-        ascii_count = sum(1 for c in text if ord(c) < 128)
-        ascii_ratio = ascii_count / len(text)
-        
-        # Should be at least 70% ASCII for English text
-        if ascii_ratio < 0.7:
-            return False
-        
-        # Check for reasonable alphanumeric content
-        alnum_count = sum(1 for c in text if c.isalnum() or c.isspace())
-        alnum_ratio = alnum_count / len(text)
-        
-        # Should be at least 80% alphanumeric + spaces
-        if alnum_ratio < 0.8:
-            return False
-        
-        return True
+        options = {**INGEST_RULE_OPTIONS, "garbled": {"min_length": min_length},
+                   "replacement_chars": {"max_ratio": max_replacement_ratio}}
+        rules = [rule for rule in build_rules(INGEST_RULES, options) if not rule.url_only]
+        record = Record(url='', text=text)
+        return not any(rule.check(record) for rule in rules)
     
     def close_spider(self, spider):
         """Log statistics when spider closes"""
@@ -189,50 +161,56 @@ class DataCleaningPipeline:
                 f"dropped {self.dropped_count} corrupted items "
                 f"({self.dropped_count/self.processed_count*100:.1f}%)"
             )
+            breakdown = ", ".join(f"{name} {count}" for name, count in self.hygiene.counts.items() if count)
+            if breakdown:
+                spider.logger.info(f"Data Cleaning Pipeline: Dropped by rule: {breakdown}")
     
 class EmbeddingPipeline:
-    def __init__(self):
-        self.embedder = HuggingFaceEmbedder()
+    def __init__(self, embedder=None):
+        self.embedder = embedder or HuggingFaceEmbedder()
     
     def process_item(self, item, spider):
         #tqdm.write(f"Processing item: {item['url']}")
-        item['embeddings'] = self.embedder.process_item(item, spider)
+        # Chunk texts plus one float32 matrix, not per-chunk lists of Python floats
+        item['chunks'], item['vectors'] = self.embedder.embed_item(item)
         #tqdm.write(f"Processed item: {item['url']}")
         return item
     
 
 class VectorDatabasePipeline:
-    def __init__(self):
-        # Connect to your local Qdrant instance
-        self.client = QdrantClient(url="http://localhost:6333")
-
-        # Initialize embeddings (same model as your embedder)
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="intfloat/e5-base-v2",
-            model_kwargs={"device": "mps"}
-        )
+    def __init__(self, client=None, collection_name="cuboulder_pages", canonicalizer=None, vector_store=None,
+                 reducer=None):
+        # Connect to your local Qdrant instance (or use the client passed in, e.g. in-memory)
+        self.client = client or QdrantClient(url="http://localhost:6333")
 
         # Set a collection name for your university data
-        self.collection_name = "cuboulder_pages"
+        self.collection_name = collection_name
 
-        # Create the collection if it doesn't exist (but don't recreate if it already exists)
-        if not self.client.collection_exists(collection_name=self.collection_name):
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config={"size": 768, "distance": "Cosine"}
-            )
+        # Payload URLs are canonical so dupefilters and re-crawls match them
+        self.canonicalizer = canonicalizer or URLCanonicalizer()
 
-        # Wrap in LangChain's vectorstore for convenience
-        self.vectorstore = Qdrant(
-            client=self.client,
-            collection_name=self.collection_name,
-            embeddings=self.embeddings
-        )
+        # Create the collection if it doesn't exist (but don't recreate if it already exists),
+        # with the quantization/on-disk/HNSW settings of config_llm.json's vector_store section
+        ensure_collection(self.client, self.collection_name, vector_store)
+        # Small named vector for two-stage search (src/vectorstore/reduction.py), if configured
+        self.reducer = check_reducer(self.client, self.collection_name, reducer)
         
         # Initialize progress tracking
         self.pages_processed = 0
         self.pbar = None
 
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        vector_store = load_vector_store_config(settings.get('VECTOR_STORE_CONFIG', 'config_llm.json'))
+        return cls(
+            client=QdrantClient(url=settings.get('QDRANT_URL', 'http://localhost:6333')),
+            collection_name=settings.get('QDRANT_COLLECTION', 'cuboulder_pages'),
+            canonicalizer=get_canonicalizer(settings),
+            vector_store=vector_store,
+            reducer=VectorReducer.from_config(vector_store.get('small_vector'))
+        )
+
     def open_spider(self, spider):
         """Initialize progress bar when spider opens."""
         self.pbar = tqdm(desc="Processing pages", unit="page", dynamic_ncols=True)
@@ -245,24 +223,17 @@ class VectorDatabasePipeline:
     
     def process_item(self, item, spider):
         """Insert crawled item's embeddings into Qdrant."""
-        docs = [
-            Document(
-                page_content=chunk["text"],
-                metadata={
-                    "url": item["url"],
-                    "title": item.get("title", ""),
-                    "source": "cuboulder_scraper"
-                }
-            )
-            for chunk in item["embeddings"]
-        ]
-
-        self.vectorstore.add_documents(docs)
+        url = self.canonicalizer.canonicalize(item["url"])
+        with timed("upsert", CRAWL_METRICS):
+            # Reuse the vectors from EmbeddingPipeline instead of embedding the chunks again;
+            # one copy per canonical URL replaces chunks from an earlier crawl or alias
+            written = write_pages(self.client, self.collection_name,
+                                  [(url, item.get("title"), item["chunks"], item["vectors"])], reducer=self.reducer)
         
         # Update progress bar
         self.pages_processed += 1
         if self.pbar is not None:
             self.pbar.update(1)
-            self.pbar.set_postfix({"chunks": len(docs), "url": item['url'][:50]})
+            self.pbar.set_postfix({"chunks": written, "url": item['url'][:50]})
         
         return item
\ No newline at end of file
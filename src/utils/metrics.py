@@ -0,0 +1,182 @@
+"""
+Lightweight latency and throughput metrics with Prometheus text export.
+
+Stages are timed with the timed() context manager or record(). Every
+observation goes into a process-wide registry, which keeps an all-time
+histogram (for Prometheus' histogram_quantile) and a rolling window of
+recent samples (for p50/p95/p99 of the last few minutes). Observations
+made inside collect_timings() are also returned to the caller, so a
+single request can report its own per-stage breakdown.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds; covers sub-millisecond lookups up to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+WINDOW_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+# Per-request stage timings, set by collect_timings()
+_current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('current_timings', default=None)
+
+
+class RollingHistogram:
+    """Histogram with all-time buckets plus a time-bounded window of raw samples."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, window_seconds: float = 600, max_samples: int = 5000):
+        self.buckets = tuple(sorted(buckets))
+        self.window_seconds = window_seconds
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.bucket_counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self._samples.append((time.time(), value))
+
+    def window(self) -> List[float]:
+        """Samples observed within the rolling window, oldest first."""
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return [value for _, value in self._samples]
+
+    def quantiles(self, quantiles: Tuple[float, ...] = WINDOW_QUANTILES) -> Dict[float, float]:
+        values = sorted(self.window())
+        if not values:
+            return {}
+        return {q: values[min(int(q * len(values)), len(values) - 1)] for q in quantiles}
+
+
+class MetricsRegistry:
+    """Named histograms, counters and gauges, rendered in Prometheus text format."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, RollingHistogram())
+        histogram.observe(seconds)
+
+    def increment(self, name: str, amount: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float):
+        self.gauges[name] = value
+
+    def reset(self):
+        """Drop all recorded metrics, e.g. after a warm-up phase."""
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Plain-dict view, suitable for JSON dumps."""
+        stages = {}
+        for stage, histogram in sorted(self.histograms.items()):
+            stages[stage] = {
+                "count": histogram.count,
+                "sum": histogram.sum,
+                "window": {f"p{int(q * 100)}": v for q, v in histogram.quantiles().items()},
+            }
+        return {
+            "timestamp": time.time(),
+            "stages": stages,
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+        }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        name = f"{self.prefix}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+        window_name = f"{self.prefix}_stage_duration_window_seconds"
+        lines.append(f"# HELP {window_name} Stage latency quantiles over the rolling window.")
+        lines.append(f"# TYPE {window_name} gauge")
+        for stage, histogram in sorted(self.histograms.items()):
+            for q, value in histogram.quantiles().items():
+                lines.append(f'{window_name}{{stage="{stage}",quantile="{q}"}} {value}')
+
+        for counter, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {self.prefix}_{counter}_total counter")
+            lines.append(f"{self.prefix}_{counter}_total {value}")
+        for gauge, value in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {self.prefix}_{gauge} gauge")
+            lines.append(f"{self.prefix}_{gauge} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+_registries: Dict[str, MetricsRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(prefix: str = "rag") -> MetricsRegistry:
+    """Return the process-wide registry for a metric prefix ("rag", "crawl", ...)."""
+    with _registries_lock:
+        if prefix not in _registries:
+            _registries[prefix] = MetricsRegistry(prefix)
+        return _registries[prefix]
+
+
+def record(stage: str, seconds: float, registry: Optional[MetricsRegistry] = None):
+    """Record a stage duration in the registry and the current request's timings."""
+    (registry or get_registry()).observe(stage, seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str, registry: Optional[MetricsRegistry] = None) -> Iterator[None]:
+    """Time the enclosed block as one observation of stage."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start_time, registry)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """Collect every stage recorded inside the block into the yielded dict."""
+    timings: Dict[str, float] = {}
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
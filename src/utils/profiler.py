@@ -0,0 +1,106 @@
+"""
+Hot-path profiling for long-running processes such as a live crawl.
+
+Two modes are supported:
+- "cprofile": deterministic cProfile of the whole process, dumped as a
+  .prof file (open with snakeviz or pstats). Accurate, but slows the
+  crawl down noticeably.
+- "sample": a py-spy-style sampler thread that snapshots every thread's
+  stack at a fixed interval and writes collapsed stacks ("a;b;c 42"),
+  ready for flamegraph.pl or speedscope. Overhead is low enough to leave
+  on during a real crawl.
+"""
+import cProfile
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+
+class SamplingProfiler:
+    """Periodically samples the stacks of all threads."""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        """
+        Args:
+            interval: Seconds between samples
+            max_depth: Frames kept per stack, innermost first
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.samples[self._collapse(frame)] += 1
+            self.sample_count += 1
+
+    def _collapse(self, frame) -> str:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def dump(self, path: str):
+        """Write samples in collapsed-stack format, most frequent first."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Start/stop wrapper over cProfile or the sampling profiler."""
+
+    MODES = ("cprofile", "sample")
+
+    def __init__(self, mode: str, output_path: str, interval: float = 0.01):
+        """
+        Args:
+            mode: "cprofile" or "sample"
+            output_path: Where to write the profile when stopped
+            interval: Sampling interval for "sample" mode
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profiler mode '{mode}', expected one of {self.MODES}")
+        self.mode = mode
+        self.output_path = output_path
+        self.started_at = 0.0
+        self._profiler = cProfile.Profile() if mode == "cprofile" else SamplingProfiler(interval)
+
+    def start(self):
+        self.started_at = time.time()
+        if self.mode == "cprofile":
+            self._profiler.enable()
+        else:
+            self._profiler.start()
+
+    def stop(self) -> str:
+        """Stop profiling and write the output file; returns its path."""
+        if self.mode == "cprofile":
+            self._profiler.disable()
+            self._profiler.dump_stats(self.output_path)
+        else:
+            self._profiler.stop()
+            self._profiler.dump(self.output_path)
+        return self.output_path
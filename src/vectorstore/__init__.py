@@ -0,0 +1,19 @@
+"""Qdrant point layout and write helpers shared by the crawler and offline ingest."""
+from .collection import (apply_collection_config, bulk_load, check_reducer, ensure_collection,
+                         load_vector_store_config, ram_bytes_per_vector, resolve_alias, search_params,
+                         vector_names)
+from .partitions import (SITE_INDEXES, SiteRouter, backfill_site_fields, build_filter, ensure_site_indexes,
+                         site_fields)
+from .points import chunk_metadata, page_payloads, point_id, write_pages
+from .reduction import VectorReducer, backfill_small_vectors, sample_vectors
+from .versions import (AliasWatcher, create_version, list_versions, prune_versions, swap_alias,
+                       validate_version, version_name)
+
+__all__ = [
+    'AliasWatcher', 'SITE_INDEXES', 'SiteRouter', 'VectorReducer', 'apply_collection_config',
+    'backfill_site_fields', 'backfill_small_vectors', 'build_filter', 'bulk_load', 'check_reducer',
+    'chunk_metadata', 'create_version', 'ensure_collection', 'ensure_site_indexes', 'list_versions',
+    'load_vector_store_config', 'page_payloads', 'point_id', 'prune_versions', 'ram_bytes_per_vector',
+    'resolve_alias', 'sample_vectors', 'search_params', 'site_fields', 'swap_alias', 'validate_version',
+    'vector_names', 'version_name', 'write_pages',
+]
@@ -0,0 +1,254 @@
+"""
+Create and tune the Qdrant collection from config_llm.json.
+
+The "vector_store" section decides how vectors are stored and indexed:
+
+    "vector_store": {
+        "vector_size": 768,
+        "distance": "Cosine",
+        "on_disk": true,
+        "hnsw": {"m": 16, "ef_construct": 128},
+        "quantization": {"type": "scalar", "quantile": 0.99, "always_ram": true},
+        "small_vector": {"name": "small", "dim": 128, "method": "pca"}
+    }
+
+With scalar quantization a 768-dim vector is searched as 768 int8 bytes in
+RAM instead of 3 KB of float32 (binary quantization: 96 bytes). With
+on_disk the float32 originals are memory-mapped and only read to rescore
+the best candidates (rescore/oversampling/hnsw_ef in the retrieval
+config, see search_params).
+
+With small_vector each point also gets a low-dimensional named vector
+(src/vectorstore/reduction.py) for two-stage search; it stays in RAM as
+float32.
+
+bulk_load() pauses HNSW indexing for a full ingest and builds the index
+once at the end, instead of re-indexing segments while points are still
+arriving.
+"""
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+from qdrant_client import QdrantClient, models
+
+from src.cleanup.quality import ensure_quality_indexes
+from .partitions import ensure_site_indexes
+from .reduction import VectorReducer
+
+# HNSW m Qdrant uses when the config doesn't set one
+DEFAULT_HNSW_M = 16
+
+
+def load_vector_store_config(path: str = "config_llm.json") -> Dict[str, Any]:
+    """The "vector_store" section of an LLM config file ({} if the file is missing)."""
+    if not Path(path).exists():
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f).get("vector_store", {})
+
+
+def vectors_config(vector_store: Dict[str, Any]):
+    """The unnamed full vector, plus the small named vector if configured."""
+    distance = models.Distance(vector_store.get("distance", "Cosine"))
+    full = models.VectorParams(size=vector_store.get("vector_size", 768), distance=distance,
+                               on_disk=vector_store.get("on_disk"))
+    small = vector_store.get("small_vector")
+    if not small:
+        return full
+    return {"": full, small.get("name", "small"): models.VectorParams(size=small["dim"], distance=distance)}
+
+
+def resolve_alias(client: QdrantClient, name: str) -> str:
+    """The collection an alias points to, or name itself if it isn't an alias."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return name
+
+
+def vector_names(client: QdrantClient, collection_name: str) -> Set[str]:
+    """Names of the collection's vectors ("" is the unnamed one)."""
+    vectors = client.get_collection(collection_name).config.params.vectors
+    return set(vectors) if isinstance(vectors, dict) else {""}
+
+
+def check_reducer(client: QdrantClient, collection_name: str, reducer: Optional[VectorReducer]) -> Optional[VectorReducer]:
+    """reducer if the collection has a slot for its vector, else None (with a warning)."""
+    if reducer is None or reducer.name in vector_names(client, collection_name):
+        return reducer
+    print(f"⚠️  {collection_name} has no '{reducer.name}' vector; small vectors are skipped "
+          f"(create a new collection to add it)")
+    return None
+
+
+def hnsw_config(vector_store: Dict[str, Any]) -> Optional[models.HnswConfigDiff]:
+    hnsw = vector_store.get("hnsw")
+    return models.HnswConfigDiff(**hnsw) if hnsw else None
+
+
+def quantization_config(vector_store: Dict[str, Any]):
+    """
+    Qdrant quantization config for vector_store["quantization"].
+
+    Returns:
+        ScalarQuantization (int8), BinaryQuantization, Disabled for
+        type "none", or None when the section is missing (leave as is)
+    """
+    quantization = dict(vector_store.get("quantization") or {})
+    if not quantization:
+        return None
+    kind = quantization.pop("type", "scalar")
+    if kind == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=quantization.get("quantile"),
+            always_ram=quantization.get("always_ram")
+        ))
+    if kind == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+            always_ram=quantization.get("always_ram")
+        ))
+    if kind == "none":
+        return models.Disabled.DISABLED
+    raise ValueError(f"Unknown quantization type {kind!r} (expected 'scalar', 'binary' or 'none')")
+
+
+def ram_bytes_per_vector(vector_store: Dict[str, Any]) -> int:
+    """Approximate RAM per point for vectors and HNSW links (payload excluded)."""
+    dim = vector_store.get("vector_size", 768)
+    quantization = (vector_store.get("quantization") or {})
+    kind = quantization.get("type", "scalar") if quantization else "none"
+    size = 0 if vector_store.get("on_disk") else dim * 4
+    # Quantized vectors follow the originals onto disk unless always_ram is set
+    if kind != "none" and (quantization.get("always_ram") or not vector_store.get("on_disk")):
+        size += dim if kind == "scalar" else (dim + 7) // 8
+    small = vector_store.get("small_vector")
+    if small:
+        size += small["dim"] * 4
+    hnsw = vector_store.get("hnsw") or {}
+    if not hnsw.get("on_disk"):
+        # Two links per neighbour on layer 0, 4 bytes each
+        size += 2 * hnsw.get("m", DEFAULT_HNSW_M) * 4
+    return size
+
+
+def search_params(retrieval_config: Dict[str, Any]) -> Optional[models.SearchParams]:
+    """
+    Query-time HNSW and quantization parameters from the retrieval config.
+
+    Keys: hnsw_ef (candidates explored by HNSW), rescore (re-score the
+    quantized candidates with the original vectors) and oversampling
+    (fetch limit * oversampling quantized candidates before rescoring).
+    Unset keys keep Qdrant's defaults.
+    """
+    rescore, oversampling = retrieval_config.get("rescore"), retrieval_config.get("oversampling")
+    quantization = None
+    if rescore is not None or oversampling is not None:
+        quantization = models.QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+    if retrieval_config.get("hnsw_ef") is None and quantization is None:
+        return None
+    return models.SearchParams(hnsw_ef=retrieval_config.get("hnsw_ef"), quantization=quantization)
+
+
+def ensure_collection(client: QdrantClient, collection_name: str,
+                      vector_store: Optional[Dict[str, Any]] = None,
+                      metadata: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Create the collection from the vector_store config if it is missing,
+    and the payload indexes the cleanup and retrieval filter on.
+
+    An existing collection (or alias of one) is not changed (see
+    apply_collection_config).
+
+    Args:
+        metadata: Stored with a new collection (e.g. the embedding model);
+            needs Qdrant server and client 1.16 or newer
+
+    Returns:
+        True if the collection was created
+    """
+    vector_store = vector_store or {}
+    created = False
+    if not client.collection_exists(collection_name=resolve_alias(client, collection_name)):
+        # Collection metadata needs Qdrant 1.16+; only versions pass it
+        extra = {"metadata": metadata} if metadata else {}
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=vectors_config(vector_store),
+            hnsw_config=hnsw_config(vector_store),
+            quantization_config=quantization_config(vector_store),
+            **extra
+        )
+        created = True
+    # Index the per-chunk quality fields so cleanup can filter server-side,
+    # and the site fields so searches can be restricted to a partition
+    ensure_quality_indexes(client, collection_name)
+    ensure_site_indexes(client, collection_name)
+    return created
+
+
+def apply_collection_config(client: QdrantClient, collection_name: str, vector_store: Dict[str, Any]):
+    """
+    Bring an existing collection in line with the vector_store config
+    (on-disk originals, HNSW parameters, quantization). Qdrant rebuilds the
+    affected segments in the background.
+    """
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": models.VectorParamsDiff(on_disk=vector_store.get("on_disk"))}
+        if "on_disk" in vector_store else None,
+        hnsw_config=hnsw_config(vector_store),
+        quantization_config=quantization_config(vector_store)
+    )
+
+
+def wait_until_indexed(client: QdrantClient, collection_name: str, timeout: float = 3600,
+                       poll_interval: float = 2.0) -> bool:
+    """Wait for the optimizers to finish (collection status green); False on timeout."""
+    deadline = time.time() + timeout
+    while True:
+        status = client.get_collection(collection_name).status
+        if status == models.CollectionStatus.GREEN:
+            return True
+        if status == models.CollectionStatus.GREY:
+            # Optimizations are pending until an update triggers them
+            client.update_collection(collection_name, optimizers_config=models.OptimizersConfigDiff())
+        if time.time() >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+
+@contextmanager
+def bulk_load(client: QdrantClient, collection_name: str, vector_store: Optional[Dict[str, Any]] = None,
+              wait: bool = True, timeout: float = 3600) -> Iterator[None]:
+    """
+    Pause HNSW indexing while the block writes points, then build it once.
+
+    Points written inside the block are stored (and quantized) but not
+    linked into the graph; m is restored from the config on exit, even if
+    the block fails, so the collection never stays unindexed.
+
+    Args:
+        client: Qdrant client
+        collection_name: Collection being loaded
+        vector_store: Config with the HNSW parameters to restore
+        wait: Block until the index is built after a successful load
+        timeout: Seconds to wait for the index
+    """
+    hnsw = {"m": DEFAULT_HNSW_M, **((vector_store or {}).get("hnsw") or {})}
+    client.update_collection(collection_name, hnsw_config=models.HnswConfigDiff(m=0))
+    print(f"🚚 Bulk load: indexing of {collection_name} paused")
+    try:
+        yield
+    finally:
+        client.update_collection(collection_name, hnsw_config=models.HnswConfigDiff(**hnsw))
+    if wait:
+        print(f"🏗️  Building the index of {collection_name} (m={hnsw['m']})...")
+        start_time = time.time()
+        if wait_until_indexed(client, collection_name, timeout=timeout):
+            print(f"✅ Index built in {time.time() - start_time:.1f}s")
+        else:
+            print(f"⚠️  Index still building after {timeout:.0f}s; Qdrant continues in the background")
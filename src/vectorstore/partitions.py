@@ -0,0 +1,209 @@
+"""
+Indexed site, subdomain, section and crawl date of every chunk.
+
+colorado.edu and cubuffs.com pages share one collection. write_pages
+stores where each chunk came from, e.g. for
+https://engineering.colorado.edu/admissions/apply:
+
+    {"site": "colorado.edu", "subdomain": "engineering",
+     "section": "admissions", "crawl_date": "2025-03-01T12:00:00Z"}
+
+build_filter turns API filters into a Qdrant filter, so a search only
+walks the matching partition instead of fetching a larger k and
+discarding. SiteRouter picks the site for a query when the user didn't.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import urlsplit
+
+import numpy as np
+import tldextract
+from qdrant_client import QdrantClient, models
+from tqdm import tqdm
+
+from .reduction import sample_vectors
+
+# Payload keys (under "metadata", LangChain layout) and their index types
+SITE_INDEXES = {
+    "metadata.site": models.PayloadSchemaType.KEYWORD,
+    "metadata.subdomain": models.PayloadSchemaType.KEYWORD,
+    "metadata.section": models.PayloadSchemaType.KEYWORD,
+    "metadata.crawl_date": models.PayloadSchemaType.DATETIME,
+}
+
+# Keyword fields build_filter accepts, plus crawled_after/crawled_before
+FILTER_FIELDS = ("site", "subdomain", "section")
+
+# Bundled public suffix list; never fetched over the network
+_extract = tldextract.TLDExtract(suffix_list_urls=())
+
+
+def site_fields(url: str, crawl_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Partition fields for one chunk.
+
+    Args:
+        url: Source page URL
+        crawl_date: When the page was fetched (default: now)
+
+    Returns:
+        Dict merged into the chunk's metadata
+    """
+    parts = _extract(url)
+    segments = [segment for segment in urlsplit(url).path.lower().split('/') if segment]
+    # A bare file name ("/index.html") is not a section
+    section = segments[0] if segments and (len(segments) > 1 or '.' not in segments[0]) else ""
+    crawl_date = crawl_date or datetime.now(timezone.utc)
+    return {
+        "site": parts.top_domain_under_public_suffix.lower(),
+        "subdomain": parts.subdomain.lower(),
+        "section": section,
+        "crawl_date": crawl_date.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+def build_filter(filters: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+    """
+    Qdrant filter for API search filters.
+
+    Args:
+        filters: {"site": "cubuffs.com", "section": ["admissions", "housing"],
+            "subdomain": ..., "crawled_after": "2025-01-01", "crawled_before": ...};
+            a list matches any of its values
+
+    Returns:
+        Filter, or None if there is nothing to filter on
+
+    Raises:
+        ValueError: Unknown filter keys
+    """
+    filters = {key: value for key, value in (filters or {}).items() if value not in (None, "", [])}
+    unknown = set(filters) - set(FILTER_FIELDS) - {"crawled_after", "crawled_before"}
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))} "
+                         f"(expected {', '.join(FILTER_FIELDS)}, crawled_after, crawled_before)")
+    conditions = []
+    for key in FILTER_FIELDS:
+        value = filters.get(key)
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            match = models.MatchAny(any=[str(item).lower() for item in value])
+        else:
+            match = models.MatchValue(value=str(value).lower())
+        conditions.append(models.FieldCondition(key=f"metadata.{key}", match=match))
+    if "crawled_after" in filters or "crawled_before" in filters:
+        conditions.append(models.FieldCondition(key="metadata.crawl_date", range=models.DatetimeRange(
+            gte=filters.get("crawled_after"), lt=filters.get("crawled_before"))))
+    return models.Filter(must=conditions) if conditions else None
+
+
+def ensure_site_indexes(client: QdrantClient, collection_name: str):
+    """Create payload indexes for the partition fields (no-op for existing ones)."""
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field_name, schema in SITE_INDEXES.items():
+        if field_name not in existing:
+            client.create_payload_index(collection_name, field_name=field_name, field_schema=schema)
+
+
+def missing_site_filter() -> models.Filter:
+    """Points written before the partition fields were added."""
+    return models.Filter(must=[models.IsEmptyCondition(is_empty=models.PayloadField(key="metadata.site"))])
+
+
+def backfill_site_fields(client: QdrantClient, collection_name: str, batch_size: int = 500) -> int:
+    """
+    Add site, subdomain and section to points that don't have them.
+
+    Their crawl date is unknown and stays unset, so crawl date filters
+    exclude them until the pages are crawled again.
+
+    Returns:
+        Number of points updated
+    """
+    total = client.count(collection_name, count_filter=missing_site_filter(), exact=True).count
+    updated = 0
+    with tqdm(total=total, desc="Backfilling site fields") as pbar:
+        while updated < total:
+            # Updated points drop out of the filter, so always read the first page
+            points, _ = client.scroll(
+                collection_name,
+                scroll_filter=missing_site_filter(),
+                limit=min(batch_size, total - updated),
+                with_payload=models.PayloadSelectorInclude(include=["metadata.url"]),
+                with_vectors=False
+            )
+            if not points:
+                break
+            operations = []
+            for point in points:
+                url = ((point.payload or {}).get("metadata") or {}).get("url", "")
+                fields = site_fields(url)
+                del fields["crawl_date"]
+                operations.append(models.SetPayloadOperation(set_payload=models.SetPayload(
+                    payload=fields, points=[point.id], key="metadata")))
+            client.batch_update_points(collection_name, update_operations=operations, wait=True)
+            updated += len(points)
+            pbar.update(len(points))
+    return updated
+
+
+class SiteRouter:
+    """
+    Nearest-centroid site classifier over query embeddings.
+
+    Each site's centroid is the mean of a sample of its chunk vectors. A
+    query is routed only when it is closer to one centroid than to every
+    other by at least margin; otherwise the whole collection is searched.
+    """
+
+    def __init__(self, sites: Sequence[str], centroids: np.ndarray, margin: float = 0.02):
+        """
+        Args:
+            sites: Site names
+            centroids: (len(sites), dim) L2-normalised centroids
+            margin: Minimum cosine lead of the best site over the runner-up
+        """
+        self.sites = list(sites)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.margin = margin
+
+    @classmethod
+    def fit(cls, client: QdrantClient, collection_name: str, sites: Optional[Sequence[str]] = None,
+            sample: int = 1000, margin: float = 0.02) -> Optional["SiteRouter"]:
+        """
+        Centroids from up to sample vectors per site.
+
+        Args:
+            sites: Sites to route between (default: every metadata.site value)
+
+        Returns:
+            Router, or None with fewer than two sites to choose from
+        """
+        if sites is None:
+            sites = [hit.value for hit in client.facet(collection_name, key="metadata.site").hits]
+        names, centroids = [], []
+        for site in sites:
+            vectors = sample_vectors(client, collection_name, limit=sample,
+                                     scroll_filter=build_filter({"site": site}))
+            if not len(vectors):
+                continue
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            centroid = vectors.mean(axis=0)
+            names.append(site)
+            centroids.append(centroid / max(np.linalg.norm(centroid), 1e-12))
+        if len(names) < 2:
+            return None
+        return cls(names, np.stack(centroids), margin)
+
+    def scores(self, query_vector: Sequence[float]) -> Dict[str, float]:
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        return dict(zip(self.sites, (self.centroids @ query).tolist()))
+
+    def route(self, query_vector: Sequence[float]) -> Optional[str]:
+        """The site the query clearly belongs to, or None."""
+        ranked = sorted(self.scores(query_vector).items(), key=lambda item: item[1], reverse=True)
+        if ranked[0][1] - ranked[1][1] >= self.margin:
+            return ranked[0][0]
+        return None
@@ -0,0 +1,102 @@
+"""
+Build and write Qdrant points for crawled pages.
+
+Points use the LangChain payload layout ({"page_content", "metadata"}) so
+the retrievers keep working, but vectors are the float32 matrices
+EmbeddingPipeline (or the offline ingest) already computed; nothing is
+embedded twice.
+Point IDs are derived from the canonical URL and chunk index, so writing
+the same page again overwrites it instead of adding copies.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+from src.cleanup.quality import quality_fields
+from .partitions import site_fields
+
+# (canonical url, title, chunk texts, (n_chunks, dim) float32 vectors)
+Page = Tuple[str, Optional[str], Sequence[str], np.ndarray]
+
+
+def point_id(url: str, index: int) -> str:
+    """Deterministic point ID for chunk index of url."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{url}#{index}"))
+
+
+def chunk_metadata(url: str, title: Optional[str], text: str, source: str = "cuboulder_scraper",
+                   crawl_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """Payload metadata for one chunk, including the indexed quality and site fields."""
+    return {
+        "url": url,
+        "title": title or "",
+        "source": source,
+        **site_fields(url, crawl_date),
+        **quality_fields(url, text),
+    }
+
+
+def page_payloads(url: str, title: Optional[str], texts: Sequence[str], source: str = "cuboulder_scraper",
+                  crawl_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """LangChain-layout payloads for the chunks of one page."""
+    return [{"page_content": text, "metadata": chunk_metadata(url, title, text, source, crawl_date)}
+            for text in texts]
+
+
+def write_pages(client: QdrantClient, collection_name: str, pages: Sequence[Page], wait: bool = True,
+                batch_size: int = 256, source: str = "cuboulder_scraper", reducer=None,
+                crawl_date: Optional[datetime] = None) -> int:
+    """
+    Replace all chunks of the given pages.
+
+    Existing chunks are deleted first so a page that now has fewer chunks
+    leaves nothing stale behind. The vectors are stacked into one float32
+    matrix and passed to upload_collection as is; the client converts rows
+    per request batch (straight to protobuf with prefer_grpc) instead of
+    this code building PointStructs from Python lists.
+
+    Args:
+        client: Qdrant client
+        collection_name: Target collection
+        pages: (canonical url, title, chunk texts, (n_chunks, dim) float32 matrix) per page
+        wait: Wait for the writes to be applied
+        batch_size: Points per upload request
+        source: Value of metadata.source
+        reducer: VectorReducer; also writes its small named vector per
+            chunk (the collection needs a slot for it, see check_reducer)
+        crawl_date: Value of metadata.crawl_date (default: now)
+
+    Returns:
+        Number of points written
+    """
+    urls = list(dict.fromkeys(url for url, _, _, _ in pages))
+    if urls:
+        client.delete(
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[
+                models.FieldCondition(key="metadata.url", match=models.MatchAny(any=urls))
+            ])),
+            wait=wait
+        )
+    pages = [page for page in pages if len(page[2])]
+    if not pages:
+        return 0
+    ids = [point_id(url, i) for url, _, texts, _ in pages for i in range(len(texts))]
+    crawl_date = crawl_date or datetime.now(timezone.utc)
+    payloads = [payload for url, title, texts, _ in pages
+                for payload in page_payloads(url, title, texts, source, crawl_date)]
+    vectors = np.concatenate([np.asarray(matrix, dtype=np.float32) for _, _, _, matrix in pages])
+    if reducer is not None:
+        vectors = {"": vectors, reducer.name: reducer.transform(vectors)}
+    client.upload_collection(
+        collection_name=collection_name,
+        vectors=vectors,
+        payload=payloads,
+        ids=ids,
+        batch_size=batch_size,
+        wait=wait
+    )
+    return len(ids)
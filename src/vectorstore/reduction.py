@@ -0,0 +1,162 @@
+"""
+Low-dimensional companion vectors for two-stage search.
+
+Each chunk can carry a small named vector next to its full embedding,
+from one of two methods:
+
+- "pca": projection onto the top principal components, fitted on vectors
+  sampled from the collection (build_small_vectors.py --fit)
+- "matryoshka": the first dims of the embedding, for models trained so
+  that prefixes are embeddings themselves (e.g. nomic-embed, mxbai)
+
+Retrieval searches the small vectors first and rescores the shortlist
+with the full ones (QdrantMMRRetriever.query_reducer). Configured in
+config_llm.json:
+
+    "vector_store": {
+        "small_vector": {"name": "small", "dim": 128, "method": "pca",
+                         "path": "output/small_vector_pca.npz"}
+    }
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+METHODS = ("pca", "matryoshka")
+
+
+class VectorReducer:
+    """Maps full embeddings to a small, L2-normalised named vector."""
+
+    def __init__(self, name: str, dim: int, mean: Optional[np.ndarray] = None,
+                 components: Optional[np.ndarray] = None):
+        """
+        Args:
+            name: Qdrant vector name the small vectors are stored under
+            dim: Small vector size
+            mean: PCA centre (full_dim,), None for truncation
+            components: PCA basis (dim, full_dim), None for truncation
+        """
+        self.name = name
+        self.dim = dim
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.components = None if components is None else np.asarray(components, dtype=np.float32)
+
+    @property
+    def method(self) -> str:
+        return "matryoshka" if self.components is None else "pca"
+
+    @classmethod
+    def matryoshka(cls, dim: int, name: str = "small") -> "VectorReducer":
+        return cls(name, dim)
+
+    @classmethod
+    def fit_pca(cls, vectors: np.ndarray, dim: int, name: str = "small") -> "VectorReducer":
+        """
+        Fit a PCA projection.
+
+        Rows are normalised first (as cosine search sees them) and the
+        basis comes from the full_dim x full_dim covariance, so fitting
+        100k vectors takes a second.
+        """
+        sample = np.asarray(vectors, dtype=np.float64)
+        if len(sample) <= dim:
+            raise ValueError(f"Need more than {dim} vectors to fit a {dim}-dim PCA, got {len(sample)}")
+        sample /= np.maximum(np.linalg.norm(sample, axis=1, keepdims=True), 1e-12)
+        mean = sample.mean(axis=0)
+        centred = sample - mean
+        eigenvalues, eigenvectors = np.linalg.eigh(centred.T @ centred / len(sample))
+        top = np.argsort(eigenvalues)[::-1][:dim]
+        return cls(name, dim, mean, eigenvectors[:, top].T)
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, full_dim) -> (n, dim) float32, rows L2-normalised."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        if self.components is None:
+            small = matrix[:, :self.dim]
+        else:
+            matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            small = (matrix - self.mean) @ self.components.T
+        return np.ascontiguousarray(small / np.maximum(np.linalg.norm(small, axis=1, keepdims=True), 1e-12),
+                                    dtype=np.float32)
+
+    def transform_query(self, vector: Sequence[float]) -> list:
+        return self.transform(np.asarray(vector, dtype=np.float32))[0].tolist()
+
+    def save(self, path: str):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        projection = {} if self.components is None else {"mean": self.mean, "components": self.components}
+        with path.open('wb') as f:
+            np.savez(f, name=np.array(self.name), dim=np.array(self.dim), **projection)
+
+    @classmethod
+    def load(cls, path: str) -> "VectorReducer":
+        with np.load(path) as data:
+            if 'components' not in data.files:
+                return cls(str(data['name']), int(data['dim']))
+            return cls(str(data['name']), int(data['dim']), data['mean'], data['components'])
+
+    @classmethod
+    def from_config(cls, small_vector: Optional[Dict[str, Any]]) -> Optional["VectorReducer"]:
+        """
+        Reducer for vector_store["small_vector"], or None if it isn't
+        configured or the PCA hasn't been fitted yet.
+        """
+        if not small_vector:
+            return None
+        name, dim = small_vector.get("name", "small"), small_vector["dim"]
+        method = small_vector.get("method", "pca")
+        if method == "matryoshka":
+            return cls.matryoshka(dim, name)
+        if method != "pca":
+            raise ValueError(f"Unknown small vector method {method!r} (expected one of {METHODS})")
+        path = small_vector.get("path", "output/small_vector_pca.npz")
+        if not Path(path).exists():
+            print(f"⚠️  No PCA model at {path}; small vectors are skipped until build_small_vectors.py --fit")
+            return None
+        reducer = cls.load(path)
+        if reducer.dim != dim or reducer.name != name:
+            raise ValueError(f"PCA model {path} is {reducer.name}/{reducer.dim}, config says {name}/{dim}")
+        return reducer
+
+
+def sample_vectors(client: QdrantClient, collection_name: str, limit: int = 100000,
+                   batch_size: int = 1024, scroll_filter: Optional[models.Filter] = None) -> np.ndarray:
+    """Up to limit full vectors from the collection (or the points matching scroll_filter), as a float32 matrix."""
+    rows, offset = [], None
+    while len(rows) < limit:
+        points, offset = client.scroll(collection_name, limit=min(batch_size, limit - len(rows)), offset=offset,
+                                       scroll_filter=scroll_filter, with_payload=False, with_vectors=[""])
+        rows.extend(point.vector for point in points if point.vector)
+        if offset is None:
+            break
+    return np.asarray(rows, dtype=np.float32)
+
+
+def backfill_small_vectors(client: QdrantClient, collection_name: str, reducer: VectorReducer,
+                           batch_size: int = 512) -> int:
+    """
+    Write the small vector of every point from its full vector.
+
+    Returns:
+        Number of points updated
+    """
+    updated, offset = 0, None
+    while True:
+        points, offset = client.scroll(collection_name, limit=batch_size, offset=offset,
+                                       with_payload=False, with_vectors=[""])
+        points = [point for point in points if point.vector]
+        if points:
+            small = reducer.transform(np.asarray([point.vector for point in points], dtype=np.float32))
+            client.update_vectors(collection_name, points=[
+                models.PointVectors(id=point.id, vector={reducer.name: row.tolist()})
+                for point, row in zip(points, small)
+            ], wait=True)
+            updated += len(points)
+        if offset is None:
+            return updated
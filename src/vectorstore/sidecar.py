@@ -0,0 +1,113 @@
+"""
+Optional binary sidecar for chunk vectors.
+
+The text feed and the crawl archive carry no vectors. When a crawl's
+vectors are wanted outside Qdrant (re-indexing, offline evaluation), this
+appends each page's float32 matrix as raw bytes to <name>.f32 and one JSON
+line per page (url, byte offset, rows, dim, chunk texts) to
+<name>.index.jsonl, so a reader can memory-map single pages without
+parsing any text.
+"""
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class VectorSidecarWriter:
+    """Appends per-page float32 matrices to a raw vector file plus a JSONL index."""
+
+    def __init__(self, root: str = "output/vectors", name: str = "vectors"):
+        """
+        Args:
+            root: Directory for the sidecar files
+            name: File name prefix; host and PID are appended so concurrent
+                processes never share a file
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        stem = f"{name}-{socket.gethostname()}-{os.getpid()}"
+        self.vectors_path = self.root / f"{stem}.f32"
+        self.index_path = self.root / f"{stem}.index.jsonl"
+        self._vectors = self.vectors_path.open("ab")
+        self._index = self.index_path.open("a", encoding="utf-8")
+        self.pages = 0
+        self.rows = 0
+
+    def write(self, url: str, vectors: np.ndarray, chunks: Optional[List[str]] = None):
+        """Append one page's (n_chunks, dim) matrix."""
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or not len(matrix):
+            return
+        offset = self._vectors.tell()
+        self._vectors.write(matrix.tobytes())
+        record = {"url": url, "offset": offset, "rows": matrix.shape[0], "dim": matrix.shape[1]}
+        if chunks is not None:
+            record["chunks"] = list(chunks)
+        self._index.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.pages += 1
+        self.rows += matrix.shape[0]
+
+    def close(self):
+        self._vectors.close()
+        self._index.close()
+
+
+def iter_sidecar(index_path: str) -> Iterator[Tuple[dict, np.ndarray]]:
+    """
+    Read a sidecar back.
+
+    Args:
+        index_path: <name>.index.jsonl (the .f32 file next to it holds the vectors)
+
+    Yields:
+        (index record, read-only (rows, dim) float32 matrix mapped from disk)
+    """
+    index_path = Path(index_path)
+    vectors_path = index_path.with_name(index_path.name[:-len(".index.jsonl")] + ".f32")
+    if not vectors_path.stat().st_size:
+        return
+    data = np.memmap(vectors_path, dtype=np.uint8, mode="r")
+    with index_path.open(encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            size = record["rows"] * record["dim"] * 4
+            matrix = data[record["offset"]:record["offset"] + size].view(np.float32)
+            yield record, matrix.reshape(record["rows"], record["dim"])
+
+
+class VectorSidecarPipeline:
+    """
+    Write each item's vectors to a binary sidecar. Opt-in; runs after
+    EmbeddingPipeline:
+        ITEM_PIPELINES = {
+            'src.vectorstore.sidecar.VectorSidecarPipeline': 250,
+        }
+
+    Settings:
+        VECTOR_SIDECAR_DIR: Output directory (default 'output/vectors')
+    """
+
+    def __init__(self, writer: VectorSidecarWriter):
+        self.writer = writer
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(VectorSidecarWriter(
+            root=crawler.settings.get('VECTOR_SIDECAR_DIR', 'output/vectors'),
+            name=crawler.spidercls.name
+        ))
+
+    def process_item(self, item, spider):
+        vectors = item.get("vectors")
+        if vectors is not None:
+            self.writer.write(item["url"], vectors, item.get("chunks"))
+        return item
+
+    def close_spider(self, spider):
+        self.writer.close()
+        if self.writer.pages:
+            print(f"\n🧮 Wrote {self.writer.rows} vectors for {self.writer.pages} pages to {self.writer.vectors_path}")
@@ -0,0 +1,197 @@
+"""
+Versioned collections behind a Qdrant alias.
+
+The configured collection_name is an alias for the live version
+(cuboulder_pages -> cuboulder_pages_v3), so the crawler and other writers
+keep writing to whatever is live. A reindex (reindex.py) builds the next
+version next to it at bulk-load speed, validates it, and repoints the
+alias in one atomic operation. Old versions stay around for rollback
+until pruned.
+
+Readers resolve the alias once (setup_rag_system) and query the concrete
+version; AliasWatcher notices a swap and lets the web app build its new
+chain while the old one keeps serving from the previous version.
+"""
+import re
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+from .collection import ensure_collection, resolve_alias
+
+
+def version_name(alias: str, version: int) -> str:
+    return f"{alias}_v{version}"
+
+
+def list_versions(client: QdrantClient, alias: str) -> List[Tuple[int, str]]:
+    """(version, collection name) of every version of alias, oldest first."""
+    pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+    versions = []
+    for collection in client.get_collections().collections:
+        match = pattern.match(collection.name)
+        if match:
+            versions.append((int(match.group(1)), collection.name))
+    return sorted(versions)
+
+
+def create_version(client: QdrantClient, alias: str, vector_store: Dict[str, Any],
+                   metadata: Optional[Dict[str, Any]] = None, version: Optional[int] = None) -> str:
+    """
+    Create the next version of alias (or the given one, if it doesn't exist yet).
+
+    Args:
+        metadata: Stored with the collection, e.g. the embedding model and
+            chunking it was built with; readers embed queries with its
+            embedding_model
+
+    Returns:
+        Name of the version's collection
+    """
+    if version is None:
+        versions = list_versions(client, alias)
+        version = versions[-1][0] + 1 if versions else 1
+    name = version_name(alias, version)
+    ensure_collection(client, name, vector_store,
+                      metadata={"created": datetime.now().isoformat(), "version": version, **(metadata or {})})
+    return name
+
+
+def validate_version(client: QdrantClient, collection_name: str, vector_store: Dict[str, Any],
+                     live: Optional[str] = None, min_ratio: float = 0.9, probes: int = 20,
+                     min_self_recall: float = 0.9) -> List[str]:
+    """
+    Check that a version is fit to go live.
+
+    - indexing has finished (status green)
+    - the vector size matches the config
+    - it has points, and at least min_ratio times the points of live
+    - stored vectors find their own point (probes nearest-neighbour
+      searches); this also pages the new segments in, so the first
+      queries after the swap don't pay for it
+
+    Returns:
+        Problems found; empty if the version can go live
+    """
+    problems = []
+    info = client.get_collection(collection_name)
+    if info.status != models.CollectionStatus.GREEN:
+        problems.append(f"status is {info.status.value}, indexing hasn't finished")
+    vectors = info.config.params.vectors
+    full = vectors.get("") if isinstance(vectors, dict) else vectors
+    expected = vector_store.get("vector_size", 768)
+    if full is None or full.size != expected:
+        problems.append(f"vector size is {getattr(full, 'size', None)}, config says {expected}")
+    points = info.points_count or 0
+    if not points:
+        problems.append("no points")
+        return problems
+    if live is not None and live != collection_name:
+        live_points = client.get_collection(live).points_count or 0
+        if points < min_ratio * live_points:
+            problems.append(f"{points} points, fewer than {min_ratio:.0%} of the {live_points} in {live}")
+
+    sample, _ = client.scroll(collection_name, limit=probes, with_payload=False, with_vectors=[""])
+    sample = [point for point in sample if point.vector]
+    hits = 0
+    for point in sample:
+        vector = point.vector[""] if isinstance(point.vector, dict) else point.vector
+        if not np.all(np.isfinite(vector)):
+            problems.append(f"point {point.id} has a non-finite vector")
+            continue
+        top = client.query_points(collection_name, query=vector, limit=1).points
+        hits += bool(top) and top[0].id == point.id
+    if sample and hits < min_self_recall * len(sample):
+        problems.append(f"only {hits}/{len(sample)} stored vectors find their own point")
+    return problems
+
+
+def swap_alias(client: QdrantClient, alias: str, collection_name: str,
+               replace_collection: bool = False) -> Optional[str]:
+    """
+    Point alias at collection_name in one atomic operation.
+
+    Args:
+        replace_collection: If alias is still a plain collection (before the
+            first versioned reindex), delete it so the alias can take its
+            name; queries fail for the moment in between
+
+    Returns:
+        The collection alias pointed to before, if any
+    """
+    previous = resolve_alias(client, alias)
+    if previous == alias:
+        previous = None
+        if client.collection_exists(alias):
+            if not replace_collection:
+                raise ValueError(f"{alias} is a collection, not an alias; "
+                                 f"replace it with the new version explicitly (reindex.py --replace-collection)")
+            client.delete_collection(alias)
+    operations = []
+    if previous is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    operations.append(models.CreateAliasOperation(create_alias=models.CreateAlias(
+        collection_name=collection_name, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    return previous
+
+
+def prune_versions(client: QdrantClient, alias: str, keep: int = 2) -> List[str]:
+    """Delete all but the newest keep versions; the live one is always kept."""
+    live = resolve_alias(client, alias)
+    versions = [name for _, name in list_versions(client, alias)]
+    kept = set(versions[-keep:]) if keep > 0 else set()
+    deleted = [name for name in versions if name not in kept and name != live]
+    for name in deleted:
+        client.delete_collection(name)
+    return deleted
+
+
+class AliasWatcher:
+    """Calls on_change(collection_name) from a daemon thread when alias moves."""
+
+    def __init__(self, client: QdrantClient, alias: str, on_change: Callable[[str], Any],
+                 poll_seconds: float = 30.0, current: Optional[str] = None):
+        """
+        Args:
+            client: Qdrant client
+            alias: Alias to watch
+            on_change: Called with the new collection; if it raises, the
+                swap is retried on the next poll
+            poll_seconds: Seconds between alias lookups
+            current: Collection the caller is on now (default: resolved now)
+        """
+        self.client = client
+        self.alias = alias
+        self.on_change = on_change
+        self.poll_seconds = poll_seconds
+        self.current = current or resolve_alias(client, alias)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"alias-watcher-{alias}", daemon=True)
+
+    def start(self) -> "AliasWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def check(self) -> bool:
+        """Look the alias up once; True if on_change ran for a new target."""
+        target = resolve_alias(self.client, self.alias)
+        if target == self.current:
+            return False
+        self.on_change(target)
+        self.current = target
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️  Checking alias {self.alias} failed: {e}")
@@ -0,0 +1,6 @@
+"""Shared pytest setup."""
+from scrapy.utils.reactor import install_reactor
+
+# scrapy.utils.test.get_crawler() needs an installed reactor; install the
+# asyncio one Scrapy's default settings ask for
+install_reactor("twisted.internet.asyncioreactor.AsyncioSelectorReactor")
@@ -0,0 +1,64 @@
+"""Tests for the compressed crawl archive."""
+import pytest
+
+from src.archive import ArchiveWriter, iter_archive, list_runs
+
+PAGES = [
+    {"url": f"https://www.colorado.edu/page{i}", "title": f"Page {i}",
+     "text": "The university offers many programs for students on campus. " * 30,
+     "links": [f"https://www.colorado.edu/page{i + 1}"]}
+    for i in range(40)
+]
+
+
+@pytest.mark.parametrize("format", ["parquet", "jsonl.zst"])
+def test_runs_are_partitioned_and_columns_selectable(tmp_path, format):
+    for run_id in ("20260101T000000Z", "20260201T000000Z"):
+        writer = ArchiveWriter(str(tmp_path), run_id=run_id, format=format, row_group_size=8, max_rows_per_file=16)
+        for page in PAGES:
+            writer.write(page)
+        writer.close()
+        assert len(writer.files) == 3
+
+    assert list_runs(str(tmp_path)) == ["20260101T000000Z", "20260201T000000Z"]
+    rows = list(iter_archive(str(tmp_path), columns=["url", "links"], runs=["latest"]))
+    assert [row["url"] for row in rows] == [page["url"] for page in PAGES]
+    assert set(rows[0]) == {"url", "links"} and rows[0]["links"] == PAGES[0]["links"]
+
+
+def test_ingest_reads_archive_runs(tmp_path):
+    from qdrant_client import QdrantClient
+
+    from benchmarks.fixtures import HashEmbeddings
+    from src.embedding import HuggingFaceEmbedder
+    from src.ingest import JsonlIngester, ingest_files, prepare_collection
+
+    writer = ArchiveWriter(str(tmp_path / "archive"), row_group_size=10)
+    for page in PAGES:
+        writer.write(page)
+    writer.close()
+
+    client = QdrantClient(":memory:")
+    prepare_collection(client, "pages", vector_size=16)
+    ingester = JsonlIngester(client, "pages", HuggingFaceEmbedder(embeddings=HashEmbeddings(size=16)), clean=False)
+    stats = ingest_files([str(tmp_path / "archive")], {}, checkpoint_path=None,
+                         factory=lambda options: ingester)
+    assert stats["pages"] == len(PAGES)
+
+
+def test_killed_crawl_leaves_no_unreadable_segment(tmp_path):
+    from src.archive import archive_files
+    from src.ingest.jsonl import shard_ranges
+
+    writer = ArchiveWriter(str(tmp_path), run_id="20260101T000000Z", row_group_size=8, max_rows_per_file=16)
+    for page in PAGES[:24]:
+        writer.write(page)
+    # Killed here: the second segment is still open
+    assert [path.rsplit("-", 1)[1] for path in archive_files(str(tmp_path))] == ["00000.parquet"]
+    assert len(list(iter_archive(str(tmp_path)))) == 16
+
+    # A footerless segment from before .tmp names is skipped, not fatal
+    run_dir = tmp_path / "run=20260101T000000Z"
+    (run_dir / "pages-legacy-00000.parquet").write_bytes(b"PAR1 truncated")
+    shards = shard_ranges(archive_files(str(tmp_path)), shards_per_file=4)
+    assert {shard["path"] for shard in shards} == set(writer.files)
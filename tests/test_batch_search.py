@@ -0,0 +1,70 @@
+"""Tests for batch query mode."""
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from benchmarks.fixtures import HashEmbeddings
+from src.llm import QdrantMMRRetriever
+from src.llm.batch_search import retrieve_batch
+from src.vectorstore import ensure_collection, write_pages
+
+
+class PrefixedEmbeddings(HashEmbeddings):
+    """Embeds queries and passages with different prefixes, like e5."""
+
+    def embed_documents(self, texts):
+        return [self._embed(f"passage: {text}") for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(f"query: {text}")
+
+
+def test_batch_retrieval_matches_interactive_retrieval():
+    embeddings = PrefixedEmbeddings(size=64)
+    texts = ["Housing applications open in March.", "Football tickets go on sale in August.",
+             "The registrar office is open 9am to 5pm.", "Dining halls serve breakfast daily.",
+             "Financial aid deadlines are in spring."]
+    client = QdrantClient(":memory:")
+    ensure_collection(client, "pages", {"vector_size": 64})
+    write_pages(client, "pages", [(f"https://www.colorado.edu/page{i}", None, [text],
+                                   np.asarray(embeddings.embed_documents([text]), dtype=np.float32))
+                                  for i, text in enumerate(texts)])
+    retriever = QdrantMMRRetriever(client=client, collection_name="pages", embeddings=embeddings, k=3, fetch_k=5)
+    questions = ["housing applications", "when do football tickets go on sale", "registrar hours"]
+
+    batch = retrieve_batch({"retriever": retriever, "embeddings": embeddings}, questions)
+
+    for question, docs in zip(questions, batch):
+        single = retriever.invoke(question)
+        assert [doc.page_content for doc in docs] == [doc.page_content for doc in single]
+        assert [doc.metadata["_score"] for doc in docs] == \
+               pytest.approx([doc.metadata["_score"] for doc in single], abs=1e-6)
+
+
+class RecordingEncoder:
+    """SentenceTransformer stand-in that records encode calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append((list(texts), kwargs))
+        return np.arange(len(texts) * 2, dtype=np.float32).reshape(len(texts), 2)
+
+
+def test_questions_are_embedded_in_one_call():
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    embeddings = HuggingFaceEmbeddings.model_construct(
+        model_name="intfloat/e5-small-v2", multi_process=False, show_progress=False,
+        encode_kwargs={"batch_size": 32}, query_encode_kwargs={"prompt": "query: "})
+    embeddings._client = RecordingEncoder()
+    questions = ["housing\napplications", "football tickets", "registrar hours"]
+
+    searched = []
+    retriever = type("BatchRetriever", (), {"retrieve_batch": lambda self, vectors: searched.extend(vectors) or []})()
+    retrieve_batch({"retriever": retriever, "embeddings": embeddings}, questions)
+
+    assert embeddings._client.calls == [(["housing applications", "football tickets", "registrar hours"],
+                                         {"show_progress_bar": False, "prompt": "query: "})]
+    assert searched == [[0.0, 1.0], [2.0, 3.0], [4.0, 5.0]]
@@ -0,0 +1,38 @@
+"""Tests for URL canonicalization ahead of fingerprinting."""
+from scrapy import Request
+
+from src.filters.canonicalize import URLCanonicalizer
+
+
+def test_normalize_collapses_url_variants():
+    canonicalizer = URLCanonicalizer()
+    variants = [
+        "http://www.colorado.edu/about/",
+        "https://WWW.colorado.edu:443/about/index.html",
+        "https://www.colorado.edu/about?utm_source=news&utm_medium=email",
+        "https://www.colorado.edu/about#staff",
+        "https://www.colorado.edu/about;jsessionid=ABC?sid=1",
+    ]
+    assert {canonicalizer.normalize(url) for url in variants} == {"https://www.colorado.edu/about"}
+    assert canonicalizer.normalize("https://www.colorado.edu/news?page=2&b=1") == "https://www.colorado.edu/news?b=1&page=2"
+
+
+def test_learned_aliases_are_persisted_and_shared_by_fingerprints(tmp_path):
+    path = str(tmp_path / "aliases.db")
+    canonicalizer = URLCanonicalizer(aliases_path=path)
+    assert canonicalizer.learn("https://www.colorado.edu/old", "/new", "redirect")
+    # Cross-host canonicals are ignored
+    assert not canonicalizer.learn("https://www.colorado.edu/a", "https://example.com/a", "canonical")
+    canonicalizer.close()
+
+    reloaded = URLCanonicalizer(aliases_path=path)
+    assert reloaded.canonicalize("http://www.colorado.edu/old/") == "https://www.colorado.edu/new"
+    assert (reloaded.request_fingerprint(Request("https://www.colorado.edu/old?utm_source=x"))
+            == reloaded.request_fingerprint(Request("https://www.colorado.edu/new")))
+
+
+def test_alias_loops_keep_newest():
+    canonicalizer = URLCanonicalizer()
+    canonicalizer.learn("https://a.edu/x", "https://a.edu/y", "canonical")
+    canonicalizer.learn("https://a.edu/y", "https://a.edu/x", "redirect")
+    assert canonicalizer.canonicalize("https://a.edu/x") == canonicalizer.canonicalize("https://a.edu/y") == "https://a.edu/x"
@@ -0,0 +1,50 @@
+"""Tests for collection provisioning from the vector_store config."""
+import pytest
+from qdrant_client import QdrantClient, models
+
+from src.vectorstore import bulk_load, ensure_collection, ram_bytes_per_vector, search_params
+from src.vectorstore.collection import quantization_config
+
+VECTOR_STORE = {
+    "vector_size": 768,
+    "distance": "Cosine",
+    "on_disk": True,
+    "hnsw": {"m": 32, "ef_construct": 200},
+    "quantization": {"type": "scalar", "quantile": 0.99, "always_ram": True},
+}
+
+
+def test_quantized_config_creates_collection_and_cuts_ram():
+    client = QdrantClient(":memory:")
+    assert ensure_collection(client, "pages", VECTOR_STORE)
+    assert not ensure_collection(client, "pages", VECTOR_STORE)
+    assert client.get_collection("pages").config.params.vectors.size == 768
+
+    assert isinstance(quantization_config(VECTOR_STORE), models.ScalarQuantization)
+    assert isinstance(quantization_config({"quantization": {"type": "binary"}}), models.BinaryQuantization)
+    with pytest.raises(ValueError):
+        quantization_config({"quantization": {"type": "product"}})
+
+    float32 = ram_bytes_per_vector({"vector_size": 768, "hnsw": VECTOR_STORE["hnsw"]})
+    assert ram_bytes_per_vector(VECTOR_STORE) * 3 < float32
+    params = search_params({"hnsw_ef": 128, "rescore": True, "oversampling": 1.5})
+    assert params.hnsw_ef == 128 and params.quantization.oversampling == 1.5
+    assert search_params({}) is None
+
+
+def test_bulk_load_restores_indexing_when_ingest_fails():
+    client = QdrantClient(":memory:")
+    ensure_collection(client, "pages", VECTOR_STORE)
+    updates = []
+    update_collection = client.update_collection
+
+    def record_update(collection_name, **kwargs):
+        updates.append(kwargs.get("hnsw_config"))
+        return update_collection(collection_name, **kwargs)
+
+    client.update_collection = record_update
+    with pytest.raises(RuntimeError):
+        with bulk_load(client, "pages", VECTOR_STORE):
+            assert updates[-1].m == 0
+            raise RuntimeError("ingest failed")
+    assert updates[-1].m == 32 and updates[-1].ef_construct == 200
@@ -0,0 +1,65 @@
+"""
+Tests for token-budgeted context packing.
+"""
+from langchain_core.documents import Document
+
+from src.llm.context_builder import ContextBuilder, strip_overlap
+
+
+def count_words(text):
+    """Deterministic token counter for tests: one token per word."""
+    return len(text.split())
+
+
+def make_doc(text, url='https://www.colorado.edu/a', score=None):
+    metadata = {'url': url}
+    if score is not None:
+        metadata['_score'] = score
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_strip_overlap_removes_repeated_prefix():
+    """The splitter overlap at the start of the next chunk is dropped."""
+    previous = "First sentence here. The overlapping tail of the chunk."
+    text = "The overlapping tail of the chunk. New content follows."
+
+    assert strip_overlap(previous, text) == "New content follows."
+
+
+def test_overlap_between_chunks_of_same_page_is_sent_once():
+    """Overlapping chunks from the same URL do not repeat text in the context."""
+    builder = ContextBuilder(max_tokens=200, count_tokens=count_words)
+    docs = [
+        make_doc("Admissions open in fall. Apply online through the portal."),
+        make_doc("Apply online through the portal. Deadlines are in January."),
+    ]
+
+    context = builder.build(docs)
+
+    assert context.count("Apply online through the portal.") == 1
+    assert "Deadlines are in January." in context
+
+
+def test_budget_trims_at_sentence_boundary():
+    """A chunk that doesn't fit whole is cut after a complete sentence."""
+    builder = ContextBuilder(max_tokens=14, count_tokens=count_words, min_trimmed_tokens=1)
+    docs = [make_doc("One two three four. Five six seven eight. Nine ten eleven twelve.")]
+
+    context = builder.build(docs)
+
+    assert context.endswith("Five six seven eight.")
+    assert count_words(context) <= 14
+
+
+def test_sources_keep_retrieval_numbering_and_order():
+    """Packed parts stay in rank order with the original source numbers."""
+    builder = ContextBuilder(max_tokens=12, count_tokens=count_words, min_trimmed_tokens=100)
+    docs = [
+        make_doc("A long and only marginally relevant chunk of text here.", url='u1', score=0.1),
+        make_doc("Short relevant chunk.", url='u2', score=0.9),
+    ]
+
+    context = builder.build(docs)
+
+    assert context.startswith("[Source 2: u2]")
+    assert "u1" not in context
@@ -0,0 +1,57 @@
+"""Tests for the crawl metrics extension and the sampling profiler."""
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from src.crawlers.metrics import CrawlMetrics
+from src.utils.metrics import get_registry
+from src.utils.profiler import Profiler
+
+
+def test_extension_records_latency_counts_and_gauges(tmp_path):
+    get_registry("crawl").reset()
+    json_path = tmp_path / "crawl_metrics.jsonl"
+    crawler = get_crawler(settings_dict={"CRAWL_METRICS_JSON_PATH": str(json_path)})
+    extension = CrawlMetrics.from_crawler(crawler)
+
+    request = Request("https://www.colorado.edu/", meta={"download_latency": 0.25})
+    response = HtmlResponse(request.url, body=b"<html></html>", request=request)
+    extension.response_received(response, request, None)
+    extension.item_scraped({}, response, None)
+    extension.item_dropped({}, response, Exception("duplicate"), None)
+    # The scheduler and downloader the gauges read from a running engine
+    crawler.engine = SimpleNamespace(_slot=SimpleNamespace(scheduler=[request] * 3),
+                                     downloader=SimpleNamespace(active={request}))
+    extension.update()
+
+    snapshot = json.loads(json_path.read_text().splitlines()[-1])
+    assert snapshot["stages"]["download"]["count"] == 1
+    assert snapshot["counters"] == {"responses": 1, "items": 1, "items_dropped": 1}
+    assert snapshot["gauges"]["queue_depth"] == 3 and snapshot["gauges"]["requests_in_flight"] == 1
+    assert snapshot["gauges"]["items_per_second"] > 0
+
+
+def test_disabled_extension_is_not_configured():
+    crawler = get_crawler(settings_dict={"CRAWL_METRICS_ENABLED": False})
+    with pytest.raises(NotConfigured):
+        CrawlMetrics.from_crawler(crawler)
+
+
+def test_sampling_profiler_writes_collapsed_stacks(tmp_path):
+    output = tmp_path / "profile.folded"
+    profiler = Profiler("sample", str(output), interval=0.001)
+    profiler.start()
+    deadline = time.time() + 0.1
+    while time.time() < deadline:
+        sum(range(1000))
+    assert profiler.stop() == str(output)
+
+    lines = output.read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("test_sampling_profiler_writes_collapsed_stacks" in line for line in lines)
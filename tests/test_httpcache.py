@@ -0,0 +1,113 @@
+import gzip
+import os
+from pathlib import Path
+
+from scrapy import Request
+from scrapy.extensions.httpcache import FilesystemCacheStorage
+from scrapy.http import HtmlResponse, Response
+from scrapy.settings import Settings
+from scrapy.utils.test import get_crawler
+
+from src.crawlers.httpcache import SQLiteCacheStorage, iter_cached_responses
+from src.crawlers.university_crawler import UniversitySpider
+
+
+def _storage(tmp_path, **settings):
+    crawler = get_crawler(UniversitySpider, {"HTTPCACHE_DIR": str(tmp_path), "HTTPCACHE_EXPIRATION_SECS": 0, **settings})
+    spider = UniversitySpider(base_url="https://www.colorado.edu/")
+    spider.crawler = crawler
+    storage = SQLiteCacheStorage(Settings(crawler.settings))
+    storage.open_spider(spider)
+    return storage, spider
+
+
+def test_roundtrip_dedupes_identical_bodies(tmp_path):
+    storage, spider = _storage(tmp_path)
+    body = b"<html><body>" + b"Same page body. " * 500 + b"</body></html>"
+    for url in ("https://www.colorado.edu/a", "https://www.colorado.edu/a?utm_source=x"):
+        response = HtmlResponse(url, body=body, headers={"Content-Type": "text/html"})
+        storage.store_response(spider, Request(url), response)
+
+    cached = storage.retrieve_response(spider, Request("https://www.colorado.edu/a"))
+    assert isinstance(cached, HtmlResponse) and cached.body == body
+    assert storage.retrieve_response(spider, Request("https://www.colorado.edu/missing")) is None
+    stats = storage.size_stats()
+    assert stats["entries"] == 2 and stats["bodies"] == 1
+    assert stats["stored_bytes"] < stats["raw_bytes"] / 10
+    storage.close_spider(spider)
+
+    urls = [url for url, _ in iter_cached_responses(str(storage.db_path))]
+    assert urls == ["https://www.colorado.edu/a", "https://www.colorado.edu/a?utm_source=x"]
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    storage, spider = _storage(tmp_path)
+    storage.max_size = 2500
+    for i in range(3):
+        url = f"https://www.colorado.edu/{i}"
+        body = os.urandom(1000)  # incompressible
+        storage.store_response(spider, Request(url), HtmlResponse(url, body=body))
+    storage.retrieve_response(spider, Request("https://www.colorado.edu/0"))
+
+    evicted = storage.evict()
+    assert evicted["lru"] == 1
+    assert storage.retrieve_response(spider, Request("https://www.colorado.edu/0")) is not None
+    assert storage.retrieve_response(spider, Request("https://www.colorado.edu/1")) is None
+    storage.close()
+
+
+class _RacingConnection:
+    """Lets another process store the body right after the dedup lookup."""
+
+    def __init__(self, conn, race):
+        self.conn = conn
+        self.race = race
+
+    def execute(self, sql, *args):
+        cursor = self.conn.execute(sql, *args)
+        if sql.startswith('SELECT 1 FROM bodies') and self.race:
+            self.race.pop()()
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def test_concurrent_store_of_same_body(tmp_path):
+    first, spider = _storage(tmp_path)
+    second, _ = _storage(tmp_path)
+    url = "https://www.colorado.edu/a"
+    response = HtmlResponse(url, body=b"<html>same</html>")
+    first.conn = _RacingConnection(first.conn, [lambda: second.store_response(spider, Request(url), response)])
+
+    first.store_response(spider, Request(f"{url}?b"), response)
+    assert first.stats["deduplicated"] == 1 and second.stats["deduplicated"] == 0
+    assert second.size_stats()["bodies"] == 1 and second.size_stats()["entries"] == 2
+    first.close()
+    second.close()
+
+
+def test_filesystem_cache_is_imported_once(tmp_path):
+    crawler = get_crawler(UniversitySpider, {"HTTPCACHE_DIR": str(tmp_path), "HTTPCACHE_EXPIRATION_SECS": 0})
+    spider = UniversitySpider(base_url="https://www.colorado.edu/")
+    spider.crawler = crawler
+    legacy = FilesystemCacheStorage(Settings(crawler.settings))
+    legacy.open_spider(spider)
+    body = b"<html><head><title>Home</title></head><body><p>Welcome to campus.</p></body></html>"
+    # Cached before HttpCompressionMiddleware decodes it, like a real crawl
+    legacy.store_response(spider, Request("https://www.colorado.edu/"), Response(
+        "https://www.colorado.edu/", body=gzip.compress(body),
+        headers={"Content-Type": "text/html", "Content-Encoding": "gzip"}))
+    broken = Request("https://www.colorado.edu/broken")
+    legacy.store_response(spider, broken, Response(broken.url))
+    # A crawl killed mid-write leaves an entry without its body
+    Path(legacy._get_request_path(spider, broken), "response_body").unlink()
+
+    storage, _ = _storage(tmp_path)
+    cached = storage.retrieve_response(spider, Request("https://www.colorado.edu/"))
+    assert cached.headers["Content-Encoding"] == b"gzip" and gzip.decompress(cached.body) == body
+    assert storage.size_stats()["entries"] == 1
+    storage.close_spider(spider)
+
+    [(url, response)] = list(iter_cached_responses(str(storage.db_path)))
+    assert isinstance(response, HtmlResponse) and response.css("title::text").get() == "Home"
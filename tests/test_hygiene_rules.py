@@ -0,0 +1,91 @@
+"""Tests for the shared hygiene rules and single-pass engine."""
+from src.cleanup import HygieneEngine, Record, build_rules
+
+CLEAN = "The university offers many programs for undergraduate and graduate students on campus."
+
+
+def test_binary_extension_rule_checks_query_and_fragment():
+    rule = build_rules(["binary_extension"])[0]
+    assert rule.check(Record(url="https://www.colorado.edu/files/guide.pdf", text=""))
+    assert rule.check(Record(url="https://www.colorado.edu/files/guide.PDF?download=1", text=""))
+    assert rule.check(Record(url="https://www.colorado.edu/page", text="")) is None
+
+
+def test_text_rules():
+    replacement, garbled = build_rules(["replacement_chars", "garbled"])
+    assert replacement.check(Record(url="", text="�" * 10 + CLEAN))
+    assert replacement.check(Record(url="", text=CLEAN)) is None
+    assert garbled.check(Record(url="", text="too short"))
+    assert garbled.check(Record(url="", text="ü" * 100))
+    assert garbled.check(Record(url="", text=CLEAN)) is None
+
+
+def test_engine_counts_every_rule_in_one_pass():
+    engine = HygieneEngine.from_names(["binary_extension", "garbled", "near_duplicate", "orphaned"])
+    records = [
+        Record(url="https://a/x.pdf", text="short", id=1),
+        Record(url="https://a/1", text=CLEAN, id=2),
+        Record(url="https://a/2", text=CLEAN.upper(), id=3),
+        Record(url="", text=CLEAN + " Extra sentence.", id=4),
+    ]
+    reasons = [engine.evaluate(record) for record in records]
+
+    assert reasons[0].startswith("binary_extension")
+    assert reasons[1] is None
+    assert reasons[2].startswith("near_duplicate")
+    assert reasons[3].startswith("orphaned")
+    assert engine.counts == {"binary_extension": 1, "garbled": 1, "near_duplicate": 1, "orphaned": 1}
+    assert engine.matched == 3
+
+
+def test_server_side_counts_match_scan():
+    import uuid
+    from qdrant_client import QdrantClient, models
+    from src.cleanup import ensure_quality_indexes, quality_fields
+
+    client = QdrantClient(":memory:")
+    client.create_collection("pages", vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+    ensure_quality_indexes(client, "pages")
+    docs = [("https://a/1", CLEAN), ("https://a/x.pdf", CLEAN), ("https://a/2", "�" * 10 + CLEAN), ("https://a/3", "short")]
+    client.upsert("pages", [
+        models.PointStruct(id=str(uuid.uuid4()), vector=[1.0, 0.0],
+                           payload={"page_content": text, "metadata": {"url": url, **quality_fields(url, text)}})
+        for url, text in docs
+    ])
+
+    names = ["binary_extension", "replacement_chars", "garbled"]
+    result = HygieneEngine.from_names(names).server_side(client, "pages")
+    scan = HygieneEngine.from_names(names)
+    for url, text in docs:
+        scan.evaluate(Record(url=url, text=text))
+    assert {name: info["count"] for name, info in result["rules"].items()} == scan.counts
+    assert result["unindexed"] == 0
+
+
+def test_nav_heavy_page_survives_crawl_cleaning():
+    from src.pipeline import DataCleaningPipeline
+
+    nav = "Home A-Z Map Go CU Apply " + " ".join(f"Rm {i} · Ph 303 · Ext {i} Office of the Registrar" for i in range(12))
+    html = f"<html><body><nav>{nav}</nav><p>Office hours are 9 to 5 on M W F in Rm 101.</p></body></html>"
+    pipeline = DataCleaningPipeline()
+    item = pipeline.process_item({"url": "https://www.colorado.edu/registrar/contact", "text": html}, None)
+    assert item["text"].startswith("Home A-Z Map")
+    # The offline cleanup still flags it with the short-word heuristic
+    assert build_rules(["pdf_markers"])[0].check(Record(url="", text=item["text"]))
+    assert pipeline.is_valid_text(CLEAN) and not pipeline.is_valid_text(CLEAN, min_length=200)
+
+
+def test_text_validation_pipeline_cleans_before_checking():
+    import logging
+    from types import SimpleNamespace
+
+    import pytest
+    from scrapy.exceptions import DropItem
+    from prevent_corrupted_data import TextValidationPipeline
+
+    spider = SimpleNamespace(logger=logging.getLogger("test"))
+    pipeline = TextValidationPipeline()
+    item = pipeline.process_item({"url": "https://a/1", "text": CLEAN + " \x00�"}, spider)
+    assert item["text"] == CLEAN
+    with pytest.raises(DropItem):
+        pipeline.process_item({"url": "https://a/2", "text": "�" * 80}, spider)
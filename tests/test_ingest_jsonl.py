@@ -0,0 +1,58 @@
+"""Tests for the offline JSONL ingest."""
+import json
+
+import pytest
+from qdrant_client import QdrantClient
+
+from benchmarks.fixtures import HashEmbeddings
+from src.embedding import HuggingFaceEmbedder
+from src.ingest import JsonlIngester, ingest_files, iter_range, prepare_collection, shard_ranges
+
+TEXT = "The university offers many programs for undergraduate and graduate students on campus. " * 20
+
+
+def _write_dump(path, pages):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(pages):
+            f.write(json.dumps({"url": f"https://www.colorado.edu/page{i}", "title": f"Page {i}", "text": TEXT}) + "\n")
+
+
+def test_shards_cover_every_line_once(tmp_path, monkeypatch):
+    import src.ingest.jsonl as jsonl
+    monkeypatch.setattr(jsonl, "MIN_SHARD_BYTES", 100)
+    path = tmp_path / "pages.jsonl"
+    _write_dump(path, 25)
+    shards = shard_ranges([str(path)], 4)
+    assert len(shards) == 4
+    lines = [line for shard in shards for _, line in iter_range(shard["path"], shard["start"], shard["end"])]
+    assert len(lines) == 25 and len(set(lines)) == 25
+
+
+def test_ingest_resumes_from_checkpoint(tmp_path):
+    path, checkpoint = tmp_path / "pages.jsonl", tmp_path / "ingest.checkpoint.json"
+    _write_dump(path, 30)
+    client = QdrantClient(":memory:")
+    prepare_collection(client, "pages", vector_size=32)
+    ingester = JsonlIngester(client, "pages", HuggingFaceEmbedder(embeddings=HashEmbeddings(size=32)),
+                             clean=False, batch_pages=5)
+
+    write_batch, calls = ingester.write_batch, []
+
+    def failing_write_batch(items):
+        calls.append(len(items))
+        if len(calls) == 3:
+            raise RuntimeError("interrupted")
+        return write_batch(items)
+
+    ingester.write_batch = failing_write_batch
+    with pytest.raises(RuntimeError):
+        ingest_files([str(path)], {}, checkpoint_path=str(checkpoint), factory=lambda options: ingester)
+    shard = json.loads(checkpoint.read_text())["shards"][0]
+    assert shard["pages"] == 10 and 0 < shard["offset"] < shard["end"]
+
+    ingester.write_batch = write_batch
+    stats = ingest_files([str(path)], {}, checkpoint_path=str(checkpoint), factory=lambda options: ingester)
+    assert stats["pages"] == 30
+    assert not checkpoint.exists()
+    points, _ = client.scroll("pages", limit=1000, with_payload=True)
+    assert len({point.payload["metadata"]["url"] for point in points}) == 30
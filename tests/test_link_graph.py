@@ -0,0 +1,69 @@
+import numpy as np
+from qdrant_client import QdrantClient
+
+from src.filters.canonicalize import URLCanonicalizer
+from src.graph import LinkGraph, publish_authority, publish_saved_authority, resolve_links
+from src.vectorstore import write_pages
+
+HOME = "https://www.colorado.edu"
+
+
+def test_incremental_pagerank_and_persistence(tmp_path):
+    graph = LinkGraph()
+    graph.set_links(f"{HOME}/a", [f"{HOME}/hub", f"{HOME}/b"])
+    graph.set_links(f"{HOME}/b", [f"{HOME}/hub", f"{HOME}/b"])
+    graph.set_links(f"{HOME}/hub", [f"{HOME}/a"])
+    scores = graph.pagerank()
+    assert abs(scores.sum() - 1) < 1e-4
+    assert scores[graph.ids[f"{HOME}/hub"]] == scores.max()
+
+    path = str(tmp_path / "graph.npz")
+    graph.save(path)
+    loaded = LinkGraph.load(path)
+    # Re-crawling a page replaces its row
+    loaded.set_links(f"{HOME}/a", [f"{HOME}/b"])
+    assert loaded.links(f"{HOME}/a") == [f"{HOME}/b"]
+    assert loaded.links(f"{HOME}/b") == [f"{HOME}/hub"]
+    assert loaded.stats() == {"nodes": 3, "crawled": 3, "edges": 3}
+    # Now a cycle a -> b -> hub -> a, so every page has the same rank
+    assert np.allclose(loaded.pagerank(), 1 / 3, atol=1e-4)
+
+
+def test_resolve_links_and_publish():
+    canonicalizer = URLCanonicalizer()
+    targets = resolve_links(f"{HOME}/a/", ["b?utm_source=x", "/b#top", "mailto:x@y", "https://other.org/"],
+                            canonicalizer, allowed_domains=["www.colorado.edu"])
+    assert targets == [f"{HOME}/a/b", f"{HOME}/b"]
+
+    client = QdrantClient(":memory:")
+    client.create_collection("pages", vectors_config={"size": 2, "distance": "Cosine"})
+    write_pages(client, "pages", [(f"{HOME}/hub", "Hub", ["x", "y"], np.ones((2, 2), dtype=np.float32))])
+    graph = LinkGraph()
+    graph.set_links(f"{HOME}/a", [f"{HOME}/hub"])
+    graph.set_links(f"{HOME}/hub", [])
+    graph.pagerank()
+    assert publish_authority(client, "pages", graph) == 2
+    points, _ = client.scroll("pages", with_payload=True)
+    assert all(p.payload["metadata"]["authority"] == 1.0 and p.payload["metadata"]["in_degree"] == 1 for p in points)
+    # Unchanged scores are not written again
+    assert publish_authority(client, "pages", graph) == 0
+
+
+def test_publish_saved_authority_after_rewrite(tmp_path):
+    client = QdrantClient(":memory:")
+    client.create_collection("pages", vectors_config={"size": 2, "distance": "Cosine"})
+    path = str(tmp_path / "graph.npz")
+    assert publish_saved_authority(client, "pages", path) == 0
+
+    graph = LinkGraph()
+    graph.set_links(f"{HOME}/a", [f"{HOME}/hub"])
+    graph.set_links(f"{HOME}/hub", [])
+    graph.pagerank()
+    graph.save(path)
+    # Written outside a crawl (ingest, replay, a new version): no authority yet
+    write_pages(client, "pages", [(f"{HOME}/hub", "Hub", ["x"], np.ones((1, 2), dtype=np.float32))])
+    assert publish_saved_authority(client, "pages", path) == 1
+    points, _ = client.scroll("pages", with_payload=True)
+    assert points[0].payload["metadata"]["authority"] == 1.0
+    assert points[0].payload["metadata"]["in_degree"] == 1
+    assert publish_saved_authority(client, "pages", path) == 0
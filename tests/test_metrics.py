@@ -0,0 +1,81 @@
+"""Tests for the latency metrics registry and its Prometheus export."""
+import threading
+
+from src.utils import metrics
+from src.utils.metrics import MetricsRegistry, RollingHistogram, collect_timings, get_registry, record, timed
+
+
+def test_window_quantiles_and_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(metrics.time, "time", lambda: now[0])
+    histogram = RollingHistogram(buckets=(0.1, 1.0), window_seconds=60)
+    for value in (0.05, 0.2, 0.3, 0.4, 2.0):
+        histogram.observe(value)
+
+    assert histogram.bucket_counts == [1, 3, 1]
+    assert histogram.quantiles((0.5, 0.99)) == {0.5: 0.3, 0.99: 2.0}
+
+    now[0] += 30
+    histogram.observe(5.0)
+    now[0] += 45
+    # The first five samples left the window; the all-time counts keep them
+    assert histogram.window() == [5.0]
+    assert histogram.count == 6 and histogram.quantiles((0.5,)) == {0.5: 5.0}
+    now[0] += 60
+    assert histogram.quantiles() == {}
+
+
+def test_collect_timings_is_isolated_per_request():
+    registry = MetricsRegistry("test")
+    results = {}
+    barrier = threading.Barrier(2)
+
+    def request(name, seconds):
+        with collect_timings() as timings:
+            record("llm", seconds, registry)
+            barrier.wait()
+            with timed("mmr", registry):
+                pass
+            record("llm", seconds, registry)
+        results[name] = timings
+
+    threads = [threading.Thread(target=request, args=(name, seconds)) for name, seconds in (("a", 1.0), ("b", 2.0))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results["a"]["llm"] == 2.0 and results["b"]["llm"] == 4.0
+    assert set(results["a"]) == set(results["b"]) == {"llm", "mmr"}
+    assert registry.histograms["llm"].count == 4 and registry.histograms["mmr"].count == 2
+    # Outside collect_timings only the registry records
+    record("llm", 1.0, registry)
+    assert registry.histograms["llm"].count == 5
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry("test")
+    registry.histograms["vector_search"] = RollingHistogram(buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.5):
+        registry.observe("vector_search", seconds)
+    registry.increment("requests", 3)
+    registry.set_gauge("collection_points", 42)
+
+    lines = registry.render_prometheus().splitlines()
+    assert "# TYPE test_stage_duration_seconds histogram" in lines
+    assert 'test_stage_duration_seconds_bucket{stage="vector_search",le="0.01"} 1' in lines
+    assert 'test_stage_duration_seconds_bucket{stage="vector_search",le="0.1"} 2' in lines
+    assert 'test_stage_duration_seconds_bucket{stage="vector_search",le="+Inf"} 3' in lines
+    assert 'test_stage_duration_seconds_count{stage="vector_search"} 3' in lines
+    assert 'test_stage_duration_window_seconds{stage="vector_search",quantile="0.5"} 0.05' in lines
+    assert "test_requests_total 3" in lines and "test_collection_points 42" in lines
+
+
+def test_metrics_endpoint_serves_the_rag_registry():
+    from web_app import app
+
+    get_registry().increment("test_endpoint_hits")
+    response = app.test_client().get('/api/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert "rag_test_endpoint_hits_total 1" in response.get_data(as_text=True)
@@ -0,0 +1,59 @@
+"""
+Tests for the NumPy MMR selection used by QdrantMMRRetriever.
+"""
+from src.llm.retrieval import maximal_marginal_relevance
+
+
+def test_first_pick_is_most_relevant():
+    """The first selected candidate is the one closest to the query."""
+    query = [1.0, 0.0]
+    candidates = [[0.0, 1.0], [1.0, 0.0], [0.7, 0.7]]
+
+    selected = maximal_marginal_relevance(query, candidates, k=1)
+
+    assert selected == [1]
+
+
+def test_diversity_skips_near_duplicates():
+    """With a low lambda a near-duplicate loses to a different candidate."""
+    query = [1.0, 0.2]
+    candidates = [[1.0, 0.2], [1.0, 0.21], [0.5, 1.0]]
+
+    selected = maximal_marginal_relevance(query, candidates, k=2, lambda_mult=0.3)
+
+    assert selected == [0, 2]
+
+
+def test_max_per_group_limits_chunks_per_url():
+    """No URL contributes more than max_per_group chunks."""
+    query = [1.0, 0.0, 0.0]
+    candidates = [
+        [1.0, 0.0, 0.0],
+        [0.9, 0.1, 0.0],
+        [0.8, 0.2, 0.0],
+        [0.1, 0.9, 0.0],
+        [0.1, 0.0, 0.9],
+    ]
+    urls = ['a', 'a', 'a', 'b', 'c']
+
+    selected = maximal_marginal_relevance(
+        query, candidates, k=4, lambda_mult=1.0, groups=urls, max_per_group=2
+    )
+
+    assert [urls[i] for i in selected].count('a') == 2
+    assert len(selected) == 4
+
+
+def test_empty_candidates():
+    """No candidates means no selection."""
+    assert maximal_marginal_relevance([1.0, 0.0], [], k=5) == []
+
+
+def test_prior_breaks_ties_between_similar_candidates():
+    """An authority prior lifts a well-linked page above an equally similar one."""
+    query = [1.0, 0.0]
+    candidates = [[1.0, 0.05], [1.0, 0.04]]
+
+    assert maximal_marginal_relevance(query, candidates, k=1)[0] == 1
+    selected = maximal_marginal_relevance(query, candidates, k=1, prior=[0.9, 0.1], prior_weight=0.2)
+    assert selected == [0]
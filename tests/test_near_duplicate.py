@@ -0,0 +1,50 @@
+"""Tests for SimHash near-duplicate detection."""
+import random
+
+import pytest
+from scrapy.exceptions import DropItem
+
+from src.filters.near_duplicate import NearDuplicatePipeline, hamming_distance, simhash
+
+WORDS = "campus student research program faculty library housing tuition admissions course advising career".split()
+
+
+def _page(seed, words=400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def test_simhash_is_close_for_small_edits():
+    base = _page(1)
+    assert hamming_distance(simhash(base), simhash(base + " Print this page.")) <= 3
+    assert hamming_distance(simhash(base), simhash(_page(2))) > 3
+
+
+def test_pipeline_drops_near_duplicates_but_not_recrawls(tmp_path):
+    pipeline = NearDuplicatePipeline(db_path=str(tmp_path / "nd.db"))
+    base = _page(1)
+    pipeline.process_item({"url": "https://a/news", "text": base}, None)
+    # Same URL crawled again is an update, not a duplicate
+    pipeline.process_item({"url": "https://a/news", "text": base}, None)
+    pipeline.process_item({"url": "https://a/other", "text": _page(2)}, None)
+    with pytest.raises(DropItem):
+        pipeline.process_item({"url": "https://a/news?print=1", "text": base + " Print this page."}, None)
+    assert pipeline.dropped == 1
+    assert pipeline.index.canonical_for("https://a/news?print=1") == "https://a/news"
+
+
+def test_pages_sharing_a_template_are_kept(tmp_path):
+    pipeline = NearDuplicatePipeline(db_path=str(tmp_path / "nd.db"))
+    # Menus and footer dominate the text; the content differs in about 30 words
+    template = _page(3, words=3000)
+    jobs = ("Get the support you need to design your career path, find the right career for your goals "
+            "and explore job and internship opportunities on campus and beyond")
+    safety = ("CU Boulder is committed to protecting the safety of our community, with resources for "
+              "inclement weather, reporting concerns and acting as a bystander")
+    first, second = f"{template} {safety}", f"{template} {jobs}"
+    assert hamming_distance(simhash(first), simhash(second)) <= 3
+
+    pipeline.process_item({"url": "https://a/safety", "text": first}, None)
+    pipeline.process_item({"url": "https://a/jobs", "text": second}, None)
+    assert pipeline.dropped == 0 and pipeline.rejected == 1
+    assert len(pipeline.index) == 2
@@ -0,0 +1,72 @@
+"""
+Tests for the pooled Ollama client against a mocked requests.Session.
+"""
+import threading
+import time
+from unittest import mock
+
+from src.llm.ollama_client import OllamaClient
+
+
+def _response(data, status_code=200):
+    response = mock.Mock(status_code=status_code, text="")
+    response.json.return_value = data
+    return response
+
+
+def test_warm_up_and_generate_send_keep_alive_and_report_timings():
+    client = OllamaClient(model="llama3.2", base_url="http://ollama:11434/", keep_alive="30m", num_ctx=4096)
+    client.session = mock.Mock()
+    client.session.post.side_effect = [
+        _response({"load_duration": 2_500_000_000}),
+        _response({
+            "response": "Go Buffs",
+            "load_duration": 0,
+            "prompt_eval_duration": 200_000_000,
+            "prompt_eval_count": 120,
+            "eval_duration": 500_000_000,
+            "eval_count": 50,
+            "total_duration": 800_000_000,
+        }),
+    ]
+
+    assert client.warm_up() == 2.5
+    result = client.generate("Who are the Buffs?")
+
+    (warm_url,), warm_kwargs = client.session.post.call_args_list[0]
+    assert warm_url == "http://ollama:11434/api/generate"
+    assert warm_kwargs["json"]["prompt"] == "" and warm_kwargs["json"]["keep_alive"] == "30m"
+    payload = client.session.post.call_args_list[1].kwargs["json"]
+    assert payload["keep_alive"] == "30m" and payload["stream"] is False
+    assert payload["options"] == {"temperature": 0.1, "num_predict": 2048, "num_ctx": 4096}
+
+    timings = result["timings"]
+    assert result["response"] == "Go Buffs"
+    assert timings["prefill_time"] == 0.2 and timings["decode_time"] == 0.5
+    assert timings["prompt_tokens"] == 120 and timings["tokens_per_second"] == 100.0
+
+
+def test_generate_limits_concurrency():
+    client = OllamaClient(max_concurrency=2)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def post(url, json, timeout):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return _response({"response": "ok"})
+
+    client.session = mock.Mock()
+    client.session.post.side_effect = post
+    threads = [threading.Thread(target=client.generate, args=("q",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.session.post.call_count == 6
+    assert peak[0] == 2
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from itemadapter import ItemAdapter
+from qdrant_client import QdrantClient
+
+from src.crawlers.items import PageItem
+from src.vectorstore import write_pages
+from src.vectorstore.sidecar import VectorSidecarWriter, iter_sidecar
+
+
+def test_page_item_dict_access_and_adapter():
+    item = PageItem(url="https://www.colorado.edu/a", title="A", text="hello", links=["/b"])
+    item['vectors'] = np.ones((2, 4), dtype=np.float32)
+    assert item['url'] == "https://www.colorado.edu/a"
+    assert item.get('missing', 'x') == 'x'
+    with pytest.raises(KeyError):
+        item['embeddings'] = []
+    assert not hasattr(item, '__dict__')
+    assert ItemAdapter(item)['title'] == "A"
+
+
+def test_write_pages_and_sidecar_roundtrip(tmp_path):
+    client = QdrantClient(":memory:")
+    client.create_collection("pages", vectors_config={"size": 4, "distance": "Cosine"})
+    vectors = np.random.default_rng(0).random((3, 4), dtype=np.float32)
+    url = "https://www.colorado.edu/a"
+
+    assert write_pages(client, "pages", [(url, "A", ["one", "two", "three"], vectors)]) == 3
+    # Rewriting the page with fewer chunks leaves nothing stale
+    assert write_pages(client, "pages", [(url, "A", ["one"], vectors[:1])]) == 1
+    assert client.count("pages", exact=True).count == 1
+
+    writer = VectorSidecarWriter(str(tmp_path), name="test")
+    writer.write(url, vectors, ["one", "two", "three"])
+    writer.write("https://www.colorado.edu/b", vectors[:2])
+    writer.close()
+    records = list(iter_sidecar(str(writer.index_path)))
+    assert [r["url"] for r, _ in records] == [url, "https://www.colorado.edu/b"]
+    np.testing.assert_array_equal(records[0][1], vectors)
+    np.testing.assert_array_equal(records[1][1], vectors[:2])
@@ -0,0 +1,45 @@
+"""Tests for site partition fields, filtered search and site routing."""
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from benchmarks.fixtures import HashEmbeddings
+from src.llm.retrieval import QdrantMMRRetriever
+from src.vectorstore import SiteRouter, build_filter, ensure_collection, site_fields, write_pages
+
+
+def test_site_fields_and_filters():
+    fields = site_fields("https://Engineering.Colorado.edu/Admissions/apply")
+    assert (fields["site"], fields["subdomain"], fields["section"]) == ("colorado.edu", "engineering", "admissions")
+    assert site_fields("https://cubuffs.com/index.html")["section"] == ""
+    assert fields["crawl_date"].endswith("Z")
+
+    query_filter = build_filter({"site": "cubuffs.com", "section": ["football", "tickets"], "crawled_after": "2025-01-01"})
+    assert [condition.key for condition in query_filter.must] == [
+        "metadata.site", "metadata.section", "metadata.crawl_date"]
+    assert build_filter({"site": "", "section": []}) is None
+    with pytest.raises(ValueError):
+        build_filter({"sport": "football"})
+
+
+def test_filtered_and_routed_search_stay_in_one_site():
+    embeddings = HashEmbeddings(size=64)
+    pages = [(f"https://www.colorado.edu/admissions/page{i}", "Admissions",
+              [f"Undergraduate admissions tuition scholarships deadline application {i}"]) for i in range(12)]
+    pages += [(f"https://cubuffs.com/football/game{i}", "Football",
+               [f"Buffaloes football game tickets kickoff stadium schedule {i}"]) for i in range(12)]
+    client = QdrantClient(":memory:")
+    ensure_collection(client, "pages", {"vector_size": 64})
+    write_pages(client, "pages", [(url, title, texts, np.asarray(embeddings.embed_documents(texts), dtype=np.float32))
+                                  for url, title, texts in pages])
+
+    router = SiteRouter.fit(client, "pages")
+    assert sorted(router.sites) == ["colorado.edu", "cubuffs.com"]
+    retriever = QdrantMMRRetriever(client=client, collection_name="pages", embeddings=embeddings, k=4, fetch_k=20,
+                                   router=router)
+
+    docs = retriever.invoke("admissions deadline", filter=build_filter({"site": "cubuffs.com"}))
+    assert docs and all(doc.metadata["site"] == "cubuffs.com" for doc in docs)
+    docs = retriever.invoke("football game tickets schedule")
+    assert all(doc.metadata.get("_routed_site") == "cubuffs.com" == doc.metadata["site"] for doc in docs)
+    assert not any("_routed_site" in doc.metadata for doc in retriever.invoke("football game tickets", route=False))
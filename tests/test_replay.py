@@ -0,0 +1,63 @@
+"""Tests for replaying the HTTP cache into the vector store."""
+from qdrant_client import QdrantClient
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.settings import Settings
+from scrapy.utils.test import get_crawler
+
+from benchmarks.fixtures import HashEmbeddings
+from src.crawlers.httpcache import SQLiteCacheStorage
+from src.crawlers.university_crawler import UniversitySpider
+from src.embedding import HuggingFaceEmbedder
+from src.ingest import ReplayIngester, ingest_files, prepare_collection
+
+
+def _page(i, edited=False):
+    paragraphs = [f"<p>Section {n} of page {i} describes programs, advising and campus resources for students "
+                  f"in department {i}, with details on courses, deadlines and contacts number {n}.</p>" * 3
+                  for n in range(6)]
+    if edited:
+        paragraphs[-1] = f"<p>Updated admissions deadlines for department {i} are posted for the spring term.</p>" * 3
+    return ("<html><head><title>Page %d</title></head><body>%s</body></html>" % (i, "".join(paragraphs))).encode()
+
+
+def _fill_cache(tmp_path, pages, edited=()):
+    crawler = get_crawler(UniversitySpider, {"HTTPCACHE_DIR": str(tmp_path), "HTTPCACHE_EXPIRATION_SECS": 0})
+    spider = UniversitySpider(base_url="https://www.colorado.edu/")
+    spider.crawler = crawler
+    storage = SQLiteCacheStorage(Settings(crawler.settings))
+    storage.open_spider(spider)
+    for i in range(pages):
+        url = f"https://www.colorado.edu/page{i}"
+        response = HtmlResponse(url, body=_page(i, i in edited), headers={"Content-Type": "text/html"})
+        storage.store_response(spider, Request(url), response)
+    redirect = HtmlResponse("https://www.colorado.edu/old", status=301,
+                            headers={"Location": "https://www.colorado.edu/page0"})
+    storage.store_response(spider, Request("https://www.colorado.edu/old"), redirect)
+    storage.close_spider(spider)
+    return str(storage.db_path)
+
+
+def test_replay_only_reembeds_changed_chunks(tmp_path):
+    client = QdrantClient(":memory:")
+    prepare_collection(client, "pages", vector_size=32)
+    embeddings = HashEmbeddings(size=32)
+    ingester = ReplayIngester(client, "pages", HuggingFaceEmbedder(embeddings=embeddings, chunk_size=400, chunk_overlap=0),
+                              UniversitySpider(base_url="https://www.colorado.edu/"), batch_pages=4)
+
+    def replay(db_path):
+        return ingest_files([db_path], {}, checkpoint_path=None, factory=lambda options: ingester)
+
+    stats = replay(_fill_cache(tmp_path / "first", 10))
+    assert stats["pages"] == 10 and stats["pages_new"] == 10 and stats["dropped"] == 1
+    points, _ = client.scroll("pages", limit=1000)
+    assert len(points) == stats["chunks"] == stats["chunks_embedded"] > 10
+
+    stats = replay(_fill_cache(tmp_path / "second", 10, edited={3}))
+    assert (stats["pages_unchanged"], stats["pages_changed"], stats["pages_new"]) == (9, 1, 0)
+    assert 0 < stats["chunks_embedded"] < stats["chunks_reused"]
+    assert stats["chunks"] == stats["chunks_embedded"] + stats["chunks_reused"]
+    points, _ = client.scroll("pages", limit=1000, with_payload=True)
+    edited = [point for point in points if point.payload["metadata"]["url"] == "https://www.colorado.edu/page3"]
+    assert len(edited) == stats["chunks"]
+    assert any("Updated admissions" in point.payload["page_content"] for point in edited)
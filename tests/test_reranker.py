@@ -0,0 +1,57 @@
+"""
+Tests for the cross-encoder rerank stage, with a stub scoring model.
+"""
+import threading
+
+from langchain_core.documents import Document
+
+from src.llm.reranker import CrossEncoderReranker
+
+
+class StubModel:
+    """Scores a chunk by how often the query's words occur in it."""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.calls = []
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        self.calls.append(len(pairs))
+        if self.gate is not None:
+            self.gate.wait()
+        return [sum(text.lower().count(word) for word in query.lower().split()) for query, text in pairs]
+
+
+def _docs():
+    texts = ["Parking permits and maps.", "Housing deadlines for housing applications.", "Housing costs."]
+    return [Document(page_content=text, metadata={"_id": i}) for i, text in enumerate(texts)]
+
+
+def test_rerank_orders_by_score_keeps_top_n_and_caches():
+    model = StubModel()
+    reranker = CrossEncoderReranker(top_n=2, model=model)
+
+    reranked = reranker.rerank("housing", _docs())
+    assert [doc.metadata["_id"] for doc in reranked] == [1, 2]
+    assert reranked[0].metadata["_rerank_score"] == 2
+
+    reranker.rerank("housing", _docs())
+    assert model.calls == [3]
+    assert reranker.stats["cache_hits"] == 3
+
+
+def test_budget_fallback_keeps_incoming_order_without_queueing():
+    gate = threading.Event()
+    model = StubModel(gate)
+    reranker = CrossEncoderReranker(top_n=2, budget_ms=20, model=model)
+
+    # The first pass overruns; the second request doesn't queue behind it
+    assert [doc.metadata["_id"] for doc in reranker.rerank("housing", _docs())] == [0, 1]
+    assert [doc.metadata["_id"] for doc in reranker.rerank("parking", _docs())] == [0, 1]
+    assert reranker.stats["budget_exceeded"] == 2
+    assert model.calls == [3]
+
+    # The overrunning pass still fills the cache once it finishes
+    gate.set()
+    reranker._inflight.result()
+    assert [doc.metadata["_id"] for doc in reranker.rerank("housing", _docs())] == [1, 2]
@@ -0,0 +1,74 @@
+import pickle
+
+from qdrant_client import QdrantClient
+from scrapy import Request
+
+from queuelib import queue
+from scrapy.squeues import PickleFifoDiskQueue, PickleLifoDiskQueue
+from scrapy.utils.test import get_crawler
+
+from src.crawlers.squeues import (CompressedPickleFifoDiskQueue, CompressedPickleLifoDiskQueue,
+                                  _compressed_deserialize, _compressed_serialize)
+from src.crawlers.university_crawler import UniversitySpider
+from src.filters.qdrant_dupefilter import QdrantDupeFilter
+
+
+def test_compressed_disk_queue_roundtrip(tmp_path):
+    record = Request("https://www.colorado.edu/academics", meta={"depth": 3}).to_dict()
+    assert len(_compressed_serialize(record)) < len(pickle.dumps(record, protocol=4)) / 2
+
+    # Built on Scrapy's public disk queues and the queuelib queues under them
+    assert issubclass(CompressedPickleFifoDiskQueue, PickleFifoDiskQueue)
+    assert issubclass(CompressedPickleFifoDiskQueue, queue.FifoDiskQueue)
+    assert issubclass(CompressedPickleLifoDiskQueue, PickleLifoDiskQueue)
+    assert issubclass(CompressedPickleLifoDiskQueue, queue.LifoDiskQueue)
+
+    crawler = get_crawler(UniversitySpider)
+    crawler.spider = spider = UniversitySpider(base_url="https://www.colorado.edu/")
+    path = str(tmp_path / "q")
+    q = CompressedPickleFifoDiskQueue.from_crawler(crawler, path)
+    q.push(Request("https://www.colorado.edu/academics", callback=spider.parse, meta={"depth": 3}))
+    q.push(Request("https://www.colorado.edu/admissions", callback=spider.parse))
+    assert q.peek().url == "https://www.colorado.edu/academics"
+    q.close()
+
+    # Records on disk are compressed
+    raw = queue.FifoDiskQueue(path)
+    data = raw.peek()
+    raw.close()
+    assert data[0] == 1 and _compressed_deserialize(data)["url"] == "https://www.colorado.edu/academics"
+
+    q = CompressedPickleFifoDiskQueue.from_crawler(crawler, path)
+    request = q.pop()
+    assert request.url == "https://www.colorado.edu/academics" and request.meta == {"depth": 3}
+    assert request.callback == spider.parse
+    assert q.pop().url == "https://www.colorado.edu/admissions" and q.pop() is None
+    q.close()
+
+
+def test_qdrant_dupefilter_session_survives_restart(tmp_path):
+    client = QdrantClient(":memory:")
+    client.create_collection("pages", vectors_config={"size": 2, "distance": "Cosine"})
+    path = str(tmp_path / "job" / "qdrant_dupefilter.seen")
+    request = Request("https://www.colorado.edu/queued")
+
+    first = QdrantDupeFilter(client=client, collection_name="pages", path=path)
+    assert not first.request_seen(request)
+    first.close("shutdown")
+
+    resumed = QdrantDupeFilter(client=client, collection_name="pages", path=path)
+    assert resumed.request_seen(request)
+
+
+def test_qdrant_dupefilter_seen_file_survives_a_kill(tmp_path):
+    client = QdrantClient(":memory:")
+    client.create_collection("pages", vectors_config={"size": 2, "distance": "Cosine"})
+    path = str(tmp_path / "job" / "qdrant_dupefilter.seen")
+    request = Request("https://www.colorado.edu/queued")
+
+    first = QdrantDupeFilter(client=client, collection_name="pages", path=path)
+    assert not first.request_seen(request)
+    # No close(): the process was killed while paused
+    resumed = QdrantDupeFilter(client=client, collection_name="pages", path=path)
+    assert resumed.request_seen(request)
+    first.close("shutdown")
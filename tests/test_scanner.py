@@ -0,0 +1,99 @@
+"""Tests for the parallel cleanup scanner."""
+import threading
+
+import pytest
+from qdrant_client import QdrantClient, models
+
+from src.cleanup.scanner import CollectionScanner, read_matches
+
+
+def _client(points=400):
+    client = QdrantClient(":memory:")
+    client.create_collection("pages", vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+    client.upsert("pages", [models.PointStruct(id=i, vector=[1.0, 0.5], payload={"page_content": f"chunk {i}"})
+                            for i in range(points)])
+    return client
+
+
+def _even(point):
+    return "even" if point.id % 2 == 0 else None
+
+
+def test_failing_deletes_fail_the_scan_instead_of_hanging(tmp_path, monkeypatch):
+    client = _client()
+    monkeypatch.setattr(client, "delete", lambda **kwargs: (_ for _ in ()).throw(TimeoutError("qdrant timed out")))
+    scanner = CollectionScanner(client, "pages", workers=1, batch_size=5, delete=True, delete_batch_size=1,
+                                matches_path=str(tmp_path / "matches.jsonl"),
+                                checkpoint_path=str(tmp_path / "checkpoint.json"))
+    errors = []
+    thread = threading.Thread(target=lambda: errors.append(pytest.raises(RuntimeError, scanner.scan, _even)),
+                              daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+
+    assert not thread.is_alive(), "scan hung after a failed delete"
+    assert "qdrant timed out" in str(errors[0].value)
+    assert scanner.stats["deleted"] == 0 and scanner.stats["delete_failed"] > 0
+    # The checkpoint stays, so a rerun resumes and retries the deletes
+    assert (tmp_path / "checkpoint.json").exists()
+
+
+def test_resumed_scan_counts_and_deletes_recorded_matches(tmp_path):
+    client = _client(points=40)
+    options = dict(workers=1, batch_size=10, matches_path=str(tmp_path / "matches.jsonl"),
+                   checkpoint_path=str(tmp_path / "checkpoint.json"))
+    stop = threading.Event()
+
+    def interrupt_after_first_batch(point):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        if point.id == 9:
+            stop.set()
+        return _even(point)
+
+    with pytest.raises(KeyboardInterrupt):
+        CollectionScanner(client, "pages", **options).scan(interrupt_after_first_batch)
+
+    stats = CollectionScanner(client, "pages", delete=True, **options).scan(_even)
+    assert stats["matched"] == 20 and stats["reasons"] == {"even": 20}
+    assert stats["deleted"] == 20
+    assert client.count("pages").count == 20
+
+
+def test_near_duplicates_of_pages_seen_before_a_resume(tmp_path):
+    from src.cleanup import HygieneEngine
+
+    client = QdrantClient(":memory:")
+    client.create_collection("pages", vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+    # Distinct without digits (content_hash ignores them)
+    texts = {i: f"chunk {'abcdefghijklmnopqrstuvwxyz'[i % 26]} {'xy'[i // 26]}" for i in range(30)}
+    texts[25] = texts[3].upper()
+    client.upsert("pages", [models.PointStruct(id=i, vector=[1.0, 0.5], payload={"page_content": text})
+                            for i, text in texts.items()])
+    options = dict(workers=1, batch_size=10, matches_path=str(tmp_path / "matches.jsonl"),
+                   checkpoint_path=str(tmp_path / "checkpoint.json"))
+
+    engine = HygieneEngine.from_names(["near_duplicate"])
+    evaluate = engine.evaluate
+
+    def interrupt_after_first_batch(record, *args, **kwargs):
+        if record.id >= 10:
+            raise KeyboardInterrupt
+        return evaluate(record, *args, **kwargs)
+
+    engine.evaluate = interrupt_after_first_batch
+    with pytest.raises(KeyboardInterrupt):
+        engine.scan(client, "pages", **options)
+
+    report = HygieneEngine.from_names(["near_duplicate"]).scan(client, "pages", **options)
+    assert report["scan"]["matched"] == 1
+    assert [match["id"] for match in read_matches(options["matches_path"])] == [25]
+    assert not (tmp_path / "checkpoint.json.state.jsonl").exists()
+
+
+def test_read_matches_yields_each_point_once(tmp_path):
+    path = tmp_path / "matches.jsonl"
+    # A run that died after appending matches but before saving its checkpoint
+    path.write_text('{"id": 1, "url": "", "reason": "x"}\n{"id": 2, "url": "", "reason": "x"}\n'
+                    '{"id": 1, "url": "", "reason": "x"}\n')
+    assert [match["id"] for match in read_matches(str(path))] == [1, 2]
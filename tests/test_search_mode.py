@@ -0,0 +1,77 @@
+"""Tests for search-only mode and query-aware snippets."""
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+from benchmarks.fixtures import HashEmbeddings
+from src.llm import QdrantMMRRetriever, choose_mode, format_sources, query_snippet, retrieve_documents
+from src.vectorstore import ensure_collection, write_pages
+
+REGISTRAR = ("Welcome to the Office of the Registrar. We maintain student records and enrollment. "
+             "Office hours are Monday to Friday, 9am to 5pm, in the Regent Administrative Center. "
+             "Transcripts can be ordered online.")
+
+
+def test_auto_mode_sends_navigational_queries_to_search():
+    assert choose_mode(None, "registrar office hours") == "search"
+    assert choose_mode("auto", "canvas login") == "search"
+    assert choose_mode(None, "What are the admission requirements?") == "answer"
+    assert choose_mode(None, "tell me about computer science programs") == "answer"
+    assert choose_mode("answer", "registrar office hours") == "answer"
+    with pytest.raises(ValueError):
+        choose_mode("chat", "registrar office hours")
+
+
+def test_snippets_show_the_passage_matching_the_query():
+    snippet, matches = query_snippet(REGISTRAR, "office hours", max_chars=120)
+    assert snippet.startswith("...Office hours are Monday") and matches == ["office", "hours"]
+    assert query_snippet(REGISTRAR, "transcript", max_chars=60)[0] == "...Transcripts can be ordered online."
+    assert query_snippet(REGISTRAR, "zebra")[0].startswith("Welcome to the Office")
+
+    docs = [Document(page_content=REGISTRAR, metadata={"url": "https://www.colorado.edu/registrar", "title": "Registrar"})]
+    source, = format_sources(docs, query="office hours")
+    assert "Office hours are Monday" in source["snippet"] and source["matches"] == ["office", "hours"]
+    assert "matches" not in format_sources(docs)[0]
+
+
+def test_search_only_retrieval_skips_generation():
+    embeddings = HashEmbeddings(size=32)
+    texts = [REGISTRAR, "Football tickets for home games go on sale in August.", "Dining halls serve breakfast daily."]
+    client = QdrantClient(":memory:")
+    ensure_collection(client, "pages", {"vector_size": 32})
+    write_pages(client, "pages", [(f"https://www.colorado.edu/page{i}", None, [text],
+                                   np.asarray(embeddings.embed_documents([text]), dtype=np.float32))
+                                  for i, text in enumerate(texts)])
+    # No LLM client: search-only requests must not need one
+    components = {"retriever": QdrantMMRRetriever(client=client, collection_name="pages", embeddings=embeddings,
+                                                  k=2, fetch_k=3),
+                  "reranker": None, "llm_client": None}
+    docs = retrieve_documents(components, "registrar office hours")
+    assert docs[0].page_content == REGISTRAR
+
+
+class ReverseReranker:
+    top_n = 1
+
+    def rerank(self, query, docs):
+        return docs[::-1][:self.top_n]
+
+
+def test_skipped_reranker_keeps_configured_k():
+    embeddings = HashEmbeddings(size=32)
+    client = QdrantClient(":memory:")
+    ensure_collection(client, "pages", {"vector_size": 32})
+    write_pages(client, "pages", [(f"https://www.colorado.edu/page{i}", None, [f"{REGISTRAR} Room {i}."],
+                                   np.asarray(embeddings.embed_documents([f"{REGISTRAR} Room {i}."]), dtype=np.float32))
+                                  for i in range(6)])
+    # build_rag_components raises the retriever's k to the reranker's candidates
+    components = {"retriever": QdrantMMRRetriever(client=client, collection_name="pages", embeddings=embeddings,
+                                                  k=6, fetch_k=6),
+                  "reranker": ReverseReranker(), "k": 2, "llm_client": None}
+    candidates = components["retriever"].invoke("registrar office hours")
+    assert len(candidates) == 6
+
+    docs = retrieve_documents(components, "registrar office hours", rerank=False)
+    assert [doc.page_content for doc in docs] == [doc.page_content for doc in candidates[:2]]
+    assert retrieve_documents(components, "registrar office hours")[0].page_content == candidates[-1].page_content
@@ -0,0 +1,49 @@
+"""Tests for small vectors and two-stage search."""
+import numpy as np
+from qdrant_client import QdrantClient
+
+from benchmarks.fixtures import HashEmbeddings
+from src.llm.retrieval import QdrantMMRRetriever
+from src.vectorstore import VectorReducer, check_reducer, ensure_collection
+from src.vectorstore.points import write_pages
+
+
+def test_pca_reducer_round_trips_and_normalises(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(200, 32)).astype(np.float32)
+    reducer = VectorReducer.fit_pca(vectors, 8)
+    small = reducer.transform(vectors)
+    assert small.shape == (200, 8) and small.dtype == np.float32
+    assert np.allclose(np.linalg.norm(small, axis=1), 1.0, atol=1e-5)
+
+    reducer.save(tmp_path / "pca.npz")
+    loaded = VectorReducer.from_config({"name": "small", "dim": 8, "path": str(tmp_path / "pca.npz")})
+    assert loaded.method == "pca" and np.allclose(loaded.transform(vectors), small)
+    assert VectorReducer.from_config({"dim": 8, "method": "matryoshka"}).transform(vectors).shape == (200, 8)
+    assert VectorReducer.from_config({"dim": 8, "path": str(tmp_path / "missing.npz")}) is None
+
+
+def test_two_stage_retriever_rescores_small_vector_candidates():
+    embeddings = HashEmbeddings(size=64)
+    texts = [f"Page {i} covers {topic} deadlines, room {i * 7} and extension {i * 13}" for i, topic in
+             enumerate(["admissions", "housing", "tuition", "parking", "dining", "athletics"] * 5)]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    reducer = VectorReducer.fit_pca(vectors, 16)
+
+    client = QdrantClient(":memory:")
+    ensure_collection(client, "pages", {"vector_size": 64, "small_vector": {"name": "small", "dim": 16}})
+    assert check_reducer(client, "pages", reducer) is reducer
+    pages = [(f"https://www.colorado.edu/page{i}", f"Page {i}", [text], vectors[i:i + 1])
+             for i, text in enumerate(texts)]
+    assert write_pages(client, "pages", pages, reducer=reducer) == len(texts)
+    point = client.scroll("pages", limit=1, with_vectors=True)[0][0]
+    assert len(point.vector[""]) == 64 and len(point.vector["small"]) == 16
+
+    plain = QdrantMMRRetriever(client=client, collection_name="pages", embeddings=embeddings, k=3, fetch_k=10)
+    two_stage = QdrantMMRRetriever(client=client, collection_name="pages", embeddings=embeddings, k=3, fetch_k=10,
+                                   query_reducer=reducer, prefetch_limit=len(texts))
+    # Prefetching every point rescores them all with the full vectors, so the results match
+    query = "Page 7 covers housing deadlines and contacts in room 49"
+    assert [doc.page_content for doc in two_stage.invoke(query)] == [doc.page_content for doc in plain.invoke(query)]
+
+
+    assert check_reducer(client, "pages", VectorReducer.matryoshka(8, "tiny")) is None
@@ -0,0 +1,68 @@
+"""Tests for versioned collections behind an alias."""
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from src.vectorstore import (AliasWatcher, create_version, ensure_collection, list_versions, prune_versions,
+                             resolve_alias, swap_alias, validate_version, write_pages)
+
+VECTOR_STORE = {"vector_size": 8}
+
+
+def _fill(client, collection_name, pages):
+    vectors = np.random.default_rng(len(collection_name) + pages).normal(size=(pages, 8)).astype(np.float32)
+    write_pages(client, collection_name, [(f"https://www.colorado.edu/page{i}", None, [f"Page {i}"], vectors[i:i + 1])
+                                          for i in range(pages)])
+
+
+def test_reindex_swaps_alias_atomically_and_prunes():
+    client = QdrantClient(":memory:")
+    # An unversioned collection has to be replaced explicitly
+    ensure_collection(client, "pages", VECTOR_STORE)
+    v1 = create_version(client, "pages", VECTOR_STORE, metadata={"embedding_model": "e5"})
+    _fill(client, v1, 20)
+    assert validate_version(client, v1, VECTOR_STORE, live="pages") == []
+    with pytest.raises(ValueError):
+        swap_alias(client, "pages", v1)
+    assert swap_alias(client, "pages", v1, replace_collection=True) is None
+    assert resolve_alias(client, "pages") == v1
+    assert client.get_collection(v1).config.metadata["embedding_model"] == "e5"
+
+    swaps = []
+    watcher = AliasWatcher(client, "pages", swaps.append)
+    v2 = create_version(client, "pages", VECTOR_STORE)
+    assert validate_version(client, v2, VECTOR_STORE, live=v1) == ["no points"]
+    _fill(client, v2, 10)
+    assert "fewer than 90%" in validate_version(client, v2, VECTOR_STORE, live=v1)[0]
+    _fill(client, v2, 19)
+    assert validate_version(client, v2, VECTOR_STORE, live=v1) == []
+
+    assert not watcher.check()
+    assert swap_alias(client, "pages", v2) == v1
+    assert watcher.check() and swaps == [v2] and watcher.current == v2
+    # Writers using the alias now land in the new version
+    _fill(client, "pages", 25)
+    assert client.count(v2).count == 25
+
+    v3 = create_version(client, "pages", VECTOR_STORE)
+    assert [name for _, name in list_versions(client, "pages")] == [v1, v2, v3]
+    assert prune_versions(client, "pages", keep=1) == [v1]
+    assert [name for _, name in list_versions(client, "pages")] == [v2, v3]
+
+
+def test_alias_swap_rebuilds_only_the_retriever():
+    from benchmarks.fixtures import HashEmbeddings
+    from src.llm import build_rag_components
+
+    client = QdrantClient(":memory:")
+    v1 = create_version(client, "pages", VECTOR_STORE, metadata={"embedding_model": "e5"})
+    v2 = create_version(client, "pages", VECTOR_STORE, metadata={"embedding_model": "e5"})
+    embeddings, llm_client = HashEmbeddings(size=8), object()
+    live = {"client": client, "embeddings": embeddings, "embedding_model": "e5", "reranker": None,
+            "llm_client": llm_client, "collection_name": v1}
+
+    components = build_rag_components(collection_name=v2, embedding_model="e5", reuse=live)
+
+    assert components["collection_name"] == v2 and components["retriever"].collection_name == v2
+    assert components["client"] is client and components["embeddings"] is embeddings
+    assert components["llm_client"] is llm_client
@@ -1,31 +1,73 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 import time
-from typing import Dict, Any
+from typing import Any, Dict, Optional
 import json
-from src.llm.enhanced_search import setup_rag_system, format_sources
+from qdrant_client import QdrantClient
+from src.llm.enhanced_search import (DEFAULT_RETRIEVAL_CONFIG, build_rag_chain, build_rag_components, format_sources,
+                                     retrieve_documents, timing_metadata)
+from src.llm.search_mode import choose_mode
+from src.utils.metrics import collect_timings, get_registry, record, timed
+from src.vectorstore import AliasWatcher, build_filter, resolve_alias
 
 app = Flask(__name__)
 
-# Global variable to hold the RAG chain
-rag_chain = None
+# (components, chain) of the collection version being served, replaced in one
+# assignment on an alias swap; requests read it once so they never mix versions
+# (search-only requests use the components' retriever)
+rag = None
+
+# Search-only mode settings (retrieval.fast_search)
+fast_search = dict(DEFAULT_RETRIEVAL_CONFIG["fast_search"])
+
+# Rebuilds the chain when reindex.py swaps the collection alias
+alias_watcher = None
+
+def build_rag(config: Dict[str, Any], collection_name: str, reuse: Optional[Dict[str, Any]] = None):
+    """RAG components and chain over one collection version from the loaded config"""
+    components = build_rag_components(
+        collection_name=collection_name,
+        qdrant_url=config['vector_store']['url'],
+        embedding_model=config['embedding']['model_name'],
+        llm_model=config['llm']['model'],
+        device=config['embedding']['device'],
+        retrieval_config=config.get('retrieval'),
+        llm_config=config.get('llm'),
+        vector_store_config=config.get('vector_store'),
+        reuse=reuse
+    )
+    print("✅ RAG system ready!")
+    return components, build_rag_chain(components)
 
 def initialize_rag():
     """Initialize the RAG system on startup"""
-    global rag_chain
+    global rag, alias_watcher
     try:
         print("🔧 Initializing RAG system...")
         
         # Load config
         with open('config_llm.json', 'r') as f:
             config = json.load(f)
+        vector_store = config['vector_store']
+        fast_search.update(config.get('retrieval', {}).get('fast_search') or {})
+        
+        # Serve the version the alias points to now; the watcher moves us to the next one
+        client = QdrantClient(url=vector_store['url'])
+        alias = vector_store['collection_name']
+        collection_name = resolve_alias(client, alias)
+        rag = build_rag(config, collection_name)
+        
+        def swap_chain(new_collection: str):
+            global rag
+            # The old chain keeps answering from the previous version until this one is ready;
+            # the embedding model and the warmed-up LLM are reused, only the retriever is new
+            print(f"🔀 {alias} now points to {new_collection}; building its RAG chain...")
+            rag = build_rag(config, new_collection, reuse=rag[0])
+            print(f"✅ Now serving {new_collection}")
         
-        rag_chain = setup_rag_system(
-            collection_name=config['vector_store']['collection_name'],
-            qdrant_url=config['vector_store']['url'],
-            embedding_model=config['embedding']['model_name'],
-            llm_model=config['llm']['model'],
-            device=config['embedding']['device']
-        )
+        poll_seconds = vector_store.get('alias_poll_seconds', 30)
+        if poll_seconds:
+            alias_watcher = AliasWatcher(client, alias, swap_chain, poll_seconds=poll_seconds,
+                                         current=collection_name).start()
         print("✅ RAG system initialized successfully!")
         return True
     except Exception as e:
@@ -39,15 +81,23 @@ def index():
 
 @app.route('/api/search', methods=['POST'])
 def search():
-    """Handle search requests"""
-    global rag_chain
+    """
+    Handle search requests.
+    
+    mode "search" returns ranked sources with query-aware snippets from
+    retrieval alone; "answer" also generates an answer with the LLM; "auto"
+    (default) picks search for navigational queries.
+    """
+    # One read, so a concurrent alias swap can't mix two versions in this request
+    current = rag
     
     # Check if RAG system is initialized
-    if rag_chain is None:
+    if current is None:
         return jsonify({
             'error': 'RAG system not initialized. Please check your configuration and ensure Ollama is running.',
             'status': 'error'
         }), 500
+    rag_components, rag_chain = current
     
     try:
         data = request.get_json()
@@ -59,17 +109,37 @@ def search():
                 'status': 'error'
             }), 400
         
-        # Run the RAG chain
-        print(f"🔍 Processing query: {query}")
+        # Optional partition filters, searched inside Qdrant
+        filters = data.get('filters') or {}
+        try:
+            query_filter = build_filter(filters)
+            mode = choose_mode(data.get('mode'), query, default=fast_search.get('default_mode', 'auto'),
+                               max_words=fast_search.get('max_words', 5))
+        except ValueError as e:
+            return jsonify({'error': str(e), 'status': 'error'}), 400
+        
+        print(f"🔍 Processing query ({mode}): {query}")
         start_time = time.time()
         
-        chain_input = {"question": query}
-        result = rag_chain.invoke(chain_input)
+        route = data.get('route', True)
+        with collect_timings() as timings:
+            if mode == "search":
+                # Retrieval only; the LLM is skipped
+                docs = retrieve_documents(rag_components, query, query_filter, route,
+                                          rerank=fast_search.get('rerank', False))
+                result = {"docs": docs, "answer": None}
+            else:
+                # Run the RAG chain
+                result = rag_chain.invoke({"question": query, "filter": query_filter, "route": route})
+            
+            # Format sources
+            with timed("formatting"):
+                sources = format_sources(result["docs"], query=query)
         
         total_time = time.time() - start_time
-        
-        # Format sources
-        sources = format_sources(result["docs"])
+        record("total", total_time)
+        get_registry().increment("requests")
+        get_registry().increment(f"{mode}_requests")
         
         # Prepare response
         response = {
@@ -77,29 +147,41 @@ def search():
             "sources": sources,
             "metadata": {
                 "query": query,
+                "mode": mode,
                 "total_time": round(total_time, 2),
-                "total_docs": len(sources)
+                "total_ms": round(total_time * 1000, 1),
+                "total_docs": len(sources),
+                "filters": filters,
+                "routed_site": next((doc.metadata.get('_routed_site') for doc in result["docs"]), None),
+                "llm_timings": result.get("llm_timings", {}),
+                **timing_metadata(result, timings)
             },
             "status": "success"
         }
         
-        print(f"✅ Query processed in {total_time:.2f}s")
+        print(f"✅ Query processed in {total_time:.3f}s")
         return jsonify(response)
         
     except Exception as e:
         print(f"❌ Error processing search: {e}")
+        get_registry().increment("errors")
         return jsonify({
             'error': f'An error occurred while processing your query: {str(e)}',
             'status': 'error'
         }), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms in Prometheus text format"""
+    return Response(get_registry().render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    global rag_chain
     return jsonify({
-        'status': 'healthy' if rag_chain is not None else 'initializing',
-        'rag_initialized': rag_chain is not None
+        'status': 'healthy' if rag is not None else 'initializing',
+        'rag_initialized': rag is not None,
+        'collection': alias_watcher.current if alias_watcher is not None else None
     })
 
 if __name__ == '__main__':